@@ -45,6 +45,7 @@ def initialize_extensions(app: DifyApp):
         ext_commands,
         ext_compress,
         ext_database,
+        ext_gevent_monitor,
         ext_hosting_provider,
         ext_import_modules,
         ext_logging,
@@ -87,7 +88,9 @@ def initialize_extensions(app: DifyApp):
         ext_commands,
         ext_otel,
         ext_request_logging,
+        ext_gevent_monitor,
     ]
+    init_times: dict[str, float] = app.extensions.setdefault("extension_init_times", {})
     for ext in extensions:
         short_name = ext.__name__.split(".")[-1]
         is_enabled = ext.is_enabled() if hasattr(ext, "is_enabled") else True
@@ -99,6 +102,8 @@ def initialize_extensions(app: DifyApp):
         start_time = time.perf_counter()
         ext.init_app(app)
         end_time = time.perf_counter()
+        # kept for the profile-startup command
+        init_times[short_name] = end_time - start_time
         if dify_config.DEBUG:
             logging.info("Loaded %s (%s ms)", short_name, round((end_time - start_time) * 1000, 2))
 
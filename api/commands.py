@@ -1,8 +1,13 @@
 import base64
+import datetime
 import json
 import logging
+import queue
 import secrets
-from typing import Any, Optional
+import threading
+import time
+import tracemalloc
+from typing import Any, Optional, cast
 
 import click
 import sqlalchemy as sa
@@ -13,11 +18,40 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from configs import dify_config
 from constants.languages import languages
+from core.app.apps.stream_response_serializer import to_sse_frame
+from core.app.apps.text_chunk_coalescer import TextChunkCoalescer
+from core.app.entities.queue_entities import QueueTextChunkEvent, WorkflowQueueMessage
+from core.app.entities.task_entities import (
+    MessageEndStreamResponse,
+    MessageStreamResponse,
+    NodeFinishStreamResponse,
+    NodeStartStreamResponse,
+    StreamResponse,
+    WorkflowFinishStreamResponse,
+)
+from core.model_manager import ModelManager
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    PromptMessage,
+    PromptMessageTool,
+    SystemPromptMessage,
+    ToolPromptMessage,
+    UserPromptMessage,
+)
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.model_providers.__base.large_language_model import LargeLanguageModel
+from core.model_runtime.model_providers.__base.tokenizers.token_estimator import TokenEstimator
+from core.model_runtime.utils.encoders import jsonable_encoder
 from core.plugin.entities.plugin import ToolProviderID
+from core.plugin.impl.model import PluginModelClient
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.index_processor.constant.built_in_field import BuiltInField
 from core.rag.models.document import Document
+from core.rag.splitter.fixed_text_splitter import FixedRecursiveCharacterTextSplitter
+from core.rag.splitter.segment_splitter import SEGMENT_SEPARATORS
+from core.rag.splitter.span_text_splitter import SpanTextSplitter
+from core.rag.splitter.text_splitter import TextSplitter
 from core.tools.utils.system_oauth_encryption import encrypt_system_oauth_params
 from events.app_event import app_was_created
 from extensions.ext_database import db
@@ -26,6 +60,7 @@ from extensions.ext_storage import storage
 from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
+from libs.startup_profiler import profile_startup
 from models import Tenant
 from models.dataset import Dataset, DatasetCollectionBinding, DatasetMetadata, DatasetMetadataBinding, DocumentSegment
 from models.dataset import Document as DatasetDocument
@@ -34,6 +69,7 @@ from models.provider import Provider, ProviderModel
 from models.tools import ToolOAuthSystemClient
 from services.account_service import AccountService, RegisterService, TenantService
 from services.clear_free_plan_tenant_expired_logs import ClearFreePlanTenantExpiredLogs
+from services.message_retention_service import MessageRetentionService
 from services.plugin.data_migration import PluginDataMigration
 from services.plugin.plugin_migration import PluginMigration
 from tasks.remove_app_and_related_data_task import delete_draft_variables_batch
@@ -1338,3 +1374,387 @@ def cleanup_orphaned_draft_variables(
                 continue
 
     logger.info("Cleanup completed. Total deleted: %s variables across %s apps", total_deleted, processed_apps)
+
+
+@click.command("clean-expired-messages", help="Clean expired messages of sandbox plan tenants.")
+@click.option(
+    "--days",
+    default=dify_config.PLAN_SANDBOX_CLEAN_MESSAGE_DAY_SETTING,
+    show_default=True,
+    help="Messages older than this number of days are expired.",
+)
+@click.option("--batch-size", default=dify_config.MESSAGE_CLEAN_BATCH_SIZE, show_default=True, help="Batch size.")
+@click.option(
+    "--throttle",
+    default=dify_config.MESSAGE_CLEAN_THROTTLE_SECONDS,
+    show_default=True,
+    help="Pause in seconds between batches.",
+)
+@click.option("--max-batches", default=None, type=int, help="Maximum number of batches to process.")
+@click.option("--dry-run", is_flag=True, help="Show what would be deleted without actually deleting")
+def clean_expired_messages(days: int, batch_size: int, throttle: float, max_batches: Optional[int], dry_run: bool):
+    """
+    Clean expired messages of sandbox plan tenants, with their related rows.
+    """
+    click.echo(click.style("Starting clean expired messages.", fg="white"))
+
+    result = MessageRetentionService.clean_expired_messages(
+        before=datetime.datetime.now() - datetime.timedelta(days=days),
+        batch_size=batch_size,
+        throttle_seconds=throttle,
+        dry_run=dry_run,
+        max_batches=max_batches,
+    )
+
+    click.echo(f"Scanned {result.scanned_messages} messages in {result.batches} batches.")
+    for table, count in sorted(result.deleted.items()):
+        click.echo(f"  {table}: {count} {'to delete' if dry_run else 'deleted'}")
+    click.echo(click.style("Clean expired messages completed.", fg="green"))
+
+
+@click.command("profile-startup", help="Profile the import and init cost of the app startup.")
+@click.option("--top", default=20, show_default=True, help="Number of modules and packages to show.")
+def profile_startup_command(top: int):
+    """
+    Create the app in a fresh process and report the slowest imports and extensions.
+    """
+    click.echo(click.style("Profiling the app startup, this may take a while.", fg="white"))
+    try:
+        profile = profile_startup()
+    except Exception as e:
+        click.echo(click.style(f"Failed to profile the app startup: {e}", fg="red"))
+        return
+
+    click.echo(f"Created the app in {profile.total * 1000:.0f} ms.")
+    click.echo("Extensions:")
+    for name, seconds in sorted(profile.extension_init_times.items(), key=lambda item: item[1], reverse=True):
+        click.echo(f"  {name:<32} {seconds * 1000:>10.1f} ms")
+    click.echo(f"Top {top} packages by import time:")
+    for package, self_us in profile.top_packages(top):
+        click.echo(f"  {package:<32} {self_us / 1000:>10.1f} ms")
+    click.echo(f"Top {top} modules by import time, without their own imports:")
+    for module in profile.top_modules(top):
+        click.echo(
+            f"  {module.name:<64} {module.self_us / 1000:>10.1f} ms (cumulative {module.cumulative_us / 1000:.1f} ms)"
+        )
+
+
+def _token_estimation_benchmark_prompts() -> list[tuple[str, list[PromptMessage], list[PromptMessageTool]]]:
+    paragraph = (
+        "Dify is an open-source platform for building LLM applications. It combines workflows, RAG pipelines, "
+        "agents and model management, 支持多种模型供应商, and observability features. "
+    )
+    weather_tool = PromptMessageTool(
+        name="get_weather",
+        description="Get the current weather of a city",
+        parameters={
+            "type": "object",
+            "properties": {"city": {"type": "string", "description": "name of the city"}},
+            "required": ["city"],
+        },
+    )
+    prompts: list[tuple[str, list[PromptMessage], list[PromptMessageTool]]] = []
+    for turns in (1, 5, 20):
+        messages: list[PromptMessage] = [SystemPromptMessage(content="You are a helpful assistant.")]
+        for turn in range(turns):
+            messages.append(UserPromptMessage(content=f"Question {turn}: {paragraph * (turn % 3 + 1)}"))
+            messages.append(AssistantPromptMessage(content=f"Answer {turn}: {paragraph}"))
+        prompts.append((f"{turns} turns", messages, []))
+
+    tool_call = AssistantPromptMessage.ToolCall(
+        id="call_1",
+        type="function",
+        function=AssistantPromptMessage.ToolCall.ToolCallFunction(name="get_weather", arguments='{"city": "Paris"}'),
+    )
+    prompts.append(
+        (
+            "tool call",
+            [
+                UserPromptMessage(content="What's the weather in Paris?"),
+                AssistantPromptMessage(content="", tool_calls=[tool_call]),
+                ToolPromptMessage(content='{"temperature": 21, "sky": "clear"}', tool_call_id="call_1"),
+            ],
+            [weather_tool],
+        )
+    )
+    return prompts
+
+
+@click.command("benchmark-token-estimation", help="Compare local token estimation with plugin based token counting.")
+@click.option("--tenant-id", required=True, help="Workspace whose model credentials are used.")
+@click.option("--provider", required=True, help="Model provider, e.g. langgenius/openai/openai.")
+@click.option("--model", required=True, help="LLM name, e.g. gpt-4o.")
+@click.option("--rounds", default=5, show_default=True, help="Counts per prompt and method.")
+def benchmark_token_estimation(tenant_id: str, provider: str, model: str, rounds: int):
+    """
+    Count sample prompts through the plugin daemon and with the local estimator, and report the error of the
+    estimates and the latency of both.
+    """
+    model_instance = ModelManager().get_model_instance(
+        tenant_id=tenant_id, provider=provider, model_type=ModelType.LLM, model=model
+    )
+    model_type_instance = cast(LargeLanguageModel, model_instance.model_type_instance)
+    plugin_model_client = PluginModelClient()
+    estimator = TokenEstimator()
+    click.echo(f"Local encoding of {model}: {estimator.get_encoding_name(model)}")
+
+    for name, prompt_messages, tools in _token_estimation_benchmark_prompts():
+        plugin_started_at = time.perf_counter()
+        for _ in range(rounds):
+            plugin_tokens = plugin_model_client.get_llm_num_tokens(
+                tenant_id=tenant_id,
+                user_id="unknown",
+                plugin_id=model_type_instance.plugin_id,
+                provider=model_type_instance.provider_name,
+                model_type=ModelType.LLM.value,
+                model=model,
+                credentials=model_instance.credentials,
+                prompt_messages=prompt_messages,
+                tools=tools or None,
+            )
+        plugin_latency = (time.perf_counter() - plugin_started_at) / rounds
+
+        # the first count encodes the messages, the next ones hit the cache of message counts
+        local_started_at = time.perf_counter()
+        local_tokens = estimator.get_num_tokens(model, prompt_messages, tools)
+        cold_latency = time.perf_counter() - local_started_at
+        local_started_at = time.perf_counter()
+        for _ in range(rounds):
+            estimator.get_num_tokens(model, prompt_messages, tools)
+        warm_latency = (time.perf_counter() - local_started_at) / rounds
+
+        error = (local_tokens - plugin_tokens) / plugin_tokens * 100 if plugin_tokens else 0.0
+        click.echo(
+            f"{name:<12} plugin {plugin_tokens:>6} tokens {plugin_latency * 1000:>8.2f} ms | "
+            f"local {local_tokens:>6} tokens ({error:+.1f}%) {cold_latency * 1000:>8.2f} ms cold "
+            f"{warm_latency * 1000:>8.3f} ms cached"
+        )
+
+
+def _stream_coalescing_benchmark_run(
+    streams: int, chunks: int, interval: float, coalesce: bool
+) -> tuple[int, float, float]:
+    """
+    Stream the chunks of concurrent answers through queues, the way generations publish them and the task
+    pipelines consume them, and write every message as an SSE frame.
+    :return: the number of frames, the wall time and the CPU time of the run
+    """
+    frames = 0
+    frames_lock = threading.Lock()
+
+    def produce(q: queue.Queue):
+        for index in range(chunks):
+            q.put(
+                WorkflowQueueMessage(
+                    task_id="benchmark", app_mode="advanced-chat", event=QueueTextChunkEvent(text=f"token{index} ")
+                )
+            )
+            time.sleep(interval)
+        q.put(None)
+
+    def consume(q: queue.Queue):
+        nonlocal frames
+        coalescer = TextChunkCoalescer() if coalesce else None
+        sent = 0
+        while True:
+            timeout = coalescer.timeout() if coalescer else None
+            try:
+                message = q.get(timeout=1 if timeout is None else timeout)
+            except queue.Empty:
+                messages = coalescer.flush() if coalescer else []
+            else:
+                if message is None:
+                    break
+                messages = coalescer.push(message) if coalescer else [message]
+            for message in messages:
+                event = cast(QueueTextChunkEvent, message.event)
+                frame = "data: " + json.dumps({"event": "message", "answer": event.text}) + "\n\n"
+                frame.encode()
+                sent += 1
+        if coalescer:
+            sent += len(coalescer.flush())
+        with frames_lock:
+            frames += sent
+
+    threads = []
+    for _ in range(streams):
+        q: queue.Queue = queue.Queue()
+        threads.append(threading.Thread(target=produce, args=(q,)))
+        threads.append(threading.Thread(target=consume, args=(q,)))
+
+    started_at, cpu_started_at = time.perf_counter(), time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return frames, time.perf_counter() - started_at, time.process_time() - cpu_started_at
+
+
+@click.command("benchmark-stream-coalescing", help="Measure SSE frames and CPU of concurrent streams with coalescing.")
+@click.option("--streams", default=500, show_default=True, help="Concurrent streams.")
+@click.option("--chunks", default=200, show_default=True, help="Text chunks per stream.")
+@click.option("--interval-ms", default=10, show_default=True, help="Milliseconds between the chunks of a stream.")
+def benchmark_stream_coalescing(streams: int, chunks: int, interval_ms: int):
+    """
+    Stream the same answers with one frame per chunk and with the chunks merged by the coalescer, and report the
+    frames per second and the CPU time per stream of both.
+    """
+    click.echo(
+        f"{streams} streams of {chunks} chunks every {interval_ms} ms, coalescing window "
+        f"{dify_config.STREAM_TEXT_CHUNK_COALESCE_WINDOW_MS} ms"
+    )
+    for name, coalesce in [("per chunk", False), ("coalesced", True)]:
+        frames, wall_time, cpu_time = _stream_coalescing_benchmark_run(streams, chunks, interval_ms / 1000, coalesce)
+        click.echo(
+            f"{name:<10} {frames:>8} frames {frames / wall_time:>10.0f} frames/s | "
+            f"CPU {cpu_time / streams * 1000:>8.2f} ms per stream | wall {wall_time:.2f} s"
+        )
+
+
+def _stream_serialization_benchmark_responses() -> list[tuple[str, StreamResponse]]:
+    """Stream responses of typical events, the node finished one with a large output"""
+    now = int(time.time())
+    document = [{"id": index, "content": "lorem ipsum dolor sit amet " * 40, "score": 0.5} for index in range(200)]
+    return [
+        ("message", MessageStreamResponse(task_id="task", id="message", answer="Hello")),
+        (
+            "message_end",
+            MessageEndStreamResponse(task_id="task", id="message", metadata={"usage": {"total_tokens": 128}}),
+        ),
+        (
+            "node_started",
+            NodeStartStreamResponse(
+                task_id="task",
+                workflow_run_id="run",
+                data=NodeStartStreamResponse.Data(
+                    id="node-execution",
+                    node_id="llm",
+                    node_type="llm",
+                    title="LLM",
+                    index=1,
+                    inputs={"query": "What is Dify?"},
+                    created_at=now,
+                ),
+            ),
+        ),
+        (
+            "node_finished",
+            NodeFinishStreamResponse(
+                task_id="task",
+                workflow_run_id="run",
+                data=NodeFinishStreamResponse.Data(
+                    id="node-execution",
+                    node_id="llm",
+                    node_type="llm",
+                    title="LLM",
+                    index=1,
+                    inputs={"query": "What is Dify?"},
+                    outputs={"result": document},
+                    status="succeeded",
+                    elapsed_time=1.5,
+                    created_at=now,
+                    finished_at=now,
+                ),
+            ),
+        ),
+        (
+            "workflow_finished",
+            WorkflowFinishStreamResponse(
+                task_id="task",
+                workflow_run_id="run",
+                data=WorkflowFinishStreamResponse.Data(
+                    id="run",
+                    workflow_id="workflow",
+                    status="succeeded",
+                    outputs={"answer": "Dify is an LLM app development platform."},
+                    elapsed_time=3.0,
+                    total_tokens=1024,
+                    total_steps=3,
+                    created_at=now,
+                    finished_at=now,
+                ),
+            ),
+        ),
+    ]
+
+
+@click.command("benchmark-stream-serialization", help="Compare json and orjson serialization of stream responses.")
+@click.option("--rounds", default=2000, show_default=True, help="Serializations per event type and method.")
+def benchmark_stream_serialization(rounds: int):
+    """
+    Serialize typical stream responses to SSE frames, with jsonable_encoder and json as by default and with
+    pydantic-core and orjson as with STREAM_RESPONSE_ORJSON_ENABLED, and report the time per frame of both.
+    """
+    for name, response in _stream_serialization_benchmark_responses():
+        started_at = time.perf_counter()
+        for _ in range(rounds):
+            json_frame = f"data: {json.dumps(jsonable_encoder(response))}\n\n".encode()
+        json_latency = (time.perf_counter() - started_at) / rounds
+
+        started_at = time.perf_counter()
+        for _ in range(rounds):
+            orjson_frame = to_sse_frame(response.model_dump(mode="json", by_alias=True, fallback=jsonable_encoder))
+        orjson_latency = (time.perf_counter() - started_at) / rounds
+
+        click.echo(
+            f"{name:<18} {len(json_frame):>8} bytes json {json_latency * 1e6:>9.1f} us | "
+            f"{len(orjson_frame):>8} bytes orjson {orjson_latency * 1e6:>9.1f} us "
+            f"({json_latency / orjson_latency:.1f}x)"
+        )
+
+
+def _text_splitter_benchmark_corpus(size: int) -> str:
+    """Generated paragraphs of sentences of varying length, about size bytes in total"""
+    words = ["dify", "workflow", "retrieval", "知识库", "embedding", "segment", "model", "agent", "pipeline", "index"]
+    paragraphs = []
+    total = 0
+    index = 0
+    while total < size:
+        sentences = []
+        for _ in range(index % 12 + 1):
+            index += 1
+            sentences.append(" ".join(words[(index + i * i) % len(words)] for i in range(index * 7 % 26 + 5)) + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode()) + 2
+    return "\n\n".join(paragraphs)
+
+
+@click.command("benchmark-text-splitter", help="Compare the offset based text splitter with the legacy one.")
+@click.option("--size-mb", default=50, show_default=True, help="Size of the generated corpus in MB.")
+@click.option("--chunk-size", default=500, show_default=True, help="Maximum chunk size in characters.")
+@click.option("--chunk-overlap", default=50, show_default=True, help="Overlap of consecutive chunks in characters.")
+def benchmark_text_splitter(size_mb: int, chunk_size: int, chunk_overlap: int):
+    """
+    Split a generated corpus with FixedRecursiveCharacterTextSplitter and SpanTextSplitter, counting chunk sizes
+    in characters, and report the throughput and the peak traced memory of both.
+    """
+    corpus = _text_splitter_benchmark_corpus(size_mb * 1024 * 1024)
+    size = len(corpus.encode())
+    click.echo(f"{size / 1024 / 1024:.1f} MB corpus, chunk size {chunk_size}, overlap {chunk_overlap}")
+    splitters: list[tuple[str, TextSplitter]] = [
+        (
+            "legacy",
+            FixedRecursiveCharacterTextSplitter(
+                separators=SEGMENT_SEPARATORS, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+            ),
+        ),
+        ("span", SpanTextSplitter(separators=SEGMENT_SEPARATORS, chunk_size=chunk_size, chunk_overlap=chunk_overlap)),
+    ]
+    for name, splitter in splitters:
+        started_at = time.perf_counter()
+        chunks = len(splitter.split_text(corpus))
+        elapsed = time.perf_counter() - started_at
+
+        # measured in a second run, tracing slows down the allocations
+        tracemalloc.start()
+        try:
+            splitter.split_text(corpus)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        click.echo(
+            f"{name:<8} {chunks:>8} chunks {size / 1024 / 1024 / elapsed:>8.1f} MB/s | "
+            f"peak traced memory {peak / 1024 / 1024:>8.1f} MB"
+        )
@@ -5,6 +5,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -76,6 +77,119 @@ class AppExecutionConfig(BaseSettings):
     )
 
 
+class AppWorkerPoolConfig(BaseSettings):
+    """
+    Configuration for the pool of threads running workflow and advanced chat generations
+    """
+
+    APP_WORKER_POOL_ENABLED: bool = Field(
+        description="Run workflow and advanced chat generations in a bounded pool of workers instead of a new thread"
+        " each, rejecting requests with 429 once the pool is saturated",
+        default=False,
+    )
+
+    APP_WORKER_POOL_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of generations running at the same time per process",
+        default=200,
+    )
+
+    APP_WORKER_POOL_MAX_QUEUE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of generations waiting for a worker per process, further requests are rejected",
+        default=100,
+    )
+
+    APP_WORKER_POOL_MAX_PER_TENANT: NonNegativeInt = Field(
+        description="Maximum number of generations of one workspace running or waiting per process, 0 for no limit",
+        default=0,
+    )
+
+
+class StreamTextChunkCoalesceConfig(BaseSettings):
+    """
+    Configuration for merging the text chunks streamed to clients
+    """
+
+    STREAM_TEXT_CHUNK_COALESCE_ENABLED: bool = Field(
+        description="Merge consecutive text chunks of a streamed answer into one event, sent once the window elapses"
+        " or the size limit is reached, instead of one event per token",
+        default=False,
+    )
+
+    STREAM_TEXT_CHUNK_COALESCE_WINDOW_MS: PositiveInt = Field(
+        description="Milliseconds text chunks are held to be merged before they are sent",
+        default=30,
+    )
+
+    STREAM_TEXT_CHUNK_COALESCE_MAX_BYTES: PositiveInt = Field(
+        description="Size in bytes of merged text chunks that are sent right away",
+        default=4096,
+    )
+
+
+class StreamResponseConfig(BaseSettings):
+    """
+    Configuration for the serialization of app responses
+    """
+
+    STREAM_RESPONSE_ORJSON_ENABLED: bool = Field(
+        description="Serialize app responses and SSE frames with orjson and pydantic-core instead of the json module",
+        default=False,
+    )
+
+    STREAM_RESPONSE_NODE_PAYLOAD_MAX_BYTES: NonNegativeInt = Field(
+        description="Size in bytes above which the inputs, process data and outputs of node finished events are"
+        " streamed as truncated previews, 0 to always stream them in full",
+        default=0,
+    )
+
+
+class CPUOffloadConfig(BaseSettings):
+    """
+    Configuration for keeping CPU bound work off the gevent hub
+    """
+
+    CPU_OFFLOAD_ENABLED: bool = Field(
+        description="Run CPU bound work, such as document parsing and keyword extraction, in a pool of worker"
+        " processes instead of the gevent hub",
+        default=False,
+    )
+
+    CPU_OFFLOAD_MAX_WORKERS: PositiveInt = Field(
+        description="Number of worker processes of the CPU offload pool, per API or Celery process",
+        default=2,
+    )
+
+    CPU_OFFLOAD_MAX_QUEUE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of tasks waiting for a free worker process, further callers wait for a slot",
+        default=8,
+    )
+
+    CPU_OFFLOAD_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds to wait for an offloaded task, including the time waiting for a slot",
+        default=60.0,
+    )
+
+    CPU_OFFLOAD_MAX_TASKS_PER_CHILD: NonNegativeInt = Field(
+        description="Number of tasks after which a worker process is replaced to release its memory, 0 to never",
+        default=100,
+    )
+
+    CPU_OFFLOAD_MIN_TEXT_LENGTH: PositiveInt = Field(
+        description="Minimum text length in characters for token counting and keyword extraction to be offloaded",
+        default=100000,
+    )
+
+    GEVENT_BLOCKING_MONITOR_ENABLED: bool = Field(
+        description="Log a warning with the stack of the greenlet whenever the gevent hub is blocked",
+        default=False,
+    )
+
+    GEVENT_MAX_BLOCKING_TIME: PositiveFloat = Field(
+        description="Time in seconds the gevent hub may be blocked before it is reported",
+        default=0.5,
+    )
+
+
 class CodeExecutionSandboxConfig(BaseSettings):
     """
     Configuration for the code execution sandbox environment
@@ -184,6 +298,21 @@ class PluginConfig(BaseSettings):
         default=15728640 * 12,
     )
 
+    PLUGIN_MODEL_CACHE_ENABLED: bool = Field(
+        description="Cache the model providers and model schemas of plugins per tenant across requests",
+        default=False,
+    )
+
+    PLUGIN_MODEL_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds to keep cached model providers and model schemas of plugins",
+        default=300,
+    )
+
+    PLUGIN_MODEL_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of cached model provider lists and model schemas in process memory",
+        default=4096,
+    )
+
 
 class MarketplaceConfig(BaseSettings):
     """
@@ -352,6 +481,17 @@ class HttpConfig(BaseSettings):
         default=1 * 1024 * 1024,
     )
 
+    HTTP_REQUEST_NODE_STREAMING_ENABLED: bool = Field(
+        description="Stream HTTP request node responses larger than HTTP_REQUEST_NODE_STREAMING_THRESHOLD"
+        " instead of reading them into memory, binary bodies are spooled to disk and uploaded to storage in chunks",
+        default=False,
+    )
+
+    HTTP_REQUEST_NODE_STREAMING_THRESHOLD: PositiveInt = Field(
+        description="Size in bytes above which a streamed HTTP request node response is no longer kept in memory",
+        default=1 * 1024 * 1024,
+    )
+
     HTTP_REQUEST_NODE_SSL_VERIFY: bool = Field(
         description="Enable or disable SSL verification for HTTP requests",
         default=True,
@@ -472,10 +612,61 @@ class ModelLoadBalanceConfig(BaseSettings):
     )
 
     PLUGIN_BASED_TOKEN_COUNTING_ENABLED: bool = Field(
-        description="Enable or disable plugin based token counting. If disabled, token counting will return 0.",
+        description="Enable or disable plugin based token counting. If disabled, token counting will return 0"
+        " unless local token estimation is enabled.",
+        default=False,
+    )
+
+    LOCAL_TOKEN_ESTIMATION_ENABLED: bool = Field(
+        description="Estimate the tokens of prompts with a local tokenizer when plugin based token counting is off",
+        default=False,
+    )
+
+    LOCAL_TOKEN_ESTIMATION_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of token counts of prompt messages cached for local token estimation, 0 to disable",
+        default=4096,
+    )
+
+    MODEL_LB_STRATEGY: str = Field(
+        description="Strategy choosing the load balancing config of model invocations:"
+        " round_robin, weighted, least_error or latency",
+        default="round_robin",
+    )
+
+    MODEL_LB_MODEL_STRATEGIES: str = Field(
+        description="Comma-separated strategies of specific models as model:strategy, e.g. gpt-4o:latency",
+        default="",
+    )
+
+    MODEL_LB_CONFIG_WEIGHTS: str = Field(
+        description="Comma-separated weights of load balancing configs by name as name:weight for the weighted"
+        " strategy, weights are positive integers and configs not listed weigh 1",
+        default="",
+    )
+
+    MODEL_LB_SCRIPTED_SELECTION_ENABLED: bool = Field(
+        description="Advance the shared round-robin index and skip the configs in cooldown with one Redis script"
+        " call per invocation, ignored on Redis clusters",
         default=False,
     )
 
+    MODEL_LB_LOCAL_ALLOCATION_ENABLED: bool = Field(
+        description="Allocate load balancing configs round-robin in each process instead of sharing the index in"
+        " Redis, reading the cooldowns once per time slice",
+        default=False,
+    )
+
+    MODEL_LB_LOCAL_TIME_SLICE_MS: PositiveInt = Field(
+        description="Milliseconds the cooldowns of load balancing configs are reused by a process for local allocation",
+        default=1000,
+    )
+
+    MODEL_LB_STATS_WINDOW_SECONDS: PositiveInt = Field(
+        description="Seconds after which errors count half and latencies are measured again for the least_error"
+        " and latency strategies",
+        default=60,
+    )
+
 
 class BillingConfig(BaseSettings):
     """
@@ -530,6 +721,27 @@ class WorkflowConfig(BaseSettings):
     )
 
 
+class DocumentExtractorCacheConfig(BaseSettings):
+    """
+    Configuration for caching the text extracted by the document extractor node
+    """
+
+    DOCUMENT_EXTRACTOR_CACHE_ENABLED: bool = Field(
+        description="Cache the text extracted from files in Redis, so files used again aren't parsed again",
+        default=False,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds to keep an extracted text",
+        default=24 * 60 * 60,
+    )
+
+    DOCUMENT_EXTRACTOR_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum size in bytes of a compressed extracted text to cache, larger texts are not cached",
+        default=2 * 1024 * 1024,
+    )
+
+
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
     Configuration for workflow node execution
@@ -545,6 +757,22 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         description="Storage backend for WorkflowNodeExecution. Options: 'rdbms', 'hybrid'",
     )
 
+    WORKFLOW_NODE_PAYLOAD_OFFLOAD_ENABLED: bool = Field(
+        description="Save node inputs, process data and outputs larger than the threshold to the object storage,"
+        " keeping a truncated preview in the database and in node finished events",
+        default=False,
+    )
+
+    WORKFLOW_NODE_PAYLOAD_OFFLOAD_THRESHOLD: PositiveInt = Field(
+        description="Size in bytes of the node payloads saved to the object storage",
+        default=262144,
+    )
+
+    WORKFLOW_NODE_PAYLOAD_PREVIEW_MAX_BYTES: PositiveInt = Field(
+        description="Size in bytes of the preview kept in the database for a payload saved to the object storage",
+        default=8192,
+    )
+
 
 class RepositoryConfig(BaseSettings):
     """
@@ -662,6 +890,90 @@ class ToolConfig(BaseSettings):
     )
 
 
+class MCPSessionPoolConfig(BaseSettings):
+    """
+    Configuration for reusing initialized MCP sessions across tool invocations
+    """
+
+    MCP_SESSION_POOL_ENABLED: bool = Field(
+        description="Keep initialized MCP sessions open and reuse them for later tool calls to the same server",
+        default=False,
+    )
+
+    MCP_SESSION_POOL_MAX_SESSIONS_PER_SERVER: PositiveInt = Field(
+        description="Maximum number of sessions open at once per MCP provider, server and credentials",
+        default=4,
+    )
+
+    MCP_SESSION_POOL_MAX_IDLE_SESSIONS: NonNegativeInt = Field(
+        description="Maximum number of idle sessions kept open per process, the least recently used are closed first",
+        default=64,
+    )
+
+    MCP_SESSION_POOL_IDLE_TIMEOUT: PositiveInt = Field(
+        description="Time in seconds after which an idle session is closed",
+        default=300,
+    )
+
+    MCP_SESSION_POOL_PING_INTERVAL: NonNegativeInt = Field(
+        description="Idle time in seconds after which a session is pinged before it's reused, 0 to always ping",
+        default=30,
+    )
+
+    MCP_SESSION_POOL_ACQUIRE_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds to wait for a session when all sessions of the server are busy",
+        default=30.0,
+    )
+
+    MCP_LIST_TOOLS_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds to cache the tools listed by an MCP server, 0 to disable",
+        default=60,
+    )
+
+
+class AgentConfig(BaseSettings):
+    """
+    Configuration for agent tool calls and thoughts
+    """
+
+    AGENT_CONCURRENT_TOOL_CALLS_ENABLED: bool = Field(
+        description="Run the tool calls of one function calling model response concurrently instead of one by one",
+        default=False,
+    )
+
+    AGENT_MAX_CONCURRENT_TOOL_CALLS: PositiveInt = Field(
+        description="Maximum number of tool calls an agent runs at the same time",
+        default=4,
+    )
+
+    AGENT_TOOL_CALL_TIMEOUT: NonNegativeInt = Field(
+        description="Time in seconds a concurrently run tool call may take before it fails, 0 for no limit",
+        default=300,
+    )
+
+    AGENT_THOUGHT_BATCH_WRITE_ENABLED: bool = Field(
+        description="Keep the agent thoughts of an iteration in memory and write them once per iteration"
+        " instead of committing every update",
+        default=False,
+    )
+
+
+class OpsTraceConfig(BaseSettings):
+    """
+    Configuration for ops tracing integrations
+    """
+
+    OPS_TRACE_INSTANCE_CACHE_TTL: NonNegativeInt = Field(
+        description="Time in seconds to cache the resolved trace instance of an app, 0 to disable the cache",
+        default=60,
+    )
+
+    OPS_TRACE_INSTANCE_CACHE_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of apps whose resolved trace instance is cached per process",
+        default=1024,
+    )
+
+
 class MailConfig(BaseSettings):
     """
     Configuration for email services
@@ -761,6 +1073,32 @@ class RagEtlConfig(BaseSettings):
     )
 
 
+class RetrievalCacheConfig(BaseSettings):
+    """
+    Configuration for caching retrieval results of repeated queries
+    """
+
+    RETRIEVAL_RESULT_CACHE_ENABLED: bool = Field(
+        description="Cache retrieval results per dataset, query and retrieval settings",
+        default=False,
+    )
+
+    RETRIEVAL_RESULT_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds to keep a cached retrieval result",
+        default=300,
+    )
+
+    RETRIEVAL_RESULT_CACHE_MEMORY_MAX_SIZE: NonNegativeInt = Field(
+        description="Maximum number of retrieval results cached in process memory, 0 to disable the memory tier",
+        default=1024,
+    )
+
+    RETRIEVAL_RESULT_CACHE_REDIS_ENABLED: bool = Field(
+        description="Share cached retrieval results between processes through Redis",
+        default=True,
+    )
+
+
 class DataSetConfig(BaseSettings):
     """
     Configuration for dataset management
@@ -796,6 +1134,21 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    MESSAGE_CLEAN_BATCH_SIZE: PositiveInt = Field(
+        description="Number of expired messages deleted per transaction by the clean messages task",
+        default=1000,
+    )
+
+    MESSAGE_CLEAN_THROTTLE_SECONDS: NonNegativeFloat = Field(
+        description="Pause in seconds between batches of the clean messages task",
+        default=0.1,
+    )
+
+    MESSAGE_CLEAN_DRY_RUN: bool = Field(
+        description="Only log the number of rows the clean messages task would delete",
+        default=False,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -823,6 +1176,12 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    INDEXING_TOKEN_AWARE_SPLITTER_ENABLED: bool = Field(
+        description="Split documents with the offset based splitter, counting chunk sizes in tokens instead of"
+        " characters",
+        default=False,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -830,6 +1189,21 @@ class MultiModalTransferConfig(BaseSettings):
         default="base64",
     )
 
+    MULTIMODAL_ENCODED_CACHE_MAX_BYTES: NonNegativeInt = Field(
+        description="Maximum total size in bytes of base64 encoded file payloads cached per process, 0 to disable",
+        default=64 * 1024 * 1024,
+    )
+
+    MULTIMODAL_ENCODED_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds to keep a base64 encoded file payload in the cache",
+        default=600,
+    )
+
+    MULTIMODAL_LOW_DETAIL_IMAGE_MAX_SIDE: NonNegativeInt = Field(
+        description="Downscale images sent with low detail so the longest side fits this many pixels, 0 to disable",
+        default=0,
+    )
+
 
 class CeleryBeatConfig(BaseSettings):
     CELERY_BEAT_SCHEDULER_TIME: int = Field(
@@ -871,6 +1245,45 @@ class CeleryScheduleTasksConfig(BaseSettings):
         description="Enable check upgradable plugin task",
         default=True,
     )
+    ENABLE_APP_STATISTIC_ROLLUP_TASK: bool = Field(
+        description="Enable the task rolling up app statistics into hourly tables read by the console dashboards",
+        default=False,
+    )
+    APP_STATISTIC_ROLLUP_INTERVAL: PositiveInt = Field(
+        description="Interval in minutes between app statistic rollup runs",
+        default=30,
+    )
+    APP_STATISTIC_ROLLUP_LOOKBACK_HOURS: PositiveInt = Field(
+        description="Number of recent hours recomputed on every rollup run, to pick up late updates and feedbacks",
+        default=24,
+    )
+    APP_STATISTIC_ROLLUP_BACKFILL_DAYS: NonNegativeInt = Field(
+        description="Number of days rolled up by the first rollup run",
+        default=30,
+    )
+
+
+class AppLogListConfig(BaseSettings):
+    """
+    Configuration for paginating app logs, such as conversations and workflow app logs
+    """
+
+    APP_LOG_COUNT_MODE: Literal["exact", "cached", "estimated"] = Field(
+        description="How the total of app log listings is counted: 'exact' runs a COUNT query on every request,"
+        " 'cached' keeps exact counts in Redis for APP_LOG_COUNT_CACHE_TTL seconds,"
+        " 'estimated' uses the PostgreSQL planner estimate for large listings",
+        default="exact",
+    )
+
+    APP_LOG_COUNT_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds to keep a cached app log count",
+        default=60,
+    )
+
+    APP_LOG_EXACT_COUNT_THRESHOLD: NonNegativeInt = Field(
+        description="In 'estimated' mode, listings estimated below this number of rows are still counted exactly",
+        default=10000,
+    )
 
 
 class PositionConfig(BaseSettings):
@@ -970,13 +1383,18 @@ class AccountConfig(BaseSettings):
 
 class FeatureConfig(
     # place the configs in alphabet order
+    AgentConfig,
     AppExecutionConfig,
+    AppLogListConfig,
+    AppWorkerPoolConfig,
     AuthConfig,  # Changed from OAuthConfig to AuthConfig
     BillingConfig,
     CodeExecutionSandboxConfig,
+    CPUOffloadConfig,
     PluginConfig,
     MarketplaceConfig,
     DataSetConfig,
+    DocumentExtractorCacheConfig,
     EndpointConfig,
     FileAccessConfig,
     FileUploadConfig,
@@ -985,13 +1403,18 @@ class FeatureConfig(
     IndexingConfig,
     LoggingConfig,
     MailConfig,
+    MCPSessionPoolConfig,
     ModelLoadBalanceConfig,
     ModerationConfig,
     MultiModalTransferConfig,
+    OpsTraceConfig,
     PositionConfig,
     RagEtlConfig,
     RepositoryConfig,
+    RetrievalCacheConfig,
     SecurityConfig,
+    StreamResponseConfig,
+    StreamTextChunkCoalesceConfig,
     ToolConfig,
     UpdateConfig,
     WorkflowConfig,
@@ -76,6 +76,32 @@ class StorageConfig(BaseSettings):
         deprecated=True,
     )
 
+    STORAGE_LOCAL_CACHE_ENABLED: bool = Field(
+        description="Enable a read-through local disk cache in front of the storage backend.",
+        default=False,
+    )
+
+    STORAGE_LOCAL_CACHE_PATH: str = Field(
+        description="Directory of the local storage cache.",
+        default="storage_cache",
+    )
+
+    STORAGE_LOCAL_CACHE_MAX_BYTES: PositiveInt = Field(
+        description="Maximum total size in bytes of the local storage cache, least recently used objects are evicted.",
+        default=1024 * 1024 * 1024,
+    )
+
+    STORAGE_LOCAL_CACHE_MAX_OBJECT_BYTES: PositiveInt = Field(
+        description="Objects larger than this size in bytes bypass the local storage cache.",
+        default=64 * 1024 * 1024,
+    )
+
+    STORAGE_LOCAL_CACHE_KEY_PREFIXES: str = Field(
+        description="Comma-separated prefixes of the storage keys cached locally. The objects under them must never"
+        " be rewritten, since other processes can't invalidate the local copies.",
+        default="upload_files/,tools/,image_files/",
+    )
+
 
 class VectorStoreConfig(BaseSettings):
     VECTOR_STORE: Optional[str] = Field(
@@ -94,6 +120,22 @@ class VectorStoreConfig(BaseSettings):
         default="Vector_index",
     )
 
+    VECTOR_STORE_CLIENT_POOL_ENABLED: bool = Field(
+        description="Share long-lived vector store clients and connection pools within a process."
+        " A shared PGVector pool limits all datasets of the process to PGVECTOR_MAX_CONNECTION connections.",
+        default=False,
+    )
+
+    VECTOR_STORE_CLIENT_POOL_MAX_SIZE: PositiveInt = Field(
+        description="Maximum number of vector store clients kept per process.",
+        default=16,
+    )
+
+    VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL: NonNegativeInt = Field(
+        description="Minimum interval in seconds between health checks of a shared vector store client.",
+        default=60,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
@@ -21,6 +21,7 @@ from fields.conversation_fields import (
 )
 from libs.datetime_utils import naive_utc_now
 from libs.helper import DatetimeString
+from libs.keyset_pagination import keyset_cursor, paginate
 from libs.login import login_required
 from models import Conversation, EndUser, Message, MessageAnnotation
 from models.model import AppMode
@@ -44,6 +45,7 @@ class CompletionConversationApi(Resource):
         )
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        parser.add_argument("cursor", type=keyset_cursor, location="args")
         args = parser.parse_args()
 
         query = db.select(Conversation).where(Conversation.app_id == app_model.id, Conversation.mode == "completion")
@@ -90,9 +92,16 @@ class CompletionConversationApi(Resource):
                 .having(func.count(MessageAnnotation.id) == 0)
             )
 
-        query = query.order_by(Conversation.created_at.desc())
-
-        conversations = db.paginate(query, page=args["page"], per_page=args["limit"], error_out=False)
+        conversations = paginate(
+            db.session,
+            query,
+            sort_column=Conversation.created_at,
+            id_column=Conversation.id,
+            page=args["page"],
+            limit=args["limit"],
+            cursor=args["cursor"],
+            count_scope=f"completion_conversations:{app_model.id}",
+        )
 
         return conversations
 
@@ -153,6 +162,7 @@ class ChatConversationApi(Resource):
         parser.add_argument("message_count_gte", type=int_range(1, 99999), required=False, location="args")
         parser.add_argument("page", type=int_range(1, 99999), required=False, default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), required=False, default=20, location="args")
+        parser.add_argument("cursor", type=keyset_cursor, required=False, location="args")
         parser.add_argument(
             "sort_by",
             type=str,
@@ -246,18 +256,22 @@ class ChatConversationApi(Resource):
             query = query.where(Conversation.invoke_from != InvokeFrom.DEBUGGER.value)
 
         match args["sort_by"]:
-            case "created_at":
-                query = query.order_by(Conversation.created_at.asc())
-            case "-created_at":
-                query = query.order_by(Conversation.created_at.desc())
-            case "updated_at":
-                query = query.order_by(Conversation.updated_at.asc())
-            case "-updated_at":
-                query = query.order_by(Conversation.updated_at.desc())
-            case _:
-                query = query.order_by(Conversation.created_at.desc())
-
-        conversations = db.paginate(query, page=args["page"], per_page=args["limit"], error_out=False)
+            case "updated_at" | "-updated_at":
+                sort_column = Conversation.updated_at
+            case "created_at" | "-created_at" | _:
+                sort_column = Conversation.created_at
+
+        conversations = paginate(
+            db.session,
+            query,
+            sort_column=sort_column,
+            id_column=Conversation.id,
+            descending=args["sort_by"] not in {"created_at", "updated_at"},
+            page=args["page"],
+            limit=args["limit"],
+            cursor=args["cursor"],
+            count_scope=f"chat_conversations:{app_model.id}",
+        )
 
         return conversations
 
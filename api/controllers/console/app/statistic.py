@@ -14,7 +14,8 @@ from core.app.entities.app_invoke_entities import InvokeFrom
 from extensions.ext_database import db
 from libs.helper import DatetimeString
 from libs.login import login_required
-from models import AppMode, Message
+from models import AppHourlyStatisticMember, AppMode, Message
+from services.app_statistic_service import AppStatisticService
 
 
 class DailyMessageStatistic(Resource):
@@ -41,6 +42,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -62,14 +65,18 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        arg_dict.update(AppStatisticService.raw_params(window))
         sql_query += " GROUP BY date ORDER BY date"
 
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
             rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "message_count": i.message_count})
+            for date, i in AppStatisticService.combine_daily(rs, rollups, ["message_count"]):
+                response_data.append({"date": date, "message_count": i["message_count"]})
 
         return jsonify({"data": response_data})
 
@@ -89,16 +96,11 @@ class DailyConversationStatistic(Resource):
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
-        stmt = (
-            sa.select(
-                sa.func.date(
-                    sa.func.date_trunc("day", sa.text("created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz"))
-                ).label("date"),
-                sa.func.count(sa.distinct(Message.conversation_id)).label("conversation_count"),
-            )
-            .select_from(Message)
-            .where(Message.app_id == app_model.id, Message.invoke_from != InvokeFrom.DEBUGGER.value)
+        members = sa.select(Message.created_at, Message.conversation_id.label("member_id")).where(
+            Message.app_id == app_model.id, Message.invoke_from != InvokeFrom.DEBUGGER.value
         )
 
         if args["start"]:
@@ -106,16 +108,45 @@ class DailyConversationStatistic(Resource):
             start_datetime = start_datetime.replace(second=0)
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
-            stmt = stmt.where(Message.created_at >= start_datetime_utc)
+            members = members.where(Message.created_at >= start_datetime_utc)
 
         if args["end"]:
             end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
             end_datetime = end_datetime.replace(second=0)
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
-            stmt = stmt.where(Message.created_at < end_datetime_utc)
+            members = members.where(Message.created_at < end_datetime_utc)
+
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        if window:
+            members_subquery = (
+                members.where(sa.or_(Message.created_at < window.start, Message.created_at >= window.end))
+                .union_all(
+                    sa.select(
+                        AppHourlyStatisticMember.hour.label("created_at"), AppHourlyStatisticMember.member_id
+                    ).where(
+                        AppHourlyStatisticMember.app_id == app_model.id,
+                        AppHourlyStatisticMember.member_type == AppHourlyStatisticMember.MemberType.CONVERSATION,
+                        AppHourlyStatisticMember.hour >= window.start,
+                        AppHourlyStatisticMember.hour < window.end,
+                    )
+                )
+                .subquery()
+            )
+        else:
+            members_subquery = members.subquery()
 
-        stmt = stmt.group_by("date").order_by("date")
+        stmt = (
+            sa.select(
+                sa.func.date(
+                    sa.func.date_trunc("day", sa.text("created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz"))
+                ).label("date"),
+                sa.func.count(sa.distinct(members_subquery.c.member_id)).label("conversation_count"),
+            )
+            .select_from(members_subquery)
+            .group_by("date")
+            .order_by("date")
+        )
 
         response_data = []
         with db.engine.begin() as conn:
@@ -140,16 +171,18 @@ class DailyTerminalsStatistic(Resource):
         args = parser.parse_args()
 
         sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    COUNT(DISTINCT messages.from_end_user_id) AS terminal_count
-FROM
-    messages
-WHERE
-    app_id = :app_id"""
+        created_at,
+        from_end_user_id AS member_id
+    FROM
+        messages
+    WHERE
+        app_id = :app_id"""
         arg_dict = {"tz": account.timezone, "app_id": app_model.id}
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -171,7 +204,18 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
-        sql_query += " GROUP BY date ORDER BY date"
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        sql_query += AppStatisticService.members_union(window, AppHourlyStatisticMember.MemberType.END_USER)
+        arg_dict.update(AppStatisticService.raw_params(window))
+        sql_query = f"""SELECT
+    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    COUNT(DISTINCT member_id) AS terminal_count
+FROM
+    (
+    {sql_query}
+    ) members
+GROUP BY date ORDER BY date"""
 
         response_data = []
 
@@ -208,6 +252,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -229,15 +275,19 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        arg_dict.update(AppStatisticService.raw_params(window))
         sql_query += " GROUP BY date ORDER BY date"
 
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
             rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
+            for date, i in AppStatisticService.combine_daily(rs, rollups, ["token_count", "total_price"]):
                 response_data.append(
-                    {"date": str(i.date), "token_count": i.token_count, "total_price": i.total_price, "currency": "USD"}
+                    {"date": date, "token_count": i["token_count"], "total_price": i["total_price"], "currency": "USD"}
                 )
 
         return jsonify({"data": response_data})
@@ -400,7 +450,8 @@ class AverageResponseTimeStatistic(Resource):
 
         sql_query = """SELECT
     DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    AVG(provider_response_latency) AS latency
+    COUNT(*) AS message_count,
+    SUM(provider_response_latency) AS provider_response_latency
 FROM
     messages
 WHERE
@@ -409,6 +460,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -430,14 +483,23 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        arg_dict.update(AppStatisticService.raw_params(window))
         sql_query += " GROUP BY date ORDER BY date"
 
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
             rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "latency": round(i.latency * 1000, 4)})
+            for date, i in AppStatisticService.combine_daily(
+                rs, rollups, ["message_count", "provider_response_latency"]
+            ):
+                if not i["message_count"]:
+                    continue
+                latency = i["provider_response_latency"] / i["message_count"]
+                response_data.append({"date": date, "latency": round(latency * 1000, 4)})
 
         return jsonify({"data": response_data})
 
@@ -457,10 +519,8 @@ class TokensPerSecondStatistic(Resource):
 
         sql_query = """SELECT
     DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    CASE
-        WHEN SUM(provider_response_latency) = 0 THEN 0
-        ELSE (SUM(answer_tokens) / SUM(provider_response_latency))
-    END as tokens_per_second
+    SUM(answer_tokens) AS answer_tokens,
+    SUM(provider_response_latency) AS provider_response_latency
 FROM
     messages
 WHERE
@@ -469,6 +529,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -490,14 +552,22 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        arg_dict.update(AppStatisticService.raw_params(window))
         sql_query += " GROUP BY date ORDER BY date"
 
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
             rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "tps": round(i.tokens_per_second, 4)})
+            for date, i in AppStatisticService.combine_daily(
+                rs, rollups, ["answer_tokens", "provider_response_latency"]
+            ):
+                latency = i["provider_response_latency"]
+                tokens_per_second = i["answer_tokens"] / latency if latency else 0
+                response_data.append({"date": date, "tps": round(tokens_per_second, 4)})
 
         return jsonify({"data": response_data})
 
@@ -9,6 +9,7 @@ from controllers.console.wraps import account_initialization_required, setup_req
 from core.workflow.entities.workflow_execution import WorkflowExecutionStatus
 from extensions.ext_database import db
 from fields.workflow_app_log_fields import workflow_app_log_pagination_fields
+from libs.keyset_pagination import keyset_cursor
 from libs.login import login_required
 from models import App
 from models.model import AppMode
@@ -50,6 +51,7 @@ class WorkflowAppLogApi(Resource):
         )
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        parser.add_argument("cursor", type=keyset_cursor, location="args")
         args = parser.parse_args()
 
         args.status = WorkflowExecutionStatus(args.status) if args.status else None
@@ -73,6 +75,7 @@ class WorkflowAppLogApi(Resource):
                 limit=args.limit,
                 created_by_end_user_session_id=args.created_by_end_user_session_id,
                 created_by_account=args.created_by_account,
+                cursor=args.cursor,
             )
 
             return workflow_app_log_pagination
@@ -3,10 +3,12 @@ from typing import cast
 from flask_login import current_user
 from flask_restful import Resource, marshal_with, reqparse
 from flask_restful.inputs import int_range
+from werkzeug.exceptions import BadRequest, NotFound
 
 from controllers.console import api
 from controllers.console.app.wraps import get_app_model
 from controllers.console.wraps import account_initialization_required, setup_required
+from core.repositories.node_execution_payload_store import PAYLOAD_FIELDS
 from fields.workflow_run_fields import (
     advanced_chat_workflow_run_pagination_fields,
     workflow_run_detail_fields,
@@ -102,7 +104,34 @@ class WorkflowRunNodeExecutionListApi(Resource):
         return {"data": node_executions}
 
 
+class WorkflowRunNodeExecutionPayloadApi(Resource):
+    @setup_required
+    @login_required
+    @account_initialization_required
+    @get_app_model(mode=[AppMode.ADVANCED_CHAT, AppMode.WORKFLOW])
+    def get(self, app_model: App, node_execution_id, field: str):
+        """
+        Get the full inputs, process data or outputs of a node execution, listed with a preview when they were
+        saved to the object storage
+        """
+        if field not in PAYLOAD_FIELDS:
+            raise BadRequest(f"Invalid payload field {field}, expected one of {', '.join(PAYLOAD_FIELDS)}")
+
+        workflow_run_service = WorkflowRunService()
+        node_execution = workflow_run_service.get_workflow_node_execution(
+            app_model=app_model, node_execution_id=str(node_execution_id)
+        )
+        if not node_execution:
+            raise NotFound("Node execution not found")
+
+        return {"data": getattr(node_execution, f"{field}_dict")}
+
+
 api.add_resource(AdvancedChatAppWorkflowRunListApi, "/apps/<uuid:app_id>/advanced-chat/workflow-runs")
 api.add_resource(WorkflowRunListApi, "/apps/<uuid:app_id>/workflow-runs")
 api.add_resource(WorkflowRunDetailApi, "/apps/<uuid:app_id>/workflow-runs/<uuid:run_id>")
 api.add_resource(WorkflowRunNodeExecutionListApi, "/apps/<uuid:app_id>/workflow-runs/<uuid:run_id>/node-executions")
+api.add_resource(
+    WorkflowRunNodeExecutionPayloadApi,
+    "/apps/<uuid:app_id>/workflow-runs/node-executions/<uuid:node_execution_id>/payloads/<string:field>",
+)
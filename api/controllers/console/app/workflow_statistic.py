@@ -14,7 +14,8 @@ from extensions.ext_database import db
 from libs.helper import DatetimeString
 from libs.login import login_required
 from models.enums import WorkflowRunTriggeredFrom
-from models.model import AppMode
+from models.model import AppHourlyStatisticMember, AppMode
+from services.app_statistic_service import AppStatisticService
 
 
 class WorkflowDailyRunsStatistic(Resource):
@@ -32,7 +33,7 @@ class WorkflowDailyRunsStatistic(Resource):
 
         sql_query = """SELECT
     DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    COUNT(id) AS runs
+    COUNT(id) AS workflow_run_count
 FROM
     workflow_runs
 WHERE
@@ -46,6 +47,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -67,14 +70,18 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        arg_dict.update(AppStatisticService.raw_params(window))
         sql_query += " GROUP BY date ORDER BY date"
 
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
             rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append({"date": str(i.date), "runs": i.runs})
+            for date, i in AppStatisticService.combine_daily(rs, rollups, ["workflow_run_count"]):
+                response_data.append({"date": date, "runs": i["workflow_run_count"]})
 
         return jsonify({"data": response_data})
 
@@ -93,13 +100,13 @@ class WorkflowDailyTerminalsStatistic(Resource):
         args = parser.parse_args()
 
         sql_query = """SELECT
-    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    COUNT(DISTINCT workflow_runs.created_by) AS terminal_count
-FROM
-    workflow_runs
-WHERE
-    app_id = :app_id
-    AND triggered_from = :triggered_from"""
+        created_at,
+        created_by AS member_id
+    FROM
+        workflow_runs
+    WHERE
+        app_id = :app_id
+        AND triggered_from = :triggered_from"""
         arg_dict = {
             "tz": account.timezone,
             "app_id": app_model.id,
@@ -108,6 +115,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -129,7 +138,18 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
-        sql_query += " GROUP BY date ORDER BY date"
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        sql_query += AppStatisticService.members_union(window, AppHourlyStatisticMember.MemberType.WORKFLOW_USER)
+        arg_dict.update(AppStatisticService.raw_params(window))
+        sql_query = f"""SELECT
+    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    COUNT(DISTINCT member_id) AS terminal_count
+FROM
+    (
+    {sql_query}
+    ) members
+GROUP BY date ORDER BY date"""
 
         response_data = []
 
@@ -156,7 +176,7 @@ class WorkflowDailyTokenCostStatistic(Resource):
 
         sql_query = """SELECT
     DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-    SUM(workflow_runs.total_tokens) AS token_count
+    SUM(workflow_runs.total_tokens) AS workflow_token_count
 FROM
     workflow_runs
 WHERE
@@ -170,6 +190,8 @@ WHERE
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -191,17 +213,21 @@ WHERE
             sql_query += " AND created_at < :end"
             arg_dict["end"] = end_datetime_utc
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        sql_query += AppStatisticService.raw_condition(window)
+        arg_dict.update(AppStatisticService.raw_params(window))
         sql_query += " GROUP BY date ORDER BY date"
 
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
             rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
+            for date, i in AppStatisticService.combine_daily(rs, rollups, ["workflow_token_count"]):
                 response_data.append(
                     {
-                        "date": str(i.date),
-                        "token_count": i.token_count,
+                        "date": date,
+                        "token_count": i["workflow_token_count"],
                     }
                 )
 
@@ -221,27 +247,23 @@ class WorkflowAverageAppInteractionStatistic(Resource):
         parser.add_argument("end", type=DatetimeString("%Y-%m-%d %H:%M"), location="args")
         args = parser.parse_args()
 
-        sql_query = """SELECT
-    AVG(sub.interactions) AS interactions,
-    sub.date
+        # the average number of runs per user and day, counted as runs divided by distinct users
+        runs_query = """SELECT
+    DATE(DATE_TRUNC('day', c.created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    COUNT(c.id) AS workflow_run_count
 FROM
-    (
-        SELECT
-            DATE(DATE_TRUNC('day', c.created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
-            c.created_by,
-            COUNT(c.id) AS interactions
-        FROM
-            workflow_runs c
-        WHERE
-            c.app_id = :app_id
-            AND c.triggered_from = :triggered_from
-            {{start}}
-            {{end}}
-        GROUP BY
-            date, c.created_by
-    ) sub
-GROUP BY
-    sub.date"""
+    workflow_runs c
+WHERE
+    c.app_id = :app_id
+    AND c.triggered_from = :triggered_from"""
+        users_query = """SELECT
+        c.created_at,
+        c.created_by AS member_id
+    FROM
+        workflow_runs c
+    WHERE
+        c.app_id = :app_id
+        AND c.triggered_from = :triggered_from"""
         arg_dict = {
             "tz": account.timezone,
             "app_id": app_model.id,
@@ -250,6 +272,8 @@ GROUP BY
 
         timezone = pytz.timezone(account.timezone)
         utc_timezone = pytz.utc
+        start_datetime_utc = None
+        end_datetime_utc = None
 
         if args["start"]:
             start_datetime = datetime.strptime(args["start"], "%Y-%m-%d %H:%M")
@@ -258,10 +282,9 @@ GROUP BY
             start_datetime_timezone = timezone.localize(start_datetime)
             start_datetime_utc = start_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query = sql_query.replace("{{start}}", " AND c.created_at >= :start")
+            runs_query += " AND c.created_at >= :start"
+            users_query += " AND c.created_at >= :start"
             arg_dict["start"] = start_datetime_utc
-        else:
-            sql_query = sql_query.replace("{{start}}", "")
 
         if args["end"]:
             end_datetime = datetime.strptime(args["end"], "%Y-%m-%d %H:%M")
@@ -270,19 +293,36 @@ GROUP BY
             end_datetime_timezone = timezone.localize(end_datetime)
             end_datetime_utc = end_datetime_timezone.astimezone(utc_timezone)
 
-            sql_query = sql_query.replace("{{end}}", " AND c.created_at < :end")
+            runs_query += " AND c.created_at < :end"
+            users_query += " AND c.created_at < :end"
             arg_dict["end"] = end_datetime_utc
-        else:
-            sql_query = sql_query.replace("{{end}}", "")
 
+        window = AppStatisticService.get_rollup_window(start_datetime_utc, end_datetime_utc, account.timezone)
+        runs_query += AppStatisticService.raw_condition(window, "c.created_at")
+        runs_query += " GROUP BY date"
+        users_query += AppStatisticService.raw_condition(window, "c.created_at")
+        users_query += AppStatisticService.members_union(window, AppHourlyStatisticMember.MemberType.WORKFLOW_USER)
+        users_query = f"""SELECT
+    DATE(DATE_TRUNC('day', created_at AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    COUNT(DISTINCT member_id) AS user_count
+FROM
+    (
+    {users_query}
+    ) members
+GROUP BY date"""
+        arg_dict.update(AppStatisticService.raw_params(window))
+
+        rollups = AppStatisticService.get_daily_rollups(app_model.id, window, account.timezone)
         response_data = []
 
         with db.engine.begin() as conn:
-            rs = conn.execute(sa.text(sql_query), arg_dict)
-            for i in rs:
-                response_data.append(
-                    {"date": str(i.date), "interactions": float(i.interactions.quantize(Decimal("0.01")))}
-                )
+            user_counts = {str(i.date): i.user_count for i in conn.execute(sa.text(users_query), arg_dict)}
+            rs = conn.execute(sa.text(runs_query), arg_dict)
+            for date, i in AppStatisticService.combine_daily(rs, rollups, ["workflow_run_count"]):
+                if not user_counts.get(date):
+                    continue
+                interactions = Decimal(i["workflow_run_count"]) / Decimal(user_counts[date])
+                response_data.append({"date": date, "interactions": float(interactions.quantize(Decimal("0.01")))})
 
         return jsonify({"data": response_data})
 
@@ -31,6 +31,7 @@ from extensions.ext_database import db
 from fields.workflow_app_log_fields import workflow_app_log_pagination_fields
 from libs import helper
 from libs.helper import TimestampField
+from libs.keyset_pagination import keyset_cursor
 from models.model import App, AppMode, EndUser
 from repositories.factory import DifyAPIRepositoryFactory
 from services.app_generate_service import AppGenerateService
@@ -217,6 +218,7 @@ class WorkflowAppLogApi(Resource):
         )
         parser.add_argument("page", type=int_range(1, 99999), default=1, location="args")
         parser.add_argument("limit", type=int_range(1, 100), default=20, location="args")
+        parser.add_argument("cursor", type=keyset_cursor, location="args")
         args = parser.parse_args()
 
         args.status = WorkflowExecutionStatus(args.status) if args.status else None
@@ -240,6 +242,7 @@ class WorkflowAppLogApi(Resource):
                 limit=args.limit,
                 created_by_end_user_session_id=args.created_by_end_user_session_id,
                 created_by_account=args.created_by_account,
+                cursor=args.cursor,
             )
 
             return workflow_app_log_pagination
@@ -5,15 +5,17 @@ from typing import Optional, Union, cast
 
 from sqlalchemy import select
 
+from configs import dify_config
 from core.agent.entities import AgentEntity, AgentToolEntity
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
 from core.app.apps.agent_chat.app_config_manager import AgentChatAppConfig
-from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.apps.base_app_runner import AppRunner
 from core.app.entities.app_invoke_entities import (
     AgentChatAppGenerateEntity,
     ModelConfigWithCredentialsEntity,
 )
+from core.app.entities.queue_entities import AgentThoughtSnapshot, QueueAgentThoughtEvent
 from core.callback_handler.agent_tool_callback_handler import DifyAgentCallbackHandler
 from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCallbackHandler
 from core.file import file_manager
@@ -105,6 +107,8 @@ class BaseAgentRunner(AppRunner):
             .count()
         )
         db.session.close()
+        # thoughts created or updated since the last flush, by id, when their writes are batched
+        self._pending_agent_thoughts: dict[str, MessageAgentThought] = {}
 
         # check if model supports stream tool call
         llm_model = cast(LargeLanguageModel, model_instance.model_type_instance)
@@ -311,6 +315,13 @@ class BaseAgentRunner(AppRunner):
             created_by=self.user_id,
         )
 
+        if dify_config.AGENT_THOUGHT_BATCH_WRITE_ENABLED:
+            # written by the next flush, the id is set here as the database doesn't generate it yet
+            thought.id = str(uuid.uuid4())
+            self._pending_agent_thoughts[thought.id] = thought
+            self.agent_thought_count += 1
+            return thought.id
+
         db.session.add(thought)
         db.session.commit()
         agent_thought_id = str(thought.id)
@@ -334,7 +345,11 @@ class BaseAgentRunner(AppRunner):
         """
         Save agent thought
         """
-        agent_thought = db.session.query(MessageAgentThought).where(MessageAgentThought.id == agent_thought_id).first()
+        agent_thought = self._pending_agent_thoughts.get(agent_thought_id)
+        if agent_thought is None:
+            agent_thought = (
+                db.session.query(MessageAgentThought).where(MessageAgentThought.id == agent_thought_id).first()
+            )
         if not agent_thought:
             raise ValueError("agent thought not found")
 
@@ -402,9 +417,50 @@ class BaseAgentRunner(AppRunner):
 
             agent_thought.tool_meta_str = tool_invoke_meta
 
+        if agent_thought_id in self._pending_agent_thoughts:
+            return
+
+        db.session.commit()
+        db.session.close()
+
+    def flush_agent_thoughts(self):
+        """
+        Write the buffered agent thoughts in one commit.
+
+        Called at iteration boundaries, before the message end is published and when the run ends, so that a
+        failed run keeps the thoughts of its last iteration.
+        """
+        if not self._pending_agent_thoughts:
+            return
+
+        thoughts = list(self._pending_agent_thoughts.values())
+        self._pending_agent_thoughts = {}
+        db.session.add_all(thoughts)
         db.session.commit()
         db.session.close()
 
+    def publish_agent_thought(self, agent_thought_id: str):
+        """
+        Publish the agent thought event, with the state of the thought when it's buffered.
+        """
+        snapshot = None
+        agent_thought = self._pending_agent_thoughts.get(agent_thought_id)
+        if agent_thought is not None:
+            snapshot = AgentThoughtSnapshot(
+                position=agent_thought.position,
+                thought=agent_thought.thought,
+                observation=agent_thought.observation,
+                tool=agent_thought.tool,
+                tool_labels=agent_thought.tool_labels,
+                tool_input=agent_thought.tool_input,
+                message_files=agent_thought.files,
+            )
+
+        self.queue_manager.publish(
+            QueueAgentThoughtEvent(agent_thought_id=agent_thought_id, agent_thought=snapshot),
+            PublishFrom.APPLICATION_MANAGER,
+        )
+
     def organize_agent_history(self, prompt_messages: list[PromptMessage]) -> list[PromptMessage]:
         """
         Organize agent history
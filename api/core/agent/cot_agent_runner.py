@@ -7,7 +7,7 @@ from core.agent.base_agent_runner import BaseAgentRunner
 from core.agent.entities import AgentScratchpadUnit
 from core.agent.output_parser.cot_output_parser import CotAgentOutputParser
 from core.app.apps.base_app_queue_manager import PublishFrom
-from core.app.entities.queue_entities import QueueAgentThoughtEvent, QueueMessageEndEvent, QueueMessageFileEvent
+from core.app.entities.queue_entities import QueueMessageEndEvent, QueueMessageFileEvent
 from core.model_runtime.entities.llm_entities import LLMResult, LLMResultChunk, LLMResultChunkDelta, LLMUsage
 from core.model_runtime.entities.message_entities import (
     AssistantPromptMessage,
@@ -95,6 +95,9 @@ class CotAgentRunner(BaseAgentRunner, ABC):
                 # the last iteration, remove all tools
                 self._prompt_messages_tools = []
 
+            # write the thoughts of the previous iteration
+            self.flush_agent_thoughts()
+
             message_file_ids: list[str] = []
 
             agent_thought_id = self.create_agent_thought(
@@ -102,9 +105,7 @@ class CotAgentRunner(BaseAgentRunner, ABC):
             )
 
             if iteration_step > 1:
-                self.queue_manager.publish(
-                    QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                )
+                self.publish_agent_thought(agent_thought_id)
 
             # recalc llm max tokens
             prompt_messages = self._organize_prompt_messages()
@@ -132,9 +133,7 @@ class CotAgentRunner(BaseAgentRunner, ABC):
 
             # publish agent thought if it's first iteration
             if iteration_step == 1:
-                self.queue_manager.publish(
-                    QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                )
+                self.publish_agent_thought(agent_thought_id)
 
             for chunk in react_chunks:
                 if isinstance(chunk, AgentScratchpadUnit.Action):
@@ -180,9 +179,7 @@ class CotAgentRunner(BaseAgentRunner, ABC):
             )
 
             if not scratchpad.is_final():
-                self.queue_manager.publish(
-                    QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                )
+                self.publish_agent_thought(agent_thought_id)
 
             if not scratchpad.action:
                 # failed to extract action, return final answer directly
@@ -223,9 +220,7 @@ class CotAgentRunner(BaseAgentRunner, ABC):
                         llm_usage=usage_dict["usage"],
                     )
 
-                    self.queue_manager.publish(
-                        QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                    )
+                    self.publish_agent_thought(agent_thought_id)
 
                 # update prompt tool message
                 for prompt_tool in self._prompt_messages_tools:
@@ -253,6 +248,7 @@ class CotAgentRunner(BaseAgentRunner, ABC):
             answer=final_answer,
             messages_ids=[],
         )
+        self.flush_agent_thoughts()
         # publish end event
         self.queue_manager.publish(
             QueueMessageEndEvent(
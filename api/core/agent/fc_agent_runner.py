@@ -1,12 +1,18 @@
+import contextvars
+import functools
 import json
 import logging
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 from copy import deepcopy
 from typing import Any, Optional, Union
 
+from flask import current_app
+
+from configs import dify_config
 from core.agent.base_agent_runner import BaseAgentRunner
+from core.agent.tool_call_executor import ToolCallTimeoutError, run_tool_calls
 from core.app.apps.base_app_queue_manager import PublishFrom
-from core.app.entities.queue_entities import QueueAgentThoughtEvent, QueueMessageEndEvent, QueueMessageFileEvent
+from core.app.entities.queue_entities import QueueMessageEndEvent, QueueMessageFileEvent
 from core.file import file_manager
 from core.model_runtime.entities import (
     AssistantPromptMessage,
@@ -22,9 +28,12 @@ from core.model_runtime.entities import (
     UserPromptMessage,
 )
 from core.model_runtime.entities.message_entities import ImagePromptMessageContent, PromptMessageContentUnionTypes
+from core.ops.ops_trace_manager import TraceQueueManager
 from core.prompt.agent_history_prompt_transform import AgentHistoryPromptTransform
+from core.tools.__base.tool import Tool
 from core.tools.entities.tool_entities import ToolInvokeMeta
 from core.tools.tool_engine import ToolEngine
+from libs.flask_utils import preserve_flask_contexts
 from models.model import Message
 
 logger = logging.getLogger(__name__)
@@ -79,6 +88,9 @@ class FunctionCallAgentRunner(BaseAgentRunner):
                 # the last iteration, remove all tools
                 prompt_messages_tools = []
 
+            # write the thoughts of the previous iteration
+            self.flush_agent_thoughts()
+
             message_file_ids: list[str] = []
             agent_thought_id = self.create_agent_thought(
                 message_id=message.id, message="", tool_name="", tool_input="", messages_ids=message_file_ids
@@ -113,9 +125,7 @@ class FunctionCallAgentRunner(BaseAgentRunner):
                 is_first_chunk = True
                 for chunk in chunks:
                     if is_first_chunk:
-                        self.queue_manager.publish(
-                            QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                        )
+                        self.publish_agent_thought(agent_thought_id)
                         is_first_chunk = False
                     # check if there is any tool call
                     if self.check_tool_calls(chunk):
@@ -171,9 +181,7 @@ class FunctionCallAgentRunner(BaseAgentRunner):
                 if not result.message.content:
                     result.message.content = ""
 
-                self.queue_manager.publish(
-                    QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                )
+                self.publish_agent_thought(agent_thought_id)
 
                 yield LLMResultChunk(
                     model=model_instance.model,
@@ -215,61 +223,47 @@ class FunctionCallAgentRunner(BaseAgentRunner):
                 messages_ids=[],
                 llm_usage=current_llm_usage,
             )
-            self.queue_manager.publish(
-                QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-            )
+            self.publish_agent_thought(agent_thought_id)
 
             final_answer += response + "\n"
 
             # call tools
             tool_responses = []
-            for tool_call_id, tool_call_name, tool_call_args in tool_calls:
-                tool_instance = tool_instances.get(tool_call_name)
-                if not tool_instance:
-                    tool_response = {
-                        "tool_call_id": tool_call_id,
-                        "tool_call_name": tool_call_name,
-                        "tool_response": f"there is not a tool named {tool_call_name}",
-                        "meta": ToolInvokeMeta.error_instance(f"there is not a tool named {tool_call_name}").to_dict(),
-                    }
-                else:
-                    # invoke tool
-                    tool_invoke_response, message_files, tool_invoke_meta = ToolEngine.agent_invoke(
-                        tool=tool_instance,
-                        tool_parameters=tool_call_args,
-                        user_id=self.user_id,
-                        tenant_id=self.tenant_id,
+            tool_call_results: Iterable[tuple[dict[str, Any], list[str]]]
+            if dify_config.AGENT_CONCURRENT_TOOL_CALLS_ENABLED and len(tool_calls) > 1:
+                tool_call_results = self._invoke_tool_calls_concurrently(tool_instances, tool_calls, trace_manager)
+            else:
+                # invoked lazily, so that the files of each tool are published as soon as it's done
+                tool_call_results = (
+                    self._invoke_tool_call(
+                        tool_instances,
+                        tool_call_id,
+                        tool_call_name,
+                        tool_call_args,
+                        trace_manager,
                         message=self.message,
-                        invoke_from=self.application_generate_entity.invoke_from,
-                        agent_tool_callback=self.agent_callback,
-                        trace_manager=trace_manager,
-                        app_id=self.application_generate_entity.app_config.app_id,
-                        message_id=self.message.id,
                         conversation_id=self.conversation.id,
                     )
-                    # publish files
-                    for message_file_id in message_files:
-                        # publish message file
-                        self.queue_manager.publish(
-                            QueueMessageFileEvent(message_file_id=message_file_id), PublishFrom.APPLICATION_MANAGER
-                        )
-                        # add message file ids
-                        message_file_ids.append(message_file_id)
+                    for tool_call_id, tool_call_name, tool_call_args in tool_calls
+                )
 
-                    tool_response = {
-                        "tool_call_id": tool_call_id,
-                        "tool_call_name": tool_call_name,
-                        "tool_response": tool_invoke_response,
-                        "meta": tool_invoke_meta.to_dict(),
-                    }
+            for tool_response, message_files in tool_call_results:
+                # publish files
+                for message_file_id in message_files:
+                    # publish message file
+                    self.queue_manager.publish(
+                        QueueMessageFileEvent(message_file_id=message_file_id), PublishFrom.APPLICATION_MANAGER
+                    )
+                    # add message file ids
+                    message_file_ids.append(message_file_id)
 
                 tool_responses.append(tool_response)
                 if tool_response["tool_response"] is not None:
                     self._current_thoughts.append(
                         ToolPromptMessage(
                             content=str(tool_response["tool_response"]),
-                            tool_call_id=tool_call_id,
-                            name=tool_call_name,
+                            tool_call_id=tool_response["tool_call_id"],
+                            name=tool_response["tool_call_name"],
                         )
                     )
 
@@ -290,9 +284,7 @@ class FunctionCallAgentRunner(BaseAgentRunner):
                     answer="",
                     messages_ids=message_file_ids,
                 )
-                self.queue_manager.publish(
-                    QueueAgentThoughtEvent(agent_thought_id=agent_thought_id), PublishFrom.APPLICATION_MANAGER
-                )
+                self.publish_agent_thought(agent_thought_id)
 
             # update prompt tool
             for prompt_tool in prompt_messages_tools:
@@ -300,6 +292,7 @@ class FunctionCallAgentRunner(BaseAgentRunner):
 
             iteration_step += 1
 
+        self.flush_agent_thoughts()
         # publish end event
         self.queue_manager.publish(
             QueueMessageEndEvent(
@@ -376,6 +369,114 @@ class FunctionCallAgentRunner(BaseAgentRunner):
 
         return tool_calls
 
+    def _invoke_tool_call(
+        self,
+        tool_instances: dict[str, Tool],
+        tool_call_id: str,
+        tool_call_name: str,
+        tool_call_args: dict[str, Any],
+        trace_manager: Optional[TraceQueueManager],
+        message: Message,
+        conversation_id: str,
+    ) -> tuple[dict[str, Any], list[str]]:
+        """
+        Invoke the tool of a tool call
+
+        :param message: message the files created by the tool belong to
+        :param conversation_id: conversation id
+        :return: the tool response and the ids of the message files it created
+        """
+        tool_instance = tool_instances.get(tool_call_name)
+        if not tool_instance:
+            return self._error_tool_response(
+                tool_call_id, tool_call_name, f"there is not a tool named {tool_call_name}"
+            ), []
+
+        # invoke tool
+        tool_invoke_response, message_files, tool_invoke_meta = ToolEngine.agent_invoke(
+            tool=tool_instance,
+            tool_parameters=tool_call_args,
+            user_id=self.user_id,
+            tenant_id=self.tenant_id,
+            message=message,
+            invoke_from=self.application_generate_entity.invoke_from,
+            agent_tool_callback=self.agent_callback,
+            trace_manager=trace_manager,
+            app_id=self.application_generate_entity.app_config.app_id,
+            message_id=message.id,
+            conversation_id=conversation_id,
+        )
+        tool_response = {
+            "tool_call_id": tool_call_id,
+            "tool_call_name": tool_call_name,
+            "tool_response": tool_invoke_response,
+            "meta": tool_invoke_meta.to_dict(),
+        }
+        return tool_response, message_files
+
+    def _invoke_tool_calls_concurrently(
+        self,
+        tool_instances: dict[str, Tool],
+        tool_calls: list[tuple[str, str, dict[str, Any]]],
+        trace_manager: Optional[TraceQueueManager],
+    ) -> list[tuple[dict[str, Any], list[str]]]:
+        """
+        Invoke the tools of the tool calls of one model response concurrently
+
+        At most AGENT_MAX_CONCURRENT_TOOL_CALLS tools run at the same time, each limited to AGENT_TOOL_CALL_TIMEOUT.
+        A tool call that fails or times out gets an error response without affecting the others, and the
+        results keep the order of the tool calls. A tool call that times out keeps running in its thread, the
+        message files it creates afterwards are saved but not published.
+        """
+        flask_app = current_app._get_current_object()  # type: ignore
+        context = contextvars.copy_context()
+        # the message and the conversation are bound to the session of this thread, the threads only get their ids
+        message = Message(id=self.message.id, conversation_id=self.conversation.id)
+        conversation_id = self.conversation.id
+
+        def invoke(tool_call_id: str, tool_call_name: str, tool_call_args: dict[str, Any]):
+            # each thread gets its own app context and so its own database session
+            with preserve_flask_contexts(flask_app, context_vars=context):
+                return self._invoke_tool_call(
+                    tool_instances,
+                    tool_call_id,
+                    tool_call_name,
+                    tool_call_args,
+                    trace_manager,
+                    message=message,
+                    conversation_id=conversation_id,
+                )
+
+        outcomes = run_tool_calls(
+            [functools.partial(invoke, *tool_call) for tool_call in tool_calls],
+            max_workers=dify_config.AGENT_MAX_CONCURRENT_TOOL_CALLS,
+            timeout=dify_config.AGENT_TOOL_CALL_TIMEOUT,
+        )
+
+        results: list[tuple[dict[str, Any], list[str]]] = []
+        for (tool_call_id, tool_call_name, _), outcome in zip(tool_calls, outcomes):
+            if isinstance(outcome, ToolCallTimeoutError):
+                error = (
+                    f"tool invoke timeout: {tool_call_name} did not respond in {dify_config.AGENT_TOOL_CALL_TIMEOUT}s"
+                )
+                results.append((self._error_tool_response(tool_call_id, tool_call_name, error), []))
+            elif isinstance(outcome, BaseException):
+                logger.error("Tool call %s failed", tool_call_name, exc_info=outcome)
+                error = f"tool invoke error: {outcome}"
+                results.append((self._error_tool_response(tool_call_id, tool_call_name, error), []))
+            else:
+                results.append(outcome)
+        return results
+
+    @staticmethod
+    def _error_tool_response(tool_call_id: str, tool_call_name: str, error: str) -> dict[str, Any]:
+        return {
+            "tool_call_id": tool_call_id,
+            "tool_call_name": tool_call_name,
+            "tool_response": error,
+            "meta": ToolInvokeMeta.error_instance(error).to_dict(),
+        }
+
     def _init_system_message(self, prompt_template: str, prompt_messages: list[PromptMessage]) -> list[PromptMessage]:
         """
         Initialize system message
@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# how often the timeouts of the running calls are checked while none completes
+_POLL_INTERVAL = 0.1
+
+
+class ToolCallTimeoutError(Exception):
+    """Raised in place of the result of a tool call that didn't complete before its timeout."""
+
+
+def run_tool_calls(
+    calls: Sequence[Callable[[], T]], max_workers: int, timeout: Optional[float] = None
+) -> list[Union[T, BaseException]]:
+    """
+    Run tool calls concurrently in a pool of threads and collect their outcomes in the order of the calls.
+
+    A call that raises gets its exception in place of a result instead of failing the others. The timeout of
+    a call starts when it starts running, so calls waiting for a free thread aren't penalized. A call that
+    times out is left to complete in its thread, which stays busy until then, and its result is dropped.
+    :param calls: functions without arguments, one per tool call
+    :param max_workers: maximum number of calls running at the same time
+    :param timeout: seconds each call may run, no limit when None or 0
+    :return: the result or the exception of each call
+    """
+    outcomes: list[Union[T, BaseException, None]] = [None] * len(calls)
+    started_at: dict[int, float] = {}
+    lock = threading.Lock()
+
+    def run(index: int, call: Callable[[], T]) -> T:
+        with lock:
+            started_at[index] = time.monotonic()
+        return call()
+
+    executor = ThreadPoolExecutor(max_workers=max(min(max_workers, len(calls)), 1), thread_name_prefix="tool_call")
+    try:
+        futures: dict[Future, int] = {executor.submit(run, index, call): index for index, call in enumerate(calls)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=_POLL_INTERVAL if timeout else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                exception = future.exception()
+                outcomes[index] = exception if exception is not None else future.result()
+
+            if not timeout:
+                continue
+            now = time.monotonic()
+            with lock:
+                timed_out = {
+                    future
+                    for future in pending
+                    if futures[future] in started_at and now - started_at[futures[future]] >= timeout
+                }
+            for future in timed_out:
+                logger.warning("Tool call %s did not complete in %ss", futures[future], timeout)
+                outcomes[futures[future]] = ToolCallTimeoutError(f"tool call did not complete in {timeout}s")
+            pending -= timed_out
+    finally:
+        # don't wait for the calls that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outcomes  # type: ignore[return-value]
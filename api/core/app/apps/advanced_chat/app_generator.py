@@ -22,6 +22,7 @@ from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.apps.exc import GenerateTaskStoppedError
 from core.app.apps.message_based_app_generator import MessageBasedAppGenerator
 from core.app.apps.message_based_app_queue_manager import MessageBasedAppQueueManager
+from core.app.apps.worker_pool import app_worker_pool
 from core.app.entities.app_invoke_entities import AdvancedChatAppGenerateEntity, InvokeFrom
 from core.app.entities.task_entities import ChatbotAppBlockingResponse, ChatbotAppStreamResponse
 from core.helper.trace_id_helper import extract_external_trace_id_from_args
@@ -406,49 +407,47 @@ class AdvancedChatAppGenerator(MessageBasedAppGenerator):
         :param conversation: conversation
         :param stream: is stream
         """
-        is_first_conversation = False
-        if not conversation:
-            is_first_conversation = True
-
-        # init generate records
-        (conversation, message) = self._init_generate_records(application_generate_entity, conversation)
-
-        if is_first_conversation:
-            # update conversation features
-            conversation.override_model_configs = workflow.features
-            db.session.commit()
-            db.session.refresh(conversation)
-
-        # get conversation dialogue count
-        self._dialogue_count = get_thread_messages_length(conversation.id)
-
-        # init queue manager
-        queue_manager = MessageBasedAppQueueManager(
-            task_id=application_generate_entity.task_id,
-            user_id=application_generate_entity.user_id,
-            invoke_from=application_generate_entity.invoke_from,
-            conversation_id=conversation.id,
-            app_mode=conversation.mode,
-            message_id=message.id,
-        )
+        # fail fast when the workers of the process are saturated, before any record is created
+        with app_worker_pool.reserve(application_generate_entity.app_config.tenant_id) as reservation:
+            is_first_conversation = False
+            if not conversation:
+                is_first_conversation = True
+
+            # init generate records
+            (conversation, message) = self._init_generate_records(application_generate_entity, conversation)
+
+            if is_first_conversation:
+                # update conversation features
+                conversation.override_model_configs = workflow.features
+                db.session.commit()
+                db.session.refresh(conversation)
+
+            # get conversation dialogue count
+            self._dialogue_count = get_thread_messages_length(conversation.id)
+
+            # init queue manager
+            queue_manager = MessageBasedAppQueueManager(
+                task_id=application_generate_entity.task_id,
+                user_id=application_generate_entity.user_id,
+                invoke_from=application_generate_entity.invoke_from,
+                conversation_id=conversation.id,
+                app_mode=conversation.mode,
+                message_id=message.id,
+            )
 
-        # new thread with request context and contextvars
-        context = contextvars.copy_context()
-
-        worker_thread = threading.Thread(
-            target=self._generate_worker,
-            kwargs={
-                "flask_app": current_app._get_current_object(),  # type: ignore
-                "application_generate_entity": application_generate_entity,
-                "queue_manager": queue_manager,
-                "conversation_id": conversation.id,
-                "message_id": message.id,
-                "context": context,
-                "variable_loader": variable_loader,
-            },
-        )
+            # new thread with request context and contextvars
+            context = contextvars.copy_context()
 
-        worker_thread.start()
+            reservation.submit(
+                self._generate_worker,
+                flask_app=current_app._get_current_object(),  # type: ignore
+                application_generate_entity=application_generate_entity,
+                queue_manager=queue_manager,
+                conversation_id=conversation.id,
+                message_id=message.id,
+                context=context,
+                variable_loader=variable_loader,
+            )
 
         # return response or stream generator
         response = self._handle_advanced_chat_response(
@@ -228,9 +228,13 @@ class AgentChatAppRunner(AppRunner):
         )
 
         # handle invoke result
-        self._handle_invoke_result(
-            invoke_result=invoke_result,
-            queue_manager=queue_manager,
-            stream=application_generate_entity.stream,
-            agent=True,
-        )
+        try:
+            self._handle_invoke_result(
+                invoke_result=invoke_result,
+                queue_manager=queue_manager,
+                stream=application_generate_entity.stream,
+                agent=True,
+            )
+        finally:
+            # keep the buffered thoughts of a run that failed or was stopped
+            runner.flush_agent_thoughts()
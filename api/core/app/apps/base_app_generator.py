@@ -4,7 +4,9 @@ from typing import TYPE_CHECKING, Any, Optional, Union, final
 
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.app.app_config.entities import VariableEntityType
+from core.app.apps.stream_response_serializer import to_sse_frame
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.file import File, FileUploadConfig
 from core.workflow.nodes.enums import NodeType
@@ -162,6 +164,11 @@ class BaseAppGenerator:
         else:
 
             def gen():
+                if dify_config.STREAM_RESPONSE_ORJSON_ENABLED:
+                    for message in generator:
+                        yield to_sse_frame(message)
+                    return
+
                 for message in generator:
                     if isinstance(message, Mapping | dict):
                         yield f"data: {json.dumps(message)}\n\n"
@@ -1,12 +1,15 @@
 import queue
 import time
 from abc import abstractmethod
+from collections.abc import Mapping
 from enum import Enum
 from typing import Any, Optional
 
+from pydantic import BaseModel
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.text_chunk_coalescer import TextChunkCoalescer
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
@@ -51,14 +54,24 @@ class AppQueueManager:
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
         start_time = time.time()
         last_ping_time: int | float = 0
+        coalescer = TextChunkCoalescer() if dify_config.STREAM_TEXT_CHUNK_COALESCE_ENABLED else None
         while True:
             try:
-                message = self._q.get(timeout=1)
+                # held text chunks are sent once their window elapses, even if no other message comes
+                timeout = coalescer.timeout() if coalescer else None
+                message = self._q.get(timeout=1 if timeout is None else min(timeout, 1))
                 if message is None:
+                    if coalescer:
+                        yield from coalescer.flush()
                     break
 
-                yield message
+                if coalescer:
+                    yield from coalescer.push(message)
+                else:
+                    yield message
             except queue.Empty:
+                if coalescer:
+                    yield from coalescer.flush()
                 continue
             finally:
                 elapsed_time = time.time() - start_time
@@ -96,7 +109,7 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        self._check_for_sqlalchemy_models(event)
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -157,11 +170,16 @@ class AppQueueManager:
         return f"generate_task_stopped:{task_id}"
 
     def _check_for_sqlalchemy_models(self, data: Any):
-        # from entity to dict or list
-        if isinstance(data, dict):
-            for key, value in data.items():
+        # the event is walked as is, dumping it to a dict would copy every node output it carries
+        if isinstance(data, str | int | float | bool | None):
+            return
+        if isinstance(data, BaseModel):
+            for value in data.__dict__.values():
+                self._check_for_sqlalchemy_models(value)
+        elif isinstance(data, Mapping):
+            for value in data.values():
                 self._check_for_sqlalchemy_models(value)
-        elif isinstance(data, list):
+        elif isinstance(data, list | tuple):
             for item in data:
                 self._check_for_sqlalchemy_models(item)
         else:
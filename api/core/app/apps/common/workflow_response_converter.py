@@ -6,6 +6,7 @@ from typing import Any, Optional, Union, cast
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.app.entities.app_invoke_entities import AdvancedChatAppGenerateEntity, WorkflowAppGenerateEntity
 from core.app.entities.queue_entities import (
     QueueAgentLogEvent,
@@ -43,12 +44,14 @@ from core.app.entities.task_entities import (
     WorkflowStartStreamResponse,
 )
 from core.file import FILE_MODEL_IDENTITY, File
+from core.repositories.node_execution_payload_store import node_execution_payload_store
 from core.tools.tool_manager import ToolManager
 from core.variables.segments import ArrayFileSegment, FileSegment, Segment
 from core.workflow.entities.workflow_execution import WorkflowExecution
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution, WorkflowNodeExecutionStatus
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.tool.entities import ToolNodeData
+from core.workflow.utils.payload_truncation import truncate_payload
 from core.workflow.workflow_type_encoder import WorkflowRuntimeTypeConverter
 from models import (
     Account,
@@ -205,6 +208,12 @@ class WorkflowResponseConverter:
             return None
 
         json_converter = WorkflowRuntimeTypeConverter()
+        # large payloads are streamed as previews, the full ones are saved with the node execution
+        inputs, inputs_truncated = self._stream_payload(workflow_node_execution.inputs)
+        process_data, process_data_truncated = self._stream_payload(workflow_node_execution.process_data)
+        outputs, outputs_truncated = self._stream_payload(
+            json_converter.to_json_encodable(workflow_node_execution.outputs)
+        )
 
         return NodeFinishStreamResponse(
             task_id=task_id,
@@ -216,9 +225,9 @@ class WorkflowResponseConverter:
                 index=workflow_node_execution.index,
                 title=workflow_node_execution.title,
                 predecessor_node_id=workflow_node_execution.predecessor_node_id,
-                inputs=workflow_node_execution.inputs,
-                process_data=workflow_node_execution.process_data,
-                outputs=json_converter.to_json_encodable(workflow_node_execution.outputs),
+                inputs=inputs,
+                process_data=process_data,
+                outputs=outputs,
                 status=workflow_node_execution.status,
                 error=workflow_node_execution.error,
                 elapsed_time=workflow_node_execution.elapsed_time,
@@ -232,9 +241,18 @@ class WorkflowResponseConverter:
                 parent_parallel_start_node_id=event.parent_parallel_start_node_id,
                 iteration_id=event.in_iteration_id,
                 loop_id=event.in_loop_id,
+                truncated=inputs_truncated or process_data_truncated or outputs_truncated,
             ),
         )
 
+    @staticmethod
+    def _stream_payload(value: Optional[Mapping[str, Any]]) -> tuple[Optional[Mapping[str, Any]], bool]:
+        """The payload streamed in node finished events, the preview of the database when it's offloaded"""
+        preview, offloaded = node_execution_payload_store.preview(value)
+        if offloaded:
+            return preview, True
+        return truncate_payload(value, dify_config.STREAM_RESPONSE_NODE_PAYLOAD_MAX_BYTES)
+
     def workflow_node_retry_to_stream_response(
         self,
         *,
@@ -0,0 +1,44 @@
+"""
+Serialization of app responses with orjson.
+
+Stream responses are converted to dicts and written as SSE frames, one per event. The standard json module
+walks every event in Python and builds a str that is encoded again by the server, orjson writes the bytes of
+the frame directly. Types orjson doesn't know are converted like jsonable_encoder does, and the rare values
+it refuses, like integers beyond 64 bits, fall back to the json module.
+"""
+
+import json
+import logging
+from collections.abc import Mapping
+from typing import Any
+
+import orjson
+
+from core.model_runtime.utils.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+# enum and int keys, e.g. of execution metadata, are written as strings like the json module does
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialize a response to JSON.
+    :param data: dicts, lists, pydantic models and the types jsonable_encoder supports
+    :return: UTF-8 encoded JSON
+    """
+    try:
+        return orjson.dumps(data, default=jsonable_encoder, option=_OPTIONS)
+    except orjson.JSONEncodeError:
+        logger.debug("orjson can't serialize the response, using json", exc_info=True)
+        return json.dumps(jsonable_encoder(data)).encode()
+
+
+def to_sse_frame(message: Mapping[str, Any] | str) -> bytes:
+    """
+    Frame a message of an event stream, a mapping as data, a string as the name of an event, e.g. ping.
+    """
+    if isinstance(message, str):
+        return b"event: " + message.encode() + b"\n\n"
+    return b"data: " + dumps(message) + b"\n\n"
@@ -0,0 +1,126 @@
+"""
+Merging of the text chunks of a streamed answer.
+
+Models stream an answer token by token, and every chunk is published as an event, turned into a stream
+response and written to the client as an SSE frame. Most of the cost of a stream is paid per frame, so the
+coalescer holds the text chunks published within a short window and merges the consecutive ones of the same
+answer into one, sent once the window elapses, the merged text reaches a size limit, or another event comes.
+"""
+
+import time
+from typing import Optional, cast
+
+from configs import dify_config
+from core.app.entities.queue_entities import (
+    MessageQueueMessage,
+    QueueLLMChunkEvent,
+    QueueTextChunkEvent,
+    WorkflowQueueMessage,
+)
+
+QueueMessageT = WorkflowQueueMessage | MessageQueueMessage
+
+
+class TextChunkCoalescer:
+    def __init__(self, window: Optional[float] = None, max_bytes: Optional[int] = None):
+        """
+        :param window: seconds the first held chunk waits for others, STREAM_TEXT_CHUNK_COALESCE_WINDOW_MS if None
+        :param max_bytes: size of the merged text sent right away, STREAM_TEXT_CHUNK_COALESCE_MAX_BYTES if None
+        """
+        self._window = window if window is not None else dify_config.STREAM_TEXT_CHUNK_COALESCE_WINDOW_MS / 1000
+        self._max_bytes = max_bytes if max_bytes is not None else dify_config.STREAM_TEXT_CHUNK_COALESCE_MAX_BYTES
+        self._pending: list[QueueMessageT] = []
+        self._pending_key: Optional[tuple] = None
+        self._pending_bytes = 0
+        self._deadline = 0.0
+
+    def timeout(self) -> Optional[float]:
+        """
+        Seconds left before the held chunks must be sent, None when no chunk is held.
+        """
+        if not self._pending:
+            return None
+        return max(self._deadline - time.monotonic(), 0.0)
+
+    def push(self, message: QueueMessageT) -> list[QueueMessageT]:
+        """
+        Add a message of the queue.
+        :return: the messages to send now, in order
+        """
+        key = _coalesce_key(message)
+        if key is None:
+            return [*self.flush(), message]
+
+        ready = []
+        if self._pending and key != self._pending_key:
+            ready = self.flush()
+        if not self._pending:
+            self._pending_key = key
+            self._deadline = time.monotonic() + self._window
+        self._pending.append(message)
+        self._pending_bytes += len(_chunk_text(message).encode())
+
+        if self._pending_bytes >= self._max_bytes or time.monotonic() >= self._deadline or _closes_batch(message):
+            ready.extend(self.flush())
+        return ready
+
+    def flush(self) -> list[QueueMessageT]:
+        """
+        Merge the held chunks.
+        :return: the merged message, or nothing when no chunk is held
+        """
+        if not self._pending:
+            return []
+        pending = self._pending
+        self._pending = []
+        self._pending_key = None
+        self._pending_bytes = 0
+        if len(pending) == 1:
+            return pending
+        return [_merge(pending)]
+
+
+def _coalesce_key(message: QueueMessageT) -> Optional[tuple]:
+    """What chunks must share to be merged, None for the events that aren't merged"""
+    event = message.event
+    if isinstance(event, QueueTextChunkEvent):
+        selector = tuple(event.from_variable_selector) if event.from_variable_selector else None
+        return "text", selector, event.in_iteration_id, event.in_loop_id
+    if isinstance(event, QueueLLMChunkEvent):
+        delta = event.chunk.delta
+        if isinstance(delta.message.content, str) and not delta.message.tool_calls:
+            return "llm", event.chunk.model
+    return None
+
+
+def _closes_batch(message: QueueMessageT) -> bool:
+    """The last chunk of an LLM result carries its usage, no chunk is merged after it"""
+    event = message.event
+    return isinstance(event, QueueLLMChunkEvent) and (
+        event.chunk.delta.usage is not None or event.chunk.delta.finish_reason is not None
+    )
+
+
+def _chunk_text(message: QueueMessageT) -> str:
+    event = message.event
+    if isinstance(event, QueueTextChunkEvent):
+        return event.text
+    return str(cast(QueueLLMChunkEvent, event).chunk.delta.message.content or "")
+
+
+def _merge(messages: list[QueueMessageT]) -> QueueMessageT:
+    text = "".join(_chunk_text(message) for message in messages)
+    last_event = messages[-1].event
+    if isinstance(last_event, QueueTextChunkEvent):
+        return messages[-1].model_copy(update={"event": last_event.model_copy(update={"text": text})})
+
+    # chunks of the same key are all LLM chunks
+    first, last = cast(QueueLLMChunkEvent, messages[0].event), cast(QueueLLMChunkEvent, last_event)
+    delta = last.chunk.delta
+    chunk = last.chunk.model_copy(
+        update={
+            "prompt_messages": first.chunk.prompt_messages or last.chunk.prompt_messages,
+            "delta": delta.model_copy(update={"message": delta.message.model_copy(update={"content": text})}),
+        }
+    )
+    return messages[-1].model_copy(update={"event": last.model_copy(update={"chunk": chunk})})
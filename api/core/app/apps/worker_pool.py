@@ -0,0 +1,218 @@
+"""
+Bounded pool of worker threads running app generations.
+
+Every workflow and advanced chat generation runs its graph in a worker thread, while the request streams
+the events it publishes. Without a bound, a burst of requests starts as many threads as there are requests.
+The pool caps the workers of a process, queues the generations waiting for one, serves the queued generations
+of tenants in turn so that a busy tenant can't delay the others, and rejects generations right away once its
+queue is full.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from configs import dify_config
+from core.errors.error import AppWorkerPoolBusyError
+
+logger = logging.getLogger(__name__)
+
+# seconds an idle worker waits for a generation before it exits
+_WORKER_IDLE_TIMEOUT = 60
+
+# set in the context of the generations run by workers, and copied to the threads they start for parallel
+# branches and iterations
+_in_worker: contextvars.ContextVar[bool] = contextvars.ContextVar("app_worker_pool_in_worker", default=False)
+
+
+@dataclass
+class _Task:
+    tenant_id: str
+    fn: Callable[..., None]
+    kwargs: dict[str, Any]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class WorkerReservation:
+    """
+    A place in the pool reserved for a generation before it's ready to run.
+
+    Used as a context manager, the place is given back if the generation isn't submitted, e.g. when preparing
+    it fails.
+    """
+
+    def __init__(self, pool: Optional["AppWorkerPool"], tenant_id: str):
+        self._pool = pool
+        self._tenant_id = tenant_id
+        self._done = False
+
+    def submit(self, fn: Callable[..., None], **kwargs: Any):
+        """
+        Run the generation worker in the pool, or in a new thread when the pool is disabled.
+        """
+        if self._done:
+            raise RuntimeError("The reservation was already used")
+        self._done = True
+        if self._pool is None:
+            threading.Thread(target=fn, kwargs=kwargs).start()
+            return
+        self._pool._submit(_Task(tenant_id=self._tenant_id, fn=fn, kwargs=kwargs))
+
+    def cancel(self):
+        if self._done:
+            return
+        self._done = True
+        if self._pool is not None:
+            self._pool._cancel(self._tenant_id)
+
+    def __enter__(self) -> "WorkerReservation":
+        return self
+
+    def __exit__(self, *args):
+        self.cancel()
+
+
+class AppWorkerPool:
+    def __init__(self):
+        self._condition = threading.Condition()
+        # queued tasks per tenant, and the tenants with queued tasks in the order they are served
+        self._queues: dict[str, deque[_Task]] = {}
+        self._turns: deque[str] = deque()
+        # generations admitted per tenant, reserved, queued or running
+        self._admitted: dict[str, int] = defaultdict(int)
+        self._reserved = 0
+        self._queued = 0
+        self._running = 0
+        self._workers = 0
+        self._idle_workers = 0
+        # metrics of this process
+        self._rejected = 0
+        self._started = 0
+        self._queue_time_total = 0.0
+        self._queue_time_max = 0.0
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.APP_WORKER_POOL_ENABLED
+
+    def reserve(self, tenant_id: str) -> WorkerReservation:
+        """
+        Reserve a place for a generation of the tenant.
+        :raises AppWorkerPoolBusyError: when the pool or the share of the tenant is full
+        """
+        # a generation started by a worker of the pool, e.g. a workflow run as a tool, waits for the nested one,
+        # queueing it could wait for a worker forever
+        if not self.is_enabled() or _in_worker.get():
+            return WorkerReservation(None, tenant_id)
+
+        max_per_tenant = dify_config.APP_WORKER_POOL_MAX_PER_TENANT
+        with self._condition:
+            capacity = dify_config.APP_WORKER_POOL_MAX_WORKERS + dify_config.APP_WORKER_POOL_MAX_QUEUE_SIZE
+            if self._running + self._queued + self._reserved >= capacity:
+                self._rejected += 1
+                raise AppWorkerPoolBusyError("Too many requests are running, please try again later.")
+            if max_per_tenant and self._admitted[tenant_id] >= max_per_tenant:
+                self._rejected += 1
+                raise AppWorkerPoolBusyError(
+                    f"Too many requests of the workspace are running, the maximum is {max_per_tenant}."
+                    " Please try again later."
+                )
+            self._admitted[tenant_id] += 1
+            self._reserved += 1
+        return WorkerReservation(self, tenant_id)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Load and queue time metrics of the pool in this process.
+        """
+        with self._condition:
+            return {
+                "workers": self._workers,
+                "running": self._running,
+                "queued": self._queued,
+                "reserved": self._reserved,
+                "rejected": self._rejected,
+                "started": self._started,
+                "avg_queue_time": self._queue_time_total / self._started if self._started else 0.0,
+                "max_queue_time": self._queue_time_max,
+            }
+
+    def _submit(self, task: _Task):
+        with self._condition:
+            self._reserved -= 1
+            queue = self._queues.get(task.tenant_id)
+            if queue is None:
+                queue = self._queues[task.tenant_id] = deque()
+                self._turns.append(task.tenant_id)
+            queue.append(task)
+            self._queued += 1
+            if self._idle_workers == 0 and self._workers < dify_config.APP_WORKER_POOL_MAX_WORKERS:
+                self._workers += 1
+                threading.Thread(target=self._work, name=f"app_worker_{self._workers}", daemon=True).start()
+            else:
+                self._condition.notify()
+
+    def _cancel(self, tenant_id: str):
+        with self._condition:
+            self._reserved -= 1
+            self._release_tenant(tenant_id)
+
+    def _release_tenant(self, tenant_id: str):
+        self._admitted[tenant_id] -= 1
+        if self._admitted[tenant_id] <= 0:
+            self._admitted.pop(tenant_id, None)
+
+    def _next_task(self) -> Optional[_Task]:
+        """Take the next task, from the tenant whose turn it is, or None when the worker should exit"""
+        with self._condition:
+            while not self._turns:
+                self._idle_workers += 1
+                notified = self._condition.wait(_WORKER_IDLE_TIMEOUT)
+                self._idle_workers -= 1
+                if not notified and not self._turns:
+                    self._workers -= 1
+                    return None
+
+            tenant_id = self._turns.popleft()
+            queue = self._queues[tenant_id]
+            task = queue.popleft()
+            if queue:
+                # the tenant's next task waits for the tasks of the other tenants
+                self._turns.append(tenant_id)
+            else:
+                del self._queues[tenant_id]
+            self._queued -= 1
+            self._running += 1
+
+            queue_time = time.monotonic() - task.enqueued_at
+            self._started += 1
+            self._queue_time_total += queue_time
+            self._queue_time_max = max(self._queue_time_max, queue_time)
+        if queue_time > 1:
+            logger.info("App generation of tenant %s waited %.2fs for a worker", tenant_id, queue_time)
+        return task
+
+    def _work(self):
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            try:
+                # workers are reused, the context vars a generation sets must not leak into the next one
+                context = contextvars.Context()
+                context.run(_in_worker.set, True)
+                context.run(task.fn, **task.kwargs)
+            except Exception:
+                logger.exception("App generation worker of tenant %s failed", task.tenant_id)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._release_tenant(task.tenant_id)
+
+
+app_worker_pool = AppWorkerPool()
@@ -16,6 +16,7 @@ from core.app.app_config.features.file_upload.manager import FileUploadConfigMan
 from core.app.apps.base_app_generator import BaseAppGenerator
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.apps.exc import GenerateTaskStoppedError
+from core.app.apps.worker_pool import app_worker_pool
 from core.app.apps.workflow.app_config_manager import WorkflowAppConfigManager
 from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
 from core.app.apps.workflow.app_runner import WorkflowAppRunner
@@ -216,33 +217,31 @@ class WorkflowAppGenerator(BaseAppGenerator):
         :param streaming: is stream
         :param workflow_thread_pool_id: workflow thread pool id
         """
-        # init queue manager
-        queue_manager = WorkflowAppQueueManager(
-            task_id=application_generate_entity.task_id,
-            user_id=application_generate_entity.user_id,
-            invoke_from=application_generate_entity.invoke_from,
-            app_mode=app_model.mode,
-        )
+        # fail fast when the workers of the process are saturated
+        with app_worker_pool.reserve(app_model.tenant_id) as reservation:
+            # init queue manager
+            queue_manager = WorkflowAppQueueManager(
+                task_id=application_generate_entity.task_id,
+                user_id=application_generate_entity.user_id,
+                invoke_from=application_generate_entity.invoke_from,
+                app_mode=app_model.mode,
+            )
 
-        # new thread with request context and contextvars
-        context = contextvars.copy_context()
-
-        # release database connection, because the following new thread operations may take a long time
-        db.session.close()
-
-        worker_thread = threading.Thread(
-            target=self._generate_worker,
-            kwargs={
-                "flask_app": current_app._get_current_object(),  # type: ignore
-                "application_generate_entity": application_generate_entity,
-                "queue_manager": queue_manager,
-                "context": context,
-                "workflow_thread_pool_id": workflow_thread_pool_id,
-                "variable_loader": variable_loader,
-            },
-        )
+            # new thread with request context and contextvars
+            context = contextvars.copy_context()
 
-        worker_thread.start()
+            # release database connection, because the following new thread operations may take a long time
+            db.session.close()
+
+            reservation.submit(
+                self._generate_worker,
+                flask_app=current_app._get_current_object(),  # type: ignore
+                application_generate_entity=application_generate_entity,
+                queue_manager=queue_manager,
+                context=context,
+                workflow_thread_pool_id=workflow_thread_pool_id,
+                variable_loader=variable_loader,
+            )
 
         draft_var_saver_factory = self._get_draft_var_saver_factory(
             invoke_from,
@@ -586,6 +586,20 @@ class QueueNodeFailedEvent(AppQueueEvent):
     error: str
 
 
+class AgentThoughtSnapshot(BaseModel):
+    """
+    State of an agent thought that isn't written to the database yet
+    """
+
+    position: int
+    thought: Optional[str] = None
+    observation: Optional[str] = None
+    tool: Optional[str] = None
+    tool_labels: Optional[dict] = None
+    tool_input: Optional[str] = None
+    message_files: Optional[list[str]] = None
+
+
 class QueueAgentThoughtEvent(AppQueueEvent):
     """
     QueueAgentThoughtEvent entity
@@ -593,6 +607,8 @@ class QueueAgentThoughtEvent(AppQueueEvent):
 
     event: QueueEvent = QueueEvent.AGENT_THOUGHT
     agent_thought_id: str
+    # set when the thought is buffered by the runner, the thought is loaded from the database otherwise
+    agent_thought: Optional[AgentThoughtSnapshot] = None
 
 
 class QueueMessageFileEvent(AppQueueEvent):
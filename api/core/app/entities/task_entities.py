@@ -2,8 +2,9 @@ from collections.abc import Mapping, Sequence
 from enum import Enum
 from typing import Any, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, computed_field
 
+from configs import dify_config
 from core.model_runtime.entities.llm_entities import LLMResult, LLMUsage
 from core.model_runtime.utils.encoders import jsonable_encoder
 from core.rag.entities.citation_metadata import RetrievalSourceMetadata
@@ -48,7 +49,27 @@ class WorkflowTaskState(TaskState):
     WorkflowTaskState entity
     """
 
-    answer: str = ""
+    # the streamed answer is kept in parts and joined when read, growing a string chunk by chunk copies it every time
+    _answer_parts: list[str] = PrivateAttr(default_factory=list)
+
+    def __init__(self, answer: str = "", **data: Any):
+        super().__init__(**data)
+        if answer:
+            self._answer_parts.append(answer)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def answer(self) -> str:
+        if len(self._answer_parts) > 1:
+            self._answer_parts = ["".join(self._answer_parts)]
+        return self._answer_parts[0] if self._answer_parts else ""
+
+    @answer.setter
+    def answer(self, answer: str):
+        self._answer_parts = [answer]
+
+    def append_answer(self, text: str):
+        self._answer_parts.append(text)
 
 
 class StreamEvent(Enum):
@@ -93,6 +114,9 @@ class StreamResponse(BaseModel):
     task_id: str
 
     def to_dict(self):
+        if dify_config.STREAM_RESPONSE_ORJSON_ENABLED:
+            # serialized by pydantic-core, only the values it doesn't know go through jsonable_encoder
+            return self.model_dump(mode="json", by_alias=True, fallback=jsonable_encoder)
         return jsonable_encoder(self)
 
 
@@ -332,6 +356,8 @@ class NodeFinishStreamResponse(StreamResponse):
         parent_parallel_start_node_id: Optional[str] = None
         iteration_id: Optional[str] = None
         loop_id: Optional[str] = None
+        truncated: bool = False
+        """whether inputs, process data or outputs are previews of payloads too large to stream"""
 
     event: StreamEvent = StreamEvent.NODE_FINISHED
     workflow_run_id: str
@@ -472,6 +472,13 @@ class EasyUIBasedGenerateTaskPipeline(BasedGenerateTaskPipeline):
         :param event: agent thought event
         :return:
         """
+        if event.agent_thought is not None:
+            return AgentThoughtStreamResponse(
+                task_id=self._application_generate_entity.task_id,
+                id=event.agent_thought_id,
+                **event.agent_thought.model_dump(),
+            )
+
         agent_thought: Optional[MessageAgentThought] = (
             db.session.query(MessageAgentThought).where(MessageAgentThought.id == event.agent_thought_id).first()
         )
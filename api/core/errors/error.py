@@ -43,6 +43,14 @@ class AppInvokeQuotaExceededError(ValueError):
     description = "App Invoke Quota Exceeded"
 
 
+class AppWorkerPoolBusyError(AppInvokeQuotaExceededError):
+    """
+    Custom exception raised when the app workers of the process can't take another generation.
+    """
+
+    description = "App Workers Busy"
+
+
 class ModelCurrentlyNotSupportError(ValueError):
     """
     Custom exception raised when the model not support
@@ -1,5 +1,11 @@
 import base64
+import io
+import logging
+import threading
 from collections.abc import Mapping
+from typing import Optional
+
+from cachetools import TTLCache
 
 from configs import dify_config
 from core.helper import ssrf_proxy
@@ -18,6 +24,16 @@ from . import helpers
 from .enums import FileAttribute
 from .models import File, FileTransferMethod, FileType
 
+logger = logging.getLogger(__name__)
+
+# base64 payloads of files keyed by file identity and image detail, sized by payload length
+_encoded_string_cache: TTLCache = TTLCache(
+    maxsize=dify_config.MULTIMODAL_ENCODED_CACHE_MAX_BYTES,
+    ttl=dify_config.MULTIMODAL_ENCODED_CACHE_TTL,
+    getsizeof=len,
+)
+_encoded_string_cache_lock = threading.Lock()
+
 
 def get_attr(*, file: File, attr: FileAttribute):
     match attr:
@@ -82,15 +98,21 @@ def to_prompt_message_content(
         # For unsupported file types, return a text description
         return TextPromptMessageContent(data=f"[Unsupported file type: {f.filename} ({f.type.value})]")
 
+    image_detail = None
+    if f.type == FileType.IMAGE:
+        image_detail = image_detail_config or ImagePromptMessageContent.DETAIL.LOW
+
     # Process supported file types
     params = {
-        "base64_data": _get_encoded_string(f) if dify_config.MULTIMODAL_SEND_FORMAT == "base64" else "",
+        "base64_data": _get_encoded_string(f, image_detail=image_detail)
+        if dify_config.MULTIMODAL_SEND_FORMAT == "base64"
+        else "",
         "url": _to_url(f) if dify_config.MULTIMODAL_SEND_FORMAT == "url" else "",
         "format": f.extension.removeprefix("."),
         "mime_type": f.mime_type,
     }
-    if f.type == FileType.IMAGE:
-        params["detail"] = image_detail_config or ImagePromptMessageContent.DETAIL.LOW
+    if image_detail is not None:
+        params["detail"] = image_detail
 
     return prompt_class_map[f.type].model_validate(params)
 
@@ -126,7 +148,20 @@ def _download_file_content(path: str, /):
     return data
 
 
-def _get_encoded_string(f: File, /):
+def _get_encoded_string(f: File, /, *, image_detail: Optional[ImagePromptMessageContent.DETAIL] = None):
+    """
+    Return the base64 encoded content of a file.
+
+    Conversation history re-encodes the same files on every turn, so payloads are cached
+    per process by file identity and image detail.
+    """
+    cache_key = _encoded_string_cache_key(f, image_detail)
+    if cache_key is not None:
+        with _encoded_string_cache_lock:
+            cached = _encoded_string_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     match f.transfer_method:
         case FileTransferMethod.REMOTE_URL:
             response = ssrf_proxy.get(f.remote_url, follow_redirects=True)
@@ -137,10 +172,58 @@ def _get_encoded_string(f: File, /):
         case FileTransferMethod.TOOL_FILE:
             data = _download_file_content(f._storage_key)
 
+    if image_detail == ImagePromptMessageContent.DETAIL.LOW and dify_config.MULTIMODAL_LOW_DETAIL_IMAGE_MAX_SIDE:
+        data = _downscale_image(data, dify_config.MULTIMODAL_LOW_DETAIL_IMAGE_MAX_SIDE)
+
     encoded_string = base64.b64encode(data).decode("utf-8")
+    if cache_key is not None and len(encoded_string) <= _encoded_string_cache.maxsize:
+        with _encoded_string_cache_lock:
+            _encoded_string_cache[cache_key] = encoded_string
     return encoded_string
 
 
+def _encoded_string_cache_key(f: File, image_detail: Optional[ImagePromptMessageContent.DETAIL], /):
+    if not dify_config.MULTIMODAL_ENCODED_CACHE_MAX_BYTES:
+        return None
+
+    match f.transfer_method:
+        case FileTransferMethod.REMOTE_URL:
+            identity = f.remote_url
+        case FileTransferMethod.LOCAL_FILE | FileTransferMethod.TOOL_FILE:
+            identity = f.related_id
+        case _:
+            identity = None
+    if not identity:
+        return None
+    return f.transfer_method.value, identity, image_detail.value if image_detail else ""
+
+
+def _downscale_image(data: bytes, max_side: int, /) -> bytes:
+    """
+    Shrink an image so its longest side fits max_side, keeping its format.
+    Returns the original bytes when the image is already small enough or cannot be processed.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image_format = image.format
+            if not image_format or max(image.size) <= max_side or getattr(image, "n_frames", 1) > 1:
+                return data
+            image.thumbnail((max_side, max_side))
+            output = io.BytesIO()
+            image.save(output, format=image_format)
+    except Exception:
+        logger.warning("failed to downscale image, sending the original", exc_info=True)
+        return data
+
+    resized = output.getvalue()
+    return resized if len(resized) < len(data) else data
+
+
 def _to_url(f: File, /):
     if f.transfer_method == FileTransferMethod.REMOTE_URL:
         if f.remote_url is None:
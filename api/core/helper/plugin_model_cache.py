@@ -0,0 +1,134 @@
+import logging
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any, Optional, TypeVar, cast
+
+from cachetools import TTLCache
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# seconds a request waits for another one loading the same entry before loading it itself
+_FLIGHT_TIMEOUT = 60
+# seconds a finished install task is remembered, so polling it again doesn't bump the tenant version
+_TASK_KEY_TTL = 24 * 60 * 60
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class PluginModelCache:
+    """
+    Opt-in process level cache of the model providers and model schemas the plugin daemon returns per tenant.
+
+    The providers and schemas are cached per request in contextvars already, this cache keeps them across
+    requests. Keys embed a per-tenant version kept in Redis, which is bumped when plugins of the tenant are
+    installed, upgraded or uninstalled, so every process stops serving the entries of the tenant right away.
+    Concurrent misses of the same entry wait for a single call to the plugin daemon.
+    """
+
+    _version_key_prefix = "plugin_model_cache_version:"
+    _task_key_prefix = "plugin_model_cache_task:"
+
+    def __init__(self):
+        self._cache: TTLCache = TTLCache(
+            maxsize=dify_config.PLUGIN_MODEL_CACHE_MAX_SIZE,
+            ttl=dify_config.PLUGIN_MODEL_CACHE_TTL,
+        )
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return dify_config.PLUGIN_MODEL_CACHE_ENABLED
+
+    def get_model_providers(self, tenant_id: str, loader: Callable[[], T]) -> T:
+        """
+        Get the model providers of a tenant, loaded with the loader on a miss.
+        """
+        return self._get_or_load(tenant_id, ("providers",), loader, cache_none=True)
+
+    def get_model_schema(self, tenant_id: str, schema_key: str, loader: Callable[[], T]) -> T:
+        """
+        Get a model schema of a tenant, loaded with the loader on a miss. Missing schemas aren't cached.
+        """
+        return self._get_or_load(tenant_id, ("schema", schema_key), loader, cache_none=False)
+
+    def invalidate_tenant(self, tenant_id: str):
+        """
+        Bump the version of a tenant, so all cached providers and schemas of it are ignored from now on.
+        Done even while the cache is disabled, so re-enabling it never serves entries of older plugins.
+        """
+        try:
+            redis_client.incr(self._version_key_prefix + tenant_id)
+        except Exception:
+            logger.warning("failed to bump plugin model cache version of tenant %s", tenant_id, exc_info=True)
+
+    def invalidate_tenant_once(self, tenant_id: str, task_id: str):
+        """
+        Bump the version of a tenant once for a finished install task, however often the task is polled.
+        """
+        try:
+            if not redis_client.set(self._task_key_prefix + task_id, 1, nx=True, ex=_TASK_KEY_TTL):
+                return
+        except Exception:
+            logger.warning("failed to mark plugin install task %s as invalidated", task_id, exc_info=True)
+        self.invalidate_tenant(tenant_id)
+
+    def _get_version(self, tenant_id: str) -> Optional[str]:
+        try:
+            version = redis_client.get(self._version_key_prefix + tenant_id)
+        except Exception:
+            logger.warning("failed to read plugin model cache version of tenant %s", tenant_id, exc_info=True)
+            return None
+        return version.decode() if isinstance(version, bytes) else str(version or 0)
+
+    def _get_or_load(self, tenant_id: str, entry: tuple, loader: Callable[[], T], cache_none: bool) -> T:
+        if not self.enabled:
+            return loader()
+        version = self._get_version(tenant_id)
+        if version is None:
+            return loader()
+
+        key = (tenant_id, version, *entry)
+        with self._lock:
+            if key in self._cache:
+                return cast(T, self._cache[key])
+            flight = self._flights.get(key)
+            leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if flight.done.wait(_FLIGHT_TIMEOUT):
+                if flight.error is not None:
+                    raise flight.error
+                return cast(T, flight.value)
+            logger.warning("plugin model cache entry %s took too long to load, loading it again", key)
+            return loader()
+
+        try:
+            value = loader()
+            flight.value = value
+            if value is not None or cache_none:
+                with self._lock:
+                    self._cache[key] = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+
+plugin_model_cache = PluginModelCache()
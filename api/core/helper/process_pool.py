@@ -0,0 +1,123 @@
+"""
+Offload of CPU bound work to a pool of worker processes.
+
+The API server and the Celery workers run under gevent, where CPU bound code holds the hub and stalls every
+other greenlet of the process until it's done. Functions run with `run_in_process` execute in a worker process
+instead, while the calling greenlet waits cooperatively for the result.
+
+Offloaded functions and their arguments are pickled, so they must be module level functions taking plain data.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional, TypeVar
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ProcessPoolExecutor] = None
+# bounds the tasks submitted to the executor, running or waiting for a worker
+_slots: Optional[threading.BoundedSemaphore] = None
+_lock = threading.Lock()
+# set in the worker processes, where offloading again would be pointless
+_in_worker_process = False
+
+
+class ProcessPoolBusyError(Exception):
+    """Raised when no slot of the pool frees up before the timeout."""
+
+
+class ProcessPoolTimeoutError(Exception):
+    """Raised when an offloaded task doesn't complete before the timeout."""
+
+
+def is_enabled() -> bool:
+    return dify_config.CPU_OFFLOAD_ENABLED and not _in_worker_process
+
+
+def run_in_process(fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+    """
+    Run a function in the worker process pool and wait for its result.
+
+    The function runs inline when offloading is disabled. A task not started yet is cancelled when the wait
+    times out or the calling greenlet is killed, while a running task is left to complete and its result dropped.
+    :param fn: module level function to run
+    :param timeout: seconds to wait for a slot and the result, CPU_OFFLOAD_TIMEOUT by default
+    :return: the result of the function
+    """
+    if not is_enabled():
+        return fn(*args, **kwargs)
+
+    timeout = timeout or dify_config.CPU_OFFLOAD_TIMEOUT
+    deadline = time.monotonic() + timeout
+    executor, slots = _get_executor()
+    if not slots.acquire(timeout=timeout):
+        raise ProcessPoolBusyError(f"No free slot in the process pool after {timeout}s")
+
+    try:
+        future = executor.submit(fn, *args, **kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    # the slot is held until the task is done, running tasks keep their worker busy even after a timeout
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except FutureTimeoutError:
+        future.cancel()
+        raise ProcessPoolTimeoutError(f"{_name(fn)} did not complete in the process pool in {timeout}s") from None
+    except BrokenProcessPool:
+        # a worker died abruptly, e.g. killed for memory, the next task starts a new pool
+        _reset_executor(executor)
+        raise
+    except BaseException:
+        # the calling greenlet was killed or the task raised
+        future.cancel()
+        raise
+
+
+def _get_executor() -> tuple[ProcessPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _slots
+    if _executor is not None and _slots is not None:
+        return _executor, _slots
+    with _lock:
+        if _executor is None or _slots is None:
+            max_workers = dify_config.CPU_OFFLOAD_MAX_WORKERS
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                # fork is unsafe from a process running threads and an event loop
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker_process,
+                max_tasks_per_child=dify_config.CPU_OFFLOAD_MAX_TASKS_PER_CHILD or None,
+            )
+            _slots = threading.BoundedSemaphore(max_workers + dify_config.CPU_OFFLOAD_MAX_QUEUE_SIZE)
+            logger.info("Started CPU offload process pool with %s workers", max_workers)
+        return _executor, _slots
+
+
+def _reset_executor(executor: ProcessPoolExecutor):
+    global _executor, _slots
+    with _lock:
+        if _executor is executor:
+            _executor = None
+            _slots = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_worker_process():
+    global _in_worker_process
+    _in_worker_process = True
+
+
+def _name(fn: Callable) -> str:
+    return getattr(fn, "__qualname__", repr(fn))
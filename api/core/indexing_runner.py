@@ -25,10 +25,7 @@ from core.rag.index_processor.constant.index_type import IndexType
 from core.rag.index_processor.index_processor_base import BaseIndexProcessor
 from core.rag.index_processor.index_processor_factory import IndexProcessorFactory
 from core.rag.models.document import ChildDocument, Document
-from core.rag.splitter.fixed_text_splitter import (
-    EnhanceRecursiveCharacterTextSplitter,
-    FixedRecursiveCharacterTextSplitter,
-)
+from core.rag.splitter.segment_splitter import create_segment_splitter
 from core.rag.splitter.text_splitter import TextSplitter
 from core.tools.utils.rag_web_reader import get_image_upload_file_ids
 from extensions.ext_database import db
@@ -443,20 +440,19 @@ class IndexingRunner:
             if separator:
                 separator = separator.replace("\\n", "\n")
 
-            character_splitter = FixedRecursiveCharacterTextSplitter.from_encoder(
+            character_splitter = create_segment_splitter(
                 chunk_size=max_tokens,
                 chunk_overlap=chunk_overlap,
                 fixed_separator=separator,
-                separators=["\n\n", "。", ". ", " ", ""],
                 embedding_model_instance=embedding_model_instance,
             )
         else:
             # Automatic segmentation
             automatic_rules: dict[str, Any] = dict(DatasetProcessRule.AUTOMATIC_RULES["segmentation"])
-            character_splitter = EnhanceRecursiveCharacterTextSplitter.from_encoder(
+            character_splitter = create_segment_splitter(
                 chunk_size=automatic_rules["max_tokens"],
                 chunk_overlap=automatic_rules["chunk_overlap"],
-                separators=["\n\n", "。", ". ", " ", ""],
+                fixed_separator=None,
                 embedding_model_instance=embedding_model_instance,
             )
 
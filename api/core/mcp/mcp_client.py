@@ -8,7 +8,7 @@ from urllib.parse import urlparse
 from core.mcp.client.sse_client import sse_client
 from core.mcp.client.streamable_client import streamablehttp_client
 from core.mcp.error import MCPAuthError, MCPConnectionError
-from core.mcp.session.client_session import ClientSession
+from core.mcp.session.client_session import ClientSession, MessageHandlerFnT
 from core.mcp.types import Tool
 
 logger = logging.getLogger(__name__)
@@ -26,6 +26,7 @@ class MCPClient:
         headers: Optional[dict[str, str]] = None,
         timeout: Optional[float] = None,
         sse_read_timeout: Optional[float] = None,
+        message_handler: Optional[MessageHandlerFnT] = None,
     ):
         # Initialize info
         self.provider_id = provider_id
@@ -33,8 +34,10 @@ class MCPClient:
         self.client_type = "streamable"
         self.server_url = server_url
         self.headers = headers or {}
+        self.for_list = for_list
         self.timeout = timeout
         self.sse_read_timeout = sse_read_timeout
+        self.message_handler = message_handler
 
         # Authentication info
         self.authed = authed
@@ -93,14 +96,9 @@ class MCPClient:
         from core.mcp.auth.auth_flow import auth
 
         try:
-            headers = (
-                {"Authorization": f"{self.token.token_type.capitalize()} {self.token.access_token}"}
-                if self.authed and self.token
-                else self.headers
-            )
             self._streams_context = client_factory(
                 url=self.server_url,
-                headers=headers,
+                headers=self.request_headers(),
                 timeout=self.timeout,
                 sse_read_timeout=self.sse_read_timeout,
             )
@@ -114,7 +112,7 @@ class MCPClient:
             else:  # sse_client
                 streams = self._exit_stack.enter_context(self._streams_context)
 
-            self._session_context = ClientSession(*streams)
+            self._session_context = ClientSession(*streams, message_handler=self.message_handler)
             self._session = self._exit_stack.enter_context(self._session_context)
             session = cast(ClientSession, self._session)
             session.initialize()
@@ -131,6 +129,22 @@ class MCPClient:
             if first_try:
                 return self.connect_server(client_factory, method_name, first_try=False)
 
+    def request_headers(self) -> dict[str, str]:
+        """Headers sent to the MCP server, with the access token when authed"""
+        if self.authed and self.token:
+            return {"Authorization": f"{self.token.token_type.capitalize()} {self.token.access_token}"}
+        return self.headers
+
+    def is_alive(self) -> bool:
+        """Whether the session is initialized and still receiving messages from the server"""
+        return self._initialized and self._session is not None and self._session.is_receiving()
+
+    def ping(self):
+        """Check the server still answers on the session"""
+        if not self._initialized or not self._session:
+            raise ValueError("Session not initialized.")
+        self._session.send_ping()
+
     def list_tools(self) -> list[Tool]:
         """Connect to an MCP server running with SSE transport"""
         # List available tools to verify connection
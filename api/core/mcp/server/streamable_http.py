@@ -165,7 +165,7 @@ class MCPServerStreamableHTTPRequestHandler:
         answer = ""
         if isinstance(response, RateLimitGenerator):
             for item in response.generator:
-                data = item
+                data = item.decode() if isinstance(item, bytes) else item
                 if isinstance(data, str) and data.startswith("data: "):
                     try:
                         json_str = data[6:].strip()
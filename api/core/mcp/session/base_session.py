@@ -186,6 +186,10 @@ class BaseSession(
         if self._receiver_future and self._receiver_future.done():
             self._receiver_future.result()
 
+    def is_receiving(self) -> bool:
+        """Whether `_receive_loop` is still running, i.e. the session can still get responses."""
+        return self._receiver_future is not None and not self._receiver_future.done()
+
     def __exit__(
         self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: TracebackType | None
     ) -> None:
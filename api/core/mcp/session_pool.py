@@ -0,0 +1,260 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Optional, TypeVar, cast
+
+from configs import dify_config
+from core.mcp import types
+from core.mcp.error import MCPAuthError, MCPConnectionError
+from core.mcp.mcp_client import MCPClient
+from core.mcp.session.base_session import RequestResponder
+from core.mcp.session.client_session import _default_message_handler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (tenant_id, provider_id, digest of the server url, the request headers and the client options)
+SessionKey = tuple[str, str, str]
+
+
+@dataclass
+class _PooledSession:
+    key: SessionKey
+    client: MCPClient
+    last_used_at: float = field(default_factory=time.monotonic)
+
+
+class MCPSessionPool:
+    """
+    Pool of initialized MCP sessions, per tenant, provider, server url and credentials.
+
+    A session is used by one caller at a time. It goes back to the pool after each call and is closed once idle
+    for MCP_SESSION_POOL_IDLE_TIMEOUT. Sessions idle for more than MCP_SESSION_POOL_PING_INTERVAL are pinged
+    before being reused, and a reused session found disconnected during a call is replaced and the call retried.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        # idle sessions, least recently used first
+        self._idle: OrderedDict[int, _PooledSession] = OrderedDict()
+        # sessions open per key, idle or in use
+        self._open: dict[SessionKey, int] = defaultdict(int)
+        # bumped by invalidate(), sessions of an older generation are closed instead of going back to the pool
+        self._generations: dict[tuple[str, str], int] = defaultdict(int)
+        self._tools_cache: dict[SessionKey, tuple[float, list[types.Tool]]] = {}
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return dify_config.MCP_SESSION_POOL_ENABLED
+
+    def invoke_tool(self, client: MCPClient, tool_name: str, tool_args: dict) -> types.CallToolResult:
+        """
+        Call a tool on a pooled session of the client's server.
+        :param client: client of the server, not entered yet
+        :param tool_name: name of the tool
+        :param tool_args: arguments of the tool
+        """
+        return cast(
+            types.CallToolResult,
+            self.run(client, lambda session: session.invoke_tool(tool_name=tool_name, tool_args=tool_args)),
+        )
+
+    def list_tools(self, client: MCPClient, refresh: bool = False) -> list[types.Tool]:
+        """
+        List the tools of the client's server, cached for MCP_LIST_TOOLS_CACHE_TTL seconds.
+        :param client: client of the server, not entered yet
+        :param refresh: skip the cache and list the tools again
+        """
+        key = self._get_key(client)
+        ttl = dify_config.MCP_LIST_TOOLS_CACHE_TTL
+        cached = self._tools_cache.get(key)
+        if cached is not None and not refresh and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        tools = self.run(client, lambda session: session.list_tools())
+        if ttl > 0:
+            self._tools_cache[key] = (time.monotonic(), tools)
+        return tools
+
+    def run(self, client: MCPClient, fn: Callable[[MCPClient], T]) -> T:
+        """
+        Run a function with an initialized session of the client's server.
+
+        Without pooling, the client itself is initialized for the call and closed afterwards.
+        :param client: client of the server, not entered yet
+        :param fn: function to call with the initialized session
+        """
+        if not self.is_enabled():
+            with client:
+                return fn(client)
+
+        key = self._get_key(client)
+        generation = self._generations[key[:2]]
+        pooled = self._acquire(key, client)
+        reused = pooled.client is not client
+        try:
+            result = fn(pooled.client)
+        except (MCPAuthError, MCPConnectionError) as e:
+            if not reused or pooled.client.is_alive():
+                # an error answered by the server, the session is still usable
+                self._release(pooled, generation)
+                raise
+            # the server closed a session that was idle in the pool, connect again once
+            logger.info("MCP session of provider %s was disconnected, reconnecting: %s", key[1], e)
+            self._discard(pooled)
+            pooled = self._acquire(key, client, reuse=False)
+            try:
+                result = fn(pooled.client)
+            except BaseException:
+                self._release(pooled, generation)
+                raise
+        except BaseException:
+            self._release(pooled, generation)
+            raise
+
+        self._release(pooled, generation)
+        return result
+
+    def invalidate(self, tenant_id: str, provider_id: str):
+        """
+        Close the sessions and drop the cached tools of a provider, e.g. when it's updated or deleted.
+        """
+        with self._condition:
+            self._generations[(tenant_id, provider_id)] += 1
+            stale = [pooled for pooled in self._idle.values() if pooled.key[:2] == (tenant_id, provider_id)]
+            for pooled in stale:
+                self._idle.pop(id(pooled))
+            for key in [key for key in self._tools_cache if key[:2] == (tenant_id, provider_id)]:
+                self._tools_cache.pop(key, None)
+        for pooled in stale:
+            self._discard(pooled)
+
+    def _acquire(self, key: SessionKey, client: MCPClient, reuse: bool = True) -> _PooledSession:
+        deadline = time.monotonic() + dify_config.MCP_SESSION_POOL_ACQUIRE_TIMEOUT
+        with self._condition:
+            expired = self._pop_expired()
+            while True:
+                pooled = self._pop_idle(key) if reuse else None
+                if pooled is not None:
+                    break
+                if self._open[key] < dify_config.MCP_SESSION_POOL_MAX_SESSIONS_PER_SERVER:
+                    self._open[key] += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise MCPConnectionError("Timed out waiting for a free session of the MCP server")
+        for stale in expired:
+            self._close(stale)
+
+        if pooled is not None:
+            if self._is_healthy(pooled):
+                return pooled
+            # reconnect in the slot of the unhealthy session
+            self._close(pooled)
+
+        return self._connect(key, client)
+
+    def _connect(self, key: SessionKey, client: MCPClient) -> _PooledSession:
+        client.message_handler = self._message_handler(key)
+        pooled = _PooledSession(key=key, client=client)
+        try:
+            client.__enter__()
+        except BaseException:
+            self._discard(pooled)
+            raise
+        return pooled
+
+    def _is_healthy(self, pooled: _PooledSession) -> bool:
+        if not pooled.client.is_alive():
+            return False
+        if time.monotonic() - pooled.last_used_at < dify_config.MCP_SESSION_POOL_PING_INTERVAL:
+            return True
+        try:
+            pooled.client.ping()
+        except Exception:
+            logger.info("MCP session of provider %s failed the health ping", pooled.key[1])
+            return False
+        return True
+
+    def _release(self, pooled: _PooledSession, generation: int):
+        if not pooled.client.is_alive() or generation != self._generations[pooled.key[:2]]:
+            self._discard(pooled)
+            return
+
+        pooled.last_used_at = time.monotonic()
+        evicted = []
+        with self._condition:
+            self._idle[id(pooled)] = pooled
+            while len(self._idle) > dify_config.MCP_SESSION_POOL_MAX_IDLE_SESSIONS:
+                _, oldest = self._idle.popitem(last=False)
+                evicted.append(oldest)
+            self._condition.notify_all()
+        for stale in evicted:
+            self._discard(stale)
+
+    def _discard(self, pooled: _PooledSession):
+        self._close(pooled)
+        with self._condition:
+            self._open[pooled.key] -= 1
+            if self._open[pooled.key] <= 0:
+                self._open.pop(pooled.key, None)
+            self._condition.notify()
+
+    def _pop_idle(self, key: SessionKey) -> Optional[_PooledSession]:
+        # most recently used first, so that rarely needed sessions expire
+        for pooled_id in reversed(self._idle):
+            if self._idle[pooled_id].key == key:
+                return self._idle.pop(pooled_id)
+        return None
+
+    def _pop_expired(self) -> list[_PooledSession]:
+        """Remove the sessions idle for too long from the pool, to be closed by the caller outside the lock"""
+        expired = []
+        now = time.monotonic()
+        while self._idle:
+            pooled = next(iter(self._idle.values()))
+            if now - pooled.last_used_at < dify_config.MCP_SESSION_POOL_IDLE_TIMEOUT:
+                break
+            self._idle.pop(id(pooled))
+            self._open[pooled.key] -= 1
+            if self._open[pooled.key] <= 0:
+                self._open.pop(pooled.key, None)
+            expired.append(pooled)
+        return expired
+
+    @staticmethod
+    def _close(pooled: _PooledSession):
+        try:
+            pooled.client.cleanup()
+        except Exception:
+            logger.warning("Failed to close MCP session of provider %s", pooled.key[1], exc_info=True)
+
+    def _message_handler(self, key: SessionKey):
+        def handle(
+            message: RequestResponder[types.ServerRequest, types.ClientResult] | types.ServerNotification | Exception,
+        ):
+            if isinstance(message, types.ServerNotification) and isinstance(
+                message.root, types.ToolListChangedNotification
+            ):
+                self._tools_cache.pop(key, None)
+                return
+            _default_message_handler(message)
+
+        return handle
+
+    @staticmethod
+    def _get_key(client: MCPClient) -> SessionKey:
+        fingerprint = json.dumps(
+            [client.server_url, client.request_headers(), client.for_list, client.timeout, client.sse_read_timeout],
+            sort_keys=True,
+        )
+        return client.tenant_id, client.provider_id, hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+mcp_session_pool = MCPSessionPool()
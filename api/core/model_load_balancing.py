@@ -0,0 +1,278 @@
+"""
+Strategies choosing the load balancing config of a model invocation.
+
+The round-robin index of a model is shared by all processes in Redis. Updating it and checking the cooldowns
+of the configs took several round trips per invocation, the selection script does both in one call. Without
+Redis on the hot path, configs are allocated round-robin by each process and the cooldowns are read once per
+time slice. The weighted strategy spreads the round-robin over the configs by weight, while the least-error
+and latency strategies prefer the configs with the fewest recent errors or the lowest recent latency observed
+by the process.
+"""
+
+import itertools
+import logging
+import math
+import secrets
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass, field
+from enum import StrEnum
+from functools import lru_cache
+from typing import Any, Optional
+
+from cachetools import LRUCache
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# the round-robin index is reset when it reaches this value
+MAX_INDEX = 10000000
+
+# KEYS[1]: round-robin index, KEYS[2..]: cooldown keys of the configs
+# ARGV[1]: value the index is reset at, ARGV[2]: expiration of the index in seconds, ARGV[3..]: config weights
+# returns the 1-based position of the chosen config, 0 when all configs are in cooldown
+SELECT_SCRIPT = """
+local index = redis.call('INCR', KEYS[1])
+if index >= tonumber(ARGV[1]) then
+    index = 1
+    redis.call('SET', KEYS[1], index)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+
+local count = #KEYS - 1
+local total = 0
+for i = 1, count do
+    total = total + tonumber(ARGV[i + 2])
+end
+
+local position = (index - 1) % total
+local start = 1
+for i = 1, count do
+    local weight = tonumber(ARGV[i + 2])
+    if position < weight then
+        start = i
+        break
+    end
+    position = position - weight
+end
+
+for offset = 0, count - 1 do
+    local candidate = (start - 1 + offset) % count + 1
+    if redis.call('EXISTS', KEYS[candidate + 1]) == 0 then
+        return candidate
+    end
+end
+return 0
+"""
+
+
+class LoadBalancingStrategy(StrEnum):
+    ROUND_ROBIN = "round_robin"
+    WEIGHTED = "weighted"
+    LEAST_ERROR = "least_error"
+    LATENCY = "latency"
+
+
+def get_strategy(model: str) -> LoadBalancingStrategy:
+    """
+    Strategy of a model, MODEL_LB_MODEL_STRATEGIES entries take precedence over MODEL_LB_STRATEGY.
+    """
+    strategies = _parse_strategies(dify_config.MODEL_LB_STRATEGY, dify_config.MODEL_LB_MODEL_STRATEGIES)
+    return strategies.get(model, strategies[""])
+
+
+def get_weights(names: Sequence[str]) -> list[int]:
+    """
+    Weights of load balancing configs by name from MODEL_LB_CONFIG_WEIGHTS, 1 when not set.
+    """
+    weights = _parse_weights(dify_config.MODEL_LB_CONFIG_WEIGHTS)
+    return [weights.get(name, 1) for name in names]
+
+
+def weighted_position(index: int, weights: Sequence[int]) -> int:
+    """
+    Position of the config serving a round-robin index, each config serves as many indexes as its weight.
+    :param index: 0-based round-robin index
+    :param weights: weights of the configs
+    """
+    position = index % sum(weights)
+    for i, weight in enumerate(weights):
+        if position < weight:
+            return i
+        position -= weight
+    return 0
+
+
+@lru_cache(maxsize=8)
+def _parse_strategies(default: str, model_strategies: str) -> dict[str, LoadBalancingStrategy]:
+    strategies = {"": _to_strategy(default) or LoadBalancingStrategy.ROUND_ROBIN}
+    for entry in model_strategies.split(","):
+        if not entry.strip():
+            continue
+        # model names may contain colons, e.g. llama3:8b
+        model, _, name = entry.strip().rpartition(":")
+        strategy = _to_strategy(name)
+        if model and strategy:
+            strategies[model] = strategy
+    return strategies
+
+
+def _to_strategy(name: str) -> Optional[LoadBalancingStrategy]:
+    try:
+        return LoadBalancingStrategy(name.strip())
+    except ValueError:
+        logger.warning("unknown model load balancing strategy %s, using round_robin", name)
+        return None
+
+
+@lru_cache(maxsize=8)
+def _parse_weights(config_weights: str) -> dict[str, int]:
+    weights = {}
+    for entry in config_weights.split(","):
+        name, _, weight = entry.strip().rpartition(":")
+        if not name:
+            continue
+        if weight.strip().isdigit() and int(weight) > 0:
+            weights[name] = int(weight)
+        else:
+            # a config of weight 0 would never be chosen, its cooldown never noticed by the round-robin
+            logger.warning("invalid weight of model load balancing config %s, using 1", name)
+    return weights
+
+
+@dataclass
+class _ConfigStats:
+    error_score: float = 0.0
+    error_at: float = 0.0
+    latency: Optional[float] = None
+    latency_at: float = 0.0
+
+
+@dataclass
+class _ModelState:
+    counter: Iterator[int] = field(default_factory=lambda: itertools.count(secrets.randbelow(MAX_INDEX)))
+    cooldown_ids: set[str] = field(default_factory=set)
+    cooldown_expires_at: float = 0.0
+    stats: dict[str, _ConfigStats] = field(default_factory=dict)
+
+
+class LocalLoadBalancingState:
+    """
+    Load balancing state of the models in this process: round-robin counters, cooldowns read in the current
+    time slice, and the errors and latencies observed by config.
+    """
+
+    def __init__(self):
+        # models of the workspaces invoked recently
+        self._models: LRUCache = LRUCache(maxsize=4096)
+        self._lock = threading.Lock()
+
+    def next_index(self, key: str) -> int:
+        """
+        Next round-robin index of a model, counters start at a random index so processes don't send their
+        first invocations to the same config.
+        """
+        with self._lock:
+            return next(self._model(key).counter)
+
+    def cooldown_ids(self, key: str, cooldown_keys: dict[str, str]) -> set[str]:
+        """
+        Ids of the configs in cooldown, read from Redis at most once per time slice.
+        :param key: model key
+        :param cooldown_keys: cooldown key by config id
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._model(key)
+            if now < state.cooldown_expires_at:
+                return set(state.cooldown_ids)
+
+        values = redis_client.mget(list(cooldown_keys.values()))
+        cooldown_ids = {config_id for config_id, value in zip(cooldown_keys, values) if value is not None}
+        with self._lock:
+            state.cooldown_ids = cooldown_ids
+            state.cooldown_expires_at = now + dify_config.MODEL_LB_LOCAL_TIME_SLICE_MS / 1000
+        return set(cooldown_ids)
+
+    def add_cooldown(self, key: str, config_id: str):
+        with self._lock:
+            self._model(key).cooldown_ids.add(config_id)
+
+    def record_error(self, key: str, config_id: str):
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats(key, config_id)
+            stats.error_score = self._decayed(stats.error_score, stats.error_at, now) + 1
+            stats.error_at = now
+
+    def record_latency(self, key: str, config_id: str, latency: float):
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats(key, config_id)
+            if stats.latency is None or now - stats.latency_at > dify_config.MODEL_LB_STATS_WINDOW_SECONDS:
+                stats.latency = latency
+            else:
+                # exponentially weighted, recent invocations count the most
+                stats.latency = 0.7 * stats.latency + 0.3 * latency
+            stats.latency_at = now
+
+    def error_score(self, key: str, config_id: str) -> float:
+        with self._lock:
+            stats = self._stats(key, config_id)
+            return self._decayed(stats.error_score, stats.error_at, time.monotonic())
+
+    def latency(self, key: str, config_id: str) -> Optional[float]:
+        """
+        Recent latency of a config, None when it wasn't measured within the stats window.
+        """
+        with self._lock:
+            stats = self._stats(key, config_id)
+            if stats.latency is None or time.monotonic() - stats.latency_at > dify_config.MODEL_LB_STATS_WINDOW_SECONDS:
+                return None
+            return stats.latency
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def _model(self, key: str) -> _ModelState:
+        state = self._models.get(key)
+        if state is None:
+            state = self._models[key] = _ModelState()
+        return state
+
+    def _stats(self, key: str, config_id: str) -> _ConfigStats:
+        stats = self._model(key).stats
+        if config_id not in stats:
+            stats[config_id] = _ConfigStats()
+        return stats[config_id]
+
+    @staticmethod
+    def _decayed(score: float, since: float, now: float) -> float:
+        # errors count half after each stats window
+        return score * math.pow(0.5, (now - since) / dify_config.MODEL_LB_STATS_WINDOW_SECONDS)
+
+
+local_load_balancing_state = LocalLoadBalancingState()
+
+_select_script: Any = None
+
+
+def select_with_script(index_key: str, cooldown_keys: Sequence[str], weights: Sequence[int], expire: int) -> int:
+    """
+    Advance the round-robin index of a model and choose the next config not in cooldown, in one Redis call.
+    :param index_key: round-robin index key
+    :param cooldown_keys: cooldown keys of the configs
+    :param weights: weights of the configs
+    :param expire: expiration of the index in seconds
+    :return: position of the chosen config, -1 when all configs are in cooldown
+    """
+    global _select_script
+    if _select_script is None:
+        # the script is sent once, then called by its digest
+        _select_script = redis_client.register_script(SELECT_SCRIPT)
+    result = _select_script(keys=[index_key, *cooldown_keys], args=[MAX_INDEX, expire, *weights])
+    return int(result) - 1
@@ -1,4 +1,5 @@
 import logging
+import time
 from collections.abc import Callable, Generator, Iterable, Sequence
 from typing import IO, Any, Literal, Optional, Union, cast, overload
 
@@ -7,6 +8,15 @@ from core.entities.embedding_type import EmbeddingInputType
 from core.entities.provider_configuration import ProviderConfiguration, ProviderModelBundle
 from core.entities.provider_entities import ModelLoadBalancingConfiguration
 from core.errors.error import ProviderTokenNotInitError
+from core.model_load_balancing import (
+    MAX_INDEX,
+    LoadBalancingStrategy,
+    get_strategy,
+    get_weights,
+    local_load_balancing_state,
+    select_with_script,
+    weighted_position,
+)
 from core.model_runtime.callbacks.base_callback import Callback
 from core.model_runtime.entities.llm_entities import LLMResult
 from core.model_runtime.entities.message_entities import PromptMessage, PromptMessageTool
@@ -381,7 +391,15 @@ class ModelInstance:
             try:
                 if "credentials" in kwargs:
                     del kwargs["credentials"]
-                return function(*args, **kwargs, credentials=lb_config.credentials)
+                if not self.load_balancing_manager.measures_latency:
+                    return function(*args, **kwargs, credentials=lb_config.credentials)
+
+                started_at = time.perf_counter()
+                result = function(*args, **kwargs, credentials=lb_config.credentials)
+                if isinstance(result, Generator):
+                    return self._record_first_chunk_latency(result, lb_config, started_at)
+                self.load_balancing_manager.record_latency(lb_config, time.perf_counter() - started_at)
+                return result
             except InvokeRateLimitError as e:
                 # expire in 60 seconds
                 self.load_balancing_manager.cooldown(lb_config, expire=60)
@@ -395,6 +413,23 @@ class ModelInstance:
             except Exception as e:
                 raise e
 
+    def _record_first_chunk_latency(
+        self, result: Generator, lb_config: ModelLoadBalancingConfiguration, started_at: float
+    ) -> Generator:
+        """
+        Record the latency of a streamed invocation when its first chunk arrives
+        :param result: streamed result
+        :param lb_config: load balancing config of the invocation
+        :param started_at: perf counter when the model was invoked
+        :return:
+        """
+        first = True
+        for chunk in result:
+            if first and self.load_balancing_manager:
+                self.load_balancing_manager.record_latency(lb_config, time.perf_counter() - started_at)
+                first = False
+            yield chunk
+
     def get_tts_voices(self, language: Optional[str] = None) -> list:
         """
         Invoke large language tts model voices
@@ -498,60 +533,129 @@ class LBModelManager:
     def fetch_next(self) -> Optional[ModelLoadBalancingConfiguration]:
         """
         Get next model load balancing config
-        Strategy: Round Robin
+        Strategy: Round Robin by default, the strategy of a model is set by MODEL_LB_MODEL_STRATEGIES
         :return:
         """
-        cache_key = "model_lb_index:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model
-        )
-
-        cooldown_load_balancing_configs = []
-        max_index = len(self._load_balancing_configs)
-
+        strategy = get_strategy(self._model)
+        if strategy in {LoadBalancingStrategy.LEAST_ERROR, LoadBalancingStrategy.LATENCY}:
+            config = self._fetch_by_stats(strategy)
+        else:
+            if strategy == LoadBalancingStrategy.WEIGHTED:
+                weights = get_weights([config.name for config in self._load_balancing_configs])
+            else:
+                weights = [1] * len(self._load_balancing_configs)
+
+            if dify_config.MODEL_LB_LOCAL_ALLOCATION_ENABLED:
+                config = self._fetch_local(weights)
+            elif dify_config.MODEL_LB_SCRIPTED_SELECTION_ENABLED and not dify_config.REDIS_USE_CLUSTERS:
+                # the keys of a script must be in the same hash slot, which they aren't on a cluster
+                config = self._fetch_scripted(weights)
+            else:
+                config = self._fetch_round_robin(weights)
+
+        if config and dify_config.DEBUG:
+            logger.info(
+                """Model LB
+id: %s
+name:%s
+tenant_id: %s
+provider: %s
+model_type: %s
+model: %s
+strategy: %s""",
+                config.id,
+                config.name,
+                self._tenant_id,
+                self._provider,
+                self._model_type.value,
+                self._model,
+                strategy.value,
+            )
+
+        return config
+
+    def _fetch_round_robin(self, weights: list[int]) -> Optional[ModelLoadBalancingConfiguration]:
+        cooldown_config_ids = set()
         while True:
-            current_index = redis_client.incr(cache_key)
+            current_index = redis_client.incr(self._cache_key)
             current_index = cast(int, current_index)
-            if current_index >= 10000000:
+            if current_index >= MAX_INDEX:
                 current_index = 1
-                redis_client.set(cache_key, current_index)
-
-            redis_client.expire(cache_key, 3600)
-            if current_index > max_index:
-                current_index = current_index % max_index
+                redis_client.set(self._cache_key, current_index)
 
-            real_index = current_index - 1
-            if real_index > max_index:
-                real_index = 0
+            redis_client.expire(self._cache_key, 3600)
 
-            config: ModelLoadBalancingConfiguration = self._load_balancing_configs[real_index]
+            config = self._load_balancing_configs[weighted_position(current_index - 1, weights)]
 
             if self.in_cooldown(config):
-                cooldown_load_balancing_configs.append(config)
-                if len(cooldown_load_balancing_configs) >= len(self._load_balancing_configs):
+                cooldown_config_ids.add(config.id)
+                if len(cooldown_config_ids) >= len(self._load_balancing_configs):
                     # all configs are in cooldown
                     return None
 
                 continue
 
-            if dify_config.DEBUG:
-                logger.info(
-                    """Model LB
-id: %s
-name:%s
-tenant_id: %s
-provider: %s
-model_type: %s
-model: %s""",
-                    config.id,
-                    config.name,
-                    self._tenant_id,
-                    self._provider,
-                    self._model_type.value,
-                    self._model,
-                )
-
             return config
 
+    def _fetch_scripted(self, weights: list[int]) -> Optional[ModelLoadBalancingConfiguration]:
+        position = select_with_script(
+            self._cache_key,
+            [self._cooldown_cache_key(config.id) for config in self._load_balancing_configs],
+            weights,
+            expire=3600,
+        )
+        if position < 0:
+            # all configs are in cooldown
+            return None
+        return self._load_balancing_configs[position]
+
+    def _fetch_local(self, weights: list[int]) -> Optional[ModelLoadBalancingConfiguration]:
+        cooldown_config_ids = self._cooldown_config_ids()
+        index = local_load_balancing_state.next_index(self._cache_key)
+        start = weighted_position(index, weights)
+        count = len(self._load_balancing_configs)
+        for offset in range(count):
+            config = self._load_balancing_configs[(start + offset) % count]
+            if config.id not in cooldown_config_ids:
+                return config
+
+        # all configs are in cooldown
+        return None
+
+    def _fetch_by_stats(self, strategy: LoadBalancingStrategy) -> Optional[ModelLoadBalancingConfiguration]:
+        cooldown_config_ids = self._cooldown_config_ids()
+        # configs scoring the same are used in turn
+        count = len(self._load_balancing_configs)
+        start = local_load_balancing_state.next_index(self._cache_key) % count
+        candidates = [
+            config
+            for config in self._load_balancing_configs[start:] + self._load_balancing_configs[:start]
+            if config.id not in cooldown_config_ids
+        ]
+        if not candidates:
+            # all configs are in cooldown
+            return None
+
+        if strategy == LoadBalancingStrategy.LEAST_ERROR:
+            return min(
+                candidates, key=lambda config: local_load_balancing_state.error_score(self._cache_key, config.id)
+            )
+
+        # configs not measured recently are tried first
+        latencies = {config.id: local_load_balancing_state.latency(self._cache_key, config.id) for config in candidates}
+        for config in candidates:
+            if latencies[config.id] is None:
+                return config
+        return min(candidates, key=lambda config: cast(float, latencies[config.id]))
+
+    def _cooldown_config_ids(self) -> set[str]:
+        cooldown_keys = {config.id: self._cooldown_cache_key(config.id) for config in self._load_balancing_configs}
+        if dify_config.MODEL_LB_LOCAL_ALLOCATION_ENABLED:
+            return local_load_balancing_state.cooldown_ids(self._cache_key, cooldown_keys)
+
+        values = redis_client.mget(list(cooldown_keys.values()))
+        return {config_id for config_id, value in zip(cooldown_keys, values) if value is not None}
+
     def cooldown(self, config: ModelLoadBalancingConfiguration, expire: int = 60) -> None:
         """
         Cooldown model load balancing config
@@ -559,11 +663,25 @@ model: %s""",
         :param expire: cooldown time
         :return:
         """
-        cooldown_cache_key = "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model, config.id
-        )
+        redis_client.setex(self._cooldown_cache_key(config.id), expire, "true")
+        local_load_balancing_state.add_cooldown(self._cache_key, config.id)
+        local_load_balancing_state.record_error(self._cache_key, config.id)
 
-        redis_client.setex(cooldown_cache_key, expire, "true")
+    @property
+    def measures_latency(self) -> bool:
+        """
+        Whether the latency of invocations is used to choose the configs
+        """
+        return get_strategy(self._model) == LoadBalancingStrategy.LATENCY
+
+    def record_latency(self, config: ModelLoadBalancingConfiguration, latency: float) -> None:
+        """
+        Record the latency of a successful invocation with a model load balancing config
+        :param config: model load balancing config
+        :param latency: seconds until the model responded
+        :return:
+        """
+        local_load_balancing_state.record_latency(self._cache_key, config.id, latency)
 
     def in_cooldown(self, config: ModelLoadBalancingConfiguration) -> bool:
         """
@@ -571,13 +689,18 @@ model: %s""",
         :param config: model load balancing config
         :return:
         """
-        cooldown_cache_key = "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
-            self._tenant_id, self._provider, self._model_type.value, self._model, config.id
-        )
-
-        res: bool = redis_client.exists(cooldown_cache_key)
+        res: bool = redis_client.exists(self._cooldown_cache_key(config.id))
         return res
 
+    @property
+    def _cache_key(self) -> str:
+        return "model_lb_index:{}:{}:{}:{}".format(self._tenant_id, self._provider, self._model_type.value, self._model)
+
+    def _cooldown_cache_key(self, config_id: str) -> str:
+        return "model_lb_index:cooldown:{}:{}:{}:{}:{}".format(
+            self._tenant_id, self._provider, self._model_type.value, self._model, config_id
+        )
+
     @staticmethod
     def get_config_in_cooldown_and_ttl(
         tenant_id: str, provider: str, model_type: ModelType, model: str, config_id: str
@@ -22,6 +22,7 @@ from core.model_runtime.entities.model_entities import (
     PriceType,
 )
 from core.model_runtime.model_providers.__base.ai_model import AIModel
+from core.model_runtime.model_providers.__base.tokenizers.token_estimator import token_estimator
 from core.plugin.impl.model import PluginModelClient
 
 logger = logging.getLogger(__name__)
@@ -352,6 +353,8 @@ class LargeLanguageModel(AIModel):
                 prompt_messages=prompt_messages,
                 tools=tools,
             )
+        if dify_config.LOCAL_TOKEN_ESTIMATION_ENABLED:
+            return token_estimator.get_num_tokens(model, prompt_messages, tools)
         return 0
 
     def _calc_response_usage(
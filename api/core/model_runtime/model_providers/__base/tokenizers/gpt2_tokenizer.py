@@ -2,6 +2,9 @@ import logging
 from threading import Lock
 from typing import Any
 
+from configs import dify_config
+from core.helper import process_pool
+
 logger = logging.getLogger(__name__)
 
 _tokenizer: Any = None
@@ -20,11 +23,9 @@ class GPT2Tokenizer:
 
     @staticmethod
     def get_num_tokens(text: str) -> int:
-        # Because this process needs more cpu resource, we turn this back before we find a better way to handle it.
-        #
-        # future = _executor.submit(GPT2Tokenizer._get_num_tokens_by_gpt2, text)
-        # result = future.result()
-        # return cast(int, result)
+        # Short texts are counted inline, the round trip to a worker process would cost more than the counting.
+        if process_pool.is_enabled() and len(text) >= dify_config.CPU_OFFLOAD_MIN_TEXT_LENGTH:
+            return process_pool.run_in_process(GPT2Tokenizer._get_num_tokens_by_gpt2, text)
         return GPT2Tokenizer._get_num_tokens_by_gpt2(text)
 
     @staticmethod
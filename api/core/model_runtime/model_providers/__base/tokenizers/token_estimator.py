@@ -0,0 +1,242 @@
+"""
+Local estimation of the number of tokens of LLM prompts.
+
+Counting the tokens of a prompt through the plugin daemon costs a round trip per count, and without it the
+count is 0, which disables the pruning of memory and the computation of the tokens left for the completion.
+The estimator counts locally instead, with the tiktoken encoding of the model family, or the GPT-2 tokenizer
+for other models and when the encoding can't be loaded. It follows the message format overheads of OpenAI
+chat models, which is exact for them and a close estimate for the others.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from cachetools import LRUCache
+
+from configs import dify_config
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    ImagePromptMessageContent,
+    PromptMessage,
+    PromptMessageContentType,
+    PromptMessageTool,
+    TextPromptMessageContent,
+    ToolPromptMessage,
+)
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenizer import GPT2Tokenizer
+
+logger = logging.getLogger(__name__)
+
+# tiktoken encodings by model name prefix, checked in order, the first match wins
+_MODEL_FAMILY_ENCODINGS: list[tuple[str, str]] = [
+    ("gpt-4o", "o200k_base"),
+    ("chatgpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("gpt-4.5", "o200k_base"),
+    ("gpt-5", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+    ("gpt-35", "cl100k_base"),
+    ("text-embedding", "cl100k_base"),
+    # not tokenized by tiktoken, but their vocabularies are closer to cl100k_base than to GPT-2
+    ("claude", "cl100k_base"),
+    ("gemini", "cl100k_base"),
+    ("deepseek", "cl100k_base"),
+    ("qwen", "cl100k_base"),
+    ("llama", "cl100k_base"),
+    ("mistral", "cl100k_base"),
+]
+
+_GPT2 = "gpt2"
+
+# tokens added by the chat format to every message, to a message with a name, and to prime the reply
+_TOKENS_PER_MESSAGE = 3
+_TOKENS_PER_NAME = 1
+_TOKENS_PER_REPLY = 3
+# tokens added by the tool definitions as a whole and per tool
+_TOKENS_PER_TOOLS = 12
+_TOKENS_PER_TOOL = 8
+# estimates of multi-modal contents, which are sent as files and not as text
+_IMAGE_LOW_DETAIL_TOKENS = 85
+_IMAGE_HIGH_DETAIL_TOKENS = 765
+_FILE_TOKENS = {
+    PromptMessageContentType.AUDIO: 256,
+    PromptMessageContentType.VIDEO: 1024,
+    PromptMessageContentType.DOCUMENT: 1024,
+}
+
+
+class TokenEstimator:
+    def __init__(self):
+        self._encodings: dict[str, Any] = {}
+        self._encodings_lock = threading.Lock()
+        self._counts: LRUCache = LRUCache(maxsize=max(dify_config.LOCAL_TOKEN_ESTIMATION_CACHE_SIZE, 1))
+        self._counts_lock = threading.Lock()
+
+    @staticmethod
+    def get_encoding_name(model: str) -> str:
+        """
+        Name of the tiktoken encoding of the model family, "gpt2" for unknown families.
+        """
+        model = model.lower().rsplit("/", 1)[-1]
+        for prefix, encoding_name in _MODEL_FAMILY_ENCODINGS:
+            if model.startswith(prefix):
+                return encoding_name
+        return _GPT2
+
+    def get_num_tokens(
+        self, model: str, prompt_messages: Sequence[PromptMessage], tools: Optional[Sequence[PromptMessageTool]] = None
+    ) -> int:
+        """
+        Estimate the number of tokens of prompt messages and tool definitions.
+
+        The messages not counted before are encoded in one batch, and the count of every message is kept in an
+        LRU cache, as the same history is counted again on every turn of a conversation.
+        :param model: model name
+        :param prompt_messages: prompt messages
+        :param tools: tools for tool calling
+        :return: estimated number of tokens
+        """
+        encoding_name = self.get_encoding_name(model)
+        message_texts = [_message_texts(message) for message in prompt_messages]
+        keys = [
+            self._cache_key(encoding_name, texts, message) for texts, message in zip(message_texts, prompt_messages)
+        ]
+
+        counts: list[Optional[int]] = []
+        if dify_config.LOCAL_TOKEN_ESTIMATION_CACHE_SIZE > 0:
+            with self._counts_lock:
+                counts = [self._counts.get(key) for key in keys]
+        else:
+            counts = [None] * len(keys)
+
+        missing = [index for index, count in enumerate(counts) if count is None]
+        if missing:
+            texts = [text for index in missing for text in message_texts[index]]
+            text_tokens = iter(self._count_texts(encoding_name, texts))
+            for index in missing:
+                message_tokens = sum(next(text_tokens) for _ in message_texts[index])
+                counts[index] = message_tokens + _message_overhead(prompt_messages[index])
+            if dify_config.LOCAL_TOKEN_ESTIMATION_CACHE_SIZE > 0:
+                with self._counts_lock:
+                    for index in missing:
+                        self._counts[keys[index]] = counts[index]
+
+        num_tokens = sum(count or 0 for count in counts)
+        if prompt_messages:
+            num_tokens += _TOKENS_PER_REPLY
+        if tools:
+            num_tokens += self._get_num_tokens_of_tools(encoding_name, tools)
+        return num_tokens
+
+    def _get_num_tokens_of_tools(self, encoding_name: str, tools: Sequence[PromptMessageTool]) -> int:
+        texts = [
+            json.dumps(
+                {"name": tool.name, "description": tool.description, "parameters": tool.parameters},
+                ensure_ascii=False,
+                sort_keys=True,
+            )
+            for tool in tools
+        ]
+        return _TOKENS_PER_TOOLS + sum(self._count_texts(encoding_name, texts)) + _TOKENS_PER_TOOL * len(tools)
+
+    def _count_texts(self, encoding_name: str, texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        encoding = self._get_encoding(encoding_name)
+        if hasattr(encoding, "encode_batch"):
+            # special tokens in the prompt are counted as text instead of raising
+            return [len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=())]
+        return [len(encoding.encode(text)) for text in texts]
+
+    def _get_encoding(self, encoding_name: str) -> Any:
+        encoding = self._encodings.get(encoding_name)
+        if encoding is not None:
+            return encoding
+
+        with self._encodings_lock:
+            encoding = self._encodings.get(encoding_name)
+            if encoding is None:
+                encoding = _load_encoding(encoding_name)
+                self._encodings[encoding_name] = encoding
+        return encoding
+
+    @staticmethod
+    def _cache_key(encoding_name: str, texts: list[str], message: PromptMessage) -> str:
+        digest = hashlib.sha1(usedforsecurity=False)
+        for text in texts:
+            digest.update(text.encode("utf-8", "surrogatepass"))
+            digest.update(b"\0")
+        return f"{encoding_name}:{_message_overhead(message)}:{digest.hexdigest()}"
+
+
+class _CharacterEncoding:
+    """Last resort when no tokenizer can be loaded, about 4 characters per token"""
+
+    @staticmethod
+    def encode(text: str) -> list[int]:
+        return [0] * ((len(text) + 3) // 4)
+
+
+def _load_encoding(encoding_name: str) -> Any:
+    """
+    Load a tiktoken encoding, or the GPT-2 tokenizer for unknown model families and when it can't be loaded,
+    e.g. when it can't be downloaded. Failures are remembered by the caller and not retried for every count.
+    """
+    if encoding_name != _GPT2:
+        try:
+            import tiktoken
+
+            return tiktoken.get_encoding(encoding_name)
+        except Exception:
+            logger.warning("Failed to load tiktoken encoding %s, using GPT-2", encoding_name, exc_info=True)
+    try:
+        return GPT2Tokenizer.get_encoder()
+    except Exception:
+        logger.warning("Failed to load the GPT-2 tokenizer, estimating tokens by characters", exc_info=True)
+        return _CharacterEncoding()
+
+
+def _message_texts(message: PromptMessage) -> list[str]:
+    """Texts of a message that are tokenized, the role included"""
+    texts = [message.role.value]
+    if isinstance(message.content, str):
+        texts.append(message.content)
+    elif isinstance(message.content, list):
+        texts.extend(content.data for content in message.content if isinstance(content, TextPromptMessageContent))
+    if message.name:
+        texts.append(message.name)
+    if isinstance(message, AssistantPromptMessage):
+        for tool_call in message.tool_calls:
+            texts.append(tool_call.function.name)
+            texts.append(tool_call.function.arguments)
+    if isinstance(message, ToolPromptMessage):
+        texts.append(message.tool_call_id)
+    return texts
+
+
+def _message_overhead(message: PromptMessage) -> int:
+    """Tokens of a message that aren't tokenized, the chat format and the multi-modal contents"""
+    tokens = _TOKENS_PER_MESSAGE
+    if message.name:
+        tokens += _TOKENS_PER_NAME
+    if isinstance(message.content, list):
+        for content in message.content:
+            if isinstance(content, ImagePromptMessageContent):
+                if content.detail == ImagePromptMessageContent.DETAIL.HIGH:
+                    tokens += _IMAGE_HIGH_DETAIL_TOKENS
+                else:
+                    tokens += _IMAGE_LOW_DETAIL_TOKENS
+            else:
+                tokens += _FILE_TOKENS.get(content.type, 0)
+    return tokens
+
+
+token_estimator = TokenEstimator()
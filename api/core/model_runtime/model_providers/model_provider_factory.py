@@ -1,3 +1,4 @@
+import functools
 import hashlib
 import logging
 import os
@@ -8,6 +9,7 @@ from typing import Optional
 from pydantic import BaseModel
 
 import contexts
+from core.helper.plugin_model_cache import plugin_model_cache
 from core.helper.position_helper import get_provider_position_map, sort_to_dict_by_position_map
 from core.model_runtime.entities.model_entities import AIModelEntity, ModelType
 from core.model_runtime.entities.provider_entities import ProviderConfig, ProviderEntity, SimpleProviderEntity
@@ -28,27 +30,28 @@ from core.plugin.impl.model import PluginModelClient
 logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _get_provider_position_map() -> dict[str, int]:
+    """
+    Position map of the _position.yaml file next to this module, read once on first use.
+    """
+    model_providers_path = os.path.dirname(os.path.abspath(__file__))
+    return get_provider_position_map(model_providers_path)
+
+
 class ModelProviderExtension(BaseModel):
     plugin_model_provider_entity: PluginModelProviderEntity
     position: Optional[int] = None
 
 
 class ModelProviderFactory:
-    provider_position_map: dict[str, int]
-
     def __init__(self, tenant_id: str) -> None:
-        self.provider_position_map = {}
-
         self.tenant_id = tenant_id
         self.plugin_model_manager = PluginModelClient()
 
-        if not self.provider_position_map:
-            # get the path of current classes
-            current_path = os.path.abspath(__file__)
-            model_providers_path = os.path.dirname(current_path)
-
-            # get _position.yaml file path
-            self.provider_position_map = get_provider_position_map(model_providers_path)
+    @property
+    def provider_position_map(self) -> dict[str, int]:
+        return _get_provider_position_map()
 
     def get_providers(self) -> Sequence[ProviderEntity]:
         """
@@ -88,17 +91,24 @@ class ModelProviderFactory:
             if plugin_model_providers is not None:
                 return plugin_model_providers
 
-            plugin_model_providers = []
+            # Fetch plugin model providers
+            plugin_model_providers = plugin_model_cache.get_model_providers(
+                self.tenant_id, self._fetch_plugin_model_providers
+            )
+            if plugin_model_cache.enabled:
+                # shared with other requests, and callers may modify them
+                plugin_model_providers = [provider.model_copy(deep=True) for provider in plugin_model_providers]
             contexts.plugin_model_providers.set(plugin_model_providers)
 
-            # Fetch plugin model providers
-            plugin_providers = self.plugin_model_manager.fetch_model_providers(self.tenant_id)
+            return plugin_model_providers
 
-            for provider in plugin_providers:
-                provider.declaration.provider = provider.plugin_id + "/" + provider.declaration.provider
-                plugin_model_providers.append(provider)
+    def _fetch_plugin_model_providers(self) -> list[PluginModelProviderEntity]:
+        plugin_model_providers = []
+        for provider in self.plugin_model_manager.fetch_model_providers(self.tenant_id):
+            provider.declaration.provider = provider.plugin_id + "/" + provider.declaration.provider
+            plugin_model_providers.append(provider)
 
-            return plugin_model_providers
+        return plugin_model_providers
 
     def get_provider_schema(self, provider: str) -> ProviderEntity:
         """
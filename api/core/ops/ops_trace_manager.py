@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 import os
@@ -8,11 +9,12 @@ from datetime import timedelta
 from typing import Any, Optional, Union
 from uuid import UUID, uuid4
 
-from cachetools import LRUCache
+from cachetools import LRUCache, TTLCache
 from flask import current_app
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
     OPS_FILE_PATH,
@@ -122,8 +124,19 @@ class OpsTraceProviderConfigMap(dict[str, dict[str, Any]]):
 provider_config_map: dict[str, dict[str, Any]] = OpsTraceProviderConfigMap()
 
 
+# marks an app whose tracing is disabled or not configured in the app cache
+_NO_TRACE_INSTANCE = object()
+
+
 class OpsTraceManager:
+    # trace instances keyed by provider and a hash of the decrypted tracing config
     ops_trace_instances_cache: LRUCache = LRUCache(maxsize=128)
+    # resolved trace instance (or _NO_TRACE_INSTANCE) keyed by app id
+    ops_trace_app_cache: TTLCache = TTLCache(
+        maxsize=dify_config.OPS_TRACE_INSTANCE_CACHE_MAX_SIZE,
+        ttl=dify_config.OPS_TRACE_INSTANCE_CACHE_TTL,
+    )
+    ops_trace_cache_lock = threading.Lock()
 
     @classmethod
     def encrypt_tracing_config(
@@ -247,12 +260,44 @@ class OpsTraceManager:
         :param app_id: app_id
         :return:
         """
-        if isinstance(app_id, UUID):
-            app_id = str(app_id)
-
         if app_id is None:
             return None
+        # keyed like in invalidate_ops_trace_instance, whether the app id is passed as a UUID or a string
+        app_id = str(app_id)
 
+        if dify_config.OPS_TRACE_INSTANCE_CACHE_TTL <= 0:
+            return cls._resolve_ops_trace_instance(app_id)
+
+        with cls.ops_trace_cache_lock:
+            tracing_instance = cls.ops_trace_app_cache.get(app_id)
+        if tracing_instance is None:
+            tracing_instance = cls._resolve_ops_trace_instance(app_id)
+            with cls.ops_trace_cache_lock:
+                cls.ops_trace_app_cache[app_id] = (
+                    tracing_instance if tracing_instance is not None else _NO_TRACE_INSTANCE
+                )
+
+        if tracing_instance is _NO_TRACE_INSTANCE:
+            return None
+        return tracing_instance
+
+    @classmethod
+    def invalidate_ops_trace_instance(cls, app_id: Union[UUID, str]):
+        """
+        Drop the cached trace instance of an app, so the next lookup reloads its tracing config
+        :param app_id: app id
+        :return:
+        """
+        with cls.ops_trace_cache_lock:
+            cls.ops_trace_app_cache.pop(str(app_id), None)
+
+    @classmethod
+    def _resolve_ops_trace_instance(cls, app_id: str):
+        """
+        Load the tracing config of an app from the database and build its trace instance
+        :param app_id: app id
+        :return:
+        """
         app: Optional[App] = db.session.query(App).where(App.id == app_id).first()
 
         if app is None:
@@ -281,12 +326,15 @@ class OpsTraceManager:
             provider_config_map[tracing_provider]["trace_instance"],
             provider_config_map[tracing_provider]["config_class"],
         )
-        decrypt_trace_config_key = json.dumps(decrypt_trace_config, sort_keys=True)
-        tracing_instance = cls.ops_trace_instances_cache.get(decrypt_trace_config_key)
+        config_hash = hashlib.sha256(json.dumps(decrypt_trace_config, sort_keys=True).encode()).hexdigest()
+        decrypt_trace_config_key = f"{tracing_provider}:{config_hash}"
+        with cls.ops_trace_cache_lock:
+            tracing_instance = cls.ops_trace_instances_cache.get(decrypt_trace_config_key)
         if tracing_instance is None:
             # create new tracing_instance and update the cache if it absent
             tracing_instance = trace_instance(config_class(**decrypt_trace_config))
-            cls.ops_trace_instances_cache[decrypt_trace_config_key] = tracing_instance
+            with cls.ops_trace_cache_lock:
+                cls.ops_trace_instances_cache[decrypt_trace_config_key] = tracing_instance
             logging.info("new tracing_instance for app_id: %s", app_id)
         return tracing_instance
 
@@ -341,6 +389,7 @@ class OpsTraceManager:
             }
         )
         db.session.commit()
+        cls.invalidate_ops_trace_instance(app_id)
 
     @classmethod
     def get_app_tracing_config(cls, app_id: str):
@@ -28,10 +28,10 @@ class Jieba(BaseKeyword):
         with redis_client.lock(lock_name, timeout=600):
             keyword_table_handler = JiebaKeywordTableHandler()
             keyword_table = self._get_dataset_keyword_table()
-            for text in texts:
-                keywords = keyword_table_handler.extract_keywords(
-                    text.page_content, self._config.max_keywords_per_chunk
-                )
+            keywords_list = keyword_table_handler.extract_keywords_batch(
+                [text.page_content for text in texts], self._config.max_keywords_per_chunk
+            )
+            for text, keywords in zip(texts, keywords_list):
                 if text.metadata is not None:
                     self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
                     keyword_table = self._add_text_to_keyword_table(
@@ -48,19 +48,14 @@ class Jieba(BaseKeyword):
             keyword_table_handler = JiebaKeywordTableHandler()
 
             keyword_table = self._get_dataset_keyword_table()
-            keywords_list = kwargs.get("keywords_list")
-            for i in range(len(texts)):
-                text = texts[i]
-                if keywords_list:
-                    keywords = keywords_list[i]
-                    if not keywords:
-                        keywords = keyword_table_handler.extract_keywords(
-                            text.page_content, self._config.max_keywords_per_chunk
-                        )
-                else:
-                    keywords = keyword_table_handler.extract_keywords(
-                        text.page_content, self._config.max_keywords_per_chunk
-                    )
+            keywords_list = list(kwargs.get("keywords_list") or [None] * len(texts))
+            missing = [i for i, keywords in enumerate(keywords_list) if not keywords]
+            extracted = keyword_table_handler.extract_keywords_batch(
+                [texts[i].page_content for i in missing], self._config.max_keywords_per_chunk
+            )
+            for i, keywords in zip(missing, extracted):
+                keywords_list[i] = keywords
+            for text, keywords in zip(texts, keywords_list):
                 if text.metadata is not None:
                     self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
                     keyword_table = self._add_text_to_keyword_table(
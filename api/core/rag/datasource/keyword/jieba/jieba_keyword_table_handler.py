@@ -1,6 +1,11 @@
 import re
 from typing import Optional, cast
 
+from configs import dify_config
+from core.helper import process_pool
+
+_PROCESS_POOL_BATCH_SIZE = 500
+
 
 class JiebaKeywordTableHandler:
     def __init__(self):
@@ -12,6 +17,26 @@ class JiebaKeywordTableHandler:
 
     def extract_keywords(self, text: str, max_keywords_per_chunk: Optional[int] = 10) -> set[str]:
         """Extract keywords with JIEBA tfidf."""
+        if process_pool.is_enabled() and len(text) >= dify_config.CPU_OFFLOAD_MIN_TEXT_LENGTH:
+            return process_pool.run_in_process(_extract_keywords_batch, [text], max_keywords_per_chunk)[0]
+
+        return self._extract_keywords(text, max_keywords_per_chunk)
+
+    def extract_keywords_batch(self, texts: list[str], max_keywords_per_chunk: Optional[int] = 10) -> list[set[str]]:
+        """Extract keywords of several texts, in the process pool when they are long enough in total."""
+        if process_pool.is_enabled() and sum(len(text) for text in texts) >= dify_config.CPU_OFFLOAD_MIN_TEXT_LENGTH:
+            keywords_list = []
+            # one task per batch keeps each task well below the offload timeout on large datasets
+            for i in range(0, len(texts), _PROCESS_POOL_BATCH_SIZE):
+                batch = texts[i : i + _PROCESS_POOL_BATCH_SIZE]
+                keywords_list.extend(
+                    process_pool.run_in_process(_extract_keywords_batch, batch, max_keywords_per_chunk)
+                )
+            return keywords_list
+
+        return [self._extract_keywords(text, max_keywords_per_chunk) for text in texts]
+
+    def _extract_keywords(self, text: str, max_keywords_per_chunk: Optional[int]) -> set[str]:
         import jieba.analyse  # type: ignore
 
         keywords = jieba.analyse.extract_tags(
@@ -35,3 +60,8 @@ class JiebaKeywordTableHandler:
                 results.update({w for w in sub_tokens if w not in list(STOPWORDS)})
 
         return results
+
+
+def _extract_keywords_batch(texts: list[str], max_keywords_per_chunk: Optional[int]) -> list[set[str]]:
+    keyword_table_handler = JiebaKeywordTableHandler()
+    return [keyword_table_handler._extract_keywords(text, max_keywords_per_chunk) for text in texts]
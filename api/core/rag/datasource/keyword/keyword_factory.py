@@ -3,6 +3,7 @@ from typing import Any
 from configs import dify_config
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.datasource.keyword.keyword_type import KeyWordType
+from core.rag.datasource.retrieval_cache import retrieval_result_cache
 from core.rag.models.document import Document
 from models.dataset import Dataset
 
@@ -29,18 +30,22 @@ class Keyword:
 
     def create(self, texts: list[Document], **kwargs):
         self._keyword_processor.create(texts, **kwargs)
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def add_texts(self, texts: list[Document], **kwargs):
         self._keyword_processor.add_texts(texts, **kwargs)
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def text_exists(self, id: str) -> bool:
         return self._keyword_processor.text_exists(id)
 
     def delete_by_ids(self, ids: list[str]) -> None:
         self._keyword_processor.delete_by_ids(ids)
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def delete(self) -> None:
         self._keyword_processor.delete()
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
         return self._keyword_processor.search(query, **kwargs)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Optional
+
+from cachetools import TTLCache
+
+from configs import dify_config
+from core.rag.models.document import Document
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalResultCache:
+    """
+    Opt-in cache of retrieval results for repeated (dataset, query, retrieval settings) tuples.
+
+    Keys embed a per-dataset content version kept in Redis, which is bumped whenever the vector or keyword index
+    of the dataset changes, so results of outdated content are never served. Results are kept in a per-process
+    memory tier and optionally shared through Redis.
+    """
+
+    _version_key_prefix = "retrieval_cache_version:"
+    _result_key_prefix = "retrieval_cache_result:"
+
+    def __init__(self):
+        self._memory: TTLCache = TTLCache(
+            maxsize=max(dify_config.RETRIEVAL_RESULT_CACHE_MEMORY_MAX_SIZE, 1),
+            ttl=dify_config.RETRIEVAL_RESULT_CACHE_TTL,
+        )
+        self._lock = threading.Lock()
+        self._hits: dict[str, int] = defaultdict(int)
+        self._misses: dict[str, int] = defaultdict(int)
+
+    @property
+    def enabled(self) -> bool:
+        return dify_config.RETRIEVAL_RESULT_CACHE_ENABLED
+
+    def build_key(self, dataset_id: str, query: str, settings: dict[str, Any]) -> Optional[str]:
+        """
+        Build the cache key of a retrieval, None when the cache is disabled or unavailable.
+        The key is built once per retrieval, so results are stored under the content version they were read from.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            version = redis_client.get(self._version_key_prefix + dataset_id)
+        except Exception:
+            logger.warning("failed to read retrieval cache version of dataset %s", dataset_id, exc_info=True)
+            return None
+        version = version.decode() if isinstance(version, bytes) else str(version or 0)
+        payload = json.dumps(
+            {"query": " ".join(query.split()), "settings": settings},
+            sort_keys=True,
+            default=str,
+        )
+        return f"{dataset_id}:{version}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def get(self, dataset_id: str, key: str) -> Optional[list[Document]]:
+        try:
+            documents = self._get_from_tiers(key)
+        except Exception:
+            logger.warning("failed to read retrieval cache of dataset %s", dataset_id, exc_info=True)
+            return None
+
+        with self._lock:
+            if documents is None:
+                self._misses[dataset_id] += 1
+            else:
+                self._hits[dataset_id] += 1
+        return documents
+
+    def set(self, key: str, documents: list[Document]):
+        try:
+            if dify_config.RETRIEVAL_RESULT_CACHE_MEMORY_MAX_SIZE > 0:
+                with self._lock:
+                    self._memory[key] = [document.model_copy(deep=True) for document in documents]
+            if dify_config.RETRIEVAL_RESULT_CACHE_REDIS_ENABLED:
+                redis_client.setex(
+                    self._result_key_prefix + key,
+                    dify_config.RETRIEVAL_RESULT_CACHE_TTL,
+                    json.dumps([document.model_dump(exclude={"vector"}) for document in documents], default=str),
+                )
+        except Exception:
+            logger.warning("failed to write retrieval cache entry %s", key, exc_info=True)
+
+    def invalidate_dataset(self, dataset_id: str):
+        """
+        Bump the content version of a dataset, so all cached results of it are ignored from now on.
+        Done even while the cache is disabled, so re-enabling it never serves results of older content.
+        """
+        try:
+            redis_client.incr(self._version_key_prefix + dataset_id)
+        except Exception:
+            logger.warning("failed to bump retrieval cache version of dataset %s", dataset_id, exc_info=True)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Hit rate metrics per dataset of this process.
+        """
+        with self._lock:
+            result = {}
+            for dataset_id in set(self._hits) | set(self._misses):
+                hits, misses = self._hits[dataset_id], self._misses[dataset_id]
+                result[dataset_id] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+            return result
+
+    def _get_from_tiers(self, key: str) -> Optional[list[Document]]:
+        if dify_config.RETRIEVAL_RESULT_CACHE_MEMORY_MAX_SIZE > 0:
+            with self._lock:
+                documents = self._memory.get(key)
+            if documents is not None:
+                return [document.model_copy(deep=True) for document in documents]
+
+        if dify_config.RETRIEVAL_RESULT_CACHE_REDIS_ENABLED:
+            cached = redis_client.get(self._result_key_prefix + key)
+            if cached:
+                documents = [Document(**document) for document in json.loads(cached)]
+                if dify_config.RETRIEVAL_RESULT_CACHE_MEMORY_MAX_SIZE > 0:
+                    with self._lock:
+                        self._memory[key] = documents
+                return [document.model_copy(deep=True) for document in documents]
+        return None
+
+
+retrieval_result_cache = RetrievalResultCache()
@@ -6,9 +6,13 @@ from flask import Flask, current_app
 from sqlalchemy.orm import Session, load_only
 
 from configs import dify_config
+from core.model_manager import ModelManager
+from core.model_runtime.entities.model_entities import ModelType
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.retrieval_cache import retrieval_result_cache
 from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.entities.metadata_entities import MetadataCondition
 from core.rag.index_processor.constant.index_type import IndexType
@@ -43,6 +47,7 @@ class RetrievalService:
         reranking_mode: str = "reranking_model",
         weights: Optional[dict] = None,
         document_ids_filter: Optional[list[str]] = None,
+        query_vector: Optional[list[float]] = None,
     ):
         if not query:
             return []
@@ -50,6 +55,21 @@ class RetrievalService:
         if not dataset:
             return []
 
+        cache_settings = {
+            "retrieval_method": retrieval_method,
+            "top_k": top_k,
+            "score_threshold": score_threshold,
+            "reranking_model": reranking_model,
+            "reranking_mode": reranking_mode,
+            "weights": weights,
+            "document_ids_filter": sorted(document_ids_filter) if document_ids_filter is not None else None,
+        }
+        cache_key = retrieval_result_cache.build_key(dataset_id, query, cache_settings)
+        if cache_key is not None:
+            cached_documents = retrieval_result_cache.get(dataset_id, cache_key)
+            if cached_documents is not None:
+                return cached_documents
+
         all_documents: list[Document] = []
         exceptions: list[str] = []
 
@@ -83,6 +103,7 @@ class RetrievalService:
                         retrieval_method=retrieval_method,
                         exceptions=exceptions,
                         document_ids_filter=document_ids_filter,
+                        query_vector=query_vector,
                     )
                 )
             if RetrievalMethod.is_support_fulltext_search(retrieval_method):
@@ -117,6 +138,8 @@ class RetrievalService:
                 top_n=top_k,
             )
 
+        if cache_key is not None:
+            retrieval_result_cache.set(cache_key, all_documents)
         return all_documents
 
     @classmethod
@@ -142,6 +165,19 @@ class RetrievalService:
         )
         return all_documents
 
+    @classmethod
+    def embed_query(cls, tenant_id: str, provider: str, model: str, query: str) -> list[float]:
+        """
+        Embed a query with the given embedding model, so it can be shared by several datasets using that model.
+        """
+        model_instance = ModelManager().get_model_instance(
+            tenant_id=tenant_id,
+            provider=provider,
+            model_type=ModelType.TEXT_EMBEDDING,
+            model=model,
+        )
+        return CacheEmbedding(model_instance).embed_query(query)
+
     @classmethod
     def _get_dataset(cls, dataset_id: str) -> Optional[Dataset]:
         with Session(db.engine) as session:
@@ -186,6 +222,7 @@ class RetrievalService:
         retrieval_method: str,
         exceptions: list,
         document_ids_filter: Optional[list[str]] = None,
+        query_vector: Optional[list[float]] = None,
     ):
         with flask_app.app_context():
             try:
@@ -201,6 +238,7 @@ class RetrievalService:
                     score_threshold=score_threshold,
                     filter={"group_id": [dataset.id]},
                     document_ids_filter=document_ids_filter,
+                    query_vector=query_vector,
                 )
 
                 if documents:
@@ -10,6 +10,7 @@ from pymilvus.milvus_client import IndexParams  # type: ignore
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -72,7 +73,14 @@ class MilvusVector(BaseVector):
     def __init__(self, collection_name: str, config: MilvusConfig):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = self._init_client(config)
+        self._client = vector_client_registry.get_or_create(
+            VectorType.MILVUS,
+            config,
+            lambda: self._init_client(config),
+            owner=self,
+            health_check=lambda client: client.get_server_version() is not None,
+            close=lambda client: client.close(),
+        )
         self._consistency_level = "Session"  # Consistency level for Milvus operations
         self._fields: list[str] = []  # List of fields in the collection
         if self._client.has_collection(collection_name):
@@ -203,6 +211,17 @@ class MilvusVector(BaseVector):
 
         return len(result) > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids or not self._client.has_collection(self._collection_name):
+            return set()
+
+        result = self._client.query(
+            collection_name=self._collection_name,
+            filter=f'metadata["doc_id"] in {json.dumps(ids)}',
+            output_fields=[Field.METADATA_KEY.value],
+        )
+        return {r[Field.METADATA_KEY.value]["doc_id"] for r in result}
+
     def field_exists(self, field: str) -> bool:
         """
         Check if a field exists in the collection.
@@ -1,6 +1,7 @@
 import hashlib
 import json
 import logging
+import threading
 import uuid
 from contextlib import contextmanager
 from typing import Any
@@ -12,6 +13,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -72,10 +74,43 @@ USING gin (text gin_bigm_ops);
 """
 
 
+class _BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread safe connection pool waiting for a free connection when all are in use, instead of raising
+    PoolError, since the pool is shared by all PGVector instances of the process.
+    """
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        self._semaphore = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None, blocking=True):
+        if not self._semaphore.acquire(blocking=blocking):
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._semaphore.release()
+
+
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self.pool = vector_client_registry.get_or_create(
+            VectorType.PGVECTOR,
+            config,
+            lambda: self._create_connection_pool(config),
+            owner=self,
+            health_check=self._check_connection_pool,
+            close=lambda pool: pool.closeall(),
+        )
         self.table_name = f"embedding_{collection_name}"
         self.index_hash = hashlib.md5(self.table_name.encode()).hexdigest()[:8]
         self.pg_bigm = config.pg_bigm
@@ -84,7 +119,7 @@ class PGVector(BaseVector):
         return VectorType.PGVECTOR
 
     def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
+        return _BlockingConnectionPool(
             config.min_connection,
             config.max_connection,
             host=config.host,
@@ -94,6 +129,25 @@ class PGVector(BaseVector):
             database=config.database,
         )
 
+    @staticmethod
+    def _check_connection_pool(pool) -> bool:
+        if pool.closed:
+            return False
+        try:
+            conn = pool.getconn(blocking=False)
+        except psycopg2.pool.PoolError:
+            # all connections are in use, the pool is busy rather than broken
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            pool.putconn(conn, close=True)
+            return False
+        pool.putconn(conn)
+        return True
+
     @contextmanager
     def _get_cursor(self):
         conn = self.pool.getconn()
@@ -136,6 +190,13 @@ class PGVector(BaseVector):
             cur.execute(f"SELECT id FROM {self.table_name} WHERE id = %s", (id,))
             return cur.fetchone() is not None
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        with self._get_cursor() as cur:
+            cur.execute(f"SELECT id FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
+            return {str(record[0]) for record in cur}
+
     def get_by_ids(self, ids: list[str]) -> list[Document]:
         with self._get_cursor() as cur:
             cur.execute(f"SELECT meta, text FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
@@ -22,6 +22,7 @@ from qdrant_client.local.qdrant_local import QdrantLocal
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -73,7 +74,14 @@ class QdrantVector(BaseVector):
     def __init__(self, collection_name: str, group_id: str, config: QdrantConfig, distance_func: str = "Cosine"):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = qdrant_client.QdrantClient(**self._client_config.to_qdrant_params())
+        self._client = vector_client_registry.get_or_create(
+            VectorType.QDRANT,
+            config,
+            lambda: qdrant_client.QdrantClient(**config.to_qdrant_params()),
+            owner=self,
+            health_check=lambda client: client.get_collections() is not None,
+            close=lambda client: client.close(),
+        )
         self._distance_func = distance_func.upper()
         self._group_id = group_id
 
@@ -328,6 +336,14 @@ class QdrantVector(BaseVector):
 
         return len(response) > 0
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids or not self._client.collection_exists(self._collection_name):
+            return set()
+        response = self._client.retrieve(
+            collection_name=self._collection_name, ids=ids, with_payload=False, with_vectors=False
+        )
+        return {str(record.id) for record in response}
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         from qdrant_client.http import models
 
@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional, TypeVar, cast
+
+from pydantic import BaseModel
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _RegisteredClient:
+    client: Any
+    close: Optional[Callable[[Any], None]]
+    health_check: Optional[Callable[[Any], bool]]
+    checked_at: float = field(default_factory=time.monotonic)
+    # live owners of the client, it's closed once it's dropped from the registry and none are left
+    holders: int = 0
+    dropped: bool = False
+
+
+class VectorClientRegistry:
+    """
+    Process-wide registry of long-lived vector store clients and connection pools.
+
+    A new Vector is built for every retrieval and indexing call, so backends fetch their client from here
+    instead of opening a new one. Clients are keyed by backend and a hash of their config, checked for health
+    at most once per interval and the least recently used ones are dropped when the registry is full. A
+    dropped client is closed when the last object holding it is garbage collected.
+    Registered clients must be safe to share between threads.
+    """
+
+    def __init__(self, max_size: int, health_check_interval: float):
+        self._max_size = max_size
+        self._health_check_interval = health_check_interval
+        self._clients: OrderedDict[str, _RegisteredClient] = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._evicted = 0
+        self._unhealthy = 0
+
+    def get_or_create(
+        self,
+        backend: str,
+        config: BaseModel,
+        factory: Callable[[], T],
+        *,
+        owner: Optional[object] = None,
+        health_check: Optional[Callable[[T], bool]] = None,
+        close: Optional[Callable[[T], None]] = None,
+    ) -> T:
+        """
+        Return the registered client of a backend config, creating it with factory when missing or unhealthy.
+        :param backend: vector store type
+        :param config: backend config the client is built from
+        :param factory: builds a new client
+        :param owner: object using the client, the client isn't closed while it's alive
+        :param health_check: returns False, or raises, when the client can no longer be used
+        :param close: releases the resources of a client dropped from the registry
+        """
+        if not dify_config.VECTOR_STORE_CLIENT_POOL_ENABLED:
+            return factory()
+
+        key = f"{backend}:{hashlib.sha256(config.model_dump_json().encode()).hexdigest()}"
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                self._clients.move_to_end(key)
+
+        if entry is not None:
+            if self._is_healthy(backend, entry):
+                with self._lock:
+                    # it may have been dropped by another thread since
+                    acquired = not entry.dropped
+                    if acquired:
+                        self._reused += 1
+                        self._hold(backend, entry, owner)
+                if acquired:
+                    return cast(T, entry.client)
+            else:
+                self._discard(backend, key, entry)
+
+        # build outside the lock, connecting may be slow
+        client = factory()
+        to_close: list[_RegisteredClient] = []
+        with self._lock:
+            current = self._clients.get(key)
+            if current is not None:
+                # another thread registered a client in the meantime, keep theirs
+                to_close.append(_RegisteredClient(client=client, close=close, health_check=None))
+                entry = current
+                self._reused += 1
+            else:
+                entry = _RegisteredClient(client=client, close=close, health_check=health_check)
+                self._clients[key] = entry
+                self._created += 1
+                while len(self._clients) > self._max_size:
+                    _, lru_entry = self._clients.popitem(last=False)
+                    self._evicted += 1
+                    if self._drop(lru_entry):
+                        to_close.append(lru_entry)
+            self._hold(backend, entry, owner)
+
+        for closed_entry in to_close:
+            self._close(backend, closed_entry)
+        return cast(T, entry.client)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "created": self._created,
+                "reused": self._reused,
+                "evicted": self._evicted,
+                "unhealthy": self._unhealthy,
+            }
+
+    def clear(self):
+        with self._lock:
+            entries = [entry for entry in self._clients.values() if self._drop(entry)]
+            self._clients.clear()
+        for entry in entries:
+            self._close("", entry)
+
+    def _is_healthy(self, backend: str, entry: _RegisteredClient) -> bool:
+        if entry.health_check is None:
+            return True
+        now = time.monotonic()
+        if now - entry.checked_at < self._health_check_interval:
+            return True
+
+        entry.checked_at = now
+        try:
+            if entry.health_check(entry.client):
+                return True
+        except Exception:
+            logger.warning("health check of %s vector client failed", backend, exc_info=True)
+        with self._lock:
+            self._unhealthy += 1
+        return False
+
+    def _discard(self, backend: str, key: str, entry: _RegisteredClient):
+        with self._lock:
+            if self._clients.get(key) is entry:
+                del self._clients[key]
+            should_close = self._drop(entry)
+        if should_close:
+            self._close(backend, entry)
+
+    def _hold(self, backend: str, entry: _RegisteredClient, owner: Optional[object]):
+        """
+        Count a live owner of the client, must hold the lock.
+        """
+        if owner is None:
+            return
+        entry.holders += 1
+        weakref.finalize(owner, self._release, backend, entry)
+
+    def _release(self, backend: str, entry: _RegisteredClient):
+        with self._lock:
+            entry.holders -= 1
+            should_close = entry.dropped and entry.holders == 0
+        if should_close:
+            self._close(backend, entry)
+
+    @staticmethod
+    def _drop(entry: _RegisteredClient) -> bool:
+        """
+        Mark a client removed from the registry, must hold the lock.
+        :return: whether it should be closed now, it isn't held by a live owner
+        """
+        if entry.dropped:
+            return False
+        entry.dropped = True
+        return entry.holders == 0
+
+    @staticmethod
+    def _close(backend: str, entry: _RegisteredClient):
+        if entry.close is None:
+            return
+        try:
+            entry.close(entry.client)
+        except Exception:
+            logger.warning("failed to close %s vector client", backend, exc_info=True)
+
+
+vector_client_registry = VectorClientRegistry(
+    max_size=dify_config.VECTOR_STORE_CLIENT_POOL_MAX_SIZE,
+    health_check_interval=dify_config.VECTOR_STORE_CLIENT_HEALTH_CHECK_INTERVAL,
+)
@@ -6,6 +6,7 @@ from typing import Any, Optional
 from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.retrieval_cache import retrieval_result_cache
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.cached_embedding import CacheEmbedding
@@ -30,6 +31,9 @@ class AbstractVectorFactory(ABC):
 
 
 class Vector:
+    # number of ids checked per bulk existence query
+    _duplicate_check_batch_size = 1000
+
     def __init__(self, dataset: Dataset, attributes: Optional[list] = None):
         if attributes is None:
             attributes = ["doc_id", "dataset_id", "document_id", "doc_hash"]
@@ -195,6 +199,7 @@ class Vector:
                 )
                 self._vector_processor.create(texts=batch, embeddings=batch_embeddings, **kwargs)
             logger.info("Embedding %s texts took %s s", len(texts), time.time() - start)
+            retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def add_texts(self, documents: list[Document], **kwargs):
         if kwargs.get("duplicate_check", False):
@@ -202,18 +207,22 @@ class Vector:
 
         embeddings = self._embeddings.embed_documents([document.page_content for document in documents])
         self._vector_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def text_exists(self, id: str) -> bool:
         return self._vector_processor.text_exists(id)
 
     def delete_by_ids(self, ids: list[str]) -> None:
         self._vector_processor.delete_by_ids(ids)
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def delete_by_metadata_field(self, key: str, value: str) -> None:
         self._vector_processor.delete_by_metadata_field(key, value)
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
 
     def search_by_vector(self, query: str, **kwargs: Any) -> list[Document]:
-        query_vector = self._embeddings.embed_query(query)
+        # callers searching several datasets with the same embedding model may pass the query vector in
+        query_vector = kwargs.pop("query_vector", None) or self._embeddings.embed_query(query)
         return self._vector_processor.search_by_vector(query_vector, **kwargs)
 
     def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
@@ -221,6 +230,7 @@ class Vector:
 
     def delete(self) -> None:
         self._vector_processor.delete()
+        retrieval_result_cache.invalidate_dataset(self._dataset.id)
         # delete collection redis cache
         if self._vector_processor.collection_name:
             collection_exist_cache_key = f"vector_indexing_{self._vector_processor.collection_name}"
@@ -238,16 +248,14 @@ class Vector:
         return CacheEmbedding(embedding_model)
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            if text.metadata is None:
-                continue
-            doc_id = text.metadata["doc_id"]
-            if doc_id:
-                exists_duplicate_node = self.text_exists(doc_id)
-                if exists_duplicate_node:
-                    texts.remove(text)
-
-        return texts
+        doc_ids = [text.metadata["doc_id"] for text in texts if text.metadata and text.metadata.get("doc_id")]
+        existing_ids: set[str] = set()
+        for i in range(0, len(doc_ids), self._duplicate_check_batch_size):
+            existing_ids.update(
+                self._vector_processor.get_existing_ids(doc_ids[i : i + self._duplicate_check_batch_size])
+            )
+
+        return [text for text in texts if not (text.metadata and text.metadata.get("doc_id") in existing_ids)]
 
     def __getattr__(self, name):
         if self._vector_processor is not None:
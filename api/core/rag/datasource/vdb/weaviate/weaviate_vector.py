@@ -1,5 +1,6 @@
 import datetime
 import json
+import threading
 from typing import Any, Optional
 
 import requests
@@ -9,6 +10,7 @@ from pydantic import BaseModel, model_validator
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import vector_client_registry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -16,6 +18,9 @@ from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
 from models.dataset import Dataset
 
+# serializes batch imports, the batch of a shared client is not thread safe
+_batch_lock = threading.Lock()
+
 
 class WeaviateConfig(BaseModel):
     endpoint: str
@@ -33,7 +38,13 @@ class WeaviateConfig(BaseModel):
 class WeaviateVector(BaseVector):
     def __init__(self, collection_name: str, config: WeaviateConfig, attributes: list):
         super().__init__(collection_name)
-        self._client = self._init_client(config)
+        self._client = vector_client_registry.get_or_create(
+            VectorType.WEAVIATE,
+            config,
+            lambda: self._init_client(config),
+            owner=self,
+            health_check=lambda client: client.is_ready(),
+        )
         self._attributes = attributes
 
     def _init_client(self, config: WeaviateConfig) -> weaviate.Client:
@@ -110,7 +121,7 @@ class WeaviateVector(BaseVector):
 
         ids = []
 
-        with self._client.batch as batch:
+        with _batch_lock, self._client.batch as batch:
             for i, text in enumerate(texts):
                 data_properties = {Field.TEXT_KEY.value: text}
                 if metadatas is not None:
@@ -171,6 +182,27 @@ class WeaviateVector(BaseVector):
 
         return True
 
+    def get_existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids or not self._client.schema.contains(self._default_schema(self._collection_name)):
+            return set()
+        result = (
+            self._client.query.get(self._collection_name, ["doc_id"])
+            .with_where(
+                {
+                    "path": ["doc_id"],
+                    "operator": "ContainsAny",
+                    "valueTextArray": ids,
+                }
+            )
+            .with_limit(len(ids))
+            .do()
+        )
+
+        if "errors" in result:
+            raise ValueError(f"Error during query: {result['errors']}")
+
+        return {entry["doc_id"] for entry in result["data"]["Get"][self._collection_name]}
+
     def delete_by_ids(self, ids: list[str]) -> None:
         # check whether the index already exists
         schema = self._default_schema(self._collection_name)
@@ -6,28 +6,9 @@ from urllib.parse import unquote
 
 from configs import dify_config
 from core.helper import ssrf_proxy
-from core.rag.extractor.csv_extractor import CSVExtractor
 from core.rag.extractor.entity.datasource_type import DatasourceType
 from core.rag.extractor.entity.extract_setting import ExtractSetting
-from core.rag.extractor.excel_extractor import ExcelExtractor
 from core.rag.extractor.extractor_base import BaseExtractor
-from core.rag.extractor.firecrawl.firecrawl_web_extractor import FirecrawlWebExtractor
-from core.rag.extractor.html_extractor import HtmlExtractor
-from core.rag.extractor.jina_reader_extractor import JinaReaderWebExtractor
-from core.rag.extractor.markdown_extractor import MarkdownExtractor
-from core.rag.extractor.notion_extractor import NotionExtractor
-from core.rag.extractor.pdf_extractor import PdfExtractor
-from core.rag.extractor.text_extractor import TextExtractor
-from core.rag.extractor.unstructured.unstructured_doc_extractor import UnstructuredWordExtractor
-from core.rag.extractor.unstructured.unstructured_eml_extractor import UnstructuredEmailExtractor
-from core.rag.extractor.unstructured.unstructured_epub_extractor import UnstructuredEpubExtractor
-from core.rag.extractor.unstructured.unstructured_markdown_extractor import UnstructuredMarkdownExtractor
-from core.rag.extractor.unstructured.unstructured_msg_extractor import UnstructuredMsgExtractor
-from core.rag.extractor.unstructured.unstructured_ppt_extractor import UnstructuredPPTExtractor
-from core.rag.extractor.unstructured.unstructured_pptx_extractor import UnstructuredPPTXExtractor
-from core.rag.extractor.unstructured.unstructured_xml_extractor import UnstructuredXmlExtractor
-from core.rag.extractor.watercrawl.extractor import WaterCrawlWebExtractor
-from core.rag.extractor.word_extractor import WordExtractor
 from core.rag.models.document import Document
 from extensions.ext_storage import storage
 from models.model import UploadFile
@@ -92,7 +73,24 @@ class ExtractProcessor:
     def extract(
         cls, extract_setting: ExtractSetting, is_automatic: bool = False, file_path: Optional[str] = None
     ) -> list[Document]:
+        # the extractors are imported when used, some of them pull in heavy libraries such as pandas
         if extract_setting.datasource_type == DatasourceType.FILE.value:
+            from core.rag.extractor.csv_extractor import CSVExtractor
+            from core.rag.extractor.excel_extractor import ExcelExtractor
+            from core.rag.extractor.html_extractor import HtmlExtractor
+            from core.rag.extractor.markdown_extractor import MarkdownExtractor
+            from core.rag.extractor.pdf_extractor import PdfExtractor
+            from core.rag.extractor.text_extractor import TextExtractor
+            from core.rag.extractor.unstructured.unstructured_doc_extractor import UnstructuredWordExtractor
+            from core.rag.extractor.unstructured.unstructured_eml_extractor import UnstructuredEmailExtractor
+            from core.rag.extractor.unstructured.unstructured_epub_extractor import UnstructuredEpubExtractor
+            from core.rag.extractor.unstructured.unstructured_markdown_extractor import UnstructuredMarkdownExtractor
+            from core.rag.extractor.unstructured.unstructured_msg_extractor import UnstructuredMsgExtractor
+            from core.rag.extractor.unstructured.unstructured_ppt_extractor import UnstructuredPPTExtractor
+            from core.rag.extractor.unstructured.unstructured_pptx_extractor import UnstructuredPPTXExtractor
+            from core.rag.extractor.unstructured.unstructured_xml_extractor import UnstructuredXmlExtractor
+            from core.rag.extractor.word_extractor import WordExtractor
+
             with tempfile.TemporaryDirectory() as temp_dir:
                 if not file_path:
                     assert extract_setting.upload_file is not None, "upload_file is required"
@@ -164,6 +162,8 @@ class ExtractProcessor:
                         extractor = TextExtractor(file_path, autodetect_encoding=True)
                 return extractor.extract()
         elif extract_setting.datasource_type == DatasourceType.NOTION.value:
+            from core.rag.extractor.notion_extractor import NotionExtractor
+
             assert extract_setting.notion_info is not None, "notion_info is required"
             extractor = NotionExtractor(
                 notion_workspace_id=extract_setting.notion_info.notion_workspace_id,
@@ -174,6 +174,10 @@ class ExtractProcessor:
             )
             return extractor.extract()
         elif extract_setting.datasource_type == DatasourceType.WEBSITE.value:
+            from core.rag.extractor.firecrawl.firecrawl_web_extractor import FirecrawlWebExtractor
+            from core.rag.extractor.jina_reader_extractor import JinaReaderWebExtractor
+            from core.rag.extractor.watercrawl.extractor import WaterCrawlWebExtractor
+
             assert extract_setting.website_info is not None, "website_info is required"
             if extract_setting.website_info.provider == "firecrawl":
                 extractor = FirecrawlWebExtractor(
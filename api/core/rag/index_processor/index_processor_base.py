@@ -7,10 +7,7 @@ from configs import dify_config
 from core.model_manager import ModelInstance
 from core.rag.extractor.entity.extract_setting import ExtractSetting
 from core.rag.models.document import Document
-from core.rag.splitter.fixed_text_splitter import (
-    EnhanceRecursiveCharacterTextSplitter,
-    FixedRecursiveCharacterTextSplitter,
-)
+from core.rag.splitter.segment_splitter import create_segment_splitter
 from core.rag.splitter.text_splitter import TextSplitter
 from models.dataset import Dataset, DatasetProcessRule
 
@@ -65,19 +62,18 @@ class BaseIndexProcessor(ABC):
             if separator:
                 separator = separator.replace("\\n", "\n")
 
-            character_splitter = FixedRecursiveCharacterTextSplitter.from_encoder(
+            character_splitter = create_segment_splitter(
                 chunk_size=max_tokens,
                 chunk_overlap=chunk_overlap,
                 fixed_separator=separator,
-                separators=["\n\n", "。", ". ", " ", ""],
                 embedding_model_instance=embedding_model_instance,
             )
         else:
             # Automatic segmentation
-            character_splitter = EnhanceRecursiveCharacterTextSplitter.from_encoder(
+            character_splitter = create_segment_splitter(
                 chunk_size=DatasetProcessRule.AUTOMATIC_RULES["segmentation"]["max_tokens"],
                 chunk_overlap=DatasetProcessRule.AUTOMATIC_RULES["segmentation"]["chunk_overlap"],
-                separators=["\n\n", "。", ". ", " ", ""],
+                fixed_separator=None,
                 embedding_model_instance=embedding_model_instance,
             )
 
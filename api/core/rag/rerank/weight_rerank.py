@@ -74,9 +74,11 @@ class WeightRerankRunner(BaseRerankRunner):
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
         documents_keywords = []
-        for document in documents:
-            # get the document keywords
-            document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
+        # get the documents keywords
+        all_documents_keywords = keyword_table_handler.extract_keywords_batch(
+            [document.page_content for document in documents], None
+        )
+        for document, document_keywords in zip(documents, all_documents_keywords):
             if document.metadata is not None:
                 document.metadata["keywords"] = document_keywords
                 documents_keywords.append(document_keywords)
@@ -161,25 +163,26 @@ class WeightRerankRunner(BaseRerankRunner):
             model=vector_setting.embedding_model_name,
         )
         cache_embedding = CacheEmbedding(embedding_model)
-        query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
-            if document.metadata and "score" in document.metadata:
-                query_vector_scores.append(document.metadata["score"])
-            else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
+        query_vector = np.array(cache_embedding.embed_query(query))
 
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
+        # documents without a score from the vector search, compared to the query all at once
+        unscored = [
+            i for i, document in enumerate(documents) if not (document.metadata and "score" in document.metadata)
+        ]
+        cosine_sims: dict[int, float] = {}
+        if unscored:
+            # transform to NumPy
+            document_vectors = np.array([documents[i].vector for i in unscored])
 
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+            # calculate cosine similarity
+            dot_products = document_vectors @ query_vector
+            norms = np.linalg.norm(document_vectors, axis=1) * np.linalg.norm(query_vector)
+            cosine_sims = dict(zip(unscored, dot_products / norms))
+
+        for i, document in enumerate(documents):
+            if i in cosine_sims:
+                query_vector_scores.append(cosine_sims[i])
+            elif document.metadata is not None:
+                query_vector_scores.append(document.metadata["score"])
 
         return query_vector_scores
@@ -1,7 +1,9 @@
 import json
+import logging
 import math
 import re
 import threading
+import time
 from collections import Counter, defaultdict
 from collections.abc import Generator, Mapping
 from typing import Any, Optional, Union, cast
@@ -61,6 +63,8 @@ from models.dataset import ChildChunk, Dataset, DatasetMetadata, DatasetQuery, D
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
+logger = logging.getLogger(__name__)
+
 default_retrieval_model: dict[str, Any] = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -455,6 +459,7 @@ class DatasetRetrieval:
                     ].embedding_model_provider
                     weights["vector_setting"]["embedding_model_name"] = available_datasets[0].embedding_model
 
+        retrieval_datasets: list[tuple[Dataset, Optional[list[str]]]] = []
         for dataset in available_datasets:
             index_type = dataset.indexing_technique
             document_ids_filter = None
@@ -467,6 +472,16 @@ class DatasetRetrieval:
                         document_ids_filter = document_ids
                     else:
                         continue
+            retrieval_datasets.append((dataset, document_ids_filter))
+
+        timings: dict[str, float] = {}
+        start_at = time.perf_counter()
+        # embed the query once per embedding model instead of once per dataset
+        query_vectors = self._embed_query_by_model(tenant_id, [dataset for dataset, _ in retrieval_datasets], query)
+        timings["embedding"] = time.perf_counter() - start_at
+
+        start_at = time.perf_counter()
+        for dataset, document_ids_filter in retrieval_datasets:
             retrieval_thread = threading.Thread(
                 target=self._retriever,
                 kwargs={
@@ -477,13 +492,16 @@ class DatasetRetrieval:
                     "all_documents": all_documents,
                     "document_ids_filter": document_ids_filter,
                     "metadata_condition": metadata_condition,
+                    "query_vector": query_vectors.get((dataset.embedding_model_provider, dataset.embedding_model)),
                 },
             )
             threads.append(retrieval_thread)
             retrieval_thread.start()
         for thread in threads:
             thread.join()
+        timings["retrieval"] = time.perf_counter() - start_at
 
+        start_at = time.perf_counter()
         with measure_time() as timer:
             if reranking_enable:
                 # do rerank for searched documents
@@ -499,6 +517,13 @@ class DatasetRetrieval:
                     all_documents = self.calculate_vector_score(all_documents, top_k, score_threshold)
                 else:
                     all_documents = all_documents[:top_k] if top_k else all_documents
+        timings["rerank"] = time.perf_counter() - start_at
+        logger.debug(
+            "multiple retrieve over %s datasets with %s query embeddings, timings: %s",
+            len(retrieval_datasets),
+            len(query_vectors),
+            timings,
+        )
 
         self._on_query(query, dataset_ids, app_id, user_from, user_id)
 
@@ -588,6 +613,31 @@ class DatasetRetrieval:
             db.session.add_all(dataset_queries)
         db.session.commit()
 
+    def _embed_query_by_model(
+        self, tenant_id: str, datasets: list[Dataset], query: str
+    ) -> dict[tuple[str, str], list[float]]:
+        """
+        Embed the query once for every embedding model used by semantic or hybrid search of the datasets.
+        Models that fail to embed are left out, their datasets embed the query on their own.
+        """
+        embedding_models = set()
+        for dataset in datasets:
+            if dataset.provider == "external" or dataset.indexing_technique != "high_quality":
+                continue
+            if not dataset.embedding_model_provider or not dataset.embedding_model:
+                continue
+            retrieval_model = dataset.retrieval_model or default_retrieval_model
+            if RetrievalMethod.is_support_semantic_search(retrieval_model["search_method"]):
+                embedding_models.add((dataset.embedding_model_provider, dataset.embedding_model))
+
+        query_vectors: dict[tuple[str, str], list[float]] = {}
+        for provider, model in embedding_models:
+            try:
+                query_vectors[(provider, model)] = RetrievalService.embed_query(tenant_id, provider, model, query)
+            except Exception:
+                logger.warning("Failed to embed query with %s/%s", provider, model, exc_info=True)
+        return query_vectors
+
     def _retriever(
         self,
         flask_app: Flask,
@@ -597,6 +647,7 @@ class DatasetRetrieval:
         all_documents: list,
         document_ids_filter: Optional[list[str]] = None,
         metadata_condition: Optional[MetadataCondition] = None,
+        query_vector: Optional[list[float]] = None,
     ):
         with flask_app.app_context():
             with Session(db.engine) as session:
@@ -657,6 +708,7 @@ class DatasetRetrieval:
                             reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                             weights=retrieval_model.get("weights", None),
                             document_ids_filter=document_ids_filter,
+                            query_vector=query_vector,
                         )
 
                         all_documents.extend(documents)
@@ -768,10 +820,13 @@ class DatasetRetrieval:
         keyword_table_handler = JiebaKeywordTableHandler()
         query_keywords = keyword_table_handler.extract_keywords(query, None)
         documents_keywords = []
-        for document in documents:
+        documents_with_metadata = [document for document in documents if document.metadata is not None]
+        # get the documents keywords
+        all_documents_keywords = keyword_table_handler.extract_keywords_batch(
+            [document.page_content for document in documents_with_metadata], None
+        )
+        for document, document_keywords in zip(documents_with_metadata, all_documents_keywords):
             if document.metadata is not None:
-                # get the document keywords
-                document_keywords = keyword_table_handler.extract_keywords(document.page_content, None)
                 document.metadata["keywords"] = document_keywords
                 documents_keywords.append(document_keywords)
 
@@ -0,0 +1,57 @@
+"""Choice of the text splitter of a segmentation rule."""
+
+from typing import Optional, cast
+
+from configs import dify_config
+from core.model_manager import ModelInstance
+from core.rag.splitter.fixed_text_splitter import (
+    EnhanceRecursiveCharacterTextSplitter,
+    FixedRecursiveCharacterTextSplitter,
+)
+from core.rag.splitter.span_text_splitter import SpanTextSplitter
+from core.rag.splitter.text_splitter import TextSplitter
+
+SEGMENT_SEPARATORS = ["\n\n", "。", ". ", " ", ""]
+
+
+def create_segment_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    fixed_separator: Optional[str],
+    embedding_model_instance: Optional[ModelInstance],
+) -> TextSplitter:
+    """
+    Create the splitter of a segmentation rule, the SpanTextSplitter when INDEXING_TOKEN_AWARE_SPLITTER_ENABLED.
+    :param chunk_size: maximum chunk size
+    :param chunk_overlap: overlap of consecutive chunks
+    :param fixed_separator: separator of a custom rule, None for automatic segmentation
+    :param embedding_model_instance: embedding model instance
+    """
+    if dify_config.INDEXING_TOKEN_AWARE_SPLITTER_ENABLED:
+        return SpanTextSplitter.from_encoder(
+            fixed_separator=fixed_separator or "",
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=SEGMENT_SEPARATORS,
+            embedding_model_instance=embedding_model_instance,
+        )
+    if fixed_separator is None:
+        return cast(
+            TextSplitter,
+            EnhanceRecursiveCharacterTextSplitter.from_encoder(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=SEGMENT_SEPARATORS,
+                embedding_model_instance=embedding_model_instance,
+            ),
+        )
+    return cast(
+        TextSplitter,
+        FixedRecursiveCharacterTextSplitter.from_encoder(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            fixed_separator=fixed_separator,
+            separators=SEGMENT_SEPARATORS,
+            embedding_model_instance=embedding_model_instance,
+        ),
+    )
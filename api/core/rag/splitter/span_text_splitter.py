@@ -0,0 +1,173 @@
+"""Offset based text splitter with optional token budgets."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from typing import Any, Optional
+
+from core.model_manager import ModelInstance
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenizer import GPT2Tokenizer
+from core.rag.splitter.text_splitter import TextSplitter
+
+Span = tuple[int, int]
+
+
+class SpanTextSplitter(TextSplitter):
+    """
+    Splits text into (start, end) offsets over the original string.
+
+    Works like FixedRecursiveCharacterTextSplitter: the text is split by the fixed separator first, and segments
+    over the chunk size are split recursively by the next separator found in them, then merged back up to the
+    chunk size. Separators are kept at the end of the pieces, and leading and trailing whitespace is trimmed from
+    every chunk. Pieces are only kept as offsets, so no substrings are built until chunks are returned.
+
+    Chunk sizes are counted in characters, or in tokens when a token encoder is given. Token counts of the pieces
+    are computed in batches, and text without any separator left is cut at token boundaries.
+    """
+
+    # number of pieces encoded per batch call, bounds the memory used for token counting
+    _encode_batch_size = 1000
+
+    def __init__(
+        self,
+        fixed_separator: str = "\n\n",
+        separators: Optional[list[str]] = None,
+        token_encoder: Any = None,
+        **kwargs: Any,
+    ):
+        super().__init__(keep_separator=True, **kwargs)
+        self._fixed_separator = fixed_separator
+        self._separators = [separator for separator in (separators or ["\n\n", "\n", " "]) if separator]
+        self._token_encoder = token_encoder
+
+    @classmethod
+    def from_encoder(
+        cls,
+        embedding_model_instance: Optional[ModelInstance] = None,
+        **kwargs: Any,
+    ) -> SpanTextSplitter:
+        """
+        Create a splitter counting chunk sizes in tokens with the local GPT-2 encoder.
+        The embedding model is not called for token counting, it would take a remote call per batch of pieces.
+        """
+        return cls(token_encoder=GPT2Tokenizer.get_encoder(), **kwargs)
+
+    def split_text(self, text: str) -> list[str]:
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def split_spans(self, text: str) -> list[Span]:
+        """
+        Split text and return the (start, end) offsets of the chunks.
+        """
+        if self._fixed_separator:
+            segments = list(self._separated_spans(text, 0, len(text), self._fixed_separator, keep_separator=False))
+        else:
+            segments = [(0, len(text))]
+
+        spans: list[Span] = []
+        for (start, end), length in zip(segments, self._span_lengths(text, segments)):
+            if length > self._chunk_size:
+                spans.extend(self._split_span(text, start, end, self._separators))
+            else:
+                self._append_trimmed(text, start, end, spans)
+        return spans
+
+    def _split_span(self, text: str, start: int, end: int, separators: list[str]) -> list[Span]:
+        for i, separator in enumerate(separators):
+            if text.find(separator, start, end) != -1:
+                next_separators = separators[i + 1 :]
+                break
+        else:
+            return self._window_spans(text, start, end)
+
+        pieces = list(self._separated_spans(text, start, end, separator, keep_separator=True))
+        lengths = self._span_lengths(text, pieces)
+
+        spans: list[Span] = []
+        # pieces of the chunk being built, with the total length of them
+        current: deque[int] = deque()
+        total = 0
+        for index, length in enumerate(lengths):
+            if length > self._chunk_size:
+                if current:
+                    self._append_trimmed(text, pieces[current[0]][0], pieces[current[-1]][1], spans)
+                    current.clear()
+                    total = 0
+                spans.extend(self._split_span(text, pieces[index][0], pieces[index][1], next_separators))
+                continue
+
+            if current and total + length > self._chunk_size:
+                self._append_trimmed(text, pieces[current[0]][0], pieces[current[-1]][1], spans)
+                # keep the trailing pieces within the overlap as the start of the next chunk
+                while current and (total > self._chunk_overlap or total + length > self._chunk_size):
+                    total -= lengths[current.popleft()]
+            current.append(index)
+            total += length
+
+        if current:
+            self._append_trimmed(text, pieces[current[0]][0], pieces[current[-1]][1], spans)
+        return spans
+
+    def _window_spans(self, text: str, start: int, end: int) -> list[Span]:
+        """
+        Cut text without any separator into windows of the chunk size, overlapping by the chunk overlap.
+        """
+        step = max(self._chunk_size - self._chunk_overlap, 1)
+        offsets = self._token_offsets(text, start, end)
+        count = end - start if offsets is None else len(offsets)
+
+        spans: list[Span] = []
+        position = 0
+        while position < count:
+            window_end = min(position + self._chunk_size, count)
+            if offsets is None:
+                window = (start + position, start + window_end)
+            else:
+                window = (offsets[position], offsets[window_end] if window_end < count else end)
+            self._append_trimmed(text, window[0], window[1], spans)
+            if window_end >= count:
+                break
+            position += step
+        return spans
+
+    def _token_offsets(self, text: str, start: int, end: int) -> Optional[list[int]]:
+        """
+        Offsets in text where the tokens of the span start, None to cut windows of characters instead.
+        """
+        if self._token_encoder is None or not hasattr(self._token_encoder, "decode_with_offsets"):
+            return None
+
+        tokens = self._token_encoder.encode_ordinary(text[start:end])
+        _, offsets = self._token_encoder.decode_with_offsets(tokens)
+        return [start + offset for offset in offsets]
+
+    def _span_lengths(self, text: str, spans: list[Span]) -> list[int]:
+        if self._token_encoder is None:
+            return [end - start for start, end in spans]
+
+        lengths: list[int] = []
+        for batch_start in range(0, len(spans), self._encode_batch_size):
+            batch = [text[start:end] for start, end in spans[batch_start : batch_start + self._encode_batch_size]]
+            if hasattr(self._token_encoder, "encode_ordinary_batch"):
+                lengths.extend(len(tokens) for tokens in self._token_encoder.encode_ordinary_batch(batch))
+            else:
+                lengths.extend(len(self._token_encoder.encode(piece)) for piece in batch)
+        return lengths
+
+    @staticmethod
+    def _separated_spans(text: str, start: int, end: int, separator: str, keep_separator: bool) -> Iterator[Span]:
+        position = start
+        while (index := text.find(separator, position, end)) != -1:
+            yield position, index + len(separator) if keep_separator else index
+            position = index + len(separator)
+        yield position, end
+
+    @staticmethod
+    def _append_trimmed(text: str, start: int, end: int, spans: list[Span]):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
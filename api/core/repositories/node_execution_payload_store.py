@@ -0,0 +1,110 @@
+"""
+Offloading of large node execution payloads to the object storage.
+
+Inputs, process data and outputs of node executions are saved as JSON columns, and read back and parsed
+whenever the execution is listed. A node producing megabytes makes every row of its run heavy. Above a size
+threshold, a payload is saved once to the object storage and the column keeps a truncated preview, while the
+references of the offloaded payloads are saved with the execution, so they're loaded only when needed.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections.abc import Iterable, Mapping
+from typing import Any, Optional
+
+from cachetools import LRUCache
+
+from configs import dify_config
+from core.workflow.utils.payload_truncation import payload_size, truncate_payload
+from extensions.ext_storage import storage
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_FIELDS = ("inputs", "process_data", "outputs")
+
+
+class NodeExecutionPayloadStore:
+    _key_prefix = "workflow_node_executions"
+
+    def __init__(self):
+        # digests of the payloads saved by this process, a running node execution is saved again when it finishes
+        self._saved_digests: LRUCache = LRUCache(maxsize=1024)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return dify_config.WORKFLOW_NODE_PAYLOAD_OFFLOAD_ENABLED
+
+    def dump_payloads(
+        self, tenant_id: str, execution_id: str, payloads: Mapping[str, Any]
+    ) -> tuple[dict[str, Optional[str]], Optional[str]]:
+        """
+        Serialize the payloads of a node execution for its columns, offloading the large ones.
+        :param tenant_id: tenant id
+        :param execution_id: node execution id
+        :param payloads: JSON encodable payloads by field, e.g. outputs
+        :return: the column value of every field, None for empty payloads, and the references of the offloaded
+            payloads for the offloaded_payloads column, None when nothing was offloaded
+        """
+        columns: dict[str, Optional[str]] = {}
+        offloaded: dict[str, dict[str, Any]] = {}
+        for field, value in payloads.items():
+            if not value:
+                columns[field] = None
+                continue
+            data = json.dumps(value)
+            # measured like in preview, so node events stream the payload in full exactly when it's kept here
+            if payload_size(value) <= dify_config.WORKFLOW_NODE_PAYLOAD_OFFLOAD_THRESHOLD:
+                columns[field] = data
+                continue
+
+            key = f"{self._key_prefix}/{tenant_id}/{execution_id}/{field}.json"
+            self._save(key, data.encode())
+            preview, _ = truncate_payload(value, dify_config.WORKFLOW_NODE_PAYLOAD_PREVIEW_MAX_BYTES)
+            columns[field] = json.dumps(preview)
+            offloaded[field] = {"key": key, "size": len(data)}
+        return columns, json.dumps(offloaded) if offloaded else None
+
+    def preview(self, value: Any) -> tuple[Any, bool]:
+        """
+        The preview kept for a payload when it's offloaded, e.g. to stream it in node events.
+        :return: the preview, and whether the payload is offloaded, or the payload itself and False
+        """
+        if not self.enabled or not value or payload_size(value) <= dify_config.WORKFLOW_NODE_PAYLOAD_OFFLOAD_THRESHOLD:
+            return value, False
+        preview, _ = truncate_payload(value, dify_config.WORKFLOW_NODE_PAYLOAD_PREVIEW_MAX_BYTES)
+        return preview, True
+
+    def load(self, key: str) -> Any:
+        """
+        Load an offloaded payload.
+        """
+        return json.loads(storage.load_once(key))
+
+    def delete(self, offloaded_payloads: Iterable[Optional[str]]):
+        """
+        Delete the offloaded payloads of deleted node executions.
+        :param offloaded_payloads: values of the offloaded_payloads column
+        """
+        for value in offloaded_payloads:
+            if not value:
+                continue
+            for reference in json.loads(value).values():
+                try:
+                    storage.delete(reference["key"])
+                except Exception:
+                    logger.warning("failed to delete offloaded node payload %s", reference["key"], exc_info=True)
+
+    def _save(self, key: str, data: bytes):
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        with self._lock:
+            if self._saved_digests.get(key) == digest:
+                return
+        storage.save(key, data)
+        with self._lock:
+            self._saved_digests[key] = digest
+
+
+node_execution_payload_store = NodeExecutionPayloadStore()
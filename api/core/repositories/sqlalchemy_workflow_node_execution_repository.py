@@ -12,6 +12,7 @@ from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from core.model_runtime.utils.encoders import jsonable_encoder
+from core.repositories.node_execution_payload_store import PAYLOAD_FIELDS, node_execution_payload_store
 from core.workflow.entities.workflow_node_execution import (
     WorkflowNodeExecution,
     WorkflowNodeExecutionMetadataKey,
@@ -163,17 +164,28 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
         db_model.node_id = domain_model.node_id
         db_model.node_type = domain_model.node_type
         db_model.title = domain_model.title
-        db_model.inputs = (
-            json.dumps(json_converter.to_json_encodable(domain_model.inputs)) if domain_model.inputs else None
-        )
-        db_model.process_data = (
-            json.dumps(json_converter.to_json_encodable(domain_model.process_data))
-            if domain_model.process_data
-            else None
-        )
-        db_model.outputs = (
-            json.dumps(json_converter.to_json_encodable(domain_model.outputs)) if domain_model.outputs else None
-        )
+        if node_execution_payload_store.enabled:
+            # large payloads are saved to the object storage, the columns keep a preview
+            columns, db_model.offloaded_payloads = node_execution_payload_store.dump_payloads(
+                self._tenant_id,
+                domain_model.id,
+                {field: json_converter.to_json_encodable(getattr(domain_model, field)) for field in PAYLOAD_FIELDS},
+            )
+            db_model.inputs = columns["inputs"]
+            db_model.process_data = columns["process_data"]
+            db_model.outputs = columns["outputs"]
+        else:
+            db_model.inputs = (
+                json.dumps(json_converter.to_json_encodable(domain_model.inputs)) if domain_model.inputs else None
+            )
+            db_model.process_data = (
+                json.dumps(json_converter.to_json_encodable(domain_model.process_data))
+                if domain_model.process_data
+                else None
+            )
+            db_model.outputs = (
+                json.dumps(json_converter.to_json_encodable(domain_model.outputs)) if domain_model.outputs else None
+            )
         db_model.status = domain_model.status
         db_model.error = domain_model.error
         db_model.elapsed_time = domain_model.elapsed_time
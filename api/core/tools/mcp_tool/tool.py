@@ -5,6 +5,7 @@ from typing import Any, Optional
 
 from core.mcp.error import MCPAuthError, MCPConnectionError
 from core.mcp.mcp_client import MCPClient
+from core.mcp.session_pool import mcp_session_pool
 from core.mcp.types import ImageContent, TextContent
 from core.tools.__base.tool import Tool
 from core.tools.__base.tool_runtime import ToolRuntime
@@ -47,7 +48,7 @@ class MCPTool(Tool):
         from core.tools.errors import ToolInvokeError
 
         try:
-            with MCPClient(
+            mcp_client = MCPClient(
                 self.server_url,
                 self.provider_id,
                 self.tenant_id,
@@ -55,9 +56,11 @@ class MCPTool(Tool):
                 headers=self.headers,
                 timeout=self.timeout,
                 sse_read_timeout=self.sse_read_timeout,
-            ) as mcp_client:
-                tool_parameters = self._handle_none_parameter(tool_parameters)
-                result = mcp_client.invoke_tool(tool_name=self.entity.identity.name, tool_args=tool_parameters)
+            )
+            tool_parameters = self._handle_none_parameter(tool_parameters)
+            result = mcp_session_pool.invoke_tool(
+                mcp_client, tool_name=self.entity.identity.name, tool_args=tool_parameters
+            )
         except MCPAuthError as e:
             raise ToolInvokeError("Please auth the tool first") from e
         except MCPConnectionError as e:
@@ -4,7 +4,7 @@ import hmac
 import logging
 import os
 import time
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 from mimetypes import guess_extension, guess_type
 from typing import Optional, Union
 from uuid import uuid4
@@ -77,6 +77,58 @@ class ToolFileManager:
         mimetype: str,
         filename: Optional[str] = None,
     ) -> ToolFile:
+        filepath, present_filename = self._new_file_path(tenant_id, mimetype, filename)
+        storage.save(filepath, file_binary)
+
+        return self._add_tool_file(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            conversation_id=conversation_id,
+            filepath=filepath,
+            mimetype=mimetype,
+            name=present_filename,
+            size=len(file_binary),
+        )
+
+    def create_file_by_stream(
+        self,
+        *,
+        user_id: str,
+        tenant_id: str,
+        conversation_id: Optional[str],
+        stream: Iterable[bytes],
+        mimetype: str,
+        filename: Optional[str] = None,
+    ) -> ToolFile:
+        """
+        Create a tool file from chunks of bytes, saved to storage without holding the whole file in memory.
+        """
+        filepath, present_filename = self._new_file_path(tenant_id, mimetype, filename)
+        size = 0
+
+        def count_size() -> Generator[bytes, None, None]:
+            nonlocal size
+            for chunk in stream:
+                size += len(chunk)
+                yield chunk
+
+        storage.save_stream(filepath, count_size())
+
+        return self._add_tool_file(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            conversation_id=conversation_id,
+            filepath=filepath,
+            mimetype=mimetype,
+            name=present_filename,
+            size=size,
+        )
+
+    @staticmethod
+    def _new_file_path(tenant_id: str, mimetype: str, filename: Optional[str]) -> tuple[str, str]:
+        """
+        :return: the storage path of a new tool file and the file name presented to users
+        """
         extension = guess_extension(mimetype) or ".bin"
         unique_name = uuid4().hex
         unique_filename = f"{unique_name}{extension}"
@@ -86,9 +138,19 @@ class ToolFileManager:
             has_extension = len(filename.split(".")) > 1
             # Add extension flexibly
             present_filename = filename if has_extension else f"{filename}{extension}"
-        filepath = f"tools/{tenant_id}/{unique_filename}"
-        storage.save(filepath, file_binary)
+        return f"tools/{tenant_id}/{unique_filename}", present_filename
 
+    def _add_tool_file(
+        self,
+        *,
+        user_id: str,
+        tenant_id: str,
+        conversation_id: Optional[str],
+        filepath: str,
+        mimetype: str,
+        name: str,
+        size: int,
+    ) -> ToolFile:
         with Session(self._engine, expire_on_commit=False) as session:
             tool_file = ToolFile(
                 user_id=user_id,
@@ -96,8 +158,8 @@ class ToolFileManager:
                 conversation_id=conversation_id,
                 file_key=filepath,
                 mimetype=mimetype,
-                name=present_filename,
-                size=len(file_binary),
+                name=name,
+                size=size,
             )
 
             session.add(tool_file)
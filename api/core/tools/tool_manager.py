@@ -79,9 +79,8 @@ class ToolManager:
 
         """
 
-        if len(cls._hardcoded_providers) == 0:
-            # init the builtin providers
-            cls.load_hardcoded_providers_cache()
+        # the builtin providers are loaded on first use
+        cls.load_hardcoded_providers_cache()
 
         return cls._hardcoded_providers[provider]
 
@@ -98,9 +97,8 @@ class ToolManager:
         """
         # split provider to
 
-        if len(cls._hardcoded_providers) == 0:
-            # init the builtin providers
-            cls.load_hardcoded_providers_cache()
+        # the builtin providers are loaded on first use
+        cls.load_hardcoded_providers_cache()
 
         if provider not in cls._hardcoded_providers:
             # get plugin provider
@@ -578,13 +576,18 @@ class ToolManager:
 
     @classmethod
     def load_hardcoded_providers_cache(cls):
+        """
+        load the builtin providers unless they are loaded already
+        """
+        if cls._builtin_providers_loaded:
+            return
         for _ in cls.list_hardcoded_providers():
             pass
 
     @classmethod
     def clear_hardcoded_providers_cache(cls):
-        cls._hardcoded_providers = {}
         cls._builtin_providers_loaded = False
+        cls._hardcoded_providers = {}
 
     @classmethod
     def get_tool_label(cls, tool_name: str) -> Union[I18nObject, None]:
@@ -595,9 +598,7 @@ class ToolManager:
 
         :return: the label of the tool
         """
-        if len(cls._builtin_tools_labels) == 0:
-            # init the builtin providers
-            cls.load_hardcoded_providers_cache()
+        cls.load_hardcoded_providers_cache()
 
         if tool_name not in cls._builtin_tools_labels:
             return None
@@ -1023,6 +1024,3 @@ class ToolManager:
                     value = parameter.init_frontend_parameter(tool_configurations.get(parameter.name))
                     runtime_parameters[parameter.name] = value
         return runtime_parameters
-
-
-ToolManager.load_hardcoded_providers_cache()
@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import zlib
+from typing import Optional
+
+from configs import dify_config
+from core.file import File, FileTransferMethod
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# bump when a change of the extractors changes the text they produce, so older cached texts are ignored
+EXTRACTOR_VERSION = "1"
+
+_key_prefix = "document_extractor_text:"
+
+
+class ExtractionCache:
+    """
+    Opt-in cache of the text extracted from files, kept compressed in Redis.
+
+    Uploaded and tool files never change, so their text is cached by file id and a hit skips the download.
+    Remote files are cached by a hash of their content, which saves the parsing only. Keys include the
+    extractor version and the file type the parser was chosen by.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return dify_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED
+
+    @staticmethod
+    def get_file_key(file: File) -> Optional[str]:
+        """
+        Key of a file that can be looked up before downloading it, None when its content has to be hashed.
+        """
+        if file.transfer_method not in {FileTransferMethod.LOCAL_FILE, FileTransferMethod.TOOL_FILE}:
+            return None
+        if not file.related_id:
+            return None
+        return f"{EXTRACTOR_VERSION}:{file.tenant_id}:{file.transfer_method}:{file.related_id}:{_file_type(file)}"
+
+    @staticmethod
+    def get_content_key(file: File, file_content: bytes) -> str:
+        digest = hashlib.sha256(file_content).hexdigest()
+        return f"{EXTRACTOR_VERSION}:{file.tenant_id}:sha256:{digest}:{_file_type(file)}"
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            cached = redis_client.get(_key_prefix + key)
+            if cached is None:
+                return None
+            return zlib.decompress(cached).decode("utf-8")
+        except Exception:
+            logger.warning("failed to read extracted text cache entry %s", key, exc_info=True)
+            return None
+
+    def set(self, key: str, text: str):
+        compressed = zlib.compress(text.encode("utf-8"))
+        if len(compressed) > dify_config.DOCUMENT_EXTRACTOR_CACHE_MAX_SIZE:
+            return
+        try:
+            redis_client.setex(_key_prefix + key, dify_config.DOCUMENT_EXTRACTOR_CACHE_TTL, compressed)
+        except Exception:
+            logger.warning("failed to write extracted text cache entry %s", key, exc_info=True)
+
+
+def _file_type(file: File) -> str:
+    return (file.extension or file.mime_type or "").lower()
+
+
+extraction_cache = ExtractionCache()
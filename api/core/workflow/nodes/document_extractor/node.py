@@ -22,7 +22,7 @@ from docx.text.paragraph import Paragraph
 
 from configs import dify_config
 from core.file import File, FileTransferMethod, file_manager
-from core.helper import ssrf_proxy
+from core.helper import process_pool, ssrf_proxy
 from core.variables import ArrayFileSegment
 from core.variables.segments import ArrayStringSegment, FileSegment
 from core.workflow.entities.node_entities import NodeRunResult
@@ -33,6 +33,7 @@ from core.workflow.nodes.enums import ErrorStrategy, NodeType
 
 from .entities import DocumentExtractorNodeData
 from .exc import DocumentExtractorError, FileDownloadError, TextExtractionError, UnsupportedFileTypeError
+from .extraction_cache import extraction_cache
 
 logger = logging.getLogger(__name__)
 
@@ -436,13 +437,41 @@ def _download_file_content(file: File) -> bytes:
 
 
 def _extract_text_from_file(file: File):
-    file_content = _download_file_content(file)
-    if file.extension:
-        extracted_text = _extract_text_by_file_extension(file_content=file_content, file_extension=file.extension)
-    elif file.mime_type:
-        extracted_text = _extract_text_by_mime_type(file_content=file_content, mime_type=file.mime_type)
-    else:
-        raise UnsupportedFileTypeError("Unable to determine file type: MIME type or file extension is missing")
+    if not extraction_cache.enabled:
+        return _parse_file_content(file, _download_file_content(file))
+
+    file_content = None
+    cache_key = extraction_cache.get_file_key(file)
+    if cache_key is None:
+        file_content = _download_file_content(file)
+        cache_key = extraction_cache.get_content_key(file, file_content)
+
+    extracted_text = extraction_cache.get(cache_key)
+    if extracted_text is not None:
+        return extracted_text
+
+    if file_content is None:
+        file_content = _download_file_content(file)
+    extracted_text = _parse_file_content(file, file_content)
+    extraction_cache.set(cache_key, extracted_text)
+    return extracted_text
+
+
+def _parse_file_content(file: File, file_content: bytes) -> str:
+    # parsing runs in the process pool when enabled, so that large spreadsheets or PDFs don't stall the worker
+    try:
+        if file.extension:
+            extracted_text = process_pool.run_in_process(
+                _extract_text_by_file_extension, file_content=file_content, file_extension=file.extension
+            )
+        elif file.mime_type:
+            extracted_text = process_pool.run_in_process(
+                _extract_text_by_mime_type, file_content=file_content, mime_type=file.mime_type
+            )
+        else:
+            raise UnsupportedFileTypeError("Unable to determine file type: MIME type or file extension is missing")
+    except (process_pool.ProcessPoolBusyError, process_pool.ProcessPoolTimeoutError) as e:
+        raise TextExtractionError(f"Failed to extract text from file: {str(e)}") from e
     return extracted_text
 
 
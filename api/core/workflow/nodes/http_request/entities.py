@@ -1,7 +1,7 @@
 import mimetypes
 from collections.abc import Sequence
 from email.message import Message
-from typing import Any, Literal, Optional
+from typing import IO, Any, Literal, Optional
 
 import httpx
 from pydantic import BaseModel, Field, ValidationInfo, field_validator
@@ -96,10 +96,35 @@ class HttpRequestNodeData(BaseNodeData):
 class Response:
     headers: dict[str, str]
     response: httpx.Response
-
-    def __init__(self, response: httpx.Response):
+    # body of a streamed response, spooled to disk when it's a large file
+    body_file: Optional[IO[bytes]] = None
+
+    def __init__(
+        self,
+        response: httpx.Response,
+        *,
+        content: Optional[bytes] = None,
+        content_sample: Optional[bytes] = None,
+    ):
+        """
+        :param response: the httpx response, its body is read from it unless given otherwise
+        :param content: body of a streamed response read into memory
+        :param content_sample: first bytes of a streamed response read in chunks, to tell files from text
+        """
         self.response = response
         self.headers = dict(response.headers)
+        self._content = content
+        self._content_sample = content_sample
+        self._text: Optional[str] = None
+        self._size: Optional[int] = None
+
+    def set_streamed_body(self, *, size: int, text: Optional[str] = None, body_file: Optional[IO[bytes]] = None):
+        """
+        Set the body of a streamed response read in chunks, decoded text or a file positioned at its start.
+        """
+        self._size = size
+        self._text = text
+        self.body_file = body_file
 
     @property
     def is_file(self):
@@ -135,7 +160,7 @@ class Response:
             # Try to detect if content is text-based by sampling first few bytes
             try:
                 # Sample first 1024 bytes for text detection
-                content_sample = self.response.content[:1024]
+                content_sample = self._get_content_sample()
                 content_sample.decode("utf-8")
                 # If we can decode as UTF-8 and find common text patterns, likely not a file
                 text_markers = (b"{", b"[", b"<", b"function", b"var ", b"const ", b"let ")
@@ -159,10 +184,24 @@ class Response:
 
     @property
     def text(self) -> str:
+        if self._text is not None:
+            return self._text
+        if self._content is not None:
+            return self._content.decode(self.response.encoding or "utf-8", errors="replace")
         return self.response.text
 
     @property
     def content(self) -> bytes:
+        if self._content is not None:
+            return self._content
+        if self.body_file is not None:
+            # reads a spooled body back into memory, prefer streaming the body file
+            self.body_file.seek(0)
+            content = self.body_file.read()
+            self.body_file.seek(0)
+            return content
+        if self._text is not None:
+            return self._text.encode(self.response.encoding or "utf-8")
         return self.response.content
 
     @property
@@ -171,6 +210,8 @@ class Response:
 
     @property
     def size(self) -> int:
+        if self._size is not None:
+            return self._size
         return len(self.content)
 
     @property
@@ -182,6 +223,11 @@ class Response:
         else:
             return f"{(self.size / 1024 / 1024):.2f} MB"
 
+    def _get_content_sample(self) -> bytes:
+        if self._content_sample is not None:
+            return self._content_sample[:1024]
+        return self.content[:1024]
+
     @property
     def parsed_content_disposition(self) -> Optional[Message]:
         content_disposition = self.headers.get("content-disposition", "")
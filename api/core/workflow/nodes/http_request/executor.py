@@ -1,10 +1,12 @@
 import base64
+import codecs
 import json
 import secrets
 import string
+import tempfile
 from collections.abc import Mapping
 from copy import deepcopy
-from typing import Any, Literal
+from typing import Any, Literal, Optional
 from urllib.parse import urlencode, urlparse
 
 import httpx
@@ -39,6 +41,8 @@ BODY_TYPE_TO_CONTENT_TYPE = {
     "raw-text": "text/plain",
 }
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class Executor:
     method: Literal[
@@ -305,8 +309,8 @@ class Executor:
 
         return headers
 
-    def _validate_and_parse_response(self, response: httpx.Response) -> Response:
-        executor_response = Response(response)
+    def _validate_and_parse_response(self, response: httpx.Response, content: Optional[bytes] = None) -> Response:
+        executor_response = Response(response, content=content)
 
         threshold_size = (
             dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE
@@ -322,10 +326,7 @@ class Executor:
 
         return executor_response
 
-    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
-        """
-        do http request depending on api bundle
-        """
+    def _get_request_args(self, headers: dict[str, Any]) -> dict[str, Any]:
         if self.method not in {
             "get",
             "head",
@@ -344,7 +345,7 @@ class Executor:
         }:
             raise InvalidHttpMethodError(f"Invalid http method {self.method}")
 
-        request_args = {
+        return {
             "url": self.url,
             "data": self.data,
             "files": self.files,
@@ -357,6 +358,12 @@ class Executor:
             "follow_redirects": True,
             "max_retries": self.max_retries,
         }
+
+    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
+        """
+        do http request depending on api bundle
+        """
+        request_args = self._get_request_args(headers)
         # request_args = {k: v for k, v in request_args.items() if v is not None}
         try:
             response = getattr(ssrf_proxy, self.method.lower())(**request_args)
@@ -365,9 +372,81 @@ class Executor:
         # FIXME: fix type ignore, this maybe httpx type issue
         return response  # type: ignore
 
+    def _do_streaming_http_request(self, headers: dict[str, Any]) -> Response:
+        """
+        do http request and read the response body in chunks, without holding large bodies in memory
+        """
+        request_args = self._get_request_args(headers)
+        try:
+            with ssrf_proxy.stream_request(self.method.upper(), **request_args) as response:
+                return self._read_streamed_response(response)
+        except (ssrf_proxy.MaxRetriesExceededError, httpx.RequestError) as e:
+            raise HttpRequestNodeError(str(e)) from e
+
+    def _read_streamed_response(self, response: httpx.Response) -> Response:
+        threshold = dify_config.HTTP_REQUEST_NODE_STREAMING_THRESHOLD
+        chunks = response.iter_bytes(chunk_size=STREAM_CHUNK_SIZE)
+        head = bytearray()
+        for chunk in chunks:
+            head += chunk
+            if len(head) > threshold:
+                break
+        else:
+            # the whole body fits under the threshold, handle it in memory as usual
+            return self._validate_and_parse_response(response, content=bytes(head))
+
+        executor_response = Response(response, content_sample=bytes(head[:1024]))
+        is_file = executor_response.is_file
+        threshold_size = (
+            dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE if is_file else dify_config.HTTP_REQUEST_NODE_MAX_TEXT_SIZE
+        )
+
+        def check_size(size: int):
+            if size > threshold_size:
+                raise ResponseSizeError(
+                    f"{'File' if is_file else 'Text'} size is too large,"
+                    f" max size is {threshold_size / 1024 / 1024:.2f} MB,"
+                    f" but current size is over {size / 1024 / 1024:.2f} MB."
+                )
+
+        # fail before downloading a body announced too large
+        content_length = response.headers.get("content-length", "")
+        if content_length.isdigit() and "content-encoding" not in response.headers:
+            check_size(int(content_length))
+
+        size = len(head)
+        check_size(size)
+        if is_file:
+            # closed once the node has saved it to storage
+            body_file = tempfile.SpooledTemporaryFile(max_size=threshold)  # noqa: SIM115
+            try:
+                body_file.write(head)
+                for chunk in chunks:
+                    size += len(chunk)
+                    check_size(size)
+                    body_file.write(chunk)
+            except BaseException:
+                body_file.close()
+                raise
+            body_file.seek(0)
+            executor_response.set_streamed_body(size=size, body_file=body_file)
+        else:
+            decoder = _get_incremental_decoder(response.encoding)
+            text_parts = [decoder.decode(bytes(head))]
+            for chunk in chunks:
+                size += len(chunk)
+                check_size(size)
+                text_parts.append(decoder.decode(chunk))
+            text_parts.append(decoder.decode(b"", final=True))
+            executor_response.set_streamed_body(size=size, text="".join(text_parts))
+
+        return executor_response
+
     def invoke(self) -> Response:
         # assemble headers
         headers = self._assembling_headers()
+        if dify_config.HTTP_REQUEST_NODE_STREAMING_ENABLED:
+            return self._do_streaming_http_request(headers)
         # do http request
         response = self._do_http_request(headers)
         # validate response
@@ -458,6 +537,13 @@ class Executor:
         return raw
 
 
+def _get_incremental_decoder(encoding: Optional[str]) -> codecs.IncrementalDecoder:
+    try:
+        return codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
 def _generate_random_string(n: int) -> str:
     """
     Generate a random string of lowercase ASCII letters.
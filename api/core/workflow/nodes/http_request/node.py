@@ -1,3 +1,4 @@
+import functools
 import logging
 import mimetypes
 from collections.abc import Mapping, Sequence
@@ -13,7 +14,7 @@ from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.base.entities import BaseNodeData, RetryConfig
 from core.workflow.nodes.enums import ErrorStrategy, NodeType
-from core.workflow.nodes.http_request.executor import Executor
+from core.workflow.nodes.http_request.executor import STREAM_CHUNK_SIZE, Executor
 from core.workflow.utils import variable_template_parser
 from factories import file_factory
 
@@ -204,7 +205,6 @@ class HttpRequestNode(BaseNode):
         files: list[File] = []
         is_file = response.is_file
         content_type = response.content_type
-        content = response.content
         parsed_content_disposition = response.parsed_content_disposition
         content_disposition_type = None
 
@@ -224,13 +224,24 @@ class HttpRequestNode(BaseNode):
         )
         tool_file_manager = ToolFileManager()
 
-        tool_file = tool_file_manager.create_file_by_raw(
-            user_id=self.user_id,
-            tenant_id=self.tenant_id,
-            conversation_id=None,
-            file_binary=content,
-            mimetype=mime_type,
-        )
+        if response.body_file is not None:
+            # a large streamed body, uploaded in chunks from its spooled file
+            with response.body_file as body_file:
+                tool_file = tool_file_manager.create_file_by_stream(
+                    user_id=self.user_id,
+                    tenant_id=self.tenant_id,
+                    conversation_id=None,
+                    stream=iter(functools.partial(body_file.read, STREAM_CHUNK_SIZE), b""),
+                    mimetype=mime_type,
+                )
+        else:
+            tool_file = tool_file_manager.create_file_by_raw(
+                user_id=self.user_id,
+                tenant_id=self.tenant_id,
+                conversation_id=None,
+                file_binary=response.content,
+                mimetype=mime_type,
+            )
 
         mapping = {
             "tool_file_id": tool_file.id,
@@ -0,0 +1,61 @@
+"""
+Previews of large node payloads.
+
+Inputs, process data and outputs of a node can be megabytes, e.g. the text of a document or a long list. A
+preview keeps the shape of the payload, mappings and their keys, and shortens the long strings and lists in
+it until the payload fits in a size limit.
+"""
+
+from collections.abc import Mapping
+from typing import Any
+
+import orjson
+
+# marker appended to the strings and lists that are cut
+TRUNCATION_MARKER = "..."
+
+# the strings of a preview keep at least this many characters, the preview may be larger than the limit then
+_MIN_STRING_LENGTH = 64
+_MIN_ITEMS = 1
+
+
+def payload_size(value: Any) -> int:
+    """
+    Size in bytes of a JSON serializable payload.
+    """
+    return len(orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS))
+
+
+def truncate_payload(value: Any, max_bytes: int) -> tuple[Any, bool]:
+    """
+    Shorten a JSON serializable payload to about max_bytes.
+
+    Strings longer than the limit are cut, then lists, and both limits are halved until the payload fits.
+    :param value: payload
+    :param max_bytes: size limit, 0 for no limit
+    :return: the payload or its preview, and whether it was truncated
+    """
+    if not max_bytes or value is None or payload_size(value) <= max_bytes:
+        return value, False
+
+    max_length = max(max_bytes, _MIN_STRING_LENGTH)
+    max_items = max(max_bytes // 16, _MIN_ITEMS)
+    while True:
+        preview = _truncate(value, max_length, max_items)
+        if payload_size(preview) <= max_bytes or (max_length <= _MIN_STRING_LENGTH and max_items <= _MIN_ITEMS):
+            return preview, True
+        max_length = max(max_length // 2, _MIN_STRING_LENGTH)
+        max_items = max(max_items // 2, _MIN_ITEMS)
+
+
+def _truncate(value: Any, max_length: int, max_items: int) -> Any:
+    if isinstance(value, str):
+        return value[:max_length] + TRUNCATION_MARKER if len(value) > max_length else value
+    if isinstance(value, Mapping):
+        return {key: _truncate(item, max_length, max_items) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        items = [_truncate(item, max_length, max_items) for item in value[:max_items]]
+        if len(value) > max_items:
+            items.append(TRUNCATION_MARKER)
+        return items
+    return value
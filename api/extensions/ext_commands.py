@@ -4,6 +4,11 @@ from dify_app import DifyApp
 def init_app(app: DifyApp):
     from commands import (
         add_qdrant_index,
+        benchmark_stream_coalescing,
+        benchmark_stream_serialization,
+        benchmark_text_splitter,
+        benchmark_token_estimation,
+        clean_expired_messages,
         cleanup_orphaned_draft_variables,
         clear_free_plan_tenant_expired_logs,
         clear_orphaned_file_records,
@@ -15,6 +20,7 @@ def init_app(app: DifyApp):
         install_plugins,
         migrate_data_for_plugin,
         old_metadata_migration,
+        profile_startup_command,
         remove_orphaned_files_on_storage,
         reset_email,
         reset_encrypt_key_pair,
@@ -44,6 +50,12 @@ def init_app(app: DifyApp):
         remove_orphaned_files_on_storage,
         setup_system_tool_oauth_client,
         cleanup_orphaned_draft_variables,
+        clean_expired_messages,
+        profile_startup_command,
+        benchmark_token_estimation,
+        benchmark_stream_coalescing,
+        benchmark_stream_serialization,
+        benchmark_text_splitter,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
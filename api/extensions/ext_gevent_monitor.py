@@ -0,0 +1,38 @@
+import logging
+
+from configs import dify_config
+from dify_app import DifyApp
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled() -> bool:
+    return dify_config.GEVENT_BLOCKING_MONITOR_ENABLED
+
+
+def init_app(app: DifyApp):
+    from gevent import monkey
+
+    if not monkey.is_module_patched("threading"):
+        # the hub only serves requests when the process runs under gevent
+        logger.info("Skipped gevent blocking monitor, the process is not monkey patched")
+        return
+
+    import gevent
+    from zope.event import subscribers  # type: ignore
+
+    gevent.config.monitor_thread = True
+    gevent.config.max_blocking_time = dify_config.GEVENT_MAX_BLOCKING_TIME
+    subscribers.append(_log_event_loop_blocked)
+    gevent.get_hub().start_periodic_monitoring_thread()
+
+
+def _log_event_loop_blocked(event):
+    from gevent.events import EventLoopBlocked
+
+    if not isinstance(event, EventLoopBlocked):
+        return
+    # called from the monitoring thread, while the blocking greenlet may still hold the hub
+    logger.warning(
+        "gevent hub blocked for more than %ss by %s\n%s", event.blocking_time, event.greenlet, "\n".join(event.info)
+    )
@@ -1,6 +1,6 @@
 import logging
-from collections.abc import Callable, Generator
-from typing import Literal, Union, overload
+from collections.abc import Callable, Generator, Iterable
+from typing import Any, Literal, Optional, Union, overload
 
 from flask import Flask
 
@@ -18,6 +18,21 @@ class Storage:
         with app.app_context():
             self.storage_runner = storage_factory()
 
+        if dify_config.STORAGE_LOCAL_CACHE_ENABLED:
+            from extensions.storage.cached_storage import CachedStorage
+
+            self.storage_runner = CachedStorage(
+                self.storage_runner,
+                cache_dir=dify_config.STORAGE_LOCAL_CACHE_PATH,
+                max_bytes=dify_config.STORAGE_LOCAL_CACHE_MAX_BYTES,
+                max_object_bytes=dify_config.STORAGE_LOCAL_CACHE_MAX_OBJECT_BYTES,
+                key_prefixes=[
+                    prefix.strip()
+                    for prefix in dify_config.STORAGE_LOCAL_CACHE_KEY_PREFIXES.split(",")
+                    if prefix.strip()
+                ],
+            )
+
     @staticmethod
     def get_storage_factory(storage_type: str) -> Callable[[], BaseStorage]:
         match storage_type:
@@ -88,6 +103,9 @@ class Storage:
     def save(self, filename, data):
         self.storage_runner.save(filename, data)
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        self.storage_runner.save_stream(filename, stream)
+
     @overload
     def load(self, filename: str, /, *, stream: Literal[False] = False) -> bytes: ...
 
@@ -118,6 +136,16 @@ class Storage:
     def scan(self, path: str, files: bool = True, directories: bool = False) -> list[str]:
         return self.storage_runner.scan(path, files=files, directories=directories)
 
+    def cache_stats(self) -> Optional[dict[str, Any]]:
+        """
+        Hit rate metrics of the local storage cache, None when the cache is disabled.
+        """
+        from extensions.storage.cached_storage import CachedStorage
+
+        if isinstance(self.storage_runner, CachedStorage):
+            return self.storage_runner.stats()
+        return None
+
 
 storage = Storage()
 
@@ -1,5 +1,5 @@
 import posixpath
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 import oss2 as aliyun_s3  # type: ignore
 
@@ -31,6 +31,10 @@ class AliyunOssStorage(BaseStorage):
     def save(self, filename, data):
         self.client.put_object(self.__wrapper_folder_filename(filename), data)
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        # iterators are sent with chunked transfer encoding
+        self.client.put_object(self.__wrapper_folder_filename(filename), iter(stream))
+
     def load_once(self, filename: str) -> bytes:
         obj = self.client.get_object(self.__wrapper_folder_filename(filename))
         data: bytes = obj.read()
@@ -1,12 +1,12 @@
 import logging
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 import boto3  # type: ignore
 from botocore.client import Config  # type: ignore
 from botocore.exceptions import ClientError  # type: ignore
 
 from configs import dify_config
-from extensions.storage.base_storage import BaseStorage
+from extensions.storage.base_storage import BaseStorage, IterableReader
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +51,10 @@ class AwsS3Storage(BaseStorage):
     def save(self, filename, data):
         self.client.put_object(Bucket=self.bucket_name, Key=filename, Body=data)
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        # uploaded in parts by the transfer manager, which buffers a few parts at a time
+        self.client.upload_fileobj(IterableReader(stream), self.bucket_name, filename)
+
     def load_once(self, filename: str) -> bytes:
         try:
             data: bytes = self.client.get_object(Bucket=self.bucket_name, Key=filename)["Body"].read()
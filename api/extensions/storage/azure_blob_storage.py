@@ -1,4 +1,4 @@
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 from datetime import timedelta
 from typing import Optional
 
@@ -32,6 +32,12 @@ class AzureBlobStorage(BaseStorage):
         blob_container = client.get_container_client(container=self.bucket_name)
         blob_container.upload_blob(filename, data)
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        client = self._sync_client()
+        blob_container = client.get_container_client(container=self.bucket_name)
+        # iterables are uploaded as blocks
+        blob_container.upload_blob(filename, stream)
+
     def load_once(self, filename: str) -> bytes:
         client = self._sync_client()
         blob = client.get_container_client(container=self.bucket_name)
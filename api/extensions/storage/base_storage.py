@@ -1,16 +1,64 @@
 """Abstract interface for file storage implementations."""
 
+import io
+import logging
 from abc import ABC, abstractmethod
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class IterableReader(io.RawIOBase):
+    """
+    Readable file object over the chunks of a stream, for SDKs uploading from file objects in parts.
+    """
+
+    def __init__(self, stream: Iterable[bytes]):
+        self._chunks = iter(stream)
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # fills the buffer unless the stream ends, readers like the S3 transfer manager take a short read as
+        # a part of its own
+        view = memoryview(buffer).cast("B")
+        size = 0
+        while size < len(view):
+            if not self._pending:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._pending = chunk
+                continue
+            count = min(len(view) - size, len(self._pending))
+            view[size : size + count] = self._pending[:count]
+            self._pending = self._pending[count:]
+            size += count
+        return size
 
 
 class BaseStorage(ABC):
     """Interface for file storage."""
 
+    _warned_save_stream = False
+
     @abstractmethod
     def save(self, filename, data):
         raise NotImplementedError
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        """
+        Save the chunks of a stream as one file.
+        Backends able to write in chunks override this: OpenDAL, S3, Azure Blob, Aliyun OSS and Google Cloud
+        Storage. The default joins the chunks in memory, so memory use grows with the size of the file.
+        """
+        if not type(self)._warned_save_stream:
+            type(self)._warned_save_stream = True
+            logger.warning("%s saves streamed files from memory, their size isn't bounded", type(self).__name__)
+        self.save(filename, b"".join(stream))
+
     @abstractmethod
     def load_once(self, filename: str) -> bytes:
         raise NotImplementedError
@@ -0,0 +1,232 @@
+"""Read-through local disk cache in front of any storage backend."""
+
+import hashlib
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Generator, Iterable, Sequence
+from pathlib import Path
+from typing import Any, Optional
+
+from extensions.storage.base_storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+
+class CachedStorage(BaseStorage):
+    """
+    Wraps a storage backend with a local disk cache.
+
+    Objects are stored under a hash of their storage key, and the cache is kept within
+    a byte budget by evicting the least recently used entries. Writes go through to the
+    backend first, deletes invalidate the local copy.
+
+    Other processes may overwrite or delete an object without this one noticing, so only
+    keys under the given prefixes are cached. They must name objects that are never
+    rewritten, e.g. uploads saved under a fresh uuid, which makes the key as good as a
+    hash of the content. Other keys go straight to the backend.
+    """
+
+    _chunk_size = 4096
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        cache_dir: str,
+        max_bytes: int,
+        max_object_bytes: int,
+        key_prefixes: Sequence[str],
+    ):
+        self.storage = storage
+        self.key_prefixes = tuple(key_prefixes)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = min(max_object_bytes, max_bytes)
+
+        self._lock = threading.Lock()
+        # cache file name -> size, ordered from least to most recently used
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_existing_entries()
+
+    def save(self, filename, data):
+        self.storage.save(filename, data)
+        if self._cacheable(filename):
+            self._put(filename, data)
+
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        # streamed files are typically large, they're cached when first loaded
+        if self._cacheable(filename):
+            self._discard(self._cache_key(filename))
+        self.storage.save_stream(filename, stream)
+
+    def load_once(self, filename: str) -> bytes:
+        if not self._cacheable(filename):
+            return self.storage.load_once(filename)
+
+        data = self._get(filename)
+        if data is not None:
+            return data
+
+        data = self.storage.load_once(filename)
+        self._put(filename, data)
+        return data
+
+    def load_stream(self, filename: str) -> Generator:
+        path = self._lookup(filename)
+        if path is None:
+            yield from self.storage.load_stream(filename)
+            return
+
+        try:
+            with path.open("rb") as f:
+                while chunk := f.read(self._chunk_size):
+                    yield chunk
+        except FileNotFoundError:
+            # evicted by another process between the lookup and the read
+            self._discard(self._cache_key(filename))
+            yield from self.storage.load_stream(filename)
+
+    def download(self, filename, target_filepath):
+        path = self._lookup(filename)
+        if path is not None:
+            try:
+                shutil.copyfile(path, target_filepath)
+                return
+            except FileNotFoundError:
+                self._discard(self._cache_key(filename))
+        self.storage.download(filename, target_filepath)
+
+    def exists(self, filename):
+        # the cache directory is shared by processes that index it separately, another one may have deleted
+        # the object since it was cached here
+        return self.storage.exists(filename)
+
+    def delete(self, filename):
+        result = self.storage.delete(filename)
+        if self._cacheable(filename):
+            self._discard(self._cache_key(filename))
+        return result
+
+    def scan(self, path, files=True, directories=False) -> list[str]:
+        return self.storage.scan(path, files=files, directories=directories)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Hit rate metrics of the local cache.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _cacheable(self, filename: str) -> bool:
+        return filename.startswith(self.key_prefixes)
+
+    @staticmethod
+    def _cache_key(filename: str) -> str:
+        return hashlib.sha256(filename.encode()).hexdigest()
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def _load_existing_entries(self):
+        """
+        Rebuild the index from a previous run, oldest access first.
+        """
+        existing = []
+        for path in self.cache_dir.glob("*/*"):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            stat = path.stat()
+            existing.append((stat.st_atime, path.name, stat.st_size))
+        for _, key, size in sorted(existing):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _lookup(self, filename: str) -> Optional[Path]:
+        if not self._cacheable(filename):
+            return None
+        key = self._cache_key(filename)
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return self._cache_path(key)
+
+    def _get(self, filename: str) -> Optional[bytes]:
+        path = self._lookup(filename)
+        if path is None:
+            return None
+
+        try:
+            with path.open("rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b""
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[:]
+        except FileNotFoundError:
+            self._discard(self._cache_key(filename))
+            return None
+
+    def _put(self, filename: str, data: bytes):
+        if not isinstance(data, bytes | bytearray):
+            self._discard(self._cache_key(filename))
+            return
+
+        size = len(data)
+        if size > self.max_object_bytes:
+            self._discard(self._cache_key(filename))
+            return
+
+        key = self._cache_key(filename)
+        path = self._cache_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first, so readers never see a partial object
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("failed to write %s to local storage cache", filename, exc_info=True)
+            return
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def _discard(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+        self._cache_path(key).unlink(missing_ok=True)
+
+    def _evict(self):
+        """
+        Drop least recently used entries until the cache fits its budget, must hold the lock.
+        """
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._evictions += 1
+            self._cache_path(key).unlink(missing_ok=True)
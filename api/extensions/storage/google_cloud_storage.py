@@ -1,7 +1,7 @@
 import base64
 import io
 import json
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 
 from google.cloud import storage as google_cloud_storage  # type: ignore
 
@@ -32,6 +32,14 @@ class GoogleCloudStorage(BaseStorage):
         with io.BytesIO(data) as stream:
             blob.upload_from_file(stream)
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]):
+        bucket = self.client.get_bucket(self.bucket_name)
+        blob = bucket.blob(filename)
+        # the writer uploads in chunks with a resumable upload
+        with blob.open(mode="wb") as blob_stream:
+            for chunk in stream:
+                blob_stream.write(chunk)
+
     def load_once(self, filename: str) -> bytes:
         bucket = self.client.get_bucket(self.bucket_name)
         blob = bucket.get_blob(filename)
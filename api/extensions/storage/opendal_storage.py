@@ -1,6 +1,6 @@
 import logging
 import os
-from collections.abc import Generator
+from collections.abc import Generator, Iterable
 from pathlib import Path
 
 import opendal  # type: ignore[import]
@@ -44,6 +44,12 @@ class OpenDALStorage(BaseStorage):
         self.op.write(path=filename, bs=data)
         logger.debug("file %s saved", filename)
 
+    def save_stream(self, filename: str, stream: Iterable[bytes]) -> None:
+        with self.op.open(path=filename, mode="wb") as file:
+            for chunk in stream:
+                file.write(chunk)
+        logger.debug("file %s saved as stream", filename)
+
     def load_once(self, filename: str) -> bytes:
         if not self.exists(filename):
             raise FileNotFoundError("File not found")
@@ -131,6 +131,7 @@ conversation_pagination_fields = {
     "limit": fields.Integer(attribute="per_page"),
     "total": fields.Integer,
     "has_more": fields.Boolean(attribute="has_next"),
+    "next_cursor": fields.String,
     "data": fields.List(fields.Nested(conversation_fields), attribute="items"),
 }
 
@@ -171,6 +172,7 @@ conversation_with_summary_pagination_fields = {
     "limit": fields.Integer(attribute="per_page"),
     "total": fields.Integer,
     "has_more": fields.Boolean(attribute="has_next"),
+    "next_cursor": fields.String,
     "data": fields.List(fields.Nested(conversation_with_summary_fields), attribute="items"),
 }
 
@@ -20,5 +20,6 @@ workflow_app_log_pagination_fields = {
     "limit": fields.Integer,
     "total": fields.Integer,
     "has_more": fields.Boolean,
+    "next_cursor": fields.String,
     "data": fields.List(fields.Nested(workflow_app_log_partial_fields)),
 }
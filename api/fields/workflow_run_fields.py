@@ -98,9 +98,11 @@ workflow_run_node_execution_fields = {
     "node_id": fields.String,
     "node_type": fields.String,
     "title": fields.String,
-    "inputs": fields.Raw(attribute="inputs_dict"),
-    "process_data": fields.Raw(attribute="process_data_dict"),
-    "outputs": fields.Raw(attribute="outputs_dict"),
+    # previews for the payloads saved to the object storage, listed in offloaded_fields and loaded separately
+    "inputs": fields.Raw(attribute="inputs_preview_dict"),
+    "process_data": fields.Raw(attribute="process_data_preview_dict"),
+    "outputs": fields.Raw(attribute="outputs_preview_dict"),
+    "offloaded_fields": fields.List(fields.String),
     "status": fields.String,
     "error": fields.String,
     "elapsed_time": fields.Float,
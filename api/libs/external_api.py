@@ -41,17 +41,18 @@ class ExternalApi(Api):
                 default_data["message"] = "Invalid JSON payload received or JSON payload is empty."
 
             headers = e.get_response().headers
-        elif isinstance(e, ValueError):
-            status_code = 400
+        elif isinstance(e, AppInvokeQuotaExceededError):
+            # checked before ValueError, which it derives from
+            status_code = 429
             default_data = {
-                "code": "invalid_param",
+                "code": "too_many_requests",
                 "message": str(e),
                 "status": status_code,
             }
-        elif isinstance(e, AppInvokeQuotaExceededError):
-            status_code = 429
+        elif isinstance(e, ValueError):
+            status_code = 400
             default_data = {
-                "code": "too_many_requests",
+                "code": "invalid_param",
                 "message": str(e),
                 "status": status_code,
             }
@@ -18,6 +18,7 @@ from flask_restful import fields
 from pydantic import BaseModel
 
 from configs import dify_config
+from core.app.apps import stream_response_serializer
 from core.app.features.rate_limiting.rate_limit import RateLimitGenerator
 from core.file import helpers as file_helpers
 from core.model_runtime.utils.encoders import jsonable_encoder
@@ -205,6 +206,10 @@ def generate_text_hash(text: str) -> str:
 
 def compact_generate_response(response: Union[Mapping, Generator, RateLimitGenerator]) -> Response:
     if isinstance(response, dict):
+        if dify_config.STREAM_RESPONSE_ORJSON_ENABLED:
+            return Response(
+                response=stream_response_serializer.dumps(response), status=200, mimetype="application/json"
+            )
         return Response(response=json.dumps(jsonable_encoder(response)), status=200, mimetype="application/json")
     else:
 
@@ -0,0 +1,175 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, Optional
+
+from sqlalchemy import Select, func, literal_column, select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Session, scoped_session
+
+from configs import dify_config
+from extensions.ext_redis import redis_client
+
+
+class CountMode(StrEnum):
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class KeysetPagination:
+    """
+    A page of a listing, with the attributes of a Flask-SQLAlchemy pagination
+    and the cursor to fetch the next page with.
+    """
+
+    def __init__(self, items: list, page: int, per_page: int, total: int, has_next: bool, next_cursor: Optional[str]):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    payload = json.dumps([sort_value.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(sort_value), str(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor.") from e
+
+
+def keyset_cursor(value: str) -> str:
+    """
+    Argument type of cursors in request parsers.
+    """
+    decode_cursor(value)
+    return value
+
+
+def paginate(
+    session: Session | scoped_session,
+    stmt: Select,
+    *,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    descending: bool = True,
+    page: int = 1,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    count_scope: str,
+    count_mode: Optional[CountMode] = None,
+) -> KeysetPagination:
+    """
+    Paginate a listing by keyset on (sort_column, id_column).
+
+    With a cursor, the page starts right after the row the cursor points to, whatever the depth of the page.
+    Without one, the page is located by page number with OFFSET, for the clients still paginating by page.
+    :param session: SQLAlchemy session
+    :param stmt: statement selecting the rows of the listing, without ordering
+    :param sort_column: column the listing is ordered by
+    :param id_column: unique column breaking ties of sort_column
+    :param descending: order of the listing
+    :param page: page number, used when no cursor is given
+    :param limit: items per page
+    :param cursor: cursor of the last row of the previous page, as returned in next_cursor
+    :param count_scope: scope of the cached counts, e.g. the app the listing belongs to
+    :param count_mode: how the total is counted, APP_LOG_COUNT_MODE by default
+    :return: KeysetPagination
+    """
+    page_stmt = stmt
+    if cursor:
+        keys = tuple_(sort_column, id_column)
+        last_key = decode_cursor(cursor)
+        page_stmt = page_stmt.where(keys < last_key if descending else keys > last_key)
+        offset = None
+    else:
+        offset = (page - 1) * limit
+
+    if descending:
+        page_stmt = page_stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        page_stmt = page_stmt.order_by(sort_column.asc(), id_column.asc())
+    # fetch one more row to know whether there is a next page, independently of the total
+    page_stmt = page_stmt.limit(limit + 1)
+    if offset:
+        page_stmt = page_stmt.offset(offset)
+
+    items = list(session.scalars(page_stmt).unique().all())
+    has_next = len(items) > limit
+    items = items[:limit]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    total = count(session, stmt, count_scope=count_scope, count_mode=count_mode)
+    if offset is not None:
+        # an estimated or cached total may lag behind the rows actually seen
+        total = max(total, offset + len(items) + int(has_next))
+
+    return KeysetPagination(
+        items=items, page=page, per_page=limit, total=total, has_next=has_next, next_cursor=next_cursor
+    )
+
+
+def count(
+    session: Session | scoped_session, stmt: Select, *, count_scope: str, count_mode: Optional[CountMode] = None
+) -> int:
+    """
+    Count the rows selected by a statement.
+    :param session: SQLAlchemy session
+    :param stmt: statement selecting the rows to count
+    :param count_scope: scope of the cached counts
+    :param count_mode: how the rows are counted, APP_LOG_COUNT_MODE by default
+    """
+    count_mode = CountMode(count_mode or dify_config.APP_LOG_COUNT_MODE)
+    subquery = stmt.order_by(None).subquery()
+
+    if count_mode == CountMode.ESTIMATED:
+        estimated = _estimate_count(session, select(literal_column("1")).select_from(subquery))
+        if estimated is not None and estimated >= dify_config.APP_LOG_EXACT_COUNT_THRESHOLD:
+            return estimated
+    elif count_mode == CountMode.CACHED:
+        cache_key = f"app_log_count:{count_scope}:{_statement_digest(session, stmt)}"
+        cached = redis_client.get(cache_key)
+        if cached is not None:
+            return int(cached)
+        total = session.scalar(select(func.count()).select_from(subquery)) or 0
+        redis_client.setex(cache_key, dify_config.APP_LOG_COUNT_CACHE_TTL, total)
+        return total
+
+    return session.scalar(select(func.count()).select_from(subquery)) or 0
+
+
+def _estimate_count(session: Session | scoped_session, stmt: Select) -> Optional[int]:
+    """
+    Get the number of rows the PostgreSQL planner expects a statement to return, None on other databases.
+    """
+    dialect = session.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+
+    compiled = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    plan: Any = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _statement_digest(session: Session | scoped_session, stmt: Select) -> str:
+    compiled = stmt.compile(dialect=session.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    params = sorted((key, str(value)) for key, value in compiled.params.items())
+    return hashlib.sha256(f"{compiled}{params}".encode()).hexdigest()
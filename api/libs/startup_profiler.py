@@ -0,0 +1,100 @@
+"""
+Profiling of the startup of the API process.
+
+The app is created in a fresh interpreter run with `-X importtime`, so that every module is imported from
+scratch, and the cost of the imports is reported per module and per top level package, next to the time
+each extension took to initialize.
+"""
+
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# run in the child interpreter, the extension init times go to stdout and the import times to stderr
+_PROFILE_SCRIPT = """
+import json, time
+start_time = time.perf_counter()
+from app_factory import create_app
+app = create_app()
+print(json.dumps({
+    "total": time.perf_counter() - start_time,
+    "extensions": app.extensions.get("extension_init_times", {}),
+}))
+"""
+
+_IMPORT_TIME_PREFIX = "import time:"
+
+
+@dataclass
+class ModuleImportTime:
+    name: str
+    # microseconds spent importing the module itself and with its own imports
+    self_us: int
+    cumulative_us: int
+
+
+@dataclass
+class StartupProfile:
+    total: float
+    extension_init_times: dict[str, float]
+    imports: list[ModuleImportTime] = field(default_factory=list)
+
+    def top_modules(self, limit: int) -> list[ModuleImportTime]:
+        return sorted(self.imports, key=lambda module: module.self_us, reverse=True)[:limit]
+
+    def top_packages(self, limit: int) -> list[tuple[str, int]]:
+        """
+        Top level packages by the time spent importing their modules, in microseconds.
+        """
+        package_times: dict[str, int] = defaultdict(int)
+        for module in self.imports:
+            package_times[module.name.split(".")[0]] += module.self_us
+        return sorted(package_times.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def parse_import_times(output: str) -> list[ModuleImportTime]:
+    """
+    Parse the report written to stderr by `python -X importtime`.
+    :param output: the stderr of the interpreter, other lines are ignored
+    :return: the import time of each module
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            continue
+        columns = line[len(_IMPORT_TIME_PREFIX) :].split("|")
+        if len(columns) != 3:
+            continue
+        self_us, cumulative_us, name = columns
+        # the header line of the report
+        if not self_us.strip().isdigit():
+            continue
+        modules.append(ModuleImportTime(name=name.strip(), self_us=int(self_us), cumulative_us=int(cumulative_us)))
+    return modules
+
+
+def profile_startup(timeout: float = 300) -> StartupProfile:
+    """
+    Create the app in a new interpreter and measure the cost of its imports and extensions.
+    :raises RuntimeError: when the app can't be created
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROFILE_SCRIPT],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to create the app: {process.stderr[-2000:]}")
+
+    # the app may log to stdout, the result is the last line
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    return StartupProfile(
+        total=result["total"],
+        extension_init_times=result["extensions"],
+        imports=parse_import_times(process.stderr),
+    )
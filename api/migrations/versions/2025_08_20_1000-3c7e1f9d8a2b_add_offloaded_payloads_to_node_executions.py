@@ -0,0 +1,28 @@
+"""add offloaded_payloads to workflow node executions
+
+Revision ID: 3c7e1f9d8a2b
+Revises: 6b5c9a4f2e1d
+Create Date: 2025-08-20 10:00:21.316842
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+import models as models
+
+# revision identifiers, used by Alembic.
+revision = "3c7e1f9d8a2b"
+down_revision = "6b5c9a4f2e1d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("workflow_node_executions", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("offloaded_payloads", sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("workflow_node_executions", schema=None) as batch_op:
+        batch_op.drop_column("offloaded_payloads")
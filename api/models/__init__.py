@@ -34,6 +34,8 @@ from .model import (
     App,
     AppAnnotationHitHistory,
     AppAnnotationSetting,
+    AppHourlyStatistic,
+    AppHourlyStatisticMember,
     AppMCPServer,
     AppMode,
     AppModelConfig,
@@ -104,6 +106,8 @@ __all__ = [
     "AppAnnotationHitHistory",
     "AppAnnotationSetting",
     "AppDatasetJoin",
+    "AppHourlyStatistic",
+    "AppHourlyStatisticMember",
     "AppMCPServer",  # Added
     "AppMode",
     "AppModelConfig",
@@ -1862,3 +1862,54 @@ class TraceAppConfig(Base):
             "created_at": str(self.created_at) if self.created_at else None,
             "updated_at": str(self.updated_at) if self.updated_at else None,
         }
+
+
+class AppHourlyStatistic(Base):
+    """
+    Hourly rollup of the message and workflow run statistics of an app, maintained by the app statistic rollup task.
+    Hours are UTC.
+    """
+
+    __tablename__ = "app_hourly_statistics"
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("id", name="app_hourly_statistic_pkey"),
+        sa.UniqueConstraint("app_id", "hour", name="unique_app_hourly_statistic"),
+        sa.Index("app_hourly_statistic_hour_idx", "hour"),
+    )
+
+    id = mapped_column(StringUUID, server_default=sa.text("uuid_generate_v4()"))
+    app_id = mapped_column(StringUUID, nullable=False)
+    hour = mapped_column(sa.DateTime, nullable=False)
+    message_count: Mapped[int] = mapped_column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    token_count: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, server_default=sa.text("0"))
+    total_price = mapped_column(sa.Numeric(20, 7), nullable=False, server_default=sa.text("0"))
+    provider_response_latency = mapped_column(sa.Float, nullable=False, server_default=sa.text("0"))
+    answer_tokens: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, server_default=sa.text("0"))
+    workflow_run_count: Mapped[int] = mapped_column(sa.Integer, nullable=False, server_default=sa.text("0"))
+    workflow_token_count: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, server_default=sa.text("0"))
+    created_at = mapped_column(sa.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
+class AppHourlyStatisticMember(Base):
+    """
+    Distinct conversations and end users seen by an app per UTC hour, so daily distinct counts can be
+    computed without scanning messages and workflow runs.
+    """
+
+    class MemberType(StrEnum):
+        CONVERSATION = "conversation"
+        END_USER = "end_user"
+        WORKFLOW_USER = "workflow_user"
+
+    __tablename__ = "app_hourly_statistic_members"
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("id", name="app_hourly_statistic_member_pkey"),
+        sa.UniqueConstraint("app_id", "member_type", "hour", "member_id", name="unique_app_hourly_statistic_member"),
+        sa.Index("app_hourly_statistic_member_hour_idx", "hour"),
+    )
+
+    id = mapped_column(StringUUID, server_default=sa.text("uuid_generate_v4()"))
+    app_id = mapped_column(StringUUID, nullable=False)
+    member_type: Mapped[str] = mapped_column(String(16), nullable=False)
+    hour = mapped_column(sa.DateTime, nullable=False)
+    member_id = mapped_column(StringUUID, nullable=False)
@@ -3,7 +3,7 @@ import logging
 from collections.abc import Mapping, Sequence
 from datetime import datetime
 from enum import Enum, StrEnum
-from typing import TYPE_CHECKING, Any, Optional, Union
+from typing import TYPE_CHECKING, Any, Optional, Union, cast
 from uuid import uuid4
 
 import sqlalchemy as sa
@@ -638,6 +638,8 @@ class WorkflowNodeExecutionModel(Base):
     - inputs (json) All predecessor node variable content used in the node
     - process_data (json) Node process data
     - outputs (json) `optional` Node output variables
+    - offloaded_payloads (json) `optional` Object storage references of the inputs, process data and outputs
+        too large for their columns, which then keep a truncated preview
     - status (string) Execution status, `running` / `succeeded` / `failed`
     - error (string) `optional` Error reason
     - elapsed_time (float) `optional` Time consumption (s)
@@ -719,6 +721,7 @@ class WorkflowNodeExecutionModel(Base):
     inputs: Mapped[Optional[str]] = mapped_column(sa.Text)
     process_data: Mapped[Optional[str]] = mapped_column(sa.Text)
     outputs: Mapped[Optional[str]] = mapped_column(sa.Text)
+    offloaded_payloads: Mapped[Optional[str]] = mapped_column(sa.Text)
     status: Mapped[str] = mapped_column(String(255))
     error: Mapped[Optional[str]] = mapped_column(sa.Text)
     elapsed_time: Mapped[float] = mapped_column(sa.Float, server_default=sa.text("0"))
@@ -744,16 +747,46 @@ class WorkflowNodeExecutionModel(Base):
 
     @property
     def inputs_dict(self):
-        return json.loads(self.inputs) if self.inputs else None
+        return self._load_payload("inputs", self.inputs)
 
     @property
     def outputs_dict(self) -> dict[str, Any] | None:
-        return json.loads(self.outputs) if self.outputs else None
+        return self._load_payload("outputs", self.outputs)
 
     @property
     def process_data_dict(self):
+        return self._load_payload("process_data", self.process_data)
+
+    @property
+    def offloaded_payloads_dict(self) -> dict[str, Any]:
+        return json.loads(self.offloaded_payloads) if self.offloaded_payloads else {}
+
+    @property
+    def offloaded_fields(self) -> list[str]:
+        """Fields whose columns keep a preview of a payload saved to the object storage"""
+        return list(self.offloaded_payloads_dict)
+
+    @property
+    def inputs_preview_dict(self):
+        return json.loads(self.inputs) if self.inputs else None
+
+    @property
+    def outputs_preview_dict(self) -> dict[str, Any] | None:
+        return json.loads(self.outputs) if self.outputs else None
+
+    @property
+    def process_data_preview_dict(self):
         return json.loads(self.process_data) if self.process_data else None
 
+    def _load_payload(self, field: str, value: Optional[str]) -> Optional[dict[str, Any]]:
+        """The full payload of a field, loaded from the object storage when it was offloaded"""
+        reference = self.offloaded_payloads_dict.get(field)
+        if reference:
+            from core.repositories.node_execution_payload_store import node_execution_payload_store
+
+            return cast(dict[str, Any], node_execution_payload_store.load(reference["key"]))
+        return json.loads(value) if value else None
+
     @property
     def execution_metadata_dict(self) -> dict[str, Any]:
         # When the metadata is unset, we return an empty dictionary instead of `None`.
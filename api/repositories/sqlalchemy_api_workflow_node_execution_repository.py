@@ -12,6 +12,7 @@ from typing import Optional
 from sqlalchemy import delete, desc, select
 from sqlalchemy.orm import Session, sessionmaker
 
+from core.repositories.node_execution_payload_store import node_execution_payload_store
 from models.workflow import WorkflowNodeExecutionModel
 from repositories.api_workflow_node_execution_repository import DifyAPIWorkflowNodeExecutionRepository
 
@@ -167,7 +168,7 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
             with self._session_maker() as session:
                 # Find executions to delete in batches
                 stmt = (
-                    select(WorkflowNodeExecutionModel.id)
+                    select(WorkflowNodeExecutionModel.id, WorkflowNodeExecutionModel.offloaded_payloads)
                     .where(
                         WorkflowNodeExecutionModel.tenant_id == tenant_id,
                         WorkflowNodeExecutionModel.created_at < before_date,
@@ -175,7 +176,8 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
                     .limit(batch_size)
                 )
 
-                execution_ids = session.execute(stmt).scalars().all()
+                rows = session.execute(stmt).all()
+                execution_ids = [row.id for row in rows]
                 if not execution_ids:
                     break
 
@@ -184,6 +186,7 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
                 result = session.execute(delete_stmt)
                 session.commit()
                 total_deleted += result.rowcount
+                node_execution_payload_store.delete(row.offloaded_payloads for row in rows)
 
                 # If we deleted fewer than the batch size, we're done
                 if len(execution_ids) < batch_size:
@@ -214,7 +217,7 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
             with self._session_maker() as session:
                 # Find executions to delete in batches
                 stmt = (
-                    select(WorkflowNodeExecutionModel.id)
+                    select(WorkflowNodeExecutionModel.id, WorkflowNodeExecutionModel.offloaded_payloads)
                     .where(
                         WorkflowNodeExecutionModel.tenant_id == tenant_id,
                         WorkflowNodeExecutionModel.app_id == app_id,
@@ -222,7 +225,8 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
                     .limit(batch_size)
                 )
 
-                execution_ids = session.execute(stmt).scalars().all()
+                rows = session.execute(stmt).all()
+                execution_ids = [row.id for row in rows]
                 if not execution_ids:
                     break
 
@@ -231,6 +235,7 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
                 result = session.execute(delete_stmt)
                 session.commit()
                 total_deleted += result.rowcount
+                node_execution_payload_store.delete(row.offloaded_payloads for row in rows)
 
                 # If we deleted fewer than the batch size, we're done
                 if len(execution_ids) < batch_size:
@@ -284,7 +289,14 @@ class DifyAPISQLAlchemyWorkflowNodeExecutionRepository(DifyAPIWorkflowNodeExecut
             return 0
 
         with self._session_maker() as session:
+            offloaded_payloads = session.scalars(
+                select(WorkflowNodeExecutionModel.offloaded_payloads).where(
+                    WorkflowNodeExecutionModel.id.in_(execution_ids),
+                    WorkflowNodeExecutionModel.offloaded_payloads.isnot(None),
+                )
+            ).all()
             stmt = delete(WorkflowNodeExecutionModel).where(WorkflowNodeExecutionModel.id.in_(execution_ids))
             result = session.execute(stmt)
             session.commit()
+            node_execution_payload_store.delete(offloaded_payloads)
             return result.rowcount
@@ -0,0 +1,15 @@
+import time
+
+import click
+
+import app
+from services.app_statistic_service import AppStatisticService
+
+
+@app.celery.task(queue="dataset")
+def app_statistic_rollup_task():
+    click.echo(click.style("Start roll up app statistics.", fg="green"))
+    start_at = time.perf_counter()
+    AppStatisticService.roll_up()
+    end_at = time.perf_counter()
+    click.echo(click.style(f"Rolled up app statistics success latency: {end_at - start_at}", fg="green"))
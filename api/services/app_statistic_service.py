@@ -0,0 +1,365 @@
+import logging
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import pytz
+import sqlalchemy as sa
+
+from configs import dify_config
+from core.app.entities.app_invoke_entities import InvokeFrom
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.enums import WorkflowRunTriggeredFrom
+from models.model import AppHourlyStatisticMember
+
+logger = logging.getLogger(__name__)
+
+_ROLLUP_METRICS = (
+    "message_count",
+    "token_count",
+    "total_price",
+    "provider_response_latency",
+    "answer_tokens",
+    "workflow_run_count",
+    "workflow_token_count",
+)
+
+_MESSAGE_ROLLUP_SQL = """INSERT INTO app_hourly_statistics
+    (app_id, hour, message_count, token_count, total_price, provider_response_latency, answer_tokens)
+SELECT
+    app_id,
+    DATE_TRUNC('hour', created_at) AS hour,
+    COUNT(*),
+    SUM(message_tokens) + SUM(answer_tokens),
+    COALESCE(SUM(total_price), 0),
+    SUM(provider_response_latency),
+    SUM(answer_tokens)
+FROM
+    messages
+WHERE
+    created_at >= :start AND created_at < :end
+GROUP BY
+    app_id, hour
+ON CONFLICT (app_id, hour) DO UPDATE SET
+    message_count = EXCLUDED.message_count,
+    token_count = EXCLUDED.token_count,
+    total_price = EXCLUDED.total_price,
+    provider_response_latency = EXCLUDED.provider_response_latency,
+    answer_tokens = EXCLUDED.answer_tokens"""
+
+_WORKFLOW_RUN_ROLLUP_SQL = """INSERT INTO app_hourly_statistics (app_id, hour, workflow_run_count, workflow_token_count)
+SELECT
+    app_id,
+    DATE_TRUNC('hour', created_at) AS hour,
+    COUNT(id),
+    COALESCE(SUM(total_tokens), 0)
+FROM
+    workflow_runs
+WHERE
+    triggered_from = :triggered_from
+    AND created_at >= :start AND created_at < :end
+GROUP BY
+    app_id, hour
+ON CONFLICT (app_id, hour) DO UPDATE SET
+    workflow_run_count = EXCLUDED.workflow_run_count,
+    workflow_token_count = EXCLUDED.workflow_token_count"""
+
+_MEMBER_ROLLUP_SQL = """INSERT INTO app_hourly_statistic_members (app_id, member_type, hour, member_id)
+SELECT DISTINCT
+    app_id,
+    :member_type,
+    DATE_TRUNC('hour', created_at),
+    {member_column}
+FROM
+    {table}
+WHERE
+    created_at >= :start AND created_at < :end
+    AND {condition}"""
+
+_MEMBER_SOURCES = {
+    AppHourlyStatisticMember.MemberType.CONVERSATION: ("messages", "conversation_id", "invoke_from != :debugger"),
+    AppHourlyStatisticMember.MemberType.END_USER: ("messages", "from_end_user_id", "from_end_user_id IS NOT NULL"),
+    AppHourlyStatisticMember.MemberType.WORKFLOW_USER: (
+        "workflow_runs",
+        "created_by",
+        "triggered_from = :triggered_from",
+    ),
+}
+
+
+@dataclass(frozen=True)
+class RollupWindow:
+    """
+    Whole UTC hours of a statistics range that are served from the hourly rollups, naive UTC datetimes.
+    """
+
+    start: datetime
+    end: datetime
+
+    @property
+    def params(self) -> dict[str, datetime]:
+        return {"rollup_start": self.start, "rollup_end": self.end}
+
+
+class AppStatisticService:
+    """
+    Hourly rollups of the app statistics shown on the console dashboards.
+
+    The rollup task aggregates messages and workflow runs per app and UTC hour, and
+    records the rolled up range in Redis. Dashboards read whole hours of that range from the rollups, and only
+    query the raw tables for the rest of the requested range, which is the live tail of the current day and the
+    partial hours at the range edges. Daily values are summed from the hourly rows in the timezone of the account.
+
+    Each run recomputes the last hours to pick up late updates. Older hours are only recomputed when they're marked
+    stale, which the jobs deleting messages and workflow runs do, and the rows of deleted apps are deleted with them.
+    """
+
+    _rolled_up_from_key = "app_statistic_rollup:from"
+    _rolled_up_until_key = "app_statistic_rollup:until"
+    _lock_key = "app_statistic_rollup:lock"
+    _stale_hours_key = "app_statistic_rollup:stale_hours"
+
+    @classmethod
+    def get_rollup_window(
+        cls, start: Optional[datetime], end: Optional[datetime], timezone: str
+    ) -> Optional[RollupWindow]:
+        """
+        Get the part of a statistics range served from rollups, None when the raw tables have to be queried.
+        :param start: start of the range in UTC, None for unbounded
+        :param end: end of the range in UTC, None for unbounded
+        :param timezone: timezone the statistics are grouped by day in
+        """
+        rolled_up_range = cls._get_rolled_up_range()
+        if rolled_up_range is None:
+            return None
+
+        rolled_up_from, rolled_up_until = rolled_up_range
+        window_start = rolled_up_from
+        if start is not None:
+            window_start = max(window_start, cls._ceil_hour(start.replace(tzinfo=None)))
+        window_end = rolled_up_until
+        if end is not None:
+            window_end = min(window_end, cls._floor_hour(end.replace(tzinfo=None)))
+        if window_start >= window_end:
+            return None
+
+        # an hourly row must fall in a single day of the timezone
+        tz = pytz.timezone(timezone)
+        for boundary in (window_start, window_end):
+            offset = pytz.utc.localize(boundary).astimezone(tz).utcoffset()
+            if offset is None or offset.total_seconds() % 3600:
+                return None
+
+        return RollupWindow(start=window_start, end=window_end)
+
+    @staticmethod
+    def raw_condition(window: Optional[RollupWindow], column: str = "created_at") -> str:
+        """
+        SQL condition limiting a raw statistics query to the rows not covered by the rollup window.
+        """
+        if window is None:
+            return ""
+        return f" AND ({column} < :rollup_start OR {column} >= :rollup_end)"
+
+    @staticmethod
+    def raw_params(window: Optional[RollupWindow]) -> dict[str, datetime]:
+        """
+        Parameters of the raw_condition and members_union SQL.
+        """
+        return window.params if window is not None else {}
+
+    @staticmethod
+    def members_union(window: Optional[RollupWindow], member_type: AppHourlyStatisticMember.MemberType) -> str:
+        """
+        SQL selecting the rolled up members of the window as (created_at, member_id), to be unioned with the
+        members selected from the raw rows outside of it.
+        """
+        if window is None:
+            return ""
+        return f"""
+    UNION ALL
+    SELECT
+        hour AS created_at,
+        member_id
+    FROM
+        app_hourly_statistic_members
+    WHERE
+        app_id = :app_id
+        AND member_type = '{member_type.value}'
+        AND hour >= :rollup_start
+        AND hour < :rollup_end"""
+
+    @staticmethod
+    def get_daily_rollups(app_id: str, window: Optional[RollupWindow], timezone: str) -> dict[str, dict[str, Any]]:
+        """
+        Sum the hourly rollups of the window by day.
+        :return: metrics by date
+        """
+        if window is None:
+            return {}
+
+        sums = ",\n    ".join(f"SUM({metric}) AS {metric}" for metric in _ROLLUP_METRICS)
+        sql_query = f"""SELECT
+    DATE(DATE_TRUNC('day', hour AT TIME ZONE 'UTC' AT TIME ZONE :tz )) AS date,
+    {sums}
+FROM
+    app_hourly_statistics
+WHERE
+    app_id = :app_id
+    AND hour >= :rollup_start
+    AND hour < :rollup_end
+GROUP BY date"""
+        with db.engine.begin() as conn:
+            rs = conn.execute(sa.text(sql_query), {"tz": timezone, "app_id": app_id, **window.params})
+            return {str(row.date): dict(row._mapping) for row in rs}
+
+    @staticmethod
+    def combine_daily(
+        raw_rows: Iterable[Any], rollups: dict[str, dict[str, Any]], metrics: Sequence[str]
+    ) -> list[tuple[str, dict[str, Any]]]:
+        """
+        Add the daily rollups to the daily rows queried from the raw tables.
+        Raw rows must have a date column and a column for each of the metrics.
+        :return: (date, metrics) ordered by date
+        """
+        days: dict[str, dict[str, Any]] = {}
+        for row in raw_rows:
+            days[str(row.date)] = {metric: getattr(row, metric) or 0 for metric in metrics}
+        for date, rollup in rollups.items():
+            day = days.setdefault(date, dict.fromkeys(metrics, 0))
+            for metric in metrics:
+                day[metric] += rollup[metric] or 0
+        return sorted(days.items())
+
+    @classmethod
+    def roll_up(cls):
+        """
+        Roll up the hours since the last run, recomputing the lookback window to pick up late updates.
+        The first run rolls up the backfill days.
+        """
+        lock = redis_client.lock(cls._lock_key, timeout=3600)
+        if not lock.acquire(blocking=False):
+            logger.info("app statistic rollup is already running")
+            return
+
+        try:
+            now = cls._floor_hour(datetime.now(pytz.utc).replace(tzinfo=None))
+            rolled_up_range = cls._get_rolled_up_range()
+            if rolled_up_range is None:
+                rolled_up_from = now - timedelta(days=dify_config.APP_STATISTIC_ROLLUP_BACKFILL_DAYS)
+                start = rolled_up_from
+            else:
+                rolled_up_from, rolled_up_until = rolled_up_range
+                start = max(
+                    rolled_up_from,
+                    min(rolled_up_until, now - timedelta(hours=dify_config.APP_STATISTIC_ROLLUP_LOOKBACK_HOURS)),
+                )
+
+            recomputed_from = start
+            # one transaction per day, so the backfill never holds long transactions
+            while start < now:
+                end = min(start + timedelta(days=1), now)
+                cls.recompute(start, end)
+                start = end
+
+            cls._recompute_stale_hours(rolled_up_from, recomputed_from)
+
+            redis_client.set(cls._rolled_up_from_key, rolled_up_from.isoformat())
+            redis_client.set(cls._rolled_up_until_key, now.isoformat())
+        finally:
+            lock.release()
+
+    @classmethod
+    def mark_stale(cls, created_at: Iterable[datetime]):
+        """
+        Mark the hours of deleted messages or workflow runs, so the next rollup recomputes them.
+        :param created_at: creation times of the deleted rows, naive UTC datetimes
+        """
+        hours = {cls._floor_hour(value).isoformat() for value in created_at}
+        if not hours:
+            return
+        try:
+            redis_client.sadd(cls._stale_hours_key, *hours)
+        except Exception:
+            logger.warning("failed to mark %s app statistic hours as stale", len(hours), exc_info=True)
+
+    @staticmethod
+    def delete_app_rollups(app_id: str):
+        """
+        Delete the rollups of a deleted app.
+        """
+        with db.engine.begin() as conn:
+            for table in ("app_hourly_statistics", "app_hourly_statistic_members"):
+                conn.execute(sa.text(f"DELETE FROM {table} WHERE app_id = :app_id"), {"app_id": app_id})
+
+    @staticmethod
+    def recompute(start: datetime, end: datetime):
+        """
+        Replace the rollups of all apps between two whole UTC hours.
+        """
+        params: dict[str, Any] = {
+            "start": start,
+            "end": end,
+            "debugger": InvokeFrom.DEBUGGER.value,
+            "triggered_from": WorkflowRunTriggeredFrom.APP_RUN.value,
+        }
+        with db.engine.begin() as conn:
+            conn.execute(sa.text("DELETE FROM app_hourly_statistics WHERE hour >= :start AND hour < :end"), params)
+            conn.execute(
+                sa.text("DELETE FROM app_hourly_statistic_members WHERE hour >= :start AND hour < :end"), params
+            )
+            for sql_query in (_MESSAGE_ROLLUP_SQL, _WORKFLOW_RUN_ROLLUP_SQL):
+                conn.execute(sa.text(sql_query), params)
+            for member_type, (table, member_column, condition) in _MEMBER_SOURCES.items():
+                sql_query = _MEMBER_ROLLUP_SQL.format(table=table, member_column=member_column, condition=condition)
+                conn.execute(sa.text(sql_query), {**params, "member_type": member_type.value})
+
+    @classmethod
+    def _recompute_stale_hours(cls, rolled_up_from: datetime, recomputed_from: datetime):
+        """
+        Recompute the rolled up hours marked stale, the ones from recomputed_from on were just recomputed.
+        Consecutive hours are recomputed together, up to one day per transaction.
+        """
+        # popped rather than read, so hours marked again while they're recomputed are kept for the next run
+        count = redis_client.scard(cls._stale_hours_key)
+        if not count:
+            return
+        members = redis_client.spop(cls._stale_hours_key, count)
+
+        hours = sorted(datetime.fromisoformat(member.decode()) for member in members)
+        ranges: list[list[datetime]] = []
+        for hour in hours:
+            if not rolled_up_from <= hour < recomputed_from:
+                continue
+            if ranges and ranges[-1][1] == hour and hour - ranges[-1][0] < timedelta(days=1):
+                ranges[-1][1] = hour + timedelta(hours=1)
+            else:
+                ranges.append([hour, hour + timedelta(hours=1)])
+        try:
+            for start, end in ranges:
+                cls.recompute(start, end)
+        except Exception:
+            redis_client.sadd(cls._stale_hours_key, *members)
+            raise
+
+    @classmethod
+    def _get_rolled_up_range(cls) -> Optional[tuple[datetime, datetime]]:
+        try:
+            rolled_up_from, rolled_up_until = redis_client.mget([cls._rolled_up_from_key, cls._rolled_up_until_key])
+        except Exception:
+            logger.warning("failed to read the rolled up range of app statistics", exc_info=True)
+            return None
+        if not rolled_up_from or not rolled_up_until:
+            return None
+        return datetime.fromisoformat(rolled_up_from.decode()), datetime.fromisoformat(rolled_up_until.decode())
+
+    @staticmethod
+    def _floor_hour(value: datetime) -> datetime:
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    @classmethod
+    def _ceil_hour(cls, value: datetime) -> datetime:
+        floored = cls._floor_hour(value)
+        return floored if floored == value else floored + timedelta(hours=1)
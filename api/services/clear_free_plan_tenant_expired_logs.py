@@ -27,6 +27,7 @@ from models.model import (
 from models.web import SavedMessage
 from models.workflow import WorkflowAppLog
 from repositories.factory import DifyAPIRepositoryFactory
+from services.app_statistic_service import AppStatisticService
 from services.billing_service import BillingService
 
 logger = logging.getLogger(__name__)
@@ -151,6 +152,7 @@ class ClearFreePlanTenantExpiredLogs:
 
                     cls._clear_message_related_tables(session, tenant_id, message_ids)
                     session.commit()
+                    AppStatisticService.mark_stale(message.created_at for message in messages)
 
                     click.echo(
                         click.style(
@@ -279,6 +281,7 @@ class ClearFreePlanTenantExpiredLogs:
                 # Delete the backed up workflow runs
                 deleted_count = workflow_run_repo.delete_runs_by_ids(workflow_run_ids)
                 total_deleted += deleted_count
+                AppStatisticService.mark_stale(workflow_run.created_at for workflow_run in workflow_runs)
 
                 click.echo(
                     click.style(
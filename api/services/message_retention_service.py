@@ -0,0 +1,167 @@
+import datetime
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import sqlalchemy as sa
+
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.model import (
+    App,
+    AppAnnotationHitHistory,
+    Message,
+    MessageAgentThought,
+    MessageAnnotation,
+    MessageChain,
+    MessageFeedback,
+    MessageFile,
+)
+from models.web import SavedMessage
+from services.app_statistic_service import AppStatisticService
+from services.feature_service import FeatureService
+
+logger = logging.getLogger(__name__)
+
+# tables referencing messages by message_id, cleaned together with the messages
+MESSAGE_RELATED_MODELS = (
+    MessageFeedback,
+    MessageAnnotation,
+    MessageChain,
+    MessageAgentThought,
+    MessageFile,
+    AppAnnotationHitHistory,
+    SavedMessage,
+)
+
+
+@dataclass
+class MessageRetentionResult:
+    batches: int = 0
+    scanned_messages: int = 0
+    # deleted rows by table, or rows that would be deleted in a dry run
+    deleted: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class MessageRetentionService:
+    """
+    Deletes the messages of sandbox plan tenants created before a cutoff, with their related rows.
+
+    Messages are walked in batches by keyset pagination on (created_at, id), newest first, and the messages
+    of each batch are deleted with all related rows by a few set based DELETE statements in one transaction.
+    """
+
+    @classmethod
+    def clean_expired_messages(
+        cls,
+        before: datetime.datetime,
+        batch_size: int,
+        throttle_seconds: float = 0,
+        dry_run: bool = False,
+        max_batches: Optional[int] = None,
+    ) -> MessageRetentionResult:
+        """
+        Delete the expired messages of sandbox plan tenants.
+        :param before: messages created before this time are expired
+        :param batch_size: number of messages scanned per batch
+        :param throttle_seconds: pause between batches, to leave room for the regular write load
+        :param dry_run: only count the rows that would be deleted
+        :param max_batches: stop after this number of batches, None for no limit
+        """
+        result = MessageRetentionResult()
+        tenant_plans: dict[str, str] = {}
+        cursor: Optional[tuple[datetime.datetime, str]] = None
+        while max_batches is None or result.batches < max_batches:
+            batch = cls._fetch_batch(before, cursor, batch_size)
+            if not batch:
+                break
+            cursor = (batch[-1].created_at, batch[-1].id)
+            result.batches += 1
+            result.scanned_messages += len(batch)
+
+            message_ids = cls._filter_sandbox_messages(batch, tenant_plans)
+            if message_ids and not dry_run:
+                counts = cls._delete_messages(message_ids)
+                deleted_ids = set(message_ids)
+                AppStatisticService.mark_stale(row.created_at for row in batch if row.id in deleted_ids)
+            else:
+                counts = cls._count_related(message_ids) if message_ids else {}
+                # end the read transaction of the batch
+                db.session.commit()
+            for table, count in counts.items():
+                result.deleted[table] += count
+
+            if len(batch) < batch_size:
+                break
+            if throttle_seconds > 0:
+                time.sleep(throttle_seconds)
+
+        return result
+
+    @staticmethod
+    def _fetch_batch(
+        before: datetime.datetime, cursor: Optional[tuple[datetime.datetime, str]], batch_size: int
+    ) -> list[sa.Row]:
+        stmt = sa.select(Message.id, Message.app_id, Message.created_at).where(Message.created_at < before)
+        if cursor is not None:
+            stmt = stmt.where(sa.tuple_(Message.created_at, Message.id) < cursor)
+        stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(batch_size)
+        return list(db.session.execute(stmt).all())
+
+    @classmethod
+    def _filter_sandbox_messages(cls, batch: list[sa.Row], tenant_plans: dict[str, str]) -> list[str]:
+        app_ids = {row.app_id for row in batch}
+        app_tenants: dict[str, str] = {}
+        for app_id, tenant_id in db.session.execute(sa.select(App.id, App.tenant_id).where(App.id.in_(app_ids))).all():
+            app_tenants[app_id] = tenant_id
+
+        message_ids = []
+        for row in batch:
+            tenant_id = app_tenants.get(row.app_id)
+            if tenant_id is None:
+                logger.warning(
+                    "Expected App record to exist, but none was found, app_id=%s, message_id=%s", row.app_id, row.id
+                )
+                continue
+            if tenant_id not in tenant_plans:
+                tenant_plans[tenant_id] = cls._get_tenant_plan(tenant_id)
+            if tenant_plans[tenant_id] == "sandbox":
+                message_ids.append(row.id)
+        return message_ids
+
+    @staticmethod
+    def _get_tenant_plan(tenant_id: str) -> str:
+        features_cache_key = f"features:{tenant_id}"
+        plan_cache = redis_client.get(features_cache_key)
+        if plan_cache is not None:
+            return str(plan_cache.decode())
+
+        plan = str(FeatureService.get_features(tenant_id).billing.subscription.plan)
+        redis_client.setex(features_cache_key, 600, plan)
+        return plan
+
+    @staticmethod
+    def _count_related(message_ids: list[str]) -> dict[str, int]:
+        counts = {}
+        for model in MESSAGE_RELATED_MODELS:
+            stmt = sa.select(sa.func.count()).select_from(model).where(model.message_id.in_(message_ids))
+            counts[model.__tablename__] = db.session.scalar(stmt) or 0
+        counts[Message.__tablename__] = len(message_ids)
+        return counts
+
+    @staticmethod
+    def _delete_messages(message_ids: list[str]) -> dict[str, int]:
+        counts = {}
+        try:
+            for model in MESSAGE_RELATED_MODELS:
+                deleted = db.session.execute(sa.delete(model).where(model.message_id.in_(message_ids)))
+                counts[model.__tablename__] = deleted.rowcount
+            deleted = db.session.execute(sa.delete(Message).where(Message.id.in_(message_ids)))
+            counts[Message.__tablename__] = deleted.rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return counts
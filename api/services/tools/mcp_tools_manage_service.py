@@ -10,6 +10,7 @@ from core.helper import encrypter
 from core.helper.provider_cache import NoOpProviderCredentialCache
 from core.mcp.error import MCPAuthError, MCPError
 from core.mcp.mcp_client import MCPClient
+from core.mcp.session_pool import mcp_session_pool
 from core.tools.entities.api_entities import ToolProviderApiEntity
 from core.tools.entities.common_entities import I18nObject
 from core.tools.entities.tool_entities import ToolProviderType
@@ -120,8 +121,9 @@ class MCPToolManageService:
         authed = mcp_provider.authed
 
         try:
-            with MCPClient(server_url, provider_id, tenant_id, authed=authed, for_list=True) as mcp_client:
-                tools = mcp_client.list_tools()
+            mcp_client = MCPClient(server_url, provider_id, tenant_id, authed=authed, for_list=True)
+            # the user asked to update the tools, the cached list may be stale
+            tools = mcp_session_pool.list_tools(mcp_client, refresh=True)
         except MCPAuthError:
             raise ValueError("Please auth the tool first")
         except MCPError as e:
@@ -158,6 +160,7 @@ class MCPToolManageService:
 
         db.session.delete(mcp_tool)
         db.session.commit()
+        mcp_session_pool.invalidate(tenant_id, provider_id)
 
     @classmethod
     def update_mcp_provider(
@@ -208,6 +211,7 @@ class MCPToolManageService:
             if sse_read_timeout is not None:
                 mcp_provider.sse_read_timeout = sse_read_timeout
             db.session.commit()
+            mcp_session_pool.invalidate(tenant_id, provider_id)
         except IntegrityError as e:
             db.session.rollback()
             error_msg = str(e.orig)
@@ -239,6 +243,7 @@ class MCPToolManageService:
         if not authed:
             mcp_provider.tools = "[]"
         db.session.commit()
+        mcp_session_pool.invalidate(mcp_provider.tenant_id, mcp_provider.id)
 
     @classmethod
     def _re_connect_mcp_provider(cls, server_url: str, provider_id: str, tenant_id: str):
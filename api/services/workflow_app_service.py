@@ -1,10 +1,11 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import and_, func, or_, select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
 from core.workflow.entities.workflow_execution import WorkflowExecutionStatus
+from libs.keyset_pagination import paginate
 from models import Account, App, EndUser, WorkflowAppLog, WorkflowRun
 from models.enums import CreatorUserRole
 
@@ -23,6 +24,7 @@ class WorkflowAppService:
         limit: int = 20,
         created_by_end_user_session_id: str | None = None,
         created_by_account: str | None = None,
+        cursor: str | None = None,
     ) -> dict:
         """
         Get paginate workflow app logs using SQLAlchemy 2.0 style
@@ -36,6 +38,7 @@ class WorkflowAppService:
         :param limit: items per page
         :param created_by_end_user_session_id: filter by end user session id
         :param created_by_account: filter by account email
+        :param cursor: cursor of the last log of the previous page, takes precedence over page
         :return: Pagination object
         """
         # Build base statement using SQLAlchemy 2.0 style
@@ -95,24 +98,24 @@ class WorkflowAppService:
                 ),
             )
 
-        stmt = stmt.order_by(WorkflowAppLog.created_at.desc())
-
-        # Get total count using the same filters
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total = session.scalar(count_stmt) or 0
-
-        # Apply pagination limits
-        offset_stmt = stmt.offset((page - 1) * limit).limit(limit)
-
-        # Execute query and get items
-        items = list(session.scalars(offset_stmt).all())
+        pagination = paginate(
+            session,
+            stmt,
+            sort_column=WorkflowAppLog.created_at,
+            id_column=WorkflowAppLog.id,
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            count_scope=f"workflow_app_logs:{app_model.id}",
+        )
 
         return {
             "page": page,
             "limit": limit,
-            "total": total,
-            "has_more": total > page * limit,
-            "data": items,
+            "total": pagination.total,
+            "has_more": pagination.has_next,
+            "next_cursor": pagination.next_cursor,
+            "data": pagination.items,
         }
 
     @staticmethod
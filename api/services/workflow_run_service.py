@@ -120,3 +120,22 @@ class WorkflowRunService:
             app_id=app_model.id,
             workflow_run_id=run_id,
         )
+
+    def get_workflow_node_execution(
+        self,
+        app_model: App,
+        node_execution_id: str,
+    ) -> Optional[WorkflowNodeExecutionModel]:
+        """
+        Get a node execution of the app
+
+        :param app_model: app model
+        :param node_execution_id: node execution id
+        """
+        node_execution = self._node_execution_service_repo.get_execution_by_id(
+            execution_id=node_execution_id,
+            tenant_id=app_model.tenant_id,
+        )
+        if not node_execution or node_execution.app_id != app_model.id:
+            return None
+        return node_execution
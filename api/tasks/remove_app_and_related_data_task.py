@@ -39,6 +39,7 @@ from models.workflow import (
     WorkflowAppLog,
 )
 from repositories.factory import DifyAPIRepositoryFactory
+from services.app_statistic_service import AppStatisticService
 
 
 @shared_task(queue="app_deletion", bind=True, max_retries=3)
@@ -67,6 +68,7 @@ def remove_app_and_related_data_task(self, tenant_id: str, app_id: str):
         _delete_trace_app_configs(tenant_id, app_id)
         _delete_conversation_variables(app_id=app_id)
         _delete_draft_variables(app_id)
+        _delete_app_statistics(app_id)
 
         end_at = time.perf_counter()
         logging.info(click.style(f"App and related data deleted: {app_id} latency: {end_at - start_at}", fg="green"))
@@ -345,6 +347,10 @@ def _delete_trace_app_configs(tenant_id: str, app_id: str):
     )
 
 
+def _delete_app_statistics(app_id: str):
+    AppStatisticService.delete_app_rollups(app_id)
+
+
 def _delete_draft_variables(app_id: str):
     """Delete all workflow draft variables for an app in batches."""
     return delete_draft_variables_batch(app_id, batch_size=1000)
@@ -12,6 +12,7 @@ from celery import shared_task  # type: ignore[import-untyped]
 from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 
+from core.repositories.node_execution_payload_store import PAYLOAD_FIELDS, node_execution_payload_store
 from core.workflow.entities.workflow_node_execution import (
     WorkflowNodeExecution,
 )
@@ -113,13 +114,7 @@ def _create_node_execution_from_domain(
 
     # Serialize complex data as JSON
     json_converter = WorkflowRuntimeTypeConverter()
-    node_execution.inputs = json.dumps(json_converter.to_json_encodable(execution.inputs)) if execution.inputs else "{}"
-    node_execution.process_data = (
-        json.dumps(json_converter.to_json_encodable(execution.process_data)) if execution.process_data else "{}"
-    )
-    node_execution.outputs = (
-        json.dumps(json_converter.to_json_encodable(execution.outputs)) if execution.outputs else "{}"
-    )
+    _set_payloads(node_execution, execution, json_converter)
     # Convert metadata enum keys to strings for JSON serialization
     if execution.metadata:
         metadata_for_json = {
@@ -148,13 +143,7 @@ def _update_node_execution_from_domain(
     """
     # Update serialized data
     json_converter = WorkflowRuntimeTypeConverter()
-    node_execution.inputs = json.dumps(json_converter.to_json_encodable(execution.inputs)) if execution.inputs else "{}"
-    node_execution.process_data = (
-        json.dumps(json_converter.to_json_encodable(execution.process_data)) if execution.process_data else "{}"
-    )
-    node_execution.outputs = (
-        json.dumps(json_converter.to_json_encodable(execution.outputs)) if execution.outputs else "{}"
-    )
+    _set_payloads(node_execution, execution, json_converter)
     # Convert metadata enum keys to strings for JSON serialization
     if execution.metadata:
         metadata_for_json = {
@@ -169,3 +158,31 @@ def _update_node_execution_from_domain(
     node_execution.error = execution.error
     node_execution.elapsed_time = execution.elapsed_time
     node_execution.finished_at = execution.finished_at
+
+
+def _set_payloads(
+    node_execution: WorkflowNodeExecutionModel,
+    execution: WorkflowNodeExecution,
+    json_converter: WorkflowRuntimeTypeConverter,
+) -> None:
+    """
+    Serialize the inputs, process data and outputs, the large ones are saved to the object storage when enabled.
+    """
+    if node_execution_payload_store.enabled:
+        columns, node_execution.offloaded_payloads = node_execution_payload_store.dump_payloads(
+            node_execution.tenant_id,
+            execution.id,
+            {field: json_converter.to_json_encodable(getattr(execution, field)) for field in PAYLOAD_FIELDS},
+        )
+        node_execution.inputs = columns["inputs"] or "{}"
+        node_execution.process_data = columns["process_data"] or "{}"
+        node_execution.outputs = columns["outputs"] or "{}"
+        return
+
+    node_execution.inputs = json.dumps(json_converter.to_json_encodable(execution.inputs)) if execution.inputs else "{}"
+    node_execution.process_data = (
+        json.dumps(json_converter.to_json_encodable(execution.process_data)) if execution.process_data else "{}"
+    )
+    node_execution.outputs = (
+        json.dumps(json_converter.to_json_encodable(execution.outputs)) if execution.outputs else "{}"
+    )
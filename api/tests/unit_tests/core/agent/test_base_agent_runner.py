@@ -0,0 +1,79 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.agent.base_agent_runner import BaseAgentRunner
+from core.app.entities.queue_entities import QueueAgentThoughtEvent
+
+
+@pytest.fixture
+def runner():
+    runner = BaseAgentRunner.__new__(BaseAgentRunner)
+    runner.user_id = "user-1"
+    runner.agent_thought_count = 0
+    runner.queue_manager = MagicMock()
+    runner._pending_agent_thoughts = {}
+    with patch("core.agent.base_agent_runner.dify_config.AGENT_THOUGHT_BATCH_WRITE_ENABLED", True):
+        yield runner
+
+
+def test_buffers_thoughts_until_flushed(runner):
+    with patch("core.agent.base_agent_runner.db") as mock_db:
+        agent_thought_id = runner.create_agent_thought(
+            message_id="message-1", message="", tool_name="", tool_input="", messages_ids=[]
+        )
+        runner.save_agent_thought(
+            agent_thought_id=agent_thought_id,
+            tool_name="",
+            tool_input="",
+            thought="thinking",
+            observation=None,
+            tool_invoke_meta=None,
+            answer="thinking",
+            messages_ids=[],
+        )
+        runner.save_agent_thought(
+            agent_thought_id=agent_thought_id,
+            tool_name="",
+            tool_input="",
+            thought="",
+            observation={"search": "found"},
+            tool_invoke_meta={"search": {}},
+            answer="",
+            messages_ids=["file-1"],
+        )
+
+        # neither queried nor committed yet
+        mock_db.session.query.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+
+        runner.flush_agent_thoughts()
+        runner.flush_agent_thoughts()
+
+    mock_db.session.commit.assert_called_once()
+    (thoughts,) = mock_db.session.add_all.call_args.args
+    assert [thought.id for thought in thoughts] == [agent_thought_id]
+    assert thoughts[0].position == 1
+    assert thoughts[0].thought == "thinking"
+    assert thoughts[0].observation == '{"search": "found"}'
+    assert thoughts[0].message_files == '["file-1"]'
+    assert runner.agent_thought_count == 1
+
+
+def test_publishes_the_state_of_buffered_thoughts(runner):
+    with patch("core.agent.base_agent_runner.db"):
+        agent_thought_id = runner.create_agent_thought(
+            message_id="message-1", message="", tool_name="", tool_input="", messages_ids=["file-1"]
+        )
+        runner.publish_agent_thought(agent_thought_id)
+        runner.flush_agent_thoughts()
+        runner.publish_agent_thought(agent_thought_id)
+
+    buffered_event, flushed_event = [call.args[0] for call in runner.queue_manager.publish.call_args_list]
+    assert isinstance(buffered_event, QueueAgentThoughtEvent)
+    assert buffered_event.agent_thought is not None
+    assert buffered_event.agent_thought.position == 1
+    assert buffered_event.agent_thought.message_files == ["file-1"]
+    # written thoughts are loaded by the task pipeline
+    assert flushed_event.agent_thought_id == agent_thought_id
+    assert flushed_event.agent_thought is None
@@ -0,0 +1,114 @@
+import threading
+import time
+from unittest.mock import patch
+
+from flask import Flask
+
+from core.agent.fc_agent_runner import FunctionCallAgentRunner
+from core.agent.tool_call_executor import ToolCallTimeoutError, run_tool_calls
+from models.model import Conversation, Message
+
+
+def test_keeps_the_order_of_the_calls():
+    def call(delay: float, result: str):
+        def run():
+            time.sleep(delay)
+            return result
+
+        return run
+
+    outcomes = run_tool_calls([call(0.2, "first"), call(0, "second"), call(0.1, "third")], max_workers=3)
+
+    assert outcomes == ["first", "second", "third"]
+
+
+def test_isolates_errors():
+    def fail():
+        raise ValueError("boom")
+
+    outcomes = run_tool_calls([fail, lambda: "ok"], max_workers=2)
+
+    assert isinstance(outcomes[0], ValueError)
+    assert outcomes[1] == "ok"
+
+
+def test_limits_concurrent_calls():
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return True
+
+    assert run_tool_calls([call] * 6, max_workers=2) == [True] * 6
+    assert max_running == 2
+
+
+def test_times_out_calls_without_failing_the_others():
+    release = threading.Event()
+
+    def hang():
+        release.wait(5)
+        return "late"
+
+    started_at = time.monotonic()
+    outcomes = run_tool_calls([hang, lambda: "ok"], max_workers=2, timeout=0.2)
+    release.set()
+
+    assert isinstance(outcomes[0], ToolCallTimeoutError)
+    assert outcomes[1] == "ok"
+    assert time.monotonic() - started_at < 2
+
+
+def test_timeout_starts_when_the_call_starts():
+    def slow():
+        time.sleep(0.2)
+        return "slow"
+
+    # the second call waits for the first one, longer than the timeout in total
+    assert run_tool_calls([slow, slow], max_workers=1, timeout=0.3) == ["slow", "slow"]
+
+
+def test_runner_turns_failed_calls_into_error_responses():
+    runner = FunctionCallAgentRunner.__new__(FunctionCallAgentRunner)
+    runner.message = Message(id="message-1", conversation_id="conversation-1")
+    runner.conversation = Conversation(id="conversation-1")
+    tool_calls = [("call-1", "search", {"q": "dify"}), ("call-2", "weather", {})]
+    messages = []
+
+    def invoke_tool_call(
+        tool_instances, tool_call_id, tool_call_name, tool_call_args, trace_manager, message, conversation_id
+    ):
+        messages.append((message, conversation_id))
+        if tool_call_name == "weather":
+            raise RuntimeError("unreachable")
+        return {"tool_call_id": tool_call_id, "tool_call_name": tool_call_name, "tool_response": "found"}, ["file"]
+
+    with (
+        Flask(__name__).app_context(),
+        patch.object(runner, "_invoke_tool_call", side_effect=invoke_tool_call),
+        patch("core.agent.fc_agent_runner.dify_config.AGENT_MAX_CONCURRENT_TOOL_CALLS", 2),
+    ):
+        results = runner._invoke_tool_calls_concurrently({}, tool_calls, None)
+
+    assert results[0] == ({"tool_call_id": "call-1", "tool_call_name": "search", "tool_response": "found"}, ["file"])
+    error_response, message_files = results[1]
+    assert error_response["tool_call_id"] == "call-2"
+    assert error_response["tool_response"] == "tool invoke error: unreachable"
+    assert error_response["meta"]["error"] == "tool invoke error: unreachable"
+    assert message_files == []
+    # the threads get a copy of the message, not the one bound to the session of the runner
+    for message, conversation_id in messages:
+        assert message is not runner.message
+        assert (message.id, message.conversation_id, conversation_id) == (
+            "message-1",
+            "conversation-1",
+            "conversation-1",
+        )
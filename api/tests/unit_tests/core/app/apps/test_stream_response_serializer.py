@@ -0,0 +1,50 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from core.app.apps.base_app_generator import BaseAppGenerator
+from core.app.apps.stream_response_serializer import dumps, to_sse_frame
+from core.app.entities.task_entities import NodeFinishStreamResponse
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionMetadataKey
+
+
+def _node_finish_response() -> NodeFinishStreamResponse:
+    return NodeFinishStreamResponse(
+        task_id="task",
+        workflow_run_id="run",
+        data=NodeFinishStreamResponse.Data(
+            id="execution",
+            node_id="llm",
+            node_type="llm",
+            title="LLM",
+            index=1,
+            outputs={"text": "你好", "price": Decimal("0.5")},
+            status="succeeded",
+            elapsed_time=1.5,
+            execution_metadata={WorkflowNodeExecutionMetadataKey.TOTAL_TOKENS: 10},
+            created_at=1,
+            finished_at=2,
+        ),
+    )
+
+
+def test_frames_match_the_json_module():
+    response = _node_finish_response()
+    json_dict = response.to_dict()
+    with patch("core.app.entities.task_entities.dify_config.STREAM_RESPONSE_ORJSON_ENABLED", True):
+        orjson_dict = response.to_dict()
+
+    assert json.loads(to_sse_frame(orjson_dict)[len(b"data: ") : -2]) == json.loads(json.dumps(json_dict))
+    assert to_sse_frame("ping") == b"event: ping\n\n"
+
+
+def test_falls_back_to_the_json_module():
+    assert json.loads(dumps({"big": 2**70, "values": {1, 2}})) == {"big": 2**70, "values": [1, 2]}
+
+
+def test_event_stream_is_written_as_bytes():
+    messages = [{"event": "message", "answer": "你好"}, "ping"]
+    with patch("core.app.apps.base_app_generator.dify_config.STREAM_RESPONSE_ORJSON_ENABLED", True):
+        frames = list(BaseAppGenerator.convert_to_event_stream(iter(messages)))
+
+    assert frames == ['data: {"event":"message","answer":"你好"}\n\n'.encode(), b"event: ping\n\n"]
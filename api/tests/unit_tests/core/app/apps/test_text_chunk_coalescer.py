@@ -0,0 +1,123 @@
+import time
+from unittest.mock import patch
+
+from core.app.apps.base_app_queue_manager import PublishFrom
+from core.app.apps.text_chunk_coalescer import TextChunkCoalescer
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueLLMChunkEvent,
+    QueueTextChunkEvent,
+    QueueWorkflowSucceededEvent,
+    WorkflowQueueMessage,
+)
+from core.app.entities.task_entities import WorkflowTaskState
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta, LLMUsage
+from core.model_runtime.entities.message_entities import AssistantPromptMessage, UserPromptMessage
+
+
+def _text(text: str, selector: list[str] | None = None) -> WorkflowQueueMessage:
+    return WorkflowQueueMessage(
+        task_id="task", app_mode="workflow", event=QueueTextChunkEvent(text=text, from_variable_selector=selector)
+    )
+
+
+def _llm(text: str, usage: LLMUsage | None = None) -> WorkflowQueueMessage:
+    chunk = LLMResultChunk(
+        model="gpt-4o",
+        prompt_messages=[UserPromptMessage(content="hi")] if text == "a" else [],
+        delta=LLMResultChunkDelta(index=0, message=AssistantPromptMessage(content=text), usage=usage),
+    )
+    return WorkflowQueueMessage(task_id="task", app_mode="chat", event=QueueLLMChunkEvent(chunk=chunk))
+
+
+def _texts(messages: list[WorkflowQueueMessage]) -> list[str]:
+    return [message.event.text for message in messages]  # type: ignore[union-attr]
+
+
+def test_merges_chunks_of_the_same_answer():
+    coalescer = TextChunkCoalescer(window=60, max_bytes=1024)
+    assert coalescer.push(_text("Hel", ["answer", "answer"])) == []
+    assert coalescer.push(_text("lo", ["answer", "answer"])) == []
+
+    # a chunk of another answer node sends the held ones first
+    assert _texts(coalescer.push(_text("!", ["answer2", "answer"]))) == ["Hello"]
+    assert _texts(coalescer.flush()) == ["!"]
+    assert coalescer.flush() == []
+
+
+def test_other_events_keep_their_order():
+    coalescer = TextChunkCoalescer(window=60, max_bytes=1024)
+    coalescer.push(_text("a"))
+    coalescer.push(_text("b"))
+    succeeded = WorkflowQueueMessage(task_id="task", app_mode="workflow", event=QueueWorkflowSucceededEvent())
+
+    messages = coalescer.push(succeeded)
+
+    assert _texts(messages[:1]) == ["ab"]
+    assert messages[1] is succeeded
+
+
+def test_sends_on_size_and_window():
+    coalescer = TextChunkCoalescer(window=60, max_bytes=4)
+    assert coalescer.push(_text("ab")) == []
+    assert _texts(coalescer.push(_text("cd"))) == ["abcd"]
+
+    coalescer = TextChunkCoalescer(window=0.01, max_bytes=1024)
+    coalescer.push(_text("a"))
+    assert 0 <= coalescer.timeout() <= 0.01
+    time.sleep(0.02)
+    assert _texts(coalescer.push(_text("b"))) == ["ab"]
+    assert coalescer.timeout() is None
+
+
+def test_merges_llm_chunks_until_the_usage():
+    coalescer = TextChunkCoalescer(window=60, max_bytes=1024)
+    coalescer.push(_llm("a"))
+    coalescer.push(_llm("b"))
+    messages = coalescer.push(_llm("c", usage=LLMUsage.empty_usage()))
+
+    assert len(messages) == 1
+    chunk = messages[0].event.chunk  # type: ignore[union-attr]
+    assert chunk.delta.message.content == "abc"
+    assert chunk.delta.usage is not None
+    assert chunk.prompt_messages[0].content == "hi"
+
+
+def test_listen_coalesces_when_enabled():
+    with (
+        patch("core.app.apps.base_app_queue_manager.dify_config.STREAM_TEXT_CHUNK_COALESCE_ENABLED", True),
+        patch("core.app.apps.text_chunk_coalescer.dify_config.STREAM_TEXT_CHUNK_COALESCE_WINDOW_MS", 60000),
+    ):
+        queue_manager = WorkflowAppQueueManager(
+            task_id="task", user_id="user", invoke_from=InvokeFrom.SERVICE_API, app_mode="workflow"
+        )
+        for text in ["Hel", "lo", " world"]:
+            queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+        queue_manager.publish(QueueWorkflowSucceededEvent(), PublishFrom.APPLICATION_MANAGER)
+
+        events = [message.event for message in queue_manager.listen()]
+
+    assert isinstance(events[0], QueueTextChunkEvent)
+    assert events[0].text == "Hello world"
+    assert isinstance(events[1], QueueWorkflowSucceededEvent)
+
+
+def test_task_state_accumulates_answer_parts():
+    task_state = WorkflowTaskState()
+    task_state.append_answer("Hello")
+    task_state.append_answer(" world")
+    assert task_state.answer == "Hello world"
+
+    task_state.answer = "moderated"
+    task_state.append_answer("!")
+    assert task_state.answer == "moderated!"
+
+
+def test_task_state_answer_behaves_as_a_field():
+    task_state = WorkflowTaskState(answer="Hello")
+    task_state.append_answer(" world")
+
+    assert task_state.answer == "Hello world"
+    assert task_state.model_dump()["answer"] == "Hello world"
+    assert WorkflowTaskState().model_dump()["answer"] == ""
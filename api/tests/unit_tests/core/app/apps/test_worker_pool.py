@@ -0,0 +1,148 @@
+import contextvars
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+import contexts
+from core.app.apps.worker_pool import AppWorkerPool
+from core.errors.error import AppWorkerPoolBusyError
+
+
+@pytest.fixture
+def pool():
+    with (
+        patch("core.app.apps.worker_pool.dify_config.APP_WORKER_POOL_ENABLED", True),
+        patch("core.app.apps.worker_pool.dify_config.APP_WORKER_POOL_MAX_WORKERS", 1),
+        patch("core.app.apps.worker_pool.dify_config.APP_WORKER_POOL_MAX_QUEUE_SIZE", 4),
+        patch("core.app.apps.worker_pool.dify_config.APP_WORKER_POOL_MAX_PER_TENANT", 0),
+    ):
+        yield AppWorkerPool()
+
+
+def _block(pool: AppWorkerPool, tenant_id: str) -> threading.Event:
+    """Occupy the only worker of the pool until the returned event is set"""
+    started, release = threading.Event(), threading.Event()
+
+    def run():
+        started.set()
+        release.wait(5)
+
+    pool.reserve(tenant_id).submit(run)
+    assert started.wait(5)
+    return release
+
+
+def _wait_idle(pool: AppWorkerPool):
+    for _ in range(500):
+        if pool.stats()["running"] == 0 and pool.stats()["queued"] == 0:
+            return
+        time.sleep(0.01)
+    raise AssertionError("the pool did not become idle")
+
+
+def test_runs_in_a_thread_when_disabled():
+    ran = threading.Event()
+    with patch("core.app.apps.worker_pool.dify_config.APP_WORKER_POOL_ENABLED", False):
+        AppWorkerPool().reserve("tenant-1").submit(ran.set)
+
+    assert ran.wait(5)
+
+
+def test_serves_tenants_in_turn(pool):
+    order = []
+    release = _block(pool, "tenant-a")
+    for tenant_id, name in [("tenant-a", "a1"), ("tenant-a", "a2"), ("tenant-a", "a3"), ("tenant-b", "b1")]:
+        pool.reserve(tenant_id).submit(lambda name=name: order.append(name))
+
+    release.set()
+    _wait_idle(pool)
+
+    # tenant b doesn't wait for all the queued generations of tenant a
+    assert order == ["a1", "b1", "a2", "a3"]
+    assert pool.stats()["started"] == 5
+
+
+def test_rejects_when_saturated(pool):
+    release = _block(pool, "tenant-a")
+    reservations = [pool.reserve("tenant-a") for _ in range(4)]
+
+    with pytest.raises(AppWorkerPoolBusyError):
+        pool.reserve("tenant-b")
+    assert pool.stats()["rejected"] == 1
+
+    # a reservation given back frees its place
+    reservations[0].cancel()
+    with pool.reserve("tenant-b"):
+        pass
+    release.set()
+
+
+def test_limits_the_share_of_a_tenant(pool):
+    with patch("core.app.apps.worker_pool.dify_config.APP_WORKER_POOL_MAX_PER_TENANT", 2):
+        release = _block(pool, "tenant-a")
+        pool.reserve("tenant-a").submit(lambda: None)
+
+        with pytest.raises(AppWorkerPoolBusyError):
+            pool.reserve("tenant-a")
+        # other tenants still get in
+        pool.reserve("tenant-b").submit(lambda: None)
+
+        release.set()
+        _wait_idle(pool)
+        pool.reserve("tenant-a").submit(lambda: None)
+    _wait_idle(pool)
+
+
+def test_nested_generations_bypass_the_pool(pool):
+    nested_reservation = []
+
+    def run():
+        nested_reservation.append(pool.reserve("tenant-a"))
+
+    pool.reserve("tenant-a").submit(run)
+    _wait_idle(pool)
+
+    # started by a worker of the pool, the nested generation runs in its own thread
+    assert nested_reservation[0]._pool is None
+
+
+def test_nested_generations_of_parallel_branches_bypass_the_pool(pool):
+    nested_reservation = []
+
+    def branch():
+        nested_reservation.append(pool.reserve("tenant-a"))
+
+    def run():
+        # parallel branches and iterations run in threads started with a copy of the context
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(branch,))
+        thread.start()
+        thread.join(5)
+
+    pool.reserve("tenant-a").submit(run)
+    _wait_idle(pool)
+
+    assert nested_reservation[0]._pool is None
+    # the caller's own context isn't marked
+    with pool.reserve("tenant-a") as reservation:
+        assert reservation._pool is pool
+
+
+def test_generations_do_not_share_context_vars(pool):
+    seen = []
+
+    def generate(tenant_id: str):
+        # like the plugin model providers, set lazily by the generation that needs them
+        try:
+            seen.append(contexts.plugin_model_providers.get())
+        except LookupError:
+            seen.append(None)
+            contexts.plugin_model_providers.set([f"providers-of-{tenant_id}"])  # type: ignore[list-item]
+
+    for tenant_id in ("tenant-a", "tenant-b"):
+        pool.reserve(tenant_id).submit(generate, tenant_id=tenant_id)
+        _wait_idle(pool)
+
+    assert pool.stats()["workers"] == 1
+    assert seen == [None, None]
@@ -0,0 +1,87 @@
+import base64
+import io
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from core.file import File, FileTransferMethod, FileType, file_manager
+from core.model_runtime.entities import ImagePromptMessageContent
+
+
+def _make_png(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), color="red").save(output, format="PNG")
+    return output.getvalue()
+
+
+def _make_file(related_id: str = "upload-file-id") -> File:
+    return File(
+        id="test-file",
+        tenant_id="test-tenant-id",
+        type=FileType.IMAGE,
+        transfer_method=FileTransferMethod.LOCAL_FILE,
+        related_id=related_id,
+        filename="image.png",
+        extension=".png",
+        mime_type="image/png",
+        size=67,
+        storage_key="test-storage-key",
+    )
+
+
+@pytest.fixture(autouse=True)
+def _clear_encoded_string_cache():
+    file_manager._encoded_string_cache.clear()
+    yield
+    file_manager._encoded_string_cache.clear()
+
+
+def test_encoded_string_is_cached_per_file():
+    with patch.object(file_manager, "_download_file_content", return_value=b"content") as download:
+        first = file_manager.to_prompt_message_content(_make_file())
+        second = file_manager.to_prompt_message_content(_make_file())
+
+    assert first.base64_data == second.base64_data == base64.b64encode(b"content").decode()
+    download.assert_called_once_with("test-storage-key")
+
+
+def test_encoded_string_cache_is_keyed_by_image_detail():
+    with patch.object(file_manager, "_download_file_content", return_value=b"content") as download:
+        file_manager.to_prompt_message_content(_make_file(), image_detail_config=ImagePromptMessageContent.DETAIL.LOW)
+        file_manager.to_prompt_message_content(_make_file(), image_detail_config=ImagePromptMessageContent.DETAIL.HIGH)
+
+    assert download.call_count == 2
+
+
+def test_encoded_string_cache_disabled():
+    with (
+        patch.object(file_manager.dify_config, "MULTIMODAL_ENCODED_CACHE_MAX_BYTES", 0),
+        patch.object(file_manager, "_download_file_content", return_value=b"content") as download,
+    ):
+        file_manager.to_prompt_message_content(_make_file())
+        file_manager.to_prompt_message_content(_make_file())
+
+    assert download.call_count == 2
+
+
+def test_low_detail_image_is_downscaled():
+    with (
+        patch.object(file_manager.dify_config, "MULTIMODAL_LOW_DETAIL_IMAGE_MAX_SIDE", 64),
+        patch.object(file_manager, "_download_file_content", return_value=_make_png(256, 128)),
+    ):
+        low = file_manager.to_prompt_message_content(
+            _make_file(), image_detail_config=ImagePromptMessageContent.DETAIL.LOW
+        )
+        high = file_manager.to_prompt_message_content(
+            _make_file(), image_detail_config=ImagePromptMessageContent.DETAIL.HIGH
+        )
+
+    with Image.open(io.BytesIO(base64.b64decode(low.base64_data))) as image:
+        assert image.size == (64, 32)
+    with Image.open(io.BytesIO(base64.b64decode(high.base64_data))) as image:
+        assert image.size == (256, 128)
+
+
+def test_downscale_keeps_invalid_image_data():
+    assert file_manager._downscale_image(b"not an image", 64) == b"not an image"
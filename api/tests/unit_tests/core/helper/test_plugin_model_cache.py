@@ -0,0 +1,139 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.helper.plugin_model_cache import PluginModelCache
+from tests.unit_tests.conftest import redis_mock
+
+
+@pytest.fixture
+def cache():
+    versions: dict[str, int] = {}
+
+    def incr(key):
+        versions[key] = versions.get(key, 0) + 1
+
+    with (
+        patch("core.helper.plugin_model_cache.dify_config.PLUGIN_MODEL_CACHE_ENABLED", True),
+        patch.object(redis_mock, "get", side_effect=lambda key: versions.get(key)),
+        patch.object(redis_mock, "incr", side_effect=incr),
+    ):
+        yield PluginModelCache()
+
+
+def test_disabled_always_loads():
+    loader = MagicMock(return_value=["provider"])
+    with patch("core.helper.plugin_model_cache.dify_config.PLUGIN_MODEL_CACHE_ENABLED", False):
+        cache = PluginModelCache()
+        cache.get_model_providers("tenant-1", loader)
+        cache.get_model_providers("tenant-1", loader)
+
+    assert loader.call_count == 2
+
+
+def test_caches_per_tenant(cache):
+    loader = MagicMock(return_value=["provider"])
+
+    assert cache.get_model_providers("tenant-1", loader) == ["provider"]
+    assert cache.get_model_providers("tenant-1", loader) == ["provider"]
+    assert loader.call_count == 1
+
+    cache.get_model_providers("tenant-2", loader)
+    assert loader.call_count == 2
+
+
+def test_missing_schemas_are_not_cached(cache):
+    loader = MagicMock(return_value=None)
+
+    assert cache.get_model_schema("tenant-1", "gpt-4", loader) is None
+    assert cache.get_model_schema("tenant-1", "gpt-4", loader) is None
+    assert loader.call_count == 2
+
+
+def test_invalidate_tenant(cache):
+    loader = MagicMock(side_effect=[["old"], ["new"]])
+    other_loader = MagicMock(return_value=["other"])
+    cache.get_model_providers("tenant-1", loader)
+    cache.get_model_providers("tenant-2", other_loader)
+
+    cache.invalidate_tenant("tenant-1")
+
+    assert cache.get_model_providers("tenant-1", loader) == ["new"]
+    cache.get_model_providers("tenant-2", other_loader)
+    assert other_loader.call_count == 1
+
+
+def test_invalidate_tenant_once_per_task(cache):
+    tasks: set[str] = set()
+
+    def set_nx(key, value, nx=False, ex=None):
+        if key in tasks:
+            return None
+        tasks.add(key)
+        return True
+
+    loader = MagicMock(side_effect=[["old"], ["new"], ["newer"]])
+    with patch.object(redis_mock, "set", side_effect=set_nx):
+        cache.get_model_providers("tenant-1", loader)
+        cache.invalidate_tenant_once("tenant-1", "task-1")
+        assert cache.get_model_providers("tenant-1", loader) == ["new"]
+
+        # polling the finished task again keeps the entries loaded since
+        cache.invalidate_tenant_once("tenant-1", "task-1")
+        assert cache.get_model_providers("tenant-1", loader) == ["new"]
+
+
+def test_concurrent_misses_load_once(cache):
+    calls = 0
+
+    def loader():
+        nonlocal calls
+        calls += 1
+        time.sleep(0.2)
+        return ["provider"]
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_model_providers("tenant-1", loader))) for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == 1
+    assert results == [["provider"]] * 5
+
+
+def test_concurrent_misses_share_errors(cache):
+    started = threading.Event()
+    release = threading.Event()
+    loader = MagicMock(side_effect=RuntimeError("daemon unavailable"))
+
+    def slow_loader():
+        started.set()
+        release.wait(5)
+        return loader()
+
+    errors = []
+
+    def get():
+        try:
+            cache.get_model_providers("tenant-1", slow_loader)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=get)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=get)
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert loader.call_count == 1
+    assert len(errors) == 2
@@ -0,0 +1,56 @@
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.helper import process_pool
+from core.helper.process_pool import ProcessPoolBusyError, ProcessPoolTimeoutError, run_in_process
+
+
+@pytest.fixture
+def enabled():
+    with (
+        patch("core.helper.process_pool.dify_config.CPU_OFFLOAD_ENABLED", True),
+        patch("core.helper.process_pool.dify_config.CPU_OFFLOAD_MAX_WORKERS", 1),
+        patch("core.helper.process_pool.dify_config.CPU_OFFLOAD_MAX_QUEUE_SIZE", 0),
+    ):
+        yield
+        if process_pool._executor is not None:
+            process_pool._reset_executor(process_pool._executor)
+
+
+def test_runs_inline_when_disabled():
+    with patch("core.helper.process_pool.dify_config.CPU_OFFLOAD_ENABLED", False):
+        assert run_in_process(os.getpid) == os.getpid()
+
+
+def test_runs_in_worker_process(enabled):
+    worker_pid = run_in_process(os.getpid)
+
+    assert worker_pid != os.getpid()
+    # the worker process is reused
+    assert run_in_process(os.getpid) == worker_pid
+    assert run_in_process(divmod, 7, 2) == (3, 1)
+
+
+def test_raises_errors_of_the_function(enabled):
+    with pytest.raises(ZeroDivisionError):
+        run_in_process(divmod, 1, 0)
+
+
+def test_times_out(enabled):
+    with pytest.raises(ProcessPoolTimeoutError):
+        run_in_process(time.sleep, 2, timeout=0.5)
+
+
+def test_raises_when_no_slot_frees_up(enabled):
+    slots = MagicMock()
+    slots.acquire.return_value = False
+    with (
+        patch.object(process_pool, "_get_executor", return_value=(MagicMock(), slots)) as get_executor,
+        pytest.raises(ProcessPoolBusyError),
+    ):
+        run_in_process(os.getpid, timeout=0.1)
+
+    get_executor.return_value[0].submit.assert_not_called()
@@ -1,9 +1,10 @@
 import secrets
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
-from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request
+from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request, stream_request
 
 
 @patch("httpx.Client.request")
@@ -50,3 +51,19 @@ def test_retry_logic_success(mock_request):
     assert response.status_code == 200
     assert mock_request.call_count == SSRF_DEFAULT_MAX_RETRIES + 1
     assert mock_request.call_args_list[0][1].get("method") == "GET"
+
+
+@patch("core.helper.ssrf_proxy.time.sleep")
+def test_stream_request_retries_before_reading_the_body(mock_sleep):
+    status_codes = iter([503, 200])
+    transport = httpx.MockTransport(lambda request: httpx.Response(next(status_codes), content=b"streamed"))
+
+    with (
+        patch(
+            "core.helper.ssrf_proxy._create_client", side_effect=lambda ssl_verify: httpx.Client(transport=transport)
+        ),
+        stream_request("GET", "http://example.com", max_retries=1) as response,
+    ):
+        assert response.status_code == 200
+        assert b"".join(response.iter_bytes()) == b"streamed"
+    mock_sleep.assert_called_once()
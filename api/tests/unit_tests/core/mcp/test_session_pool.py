@@ -0,0 +1,176 @@
+import itertools
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.mcp import types
+from core.mcp.error import MCPConnectionError
+from core.mcp.session_pool import MCPSessionPool
+
+_ids = itertools.count()
+
+
+def _client(provider_id: str = "provider-1", token: str = "token-1", for_list: bool = False, timeout=None):
+    client = MagicMock()
+    client.id = next(_ids)
+    client.tenant_id = "tenant-1"
+    client.provider_id = provider_id
+    client.server_url = "https://mcp.example.com/mcp"
+    client.request_headers.return_value = {"Authorization": f"Bearer {token}"}
+    client.for_list = for_list
+    client.timeout = timeout
+    client.sse_read_timeout = None
+    client.is_alive.return_value = True
+    return client
+
+
+@pytest.fixture
+def pool():
+    with (
+        patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_ENABLED", True),
+        patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_MAX_SESSIONS_PER_SERVER", 2),
+        patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_MAX_IDLE_SESSIONS", 8),
+        patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_IDLE_TIMEOUT", 300),
+        patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_PING_INTERVAL", 30),
+        patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_ACQUIRE_TIMEOUT", 0.1),
+        patch("core.mcp.session_pool.dify_config.MCP_LIST_TOOLS_CACHE_TTL", 60),
+    ):
+        yield MCPSessionPool()
+
+
+def test_connects_per_call_when_disabled():
+    client = _client()
+    with patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_ENABLED", False):
+        MCPSessionPool().invoke_tool(client, "search", {"q": "dify"})
+
+    client.__enter__.assert_called_once()
+    client.__exit__.assert_called_once()
+    client.invoke_tool.assert_called_once_with(tool_name="search", tool_args={"q": "dify"})
+
+
+def test_reuses_initialized_session(pool):
+    first, second = _client(), _client()
+
+    pool.invoke_tool(first, "search", {})
+    pool.invoke_tool(second, "search", {})
+
+    first.__enter__.assert_called_once()
+    assert first.invoke_tool.call_count == 2
+    # the second client is only used to find the session
+    second.__enter__.assert_not_called()
+    first.cleanup.assert_not_called()
+
+
+def test_sessions_are_keyed_by_credentials(pool):
+    first, second = _client(token="token-1"), _client(token="token-2")
+
+    pool.invoke_tool(first, "search", {})
+    pool.invoke_tool(second, "search", {})
+
+    second.__enter__.assert_called_once()
+    second.invoke_tool.assert_called_once()
+
+
+def test_sessions_are_keyed_by_client_options(pool):
+    clients = [_client(), _client(for_list=True), _client(timeout=5)]
+
+    for client in clients:
+        pool.invoke_tool(client, "search", {})
+
+    for client in clients:
+        client.__enter__.assert_called_once()
+
+
+def test_pings_session_idle_for_long_and_reconnects_when_unhealthy(pool):
+    first, second = _client(), _client()
+    pool.invoke_tool(first, "search", {})
+    first.ping.side_effect = MCPConnectionError("gone")
+
+    with patch("core.mcp.session_pool.time.monotonic", return_value=10**6 + 60):
+        # idle timeout is not reached yet for the patched clock
+        with patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_IDLE_TIMEOUT", 10**7):
+            pool.invoke_tool(second, "search", {})
+
+    first.ping.assert_called_once()
+    first.cleanup.assert_called_once()
+    second.__enter__.assert_called_once()
+    second.invoke_tool.assert_called_once()
+
+
+def test_reconnects_once_when_reused_session_was_disconnected(pool):
+    first, second = _client(), _client()
+    pool.invoke_tool(first, "search", {})
+    first.invoke_tool.side_effect = MCPConnectionError("No response received")
+    first.is_alive.side_effect = [True, False]
+
+    pool.invoke_tool(second, "search", {})
+
+    first.cleanup.assert_called_once()
+    second.invoke_tool.assert_called_once()
+
+
+def test_server_errors_are_not_retried(pool):
+    client = _client()
+    client.invoke_tool.side_effect = MCPConnectionError("Invalid params")
+
+    with pytest.raises(MCPConnectionError):
+        pool.invoke_tool(client, "search", {})
+
+    client.invoke_tool.assert_called_once()
+    # the session is still alive and goes back to the pool
+    client.cleanup.assert_not_called()
+
+
+def test_limits_sessions_per_server(pool):
+    clients = [_client() for _ in range(3)]
+    sessions = [pool._acquire(pool._get_key(client), client) for client in clients[:2]]
+
+    with pytest.raises(MCPConnectionError, match="Timed out"):
+        pool._acquire(pool._get_key(clients[2]), clients[2])
+
+    pool._release(sessions[0], 0)
+    # the released session is reused
+    assert pool._acquire(pool._get_key(clients[2]), clients[2]) is sessions[0]
+
+
+def test_closes_expired_idle_sessions(pool):
+    first, second = _client(), _client()
+    pool.invoke_tool(first, "search", {})
+
+    with patch("core.mcp.session_pool.dify_config.MCP_SESSION_POOL_IDLE_TIMEOUT", 0):
+        pool.invoke_tool(second, "search", {})
+
+    first.cleanup.assert_called_once()
+    second.__enter__.assert_called_once()
+
+
+def test_caches_tools_until_invalidated(pool):
+    tools = [types.Tool(name="search", inputSchema={})]
+    client = _client()
+    client.list_tools.return_value = tools
+
+    assert pool.list_tools(client) == tools
+    assert pool.list_tools(_client()) == tools
+    client.list_tools.assert_called_once()
+
+    pool.invalidate("tenant-1", "provider-1")
+    # the idle session is closed with the cached tools
+    client.cleanup.assert_called_once()
+    other = _client()
+    other.list_tools.return_value = []
+    assert pool.list_tools(other) == []
+
+
+def test_tool_list_changed_notification_drops_cached_tools(pool):
+    client = _client()
+    client.list_tools.return_value = [types.Tool(name="search", inputSchema={})]
+    pool.list_tools(client)
+
+    handler = client.message_handler
+    handler(
+        types.ServerNotification(
+            types.ToolListChangedNotification(method="notifications/tools/list_changed", params=None)
+        )
+    )
+
+    assert pool._tools_cache == {}
@@ -0,0 +1,110 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.model_runtime.entities.message_entities import (
+    AssistantPromptMessage,
+    ImagePromptMessageContent,
+    PromptMessageTool,
+    SystemPromptMessage,
+    TextPromptMessageContent,
+    ToolPromptMessage,
+    UserPromptMessage,
+)
+from core.model_runtime.model_providers.__base.tokenizers import token_estimator as token_estimator_module
+from core.model_runtime.model_providers.__base.tokenizers.token_estimator import TokenEstimator
+
+
+class WordEncoding:
+    """One token per word"""
+
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    def encode_batch(self, texts, disallowed_special):
+        self.batches.append(texts)
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def encoding():
+    encoding = WordEncoding()
+    with (
+        patch.object(token_estimator_module, "_load_encoding", return_value=encoding),
+        patch.object(token_estimator_module.dify_config, "LOCAL_TOKEN_ESTIMATION_CACHE_SIZE", 16),
+    ):
+        yield encoding
+
+
+@pytest.mark.parametrize(
+    ("model", "encoding_name"),
+    [
+        ("gpt-4o-mini", "o200k_base"),
+        ("o3-mini", "o200k_base"),
+        ("gpt-4-turbo", "cl100k_base"),
+        ("gpt-3.5-turbo", "cl100k_base"),
+        ("anthropic/claude-3-5-sonnet", "cl100k_base"),
+        ("some-local-model", "gpt2"),
+    ],
+)
+def test_get_encoding_name(model, encoding_name):
+    assert TokenEstimator.get_encoding_name(model) == encoding_name
+
+
+def test_counts_messages_with_format_overhead(encoding):
+    messages = [
+        SystemPromptMessage(content="be brief"),
+        UserPromptMessage(content="hello there"),
+    ]
+
+    # role and content words, 3 per message and 3 to prime the reply
+    assert TokenEstimator().get_num_tokens("gpt-4o", messages) == (1 + 2 + 3) + (1 + 2 + 3) + 3
+
+
+def test_caches_message_counts(encoding):
+    estimator = TokenEstimator()
+    history = [UserPromptMessage(content="first question"), AssistantPromptMessage(content="first answer")]
+    estimator.get_num_tokens("gpt-4o", history)
+    assert len(encoding.batches) == 1
+
+    estimator.get_num_tokens("gpt-4o", [*history, UserPromptMessage(content="second question")])
+
+    # only the new message is encoded
+    assert encoding.batches[1] == ["user", "second question"]
+
+
+def test_counts_multimodal_contents_and_tools(encoding):
+    image = ImagePromptMessageContent(format="png", mime_type="image/png", url="https://example.com/a.png")
+    high_detail_image = image.model_copy(update={"detail": ImagePromptMessageContent.DETAIL.HIGH})
+    tool_call = AssistantPromptMessage.ToolCall(
+        id="call_1",
+        type="function",
+        function=AssistantPromptMessage.ToolCall.ToolCallFunction(name="search", arguments='{"q": "x"}'),
+    )
+    messages = [
+        UserPromptMessage(content=[TextPromptMessageContent(data="look"), image, high_detail_image]),
+        AssistantPromptMessage(content="", tool_calls=[tool_call]),
+        ToolPromptMessage(content="found", tool_call_id="call_1"),
+    ]
+    tool = PromptMessageTool(name="search", description="search the web", parameters={"type": "object"})
+    estimator = TokenEstimator()
+
+    without_tools = estimator.get_num_tokens("gpt-4o", messages)
+    with_tools = estimator.get_num_tokens("gpt-4o", messages, [tool])
+
+    # user: role, text and images; assistant: role, tool name and arguments; tool: role, content and call id
+    assert without_tools == (2 + 3 + 85 + 765) + (4 + 3) + (3 + 3) + 3
+    assert with_tools > without_tools
+
+
+def test_falls_back_to_gpt2_and_then_characters():
+    gpt2_encoder = MagicMock()
+    with (
+        patch("tiktoken.get_encoding", side_effect=ConnectionError("offline")),
+        patch.object(token_estimator_module.GPT2Tokenizer, "get_encoder", return_value=gpt2_encoder),
+    ):
+        assert token_estimator_module._load_encoding("cl100k_base") is gpt2_encoder
+
+    with patch.object(token_estimator_module.GPT2Tokenizer, "get_encoder", side_effect=OSError("not bundled")):
+        encoding = token_estimator_module._load_encoding("gpt2")
+    assert len(encoding.encode("12345678")) == 2
@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from core.ops.ops_trace_manager import OpsTraceManager
+
+
+@pytest.fixture(autouse=True)
+def _clear_trace_caches():
+    OpsTraceManager.ops_trace_app_cache.clear()
+    OpsTraceManager.ops_trace_instances_cache.clear()
+    yield
+    OpsTraceManager.ops_trace_app_cache.clear()
+    OpsTraceManager.ops_trace_instances_cache.clear()
+
+
+class TestOpsTraceInstanceCache:
+    def test_instance_is_resolved_once_per_app(self):
+        trace_instance = MagicMock()
+        with patch.object(OpsTraceManager, "_resolve_ops_trace_instance", return_value=trace_instance) as resolve:
+            assert OpsTraceManager.get_ops_trace_instance("app-1") is trace_instance
+            assert OpsTraceManager.get_ops_trace_instance("app-1") is trace_instance
+
+        resolve.assert_called_once_with("app-1")
+
+    def test_disabled_tracing_is_cached(self):
+        with patch.object(OpsTraceManager, "_resolve_ops_trace_instance", return_value=None) as resolve:
+            assert OpsTraceManager.get_ops_trace_instance("app-1") is None
+            assert OpsTraceManager.get_ops_trace_instance("app-1") is None
+
+        resolve.assert_called_once_with("app-1")
+
+    def test_invalidate_reloads_instance(self):
+        first, second = MagicMock(), MagicMock()
+        with patch.object(OpsTraceManager, "_resolve_ops_trace_instance", side_effect=[first, second]) as resolve:
+            assert OpsTraceManager.get_ops_trace_instance("app-1") is first
+            OpsTraceManager.invalidate_ops_trace_instance("app-1")
+            assert OpsTraceManager.get_ops_trace_instance("app-1") is second
+
+        assert resolve.call_count == 2
+
+    def test_uuid_and_string_app_ids_share_the_entry(self):
+        app_id = uuid4()
+        first, second = MagicMock(), MagicMock()
+        with patch.object(OpsTraceManager, "_resolve_ops_trace_instance", side_effect=[first, second]) as resolve:
+            assert OpsTraceManager.get_ops_trace_instance(app_id) is first
+            assert OpsTraceManager.get_ops_trace_instance(str(app_id)) is first
+            OpsTraceManager.invalidate_ops_trace_instance(app_id)
+            assert OpsTraceManager.get_ops_trace_instance(app_id) is second
+
+        resolve.assert_called_with(str(app_id))
+
+    def test_cache_disabled_by_zero_ttl(self):
+        trace_instance = MagicMock()
+        with (
+            patch("core.ops.ops_trace_manager.dify_config.OPS_TRACE_INSTANCE_CACHE_TTL", 0),
+            patch.object(OpsTraceManager, "_resolve_ops_trace_instance", return_value=trace_instance) as resolve,
+        ):
+            OpsTraceManager.get_ops_trace_instance("app-1")
+            OpsTraceManager.get_ops_trace_instance("app-1")
+
+        assert resolve.call_count == 2
+
+    def test_none_app_id(self):
+        with patch.object(OpsTraceManager, "_resolve_ops_trace_instance") as resolve:
+            assert OpsTraceManager.get_ops_trace_instance(None) is None
+
+        resolve.assert_not_called()
@@ -0,0 +1,68 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from core.rag.datasource.retrieval_cache import RetrievalResultCache
+from core.rag.models.document import Document
+from tests.unit_tests.conftest import redis_mock
+
+SETTINGS = {"retrieval_method": "semantic_search", "top_k": 2}
+
+
+@pytest.fixture
+def cache():
+    with (
+        patch("core.rag.datasource.retrieval_cache.dify_config.RETRIEVAL_RESULT_CACHE_ENABLED", True),
+        patch("core.rag.datasource.retrieval_cache.dify_config.RETRIEVAL_RESULT_CACHE_REDIS_ENABLED", False),
+    ):
+        yield RetrievalResultCache()
+
+
+def _documents() -> list[Document]:
+    return [Document(page_content="hello", metadata={"doc_id": "1", "score": 0.9})]
+
+
+def test_build_key_disabled():
+    with patch("core.rag.datasource.retrieval_cache.dify_config.RETRIEVAL_RESULT_CACHE_ENABLED", False):
+        assert RetrievalResultCache().build_key("dataset", "query", SETTINGS) is None
+
+
+def test_memory_tier_hit(cache):
+    key = cache.build_key("dataset", "what  is dify", SETTINGS)
+    assert cache.get("dataset", key) is None
+
+    cache.set(key, _documents())
+
+    # whitespace is normalized
+    same_key = cache.build_key("dataset", " what is dify ", SETTINGS)
+    assert same_key == key
+    documents = cache.get("dataset", same_key)
+    assert documents == _documents()
+    assert cache.stats() == {"dataset": {"hits": 1, "misses": 1, "hit_rate": 0.5}}
+
+
+def test_key_depends_on_settings_and_content_version(cache):
+    key = cache.build_key("dataset", "query", SETTINGS)
+
+    assert cache.build_key("dataset", "query", {**SETTINGS, "top_k": 3}) != key
+    redis_mock.get.return_value = b"1"
+    assert cache.build_key("dataset", "query", SETTINGS) != key
+
+
+def test_invalidate_bumps_content_version(cache):
+    cache.invalidate_dataset("dataset")
+
+    redis_mock.incr.assert_called_once_with("retrieval_cache_version:dataset")
+
+
+def test_redis_tier_hit(cache):
+    cached = json.dumps([document.model_dump() for document in _documents()]).encode()
+    with (
+        patch("core.rag.datasource.retrieval_cache.dify_config.RETRIEVAL_RESULT_CACHE_REDIS_ENABLED", True),
+        patch.object(redis_mock, "get", side_effect=[None, cached]),
+    ):
+        key = cache.build_key("dataset", "query", SETTINGS)
+        documents = cache.get("dataset", key)
+
+    assert documents == _documents()
@@ -0,0 +1,40 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from psycopg2.pool import PoolError
+
+from core.rag.datasource.vdb.pgvector.pgvector import PGVector, _BlockingConnectionPool
+
+
+@pytest.fixture
+def pool():
+    with patch("psycopg2.connect", side_effect=lambda *args, **kwargs: MagicMock(closed=False)):
+        yield _BlockingConnectionPool(1, 1, host="localhost")
+
+
+def test_getconn_waits_for_a_free_connection(pool):
+    conn = pool.getconn()
+    with pytest.raises(PoolError):
+        pool.getconn(blocking=False)
+
+    received = []
+    waiter = threading.Thread(target=lambda: received.append(pool.getconn()))
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive()
+
+    pool.putconn(conn)
+    waiter.join(1)
+    assert received == [conn]
+
+
+def test_busy_pool_is_healthy(pool):
+    conn = pool.getconn()
+
+    assert PGVector._check_connection_pool(pool) is True
+    conn.cursor.assert_not_called()
+
+    pool.putconn(conn)
+    assert PGVector._check_connection_pool(pool) is True
+    conn.cursor.assert_called_once()
@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pydantic import BaseModel
+
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
+
+
+class _Config(BaseModel):
+    host: str
+    port: int = 1234
+
+
+@pytest.fixture(autouse=True)
+def _enable_client_pool():
+    with patch("core.rag.datasource.vdb.vector_client_registry.dify_config.VECTOR_STORE_CLIENT_POOL_ENABLED", True):
+        yield
+
+
+def test_client_is_reused_for_same_config():
+    registry = VectorClientRegistry(max_size=4, health_check_interval=60)
+    factory = MagicMock(side_effect=lambda: object())
+
+    first = registry.get_or_create("qdrant", _Config(host="a"), factory)
+    second = registry.get_or_create("qdrant", _Config(host="a"), factory)
+    third = registry.get_or_create("qdrant", _Config(host="b"), factory)
+
+    assert first is second
+    assert first is not third
+    assert factory.call_count == 2
+    assert registry.stats() == {"clients": 2, "created": 2, "reused": 1, "evicted": 0, "unhealthy": 0}
+
+
+def test_least_recently_used_client_is_evicted_and_closed():
+    registry = VectorClientRegistry(max_size=2, health_check_interval=60)
+    close = MagicMock()
+
+    client_a = registry.get_or_create("qdrant", _Config(host="a"), lambda: "a", close=close)
+    registry.get_or_create("qdrant", _Config(host="b"), lambda: "b", close=close)
+    # touch a, so b is evicted
+    registry.get_or_create("qdrant", _Config(host="a"), lambda: "a2", close=close)
+    registry.get_or_create("qdrant", _Config(host="c"), lambda: "c", close=close)
+
+    close.assert_called_once_with("b")
+    assert registry.get_or_create("qdrant", _Config(host="a"), lambda: "a3") == client_a
+    assert registry.stats()["evicted"] == 1
+
+
+def test_unhealthy_client_is_replaced():
+    registry = VectorClientRegistry(max_size=2, health_check_interval=0)
+    close = MagicMock()
+    health_check = MagicMock(side_effect=[False, True])
+
+    first = registry.get_or_create(
+        "pgvector", _Config(host="a"), lambda: "first", health_check=health_check, close=close
+    )
+    second = registry.get_or_create(
+        "pgvector", _Config(host="a"), lambda: "second", health_check=health_check, close=close
+    )
+    third = registry.get_or_create(
+        "pgvector", _Config(host="a"), lambda: "third", health_check=health_check, close=close
+    )
+
+    assert first == "first"
+    assert second == third == "second"
+    close.assert_called_once_with("first")
+    assert registry.stats()["unhealthy"] == 1
+
+
+def test_health_check_is_rate_limited():
+    registry = VectorClientRegistry(max_size=2, health_check_interval=60)
+    health_check = MagicMock(return_value=True)
+
+    for _ in range(3):
+        registry.get_or_create("milvus", _Config(host="a"), lambda: "client", health_check=health_check)
+
+    health_check.assert_not_called()
+
+
+def test_registry_disabled():
+    registry = VectorClientRegistry(max_size=2, health_check_interval=60)
+    factory = MagicMock(side_effect=lambda: object())
+
+    with patch("core.rag.datasource.vdb.vector_client_registry.dify_config.VECTOR_STORE_CLIENT_POOL_ENABLED", False):
+        registry.get_or_create("qdrant", _Config(host="a"), factory)
+        registry.get_or_create("qdrant", _Config(host="a"), factory)
+
+    assert factory.call_count == 2
+    assert registry.stats()["clients"] == 0
+
+
+def test_held_client_is_closed_when_its_last_owner_is_gone():
+    registry = VectorClientRegistry(max_size=1, health_check_interval=0)
+    close = MagicMock()
+    health_check = MagicMock(return_value=False)
+
+    class _Owner:
+        pass
+
+    owner_a, owner_b = _Owner(), _Owner()
+    registry.get_or_create("pgvector", _Config(host="a"), lambda: "a", owner=owner_a, close=close)
+    registry.get_or_create("pgvector", _Config(host="a"), lambda: "a2", owner=owner_b, close=close)
+    # evicted while both owners still use it
+    registry.get_or_create("pgvector", _Config(host="b"), lambda: "b", health_check=health_check, close=close)
+    close.assert_not_called()
+
+    del owner_a
+    close.assert_not_called()
+    del owner_b
+    close.assert_called_once_with("a")
+
+    # unhealthy clients are replaced, and closed right away when nothing holds them
+    registry.get_or_create("pgvector", _Config(host="b"), lambda: "b2", close=close)
+    close.assert_called_with("b")
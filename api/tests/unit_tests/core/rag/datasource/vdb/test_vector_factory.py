@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.models.document import Document
+
+
+def _make_documents(*doc_ids: str) -> list[Document]:
+    return [Document(page_content=f"content {doc_id}", metadata={"doc_id": doc_id}) for doc_id in doc_ids]
+
+
+def _make_vector(vector_processor) -> Vector:
+    vector = Vector.__new__(Vector)
+    vector._vector_processor = vector_processor
+    return vector
+
+
+def test_filter_duplicate_texts_checks_ids_in_bulk():
+    vector_processor = MagicMock()
+    vector_processor.get_existing_ids.return_value = {"b"}
+    vector = _make_vector(vector_processor)
+
+    documents = vector._filter_duplicate_texts(_make_documents("a", "b", "c"))
+
+    assert [document.metadata["doc_id"] for document in documents] == ["a", "c"]
+    vector_processor.get_existing_ids.assert_called_once_with(["a", "b", "c"])
+    vector_processor.text_exists.assert_not_called()
+
+
+def test_filter_duplicate_texts_batches_ids():
+    vector_processor = MagicMock()
+    vector_processor.get_existing_ids.side_effect = lambda ids: {ids[0]}
+    vector = _make_vector(vector_processor)
+
+    with patch.object(Vector, "_duplicate_check_batch_size", 2):
+        documents = vector._filter_duplicate_texts(_make_documents("a", "b", "c", "d", "e"))
+
+    assert [document.metadata["doc_id"] for document in documents] == ["b", "d"]
+    assert vector_processor.get_existing_ids.call_count == 3
+
+
+def test_base_vector_get_existing_ids_falls_back_to_text_exists():
+    with patch.multiple(BaseVector, __abstractmethods__=set()):
+        vector = BaseVector("collection")  # type: ignore[abstract]
+    with patch.object(vector, "text_exists", side_effect=lambda doc_id: doc_id == "b"):
+        assert vector.get_existing_ids(["a", "b"]) == {"b"}
+        documents = vector._filter_duplicate_texts(_make_documents("a", "b"))
+
+    assert [document.metadata["doc_id"] for document in documents] == ["a"]
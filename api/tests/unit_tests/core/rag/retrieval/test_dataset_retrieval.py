@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.retrieval.dataset_retrieval import DatasetRetrieval
+from core.rag.retrieval.retrieval_methods import RetrievalMethod
+
+
+def _make_dataset(
+    provider: str = "openai",
+    model: str = "text-embedding-3-small",
+    indexing_technique: str = "high_quality",
+    search_method: str = RetrievalMethod.SEMANTIC_SEARCH.value,
+) -> MagicMock:
+    dataset = MagicMock()
+    dataset.provider = "vendor"
+    dataset.indexing_technique = indexing_technique
+    dataset.embedding_model_provider = provider
+    dataset.embedding_model = model
+    dataset.retrieval_model = {"search_method": search_method}
+    return dataset
+
+
+def test_embed_query_once_per_embedding_model():
+    datasets = [
+        _make_dataset(),
+        _make_dataset(),
+        _make_dataset(search_method=RetrievalMethod.HYBRID_SEARCH.value),
+        _make_dataset(provider="cohere", model="embed-multilingual-v3.0"),
+    ]
+
+    with patch(
+        "core.rag.retrieval.dataset_retrieval.RetrievalService.embed_query", return_value=[0.1, 0.2]
+    ) as embed_query:
+        query_vectors = DatasetRetrieval()._embed_query_by_model("tenant-id", datasets, "query")
+
+    assert embed_query.call_count == 2
+    assert query_vectors == {
+        ("openai", "text-embedding-3-small"): [0.1, 0.2],
+        ("cohere", "embed-multilingual-v3.0"): [0.1, 0.2],
+    }
+
+
+def test_embed_query_skips_datasets_without_semantic_search():
+    datasets = [
+        _make_dataset(indexing_technique="economy"),
+        _make_dataset(search_method=RetrievalMethod.FULL_TEXT_SEARCH.value),
+    ]
+
+    with patch("core.rag.retrieval.dataset_retrieval.RetrievalService.embed_query") as embed_query:
+        query_vectors = DatasetRetrieval()._embed_query_by_model("tenant-id", datasets, "query")
+
+    embed_query.assert_not_called()
+    assert query_vectors == {}
+
+
+def test_embed_query_failure_falls_back_to_per_dataset_embedding():
+    with patch(
+        "core.rag.retrieval.dataset_retrieval.RetrievalService.embed_query", side_effect=ValueError("model error")
+    ):
+        query_vectors = DatasetRetrieval()._embed_query_by_model("tenant-id", [_make_dataset()], "query")
+
+    assert query_vectors == {}
@@ -0,0 +1,119 @@
+import re
+from unittest.mock import patch
+
+import pytest
+
+from core.rag.splitter.fixed_text_splitter import (
+    EnhanceRecursiveCharacterTextSplitter,
+    FixedRecursiveCharacterTextSplitter,
+)
+from core.rag.splitter.segment_splitter import create_segment_splitter
+from core.rag.splitter.span_text_splitter import SpanTextSplitter
+
+
+class _WordEncoder:
+    """
+    Encodes every word and every run of whitespace as one token.
+    """
+
+    def __init__(self):
+        self.batch_calls = 0
+
+    def encode_ordinary(self, text: str) -> list[str]:
+        return re.findall(r"\S+|\s+", text)
+
+    def encode_ordinary_batch(self, texts: list[str]) -> list[list[str]]:
+        self.batch_calls += 1
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode_with_offsets(self, tokens: list[str]) -> tuple[str, list[int]]:
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token)
+        return "".join(tokens), offsets
+
+
+def test_spans_point_into_original_text():
+    text = "first paragraph\n\nsecond paragraph is longer\n\n  \n\nthird"
+    splitter = SpanTextSplitter(chunk_size=20, chunk_overlap=0)
+
+    spans = splitter.split_spans(text)
+
+    assert [text[start:end] for start, end in spans] == splitter.split_text(text)
+    assert splitter.split_text(text) == ["first paragraph", "second paragraph is", "longer", "third"]
+
+
+def test_chunks_fit_character_budget():
+    text = " ".join(f"word{i}" for i in range(500))
+    splitter = SpanTextSplitter(fixed_separator="", chunk_size=50, chunk_overlap=10)
+
+    chunks = splitter.split_text(text)
+
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert chunks[0].startswith("word0 ")
+    assert chunks[-1].endswith("word499")
+    # consecutive chunks overlap
+    assert chunks[1].split()[0] in chunks[0].split()
+
+
+def test_text_without_separators_is_cut_into_windows():
+    text = "x" * 95
+    splitter = SpanTextSplitter(fixed_separator="", chunk_size=40, chunk_overlap=10)
+
+    assert splitter.split_spans(text) == [(0, 40), (30, 70), (60, 95)]
+
+
+def test_chunks_fit_token_budget():
+    encoder = _WordEncoder()
+    text = " ".join(f"w{i}" for i in range(100))
+    splitter = SpanTextSplitter(fixed_separator="", chunk_size=9, chunk_overlap=0, token_encoder=encoder)
+
+    chunks = splitter.split_text(text)
+
+    # pieces keep their trailing space, so 4 words fit in 9 tokens
+    assert chunks[0] == "w0 w1 w2 w3"
+    assert all(len(encoder.encode_ordinary(chunk)) <= 9 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_token_lengths_are_encoded_in_batches():
+    encoder = _WordEncoder()
+    text = "\n\n".join(f"paragraph {i}" for i in range(2500))
+    splitter = SpanTextSplitter(chunk_size=100, chunk_overlap=0, token_encoder=encoder)
+
+    chunks = splitter.split_text(text)
+
+    assert len(chunks) == 2500
+    assert encoder.batch_calls == 3
+
+
+def test_long_word_is_cut_at_token_boundaries():
+    encoder = _WordEncoder()
+    text = "a b c d e f g h i j"
+    splitter = SpanTextSplitter(
+        fixed_separator="", separators=["\n"], chunk_size=5, chunk_overlap=1, token_encoder=encoder
+    )
+
+    assert splitter.split_text(text) == ["a b c", "c d e", "e f g", "g h i", "i j"]
+
+
+@pytest.mark.parametrize(
+    ("token_aware", "fixed_separator", "splitter_class"),
+    [
+        (True, "\n", SpanTextSplitter),
+        (True, None, SpanTextSplitter),
+        (False, "\n", FixedRecursiveCharacterTextSplitter),
+        (False, None, EnhanceRecursiveCharacterTextSplitter),
+    ],
+)
+def test_create_segment_splitter(token_aware, fixed_separator, splitter_class):
+    with (
+        patch("core.rag.splitter.segment_splitter.dify_config.INDEXING_TOKEN_AWARE_SPLITTER_ENABLED", token_aware),
+        patch("core.rag.splitter.span_text_splitter.GPT2Tokenizer.get_encoder", return_value=_WordEncoder()),
+    ):
+        splitter = create_segment_splitter(
+            chunk_size=100, chunk_overlap=10, fixed_separator=fixed_separator, embedding_model_instance=None
+        )
+
+    assert type(splitter) is splitter_class
@@ -0,0 +1,101 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
+from core.repositories.node_execution_payload_store import NodeExecutionPayloadStore
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution, WorkflowNodeExecutionStatus
+from core.workflow.nodes.enums import NodeType
+from models.account import Account
+from models.workflow import WorkflowNodeExecutionModel, WorkflowNodeExecutionTriggeredFrom
+
+_CONFIG = "core.repositories.node_execution_payload_store.dify_config"
+
+
+@pytest.fixture
+def storage():
+    files: dict[str, bytes] = {}
+    storage = MagicMock()
+    storage.save.side_effect = files.__setitem__
+    storage.load_once.side_effect = files.__getitem__
+    storage.delete.side_effect = files.pop
+    storage.files = files
+    with (
+        patch("core.repositories.node_execution_payload_store.storage", storage),
+        patch(f"{_CONFIG}.WORKFLOW_NODE_PAYLOAD_OFFLOAD_ENABLED", True),
+        patch(f"{_CONFIG}.WORKFLOW_NODE_PAYLOAD_OFFLOAD_THRESHOLD", 1024),
+        patch(f"{_CONFIG}.WORKFLOW_NODE_PAYLOAD_PREVIEW_MAX_BYTES", 256),
+    ):
+        yield storage
+
+
+def test_offloads_large_payloads(storage):
+    store = NodeExecutionPayloadStore()
+    outputs = {"documents": [{"content": "x" * 200} for _ in range(50)]}
+
+    columns, offloaded_payloads = store.dump_payloads(
+        "tenant", "execution", {"inputs": {"query": "hi"}, "process_data": None, "outputs": outputs}
+    )
+
+    assert columns["inputs"] == json.dumps({"query": "hi"})
+    assert columns["process_data"] is None
+    assert len(columns["outputs"]) <= 256
+    references = json.loads(offloaded_payloads)
+    assert list(references) == ["outputs"]
+    assert references["outputs"]["key"] == "workflow_node_executions/tenant/execution/outputs.json"
+    assert store.load(references["outputs"]["key"]) == outputs
+
+    # saving the execution again doesn't upload the same payload again
+    store.dump_payloads("tenant", "execution", {"outputs": outputs})
+    assert storage.save.call_count == 1
+
+    store.delete([offloaded_payloads, None])
+    assert storage.files == {}
+
+
+@pytest.mark.parametrize("text", ["数据" * 150, "数据" * 200], ids=["kept", "offloaded"])
+def test_offloads_like_preview(storage, text):
+    store = NodeExecutionPayloadStore()
+    outputs = {"text": text}
+
+    _, offloaded_payloads = store.dump_payloads("tenant", "execution", {"outputs": outputs})
+    _, truncated = store.preview(outputs)
+
+    assert (offloaded_payloads is not None) == truncated
+
+
+def test_node_execution_loads_offloaded_payloads(storage):
+    user = Account()
+    user.id = "user"
+    user._current_tenant = MagicMock()
+    user._current_tenant.id = "tenant"
+    repository = SQLAlchemyWorkflowNodeExecutionRepository(
+        session_factory=sessionmaker(),
+        user=user,
+        app_id="app",
+        triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+    )
+    outputs = {"text": "y" * 5000}
+    execution = WorkflowNodeExecution(
+        id="execution",
+        workflow_id="workflow",
+        index=1,
+        node_id="llm",
+        node_type=NodeType.LLM,
+        title="LLM",
+        inputs={"query": "hi"},
+        outputs=outputs,
+        status=WorkflowNodeExecutionStatus.SUCCEEDED,
+        created_at=datetime.now(),
+    )
+
+    db_model = repository.to_db_model(execution)
+
+    assert isinstance(db_model, WorkflowNodeExecutionModel)
+    assert db_model.offloaded_fields == ["outputs"]
+    assert db_model.outputs_preview_dict["text"].endswith("...")
+    assert db_model.outputs_dict == outputs
+    assert db_model.inputs_dict == db_model.inputs_preview_dict == {"query": "hi"}
@@ -4,6 +4,7 @@ import pytest
 import redis
 
 from core.entities.provider_entities import ModelLoadBalancingConfiguration
+from core.model_load_balancing import local_load_balancing_state, weighted_position
 from core.model_manager import LBModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from extensions.ext_redis import redis_client
@@ -70,3 +71,132 @@ def test_lb_model_manager_fetch_next(mocker, lb_model_manager):
 
         config = lb_model_manager.fetch_next()
         assert config == config3
+
+
+def _manager(model: str = "gpt-4") -> LBModelManager:
+    return LBModelManager(
+        tenant_id="tenant_id",
+        provider="openai",
+        model_type=ModelType.LLM,
+        model=model,
+        load_balancing_configs=[
+            ModelLoadBalancingConfiguration(id=f"id{i}", name=f"config{i}", credentials={}) for i in range(1, 4)
+        ],
+    )
+
+
+@pytest.fixture
+def lb_redis():
+    local_load_balancing_state.clear()
+    client = MagicMock()
+    client.mget.return_value = [None, None, None]
+    with (
+        patch("core.model_manager.redis_client", client),
+        patch("core.model_load_balancing.redis_client", client),
+        patch("core.model_load_balancing._select_script", None),
+    ):
+        yield client
+    local_load_balancing_state.clear()
+
+
+def test_weighted_position():
+    assert [weighted_position(index, [2, 0, 1]) for index in range(6)] == [0, 0, 2, 0, 0, 2]
+    assert [weighted_position(index, [1, 1, 1]) for index in range(4)] == [0, 1, 2, 0]
+
+
+def test_lb_model_manager_fetch_next_with_script(lb_redis):
+    lb_redis.register_script.return_value.return_value = 2
+    with (
+        patch("core.model_manager.dify_config.MODEL_LB_SCRIPTED_SELECTION_ENABLED", True),
+        patch("core.model_manager.dify_config.REDIS_USE_CLUSTERS", False),
+        patch("core.model_load_balancing.dify_config.MODEL_LB_MODEL_STRATEGIES", "gpt-4:weighted"),
+        patch("core.model_load_balancing.dify_config.MODEL_LB_CONFIG_WEIGHTS", "config1:3"),
+    ):
+        manager = _manager()
+        assert manager.fetch_next() == manager._load_balancing_configs[1]
+
+        lb_redis.register_script.return_value.return_value = 0
+        assert manager.fetch_next() is None
+
+    # the script is registered once, then each selection is a single call
+    lb_redis.register_script.assert_called_once()
+    lb_redis.register_script.return_value.assert_called_with(
+        keys=[
+            "model_lb_index:tenant_id:openai:llm:gpt-4",
+            *[f"model_lb_index:cooldown:tenant_id:openai:llm:gpt-4:id{i}" for i in range(1, 4)],
+        ],
+        args=[10000000, 3600, 3, 1, 1],
+    )
+    lb_redis.incr.assert_not_called()
+    lb_redis.expire.assert_not_called()
+
+
+def test_lb_model_manager_fetch_next_locally(lb_redis):
+    lb_redis.mget.return_value = [None, b"true", None]
+    with (
+        patch("core.model_manager.dify_config.MODEL_LB_LOCAL_ALLOCATION_ENABLED", True),
+        patch("core.model_load_balancing.dify_config.MODEL_LB_LOCAL_TIME_SLICE_MS", 60000),
+    ):
+        manager = _manager()
+        ids = [manager.fetch_next().id for _ in range(4)]  # type: ignore[union-attr]
+
+        # a cooldown of this process applies right away
+        manager.cooldown(manager._load_balancing_configs[2])
+        assert manager.fetch_next().id == "id1"  # type: ignore[union-attr]
+
+    assert "id2" not in ids
+    assert set(ids) == {"id1", "id3"}
+    # the cooldowns are read once per time slice
+    lb_redis.mget.assert_called_once()
+    lb_redis.incr.assert_not_called()
+
+
+def test_lb_model_manager_fetch_next_by_stats(lb_redis):
+    with patch(
+        "core.model_load_balancing.dify_config.MODEL_LB_MODEL_STRATEGIES", "gpt-4:least_error,gpt-4-turbo:latency"
+    ):
+        manager = _manager()
+        manager.cooldown(manager._load_balancing_configs[0])
+        manager.cooldown(manager._load_balancing_configs[1])
+        manager.cooldown(manager._load_balancing_configs[1])
+        assert not manager.measures_latency
+        assert manager.fetch_next().id == "id3"  # type: ignore[union-attr]
+
+        manager = _manager("gpt-4-turbo")
+        configs = manager._load_balancing_configs
+        assert manager.measures_latency
+        # configs without a recent latency are tried first
+        manager.record_latency(configs[0], 0.5)
+        manager.record_latency(configs[1], 0.2)
+        assert manager.fetch_next() == configs[2]
+
+        manager.record_latency(configs[2], 0.9)
+        assert manager.fetch_next() == configs[1]
+
+        lb_redis.mget.return_value = [None, b"true", None]
+        assert manager.fetch_next() == configs[0]
+
+
+def test_lb_model_manager_fetch_next_ignores_zero_weights(lb_redis):
+    index = 0
+
+    def incr(key):
+        nonlocal index
+        index += 1
+        return index
+
+    lb_redis.incr.side_effect = incr
+    with (
+        patch("core.model_manager.dify_config.MODEL_LB_LOCAL_ALLOCATION_ENABLED", False),
+        patch("core.model_manager.dify_config.MODEL_LB_SCRIPTED_SELECTION_ENABLED", False),
+        patch("core.model_load_balancing.dify_config.MODEL_LB_MODEL_STRATEGIES", "gpt-4:weighted"),
+        patch("core.model_load_balancing.dify_config.MODEL_LB_CONFIG_WEIGHTS", "config1:1,config2:1,config3:0"),
+    ):
+        manager = _manager()
+        manager.in_cooldown = MagicMock(side_effect=lambda config: config.id in {"id1", "id2"})  # type: ignore[method-assign]
+
+        # config3 weighs 1 instead of 0, so the round-robin reaches it rather than looping forever
+        assert manager.fetch_next() == manager._load_balancing_configs[2]
+
+        manager.in_cooldown = MagicMock(return_value=True)  # type: ignore[method-assign]
+        assert manager.fetch_next() is None
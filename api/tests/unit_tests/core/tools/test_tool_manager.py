@@ -0,0 +1,38 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from core.tools.tool_manager import ToolManager
+
+API_ROOT = Path(__file__).resolve().parents[4]
+
+
+def test_tool_manager_import_is_lazy():
+    """
+    Importing the tool manager in a fresh interpreter must not load the builtin tool providers
+    or the heavy libraries of the document extractors.
+    """
+    script = """
+import json, sys
+from core.tools.tool_manager import ToolManager
+print(json.dumps({
+    "providers_loaded": ToolManager._builtin_providers_loaded,
+    "heavy_modules": [name for name in ("pandas", "docx", "pypdfium2") if name in sys.modules],
+}))
+"""
+    process = subprocess.run(
+        [sys.executable, "-c", script], cwd=API_ROOT, capture_output=True, text=True, timeout=300, check=True
+    )
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+
+    assert result["providers_loaded"] is False
+    assert result["heavy_modules"] == []
+
+
+def test_builtin_providers_are_loaded_on_first_use():
+    ToolManager.clear_hardcoded_providers_cache()
+    provider = ToolManager.get_hardcoded_provider("time")
+
+    assert provider.entity.identity.name == "time"
+    assert ToolManager._builtin_providers_loaded
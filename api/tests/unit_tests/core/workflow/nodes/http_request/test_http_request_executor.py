@@ -1,3 +1,6 @@
+import httpx
+import pytest
+
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.nodes.http_request import (
     BodyData,
@@ -6,6 +9,7 @@ from core.workflow.nodes.http_request import (
     HttpRequestNodeData,
 )
 from core.workflow.nodes.http_request.entities import HttpRequestNodeTimeout
+from core.workflow.nodes.http_request.exc import ResponseSizeError
 from core.workflow.nodes.http_request.executor import Executor
 from core.workflow.system_variable import SystemVariable
 
@@ -348,3 +352,89 @@ def test_init_params():
     executor = create_executor("key1:value1\n\nkey2:value2\n\n")
     executor._init_params()
     assert executor.params == [("key1", "value1"), ("key2", "value2")]
+
+
+def _streaming_executor(monkeypatch, handler, threshold: int = 16) -> Executor:
+    monkeypatch.setattr(
+        "core.workflow.nodes.http_request.executor.dify_config.HTTP_REQUEST_NODE_STREAMING_ENABLED", True
+    )
+    monkeypatch.setattr(
+        "core.workflow.nodes.http_request.executor.dify_config.HTTP_REQUEST_NODE_STREAMING_THRESHOLD", threshold
+    )
+    monkeypatch.setattr(
+        "core.helper.ssrf_proxy._create_client",
+        lambda ssl_verify: httpx.Client(transport=httpx.MockTransport(handler)),
+    )
+    node_data = HttpRequestNodeData(
+        title="Test streaming",
+        method="get",
+        url="https://api.example.com/export",
+        authorization=HttpRequestNodeAuthorization(type="no-auth"),
+        headers="",
+        params="",
+    )
+    return Executor(
+        node_data=node_data,
+        timeout=HttpRequestNodeTimeout(connect=10, read=30, write=30),
+        variable_pool=VariablePool(system_variables=SystemVariable.empty(), user_inputs={}),
+        max_retries=0,
+    )
+
+
+def test_streaming_keeps_small_bodies_in_memory(monkeypatch):
+    executor = _streaming_executor(monkeypatch, lambda request: httpx.Response(200, json={"ok": True}))
+
+    response = executor.invoke()
+
+    assert response.body_file is None
+    assert response.text == '{"ok": true}'
+    assert response.size == len(response.text)
+
+
+def test_streaming_spools_large_files(monkeypatch):
+    body = bytes(range(256)) * 4
+    executor = _streaming_executor(
+        monkeypatch,
+        lambda request: httpx.Response(200, headers={"Content-Type": "application/pdf"}, stream=httpx.ByteStream(body)),
+    )
+
+    response = executor.invoke()
+
+    assert response.is_file
+    assert response.size == len(body)
+    assert response.body_file is not None
+    assert response.body_file.read() == body
+
+
+def test_streaming_decodes_large_text_incrementally(monkeypatch):
+    text = "数据" * 100
+    executor = _streaming_executor(
+        monkeypatch,
+        lambda request: httpx.Response(
+            200, headers={"Content-Type": "text/plain; charset=utf-8"}, content=text.encode()
+        ),
+    )
+
+    response = executor.invoke()
+
+    assert response.body_file is None
+    assert response.text == text
+
+
+def test_streaming_stops_reading_oversized_bodies(monkeypatch):
+    monkeypatch.setattr("core.workflow.nodes.http_request.executor.dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE", 100)
+    sent = []
+
+    def chunks():
+        for _ in range(10000):
+            sent.append(1)
+            yield b"\x00" * 64
+
+    executor = _streaming_executor(
+        monkeypatch,
+        lambda request: httpx.Response(200, headers={"Content-Type": "image/png"}, content=chunks()),
+    )
+
+    with pytest.raises(ResponseSizeError):
+        executor.invoke()
+    assert len(sent) < 10000
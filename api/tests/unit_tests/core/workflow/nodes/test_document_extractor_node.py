@@ -12,13 +12,16 @@ from core.variables.variables import StringVariable
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecutionStatus
 from core.workflow.nodes.document_extractor import DocumentExtractorNode, DocumentExtractorNodeData
+from core.workflow.nodes.document_extractor.extraction_cache import extraction_cache
 from core.workflow.nodes.document_extractor.node import (
     _extract_text_from_docx,
     _extract_text_from_excel,
+    _extract_text_from_file,
     _extract_text_from_pdf,
     _extract_text_from_plain_text,
 )
 from core.workflow.nodes.enums import NodeType
+from tests.unit_tests.conftest import redis_mock
 
 
 @pytest.fixture
@@ -369,3 +372,74 @@ def test_extract_text_from_excel_numeric_type_column(mock_excel_file):
     expected_manual = "| 1.0 | 1.1 |\n| --- | --- |\n| Test | Test |\n\n"
 
     assert expected_manual == result
+
+
+def _cached_redis():
+    entries = {}
+    return (
+        patch.object(redis_mock, "get", side_effect=lambda key: entries.get(key)),
+        patch.object(redis_mock, "setex", side_effect=lambda key, ttl, value: entries.__setitem__(key, value)),
+    )
+
+
+def test_extract_text_from_uploaded_file_is_cached_by_file_id(monkeypatch):
+    monkeypatch.setattr(
+        "core.workflow.nodes.document_extractor.node.dify_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED", True
+    )
+    file = File(
+        id="file-1",
+        tenant_id="tenant-1",
+        type="document",
+        transfer_method=FileTransferMethod.LOCAL_FILE,
+        related_id="upload-1",
+        extension=".txt",
+        storage_key="",
+    )
+    download = Mock(return_value=b"Hello, world!")
+    monkeypatch.setattr("core.file.file_manager.download", download)
+    get, setex = _cached_redis()
+
+    with get, setex:
+        assert _extract_text_from_file(file) == "Hello, world!"
+        assert _extract_text_from_file(file) == "Hello, world!"
+
+    # the cached text is found without downloading the file again
+    download.assert_called_once()
+
+
+def test_extract_text_from_remote_file_is_cached_by_content(monkeypatch):
+    monkeypatch.setattr(
+        "core.workflow.nodes.document_extractor.node.dify_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED", True
+    )
+    file = File(
+        tenant_id="tenant-1",
+        type="document",
+        transfer_method=FileTransferMethod.REMOTE_URL,
+        remote_url="https://example.com/notes.txt",
+        extension=".txt",
+        storage_key="",
+    )
+    monkeypatch.setattr("core.helper.ssrf_proxy.get", Mock(return_value=Mock(content=b"Hello, world!")))
+    parse = Mock(side_effect=_extract_text_from_plain_text)
+    monkeypatch.setattr("core.workflow.nodes.document_extractor.node._extract_text_from_plain_text", parse)
+    get, setex = _cached_redis()
+
+    with get, setex:
+        assert _extract_text_from_file(file) == "Hello, world!"
+        assert _extract_text_from_file(file) == "Hello, world!"
+
+    parse.assert_called_once()
+
+
+def test_extract_text_too_large_to_cache(monkeypatch):
+    monkeypatch.setattr(
+        "core.workflow.nodes.document_extractor.node.dify_config.DOCUMENT_EXTRACTOR_CACHE_ENABLED", True
+    )
+    monkeypatch.setattr(
+        "core.workflow.nodes.document_extractor.extraction_cache.dify_config.DOCUMENT_EXTRACTOR_CACHE_MAX_SIZE", 8
+    )
+
+    with patch.object(redis_mock, "setex") as setex:
+        extraction_cache.set("key", "text compressed to more than 8 bytes")
+
+    setex.assert_not_called()
@@ -0,0 +1,22 @@
+from core.workflow.utils.payload_truncation import TRUNCATION_MARKER, payload_size, truncate_payload
+
+
+def test_small_payloads_are_kept():
+    payload = {"text": "hello", "items": [1, 2, 3]}
+    assert truncate_payload(payload, 1024) == (payload, False)
+    assert truncate_payload({"text": "x" * 10_000}, 0) == ({"text": "x" * 10_000}, False)
+    assert truncate_payload(None, 10) == (None, False)
+
+
+def test_large_payloads_keep_their_shape():
+    payload = {"text": "x" * 100_000, "documents": [{"content": "y" * 500, "score": 0.5}] * 1000, "count": 1000}
+
+    preview, truncated = truncate_payload(payload, 4096)
+
+    assert truncated
+    assert payload_size(preview) <= 4096
+    assert set(preview) == {"text", "documents", "count"}
+    assert preview["count"] == 1000
+    assert preview["text"].endswith(TRUNCATION_MARKER)
+    assert preview["documents"][-1] == TRUNCATION_MARKER
+    assert preview["documents"][0]["score"] == 0.5
@@ -0,0 +1,25 @@
+from unittest.mock import MagicMock, patch
+
+from gevent.events import EventLoopBlocked
+
+from extensions import ext_gevent_monitor
+
+
+def test_logs_blocked_event_loop():
+    event = EventLoopBlocked(MagicMock(), 0.5, ["File 'node.py', line 10", "  parse()"])
+    with patch.object(ext_gevent_monitor, "logger") as logger:
+        ext_gevent_monitor._log_event_loop_blocked(event)
+        ext_gevent_monitor._log_event_loop_blocked(object())
+
+    logger.warning.assert_called_once()
+    assert "parse()" in logger.warning.call_args.args[-1]
+
+
+def test_skips_when_not_monkey_patched():
+    with (
+        patch("gevent.monkey.is_module_patched", return_value=False),
+        patch("gevent.get_hub") as get_hub,
+    ):
+        ext_gevent_monitor.init_app(MagicMock())
+
+    get_hub.assert_not_called()
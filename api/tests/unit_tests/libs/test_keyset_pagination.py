@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import DateTime, String, create_engine, select
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from libs.keyset_pagination import (
+    CountMode,
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_cursor,
+    paginate,
+)
+from tests.unit_tests.conftest import redis_mock
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Log(Base):
+    __tablename__ = "logs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+
+START = datetime(2025, 8, 1)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # two logs per timestamp, so that pages have to break ties by id
+        session.add_all(Log(id=f"log-{i:02d}", created_at=START + timedelta(minutes=i // 2)) for i in range(7))
+        session.commit()
+        yield session
+
+
+def _ids(pagination):
+    return [log.id for log in pagination.items]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(START, "log-01")
+
+    assert decode_cursor(cursor) == (START, "log-01")
+    assert keyset_cursor(cursor) == cursor
+    with pytest.raises(InvalidCursorError):
+        keyset_cursor("not-a-cursor")
+
+
+def test_walks_pages_by_cursor(session):
+    stmt = select(Log)
+    pages = []
+    cursor = None
+    while True:
+        pagination = paginate(
+            session,
+            stmt,
+            sort_column=Log.created_at,
+            id_column=Log.id,
+            limit=3,
+            cursor=cursor,
+            count_scope="test",
+            count_mode=CountMode.EXACT,
+        )
+        pages.append(_ids(pagination))
+        assert pagination.total == 7
+        if not pagination.has_next:
+            assert pagination.next_cursor is None
+            break
+        cursor = pagination.next_cursor
+
+    assert pages == [["log-06", "log-05", "log-04"], ["log-03", "log-02", "log-01"], ["log-00"]]
+
+
+def test_page_numbers_still_work(session):
+    pagination = paginate(
+        session,
+        select(Log),
+        sort_column=Log.created_at,
+        id_column=Log.id,
+        descending=False,
+        page=2,
+        limit=3,
+        count_scope="test",
+        count_mode=CountMode.EXACT,
+    )
+
+    assert _ids(pagination) == ["log-03", "log-04", "log-05"]
+    assert pagination.page == 2
+    assert pagination.has_next
+    # the cursor of a page fetched by number leads to the next page
+    next_page = paginate(
+        session,
+        select(Log),
+        sort_column=Log.created_at,
+        id_column=Log.id,
+        descending=False,
+        limit=3,
+        cursor=pagination.next_cursor,
+        count_scope="test",
+        count_mode=CountMode.EXACT,
+    )
+    assert _ids(next_page) == ["log-06"]
+
+
+def test_cached_count(session):
+    with (
+        patch.object(redis_mock, "get", side_effect=[None, b"7"]),
+        patch.object(redis_mock, "setex") as setex,
+        patch.object(session, "scalar", wraps=session.scalar) as scalar,
+    ):
+        for _ in range(2):
+            pagination = paginate(
+                session,
+                select(Log),
+                sort_column=Log.created_at,
+                id_column=Log.id,
+                limit=3,
+                count_scope="test",
+                count_mode=CountMode.CACHED,
+            )
+            assert pagination.total == 7
+
+    scalar.assert_called_once()
+    cache_key, ttl, total = setex.call_args.args
+    assert cache_key.startswith("app_log_count:test:")
+    assert total == 7
+
+
+def test_estimated_count(session):
+    def _paginate(page: int):
+        return paginate(
+            session,
+            select(Log),
+            sort_column=Log.created_at,
+            id_column=Log.id,
+            page=page,
+            limit=3,
+            count_scope="test",
+            count_mode=CountMode.ESTIMATED,
+        )
+
+    with (
+        patch("libs.keyset_pagination.dify_config.APP_LOG_EXACT_COUNT_THRESHOLD", 5),
+        patch("libs.keyset_pagination._estimate_count", return_value=5),
+    ):
+        assert _paginate(1).total == 5
+        # a stale estimate never hides the rows already seen
+        assert _paginate(2).total == 7
+
+    with (
+        patch("libs.keyset_pagination.dify_config.APP_LOG_EXACT_COUNT_THRESHOLD", 100),
+        patch("libs.keyset_pagination._estimate_count", return_value=5),
+    ):
+        # small listings are counted exactly
+        assert _paginate(1).total == 7
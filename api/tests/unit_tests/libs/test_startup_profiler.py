@@ -0,0 +1,27 @@
+from libs.startup_profiler import StartupProfile, parse_import_times
+
+IMPORT_TIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2000 |       2500 |     pandas.core
+import time:      3000 |       5500 |   pandas
+Traceback lines and logs are ignored
+import time:       500 |       6000 | core.rag.extractor
+"""
+
+
+def test_parse_import_times():
+    modules = parse_import_times(IMPORT_TIME_OUTPUT)
+
+    assert [(module.name, module.self_us, module.cumulative_us) for module in modules] == [
+        ("_io", 120, 120),
+        ("pandas.core", 2000, 2500),
+        ("pandas", 3000, 5500),
+        ("core.rag.extractor", 500, 6000),
+    ]
+
+
+def test_profile_aggregates_packages():
+    profile = StartupProfile(total=1.0, extension_init_times={}, imports=parse_import_times(IMPORT_TIME_OUTPUT))
+
+    assert profile.top_packages(2) == [("pandas", 5000), ("core", 500)]
+    assert [module.name for module in profile.top_modules(1)] == ["pandas"]
@@ -0,0 +1,116 @@
+from unittest.mock import patch
+
+import pytest
+
+from extensions.storage.cached_storage import CachedStorage
+from extensions.storage.opendal_storage import OpenDALStorage
+
+
+class TestCachedStorage:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, tmp_path):
+        """Executed before each test method."""
+        self.backend = OpenDALStorage(scheme="fs", root=str(tmp_path / "bucket"))
+        self.cache_dir = tmp_path / "cache"
+        self.storage = CachedStorage(
+            self.backend, cache_dir=str(self.cache_dir), max_bytes=10, max_object_bytes=8, key_prefixes=[""]
+        )
+
+    def test_load_once_reads_through(self):
+        self.backend.save("a.txt", b"abc")
+
+        assert self.storage.load_once("a.txt") == b"abc"
+        with patch.object(self.backend, "load_once") as backend_load:
+            assert self.storage.load_once("a.txt") == b"abc"
+        backend_load.assert_not_called()
+
+        stats = self.storage.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes"] == 3
+
+    def test_save_writes_through(self):
+        self.storage.save("a.txt", b"abc")
+
+        assert self.backend.load_once("a.txt") == b"abc"
+        with patch.object(self.backend, "load_once") as backend_load:
+            assert self.storage.load_once("a.txt") == b"abc"
+        backend_load.assert_not_called()
+
+    def test_delete_invalidates(self):
+        self.storage.save("a.txt", b"abc")
+        self.storage.delete("a.txt")
+
+        assert not self.storage.exists("a.txt")
+        assert self.storage.stats()["entries"] == 0
+        with pytest.raises(FileNotFoundError):
+            self.storage.load_once("a.txt")
+
+    def test_deletes_of_other_processes_and_failed_deletes(self):
+        self.storage.save("a.txt", b"abc")
+        # deleted by another process sharing the cache directory
+        self.backend.delete("a.txt")
+        assert not self.storage.exists("a.txt")
+
+        self.storage.save("b.txt", b"abc")
+        with patch.object(self.backend, "delete", side_effect=OSError), pytest.raises(OSError):
+            self.storage.delete("b.txt")
+        assert self.storage.stats()["entries"] == 2
+        with patch.object(self.backend, "load_once") as backend_load:
+            assert self.storage.load_once("b.txt") == b"abc"
+        backend_load.assert_not_called()
+
+    def test_lru_eviction_within_budget(self):
+        self.storage.save("a.txt", b"aaaa")
+        self.storage.save("b.txt", b"bbbb")
+        # touch a.txt so b.txt becomes the least recently used entry
+        self.storage.load_once("a.txt")
+        self.storage.save("c.txt", b"cccc")
+
+        stats = self.storage.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] == 8
+        with patch.object(self.backend, "load_once", wraps=self.backend.load_once) as backend_load:
+            self.storage.load_once("a.txt")
+            self.storage.load_once("b.txt")
+        backend_load.assert_called_once_with("b.txt")
+
+    def test_large_objects_bypass_cache(self):
+        self.storage.save("big.txt", b"x" * 9)
+
+        assert self.storage.stats()["entries"] == 0
+        assert self.storage.load_once("big.txt") == b"x" * 9
+
+    def test_load_stream_and_download_from_cache(self, tmp_path):
+        self.storage.save("a.txt", b"abc")
+
+        with patch.object(self.backend, "load_stream") as backend_stream:
+            assert b"".join(self.storage.load_stream("a.txt")) == b"abc"
+        backend_stream.assert_not_called()
+
+        target = tmp_path / "download.txt"
+        self.storage.download("a.txt", str(target))
+        assert target.read_bytes() == b"abc"
+
+    def test_index_is_rebuilt_from_disk(self):
+        self.storage.save("a.txt", b"abc")
+
+        storage = CachedStorage(
+            self.backend, cache_dir=str(self.cache_dir), max_bytes=10, max_object_bytes=8, key_prefixes=[""]
+        )
+        with patch.object(self.backend, "load_once") as backend_load:
+            assert storage.load_once("a.txt") == b"abc"
+        backend_load.assert_not_called()
+
+    def test_only_keys_under_the_prefixes_are_cached(self):
+        storage = CachedStorage(
+            self.backend, cache_dir=str(self.cache_dir), max_bytes=10, max_object_bytes=8, key_prefixes=["uploads/"]
+        )
+        storage.save("uploads/a.txt", b"abc")
+        storage.save("privkeys/key.pem", b"abc")
+        # rewritten by another process, the local copy would be stale
+        self.backend.save("privkeys/key.pem", b"def")
+
+        assert storage.stats()["entries"] == 1
+        assert storage.load_once("privkeys/key.pem") == b"def"
+        assert b"".join(storage.load_stream("privkeys/key.pem")) == b"def"
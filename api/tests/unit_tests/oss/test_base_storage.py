@@ -0,0 +1,23 @@
+import io
+from unittest.mock import MagicMock
+
+from extensions.storage.base_storage import BaseStorage, IterableReader
+
+
+def test_iterable_reader_reads_across_chunks():
+    reader = IterableReader([b"ab", b"", b"cdef", b"g"])
+
+    assert reader.read(3) == b"abc"
+    assert reader.read(2) == b"de"
+    assert io.BufferedReader(reader).read() == b"fg"
+    assert reader.read(1) == b""
+
+
+def test_default_save_stream_joins_chunks():
+    class _Storage(BaseStorage):
+        save = MagicMock()
+        load_once = load_stream = download = exists = delete = MagicMock()
+
+    _Storage().save_stream("a.txt", iter([b"ab", b"c"]))
+
+    _Storage.save.assert_called_once_with("a.txt", b"abc")
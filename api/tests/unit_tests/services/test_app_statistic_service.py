@@ -0,0 +1,154 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call, patch
+
+import pytz
+
+from services.app_statistic_service import AppStatisticService, RollupWindow
+from tests.unit_tests.conftest import redis_mock
+
+
+def _rolled_up(rolled_up_from: str, rolled_up_until: str):
+    return patch.object(redis_mock, "mget", return_value=[rolled_up_from.encode(), rolled_up_until.encode()])
+
+
+class TestGetRollupWindow:
+    def test_no_window_before_first_rollup(self):
+        with patch.object(redis_mock, "mget", return_value=[None, None]):
+            assert AppStatisticService.get_rollup_window(None, None, "UTC") is None
+
+    def test_window_covers_whole_hours_of_range(self):
+        start = pytz.utc.localize(datetime(2025, 8, 1, 10, 30))
+        end = pytz.utc.localize(datetime(2025, 8, 5, 12, 15))
+        with _rolled_up("2025-07-01T00:00:00", "2025-08-10T00:00:00"):
+            window = AppStatisticService.get_rollup_window(start, end, "UTC")
+
+        assert window == RollupWindow(start=datetime(2025, 8, 1, 11), end=datetime(2025, 8, 5, 12))
+
+    def test_window_ends_at_rolled_up_hour(self):
+        with _rolled_up("2025-07-01T00:00:00", "2025-08-10T09:00:00"):
+            window = AppStatisticService.get_rollup_window(None, None, "Asia/Shanghai")
+
+        assert window == RollupWindow(start=datetime(2025, 7, 1), end=datetime(2025, 8, 10, 9))
+
+    def test_no_window_outside_rolled_up_range(self):
+        start = pytz.utc.localize(datetime(2025, 8, 10, 9, 30))
+        with _rolled_up("2025-07-01T00:00:00", "2025-08-10T09:00:00"):
+            assert AppStatisticService.get_rollup_window(start, None, "UTC") is None
+
+    def test_no_window_for_timezone_with_partial_hour_offset(self):
+        with _rolled_up("2025-07-01T00:00:00", "2025-08-10T09:00:00"):
+            assert AppStatisticService.get_rollup_window(None, None, "Asia/Kolkata") is None
+
+
+class TestCombineDaily:
+    def test_adds_rollups_to_raw_rows(self):
+        raw_rows = [
+            SimpleNamespace(date="2025-08-02", message_count=3, total_price=Decimal("0.5")),
+            SimpleNamespace(date="2025-08-03", message_count=1, total_price=None),
+        ]
+        rollups = {
+            "2025-08-01": {"message_count": 10, "total_price": Decimal("1.0")},
+            "2025-08-02": {"message_count": 5, "total_price": Decimal("0.25")},
+        }
+
+        days = AppStatisticService.combine_daily(raw_rows, rollups, ["message_count", "total_price"])
+
+        assert days == [
+            ("2025-08-01", {"message_count": 10, "total_price": Decimal("1.0")}),
+            ("2025-08-02", {"message_count": 8, "total_price": Decimal("0.75")}),
+            ("2025-08-03", {"message_count": 1, "total_price": 0}),
+        ]
+
+    def test_raw_condition_excludes_window(self):
+        window = RollupWindow(start=datetime(2025, 8, 1), end=datetime(2025, 8, 2))
+
+        assert AppStatisticService.raw_condition(None) == ""
+        assert AppStatisticService.raw_condition(window, "m.created_at") == (
+            " AND (m.created_at < :rollup_start OR m.created_at >= :rollup_end)"
+        )
+        assert AppStatisticService.raw_params(window) == {"rollup_start": window.start, "rollup_end": window.end}
+
+
+class TestRollUp:
+    @patch("services.app_statistic_service.datetime")
+    def test_first_run_backfills_by_day(self, mock_datetime):
+        mock_datetime.now.return_value = pytz.utc.localize(datetime(2025, 8, 10, 9, 42))
+        with (
+            patch("services.app_statistic_service.dify_config.APP_STATISTIC_ROLLUP_BACKFILL_DAYS", 2),
+            patch.object(redis_mock, "mget", return_value=[None, None]),
+            patch.object(redis_mock, "set") as redis_set,
+            patch.object(AppStatisticService, "recompute") as recompute,
+        ):
+            AppStatisticService.roll_up()
+
+        assert recompute.call_args_list == [
+            call(datetime(2025, 8, 8, 9), datetime(2025, 8, 9, 9)),
+            call(datetime(2025, 8, 9, 9), datetime(2025, 8, 10, 9)),
+        ]
+        redis_set.assert_any_call("app_statistic_rollup:from", "2025-08-08T09:00:00")
+        redis_set.assert_any_call("app_statistic_rollup:until", "2025-08-10T09:00:00")
+
+    @patch("services.app_statistic_service.datetime")
+    def test_later_runs_recompute_lookback(self, mock_datetime):
+        mock_datetime.now.return_value = pytz.utc.localize(datetime(2025, 8, 10, 9, 42))
+        mock_datetime.fromisoformat = datetime.fromisoformat
+        with (
+            patch("services.app_statistic_service.dify_config.APP_STATISTIC_ROLLUP_LOOKBACK_HOURS", 3),
+            _rolled_up("2025-07-01T00:00:00", "2025-08-10T08:00:00"),
+            patch.object(redis_mock, "set") as redis_set,
+            patch.object(AppStatisticService, "recompute") as recompute,
+        ):
+            AppStatisticService.roll_up()
+
+        recompute.assert_called_once_with(datetime(2025, 8, 10, 6), datetime(2025, 8, 10, 9))
+        redis_set.assert_any_call("app_statistic_rollup:from", "2025-07-01T00:00:00")
+
+    @patch("services.app_statistic_service.datetime")
+    def test_recomputes_stale_hours_before_lookback(self, mock_datetime):
+        mock_datetime.now.return_value = pytz.utc.localize(datetime(2025, 8, 10, 9, 42))
+        mock_datetime.fromisoformat = datetime.fromisoformat
+        stale_hours = [
+            b"2025-08-01T11:00:00",
+            b"2025-08-01T10:00:00",
+            b"2025-08-03T05:00:00",
+            # before the rolled up range, and within the lookback
+            b"2025-06-01T00:00:00",
+            b"2025-08-10T07:00:00",
+        ]
+        with (
+            patch("services.app_statistic_service.dify_config.APP_STATISTIC_ROLLUP_LOOKBACK_HOURS", 3),
+            _rolled_up("2025-07-01T00:00:00", "2025-08-10T08:00:00"),
+            patch.object(redis_mock, "set"),
+            patch.object(redis_mock, "scard", return_value=len(stale_hours)),
+            patch.object(redis_mock, "spop", return_value=stale_hours) as spop,
+            patch.object(AppStatisticService, "recompute") as recompute,
+        ):
+            AppStatisticService.roll_up()
+
+        spop.assert_called_once_with("app_statistic_rollup:stale_hours", 5)
+        assert recompute.call_args_list == [
+            call(datetime(2025, 8, 10, 6), datetime(2025, 8, 10, 9)),
+            call(datetime(2025, 8, 1, 10), datetime(2025, 8, 1, 12)),
+            call(datetime(2025, 8, 3, 5), datetime(2025, 8, 3, 6)),
+        ]
+
+    def test_mark_stale_adds_the_hours(self):
+        with patch.object(redis_mock, "sadd") as sadd:
+            AppStatisticService.mark_stale([datetime(2025, 8, 1, 10, 5), datetime(2025, 8, 1, 10, 55)])
+            AppStatisticService.mark_stale([])
+
+        sadd.assert_called_once_with("app_statistic_rollup:stale_hours", "2025-08-01T10:00:00")
+
+    def test_skips_when_another_run_holds_the_lock(self):
+        lock = MagicMock()
+        lock.acquire.return_value = False
+        with (
+            patch.object(redis_mock, "lock", return_value=lock),
+            patch.object(AppStatisticService, "recompute") as recompute,
+        ):
+            AppStatisticService.roll_up()
+
+        recompute.assert_not_called()
+        lock.release.assert_not_called()
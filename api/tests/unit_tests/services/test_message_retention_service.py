@@ -0,0 +1,122 @@
+import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.message_retention_service import MESSAGE_RELATED_MODELS, MessageRetentionService
+
+BEFORE = datetime.datetime(2025, 1, 1)
+
+
+def _message(index: int, app_id: str = "app-1"):
+    return SimpleNamespace(id=f"msg-{index}", app_id=app_id, created_at=BEFORE - datetime.timedelta(minutes=index))
+
+
+@pytest.fixture
+def mock_db():
+    with patch("services.message_retention_service.db") as mock_db:
+        yield mock_db
+
+
+@pytest.fixture
+def tenant_plans():
+    plans = {"tenant-sandbox": "sandbox", "tenant-pro": "professional"}
+    with patch.object(MessageRetentionService, "_get_tenant_plan", side_effect=plans.__getitem__) as get_tenant_plan:
+        yield get_tenant_plan
+
+
+def _setup_apps(mock_db, app_tenants: dict[str, str]):
+    mock_db.session.execute.return_value.all.return_value = list(app_tenants.items())
+
+
+class TestCleanExpiredMessages:
+    def test_walks_batches_by_keyset(self, mock_db, tenant_plans):
+        batches = [[_message(0), _message(1)], [_message(2)]]
+        _setup_apps(mock_db, {"app-1": "tenant-sandbox"})
+        with (
+            patch.object(MessageRetentionService, "_fetch_batch", side_effect=batches) as fetch_batch,
+            patch.object(MessageRetentionService, "_delete_messages", return_value={"messages": 1}) as delete,
+        ):
+            result = MessageRetentionService.clean_expired_messages(BEFORE, batch_size=2)
+
+        assert fetch_batch.call_args_list[0].args == (BEFORE, None, 2)
+        assert fetch_batch.call_args_list[1].args == (BEFORE, (batches[0][1].created_at, "msg-1"), 2)
+        # the second batch is not full, so there is nothing left to fetch
+        assert fetch_batch.call_count == 2
+        assert [c.args[0] for c in delete.call_args_list] == [["msg-0", "msg-1"], ["msg-2"]]
+        assert result.batches == 2
+        assert result.scanned_messages == 3
+        assert result.deleted == {"messages": 2}
+        # plans are looked up once per tenant
+        tenant_plans.assert_called_once_with("tenant-sandbox")
+
+    def test_only_sandbox_messages_are_deleted(self, mock_db, tenant_plans):
+        batch = [_message(0, "app-1"), _message(1, "app-2"), _message(2, "app-missing")]
+        _setup_apps(mock_db, {"app-1": "tenant-sandbox", "app-2": "tenant-pro"})
+        with (
+            patch.object(MessageRetentionService, "_fetch_batch", side_effect=[batch]),
+            patch.object(MessageRetentionService, "_delete_messages", return_value={}) as delete,
+            patch("services.message_retention_service.AppStatisticService.mark_stale") as mark_stale,
+        ):
+            MessageRetentionService.clean_expired_messages(BEFORE, batch_size=10)
+
+        delete.assert_called_once_with(["msg-0"])
+        # the statistics of the hours of deleted messages are rolled up again
+        assert list(mark_stale.call_args.args[0]) == [batch[0].created_at]
+
+    def test_dry_run_counts_without_deleting(self, mock_db, tenant_plans):
+        _setup_apps(mock_db, {"app-1": "tenant-sandbox"})
+        mock_db.session.scalar.return_value = 4
+        with (
+            patch.object(MessageRetentionService, "_fetch_batch", side_effect=[[_message(0), _message(1)]]),
+            patch.object(MessageRetentionService, "_delete_messages") as delete,
+        ):
+            result = MessageRetentionService.clean_expired_messages(BEFORE, batch_size=10, dry_run=True)
+
+        delete.assert_not_called()
+        assert result.deleted["messages"] == 2
+        assert result.deleted["message_feedbacks"] == 4
+        assert mock_db.session.scalar.call_count == len(MESSAGE_RELATED_MODELS)
+
+    def test_throttles_between_batches(self, mock_db, tenant_plans):
+        _setup_apps(mock_db, {"app-1": "tenant-pro"})
+        batches = [[_message(0)], [_message(1)], []]
+        with (
+            patch.object(MessageRetentionService, "_fetch_batch", side_effect=batches),
+            patch("services.message_retention_service.time.sleep") as sleep,
+        ):
+            result = MessageRetentionService.clean_expired_messages(BEFORE, batch_size=1, throttle_seconds=0.5)
+
+        assert result.batches == 2
+        assert sleep.call_count == 2
+        sleep.assert_called_with(0.5)
+
+    def test_max_batches(self, mock_db, tenant_plans):
+        _setup_apps(mock_db, {"app-1": "tenant-pro"})
+        with patch.object(MessageRetentionService, "_fetch_batch", return_value=[_message(0)]) as fetch_batch:
+            result = MessageRetentionService.clean_expired_messages(BEFORE, batch_size=1, max_batches=3)
+
+        assert result.batches == 3
+        assert fetch_batch.call_count == 3
+
+
+class TestDeleteMessages:
+    def test_deletes_related_rows_and_messages_in_one_transaction(self, mock_db):
+        mock_db.session.execute.return_value = MagicMock(rowcount=2)
+
+        counts = MessageRetentionService._delete_messages(["msg-0", "msg-1"])
+
+        assert mock_db.session.execute.call_count == len(MESSAGE_RELATED_MODELS) + 1
+        mock_db.session.commit.assert_called_once()
+        assert counts["messages"] == 2
+        assert counts["saved_messages"] == 2
+
+    def test_rolls_back_on_error(self, mock_db):
+        mock_db.session.execute.side_effect = RuntimeError("lock timeout")
+
+        with pytest.raises(RuntimeError):
+            MessageRetentionService._delete_messages(["msg-0"])
+
+        mock_db.session.rollback.assert_called_once()
+        mock_db.session.commit.assert_not_called()
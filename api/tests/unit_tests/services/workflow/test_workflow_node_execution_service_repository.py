@@ -167,9 +167,11 @@ class TestSQLAlchemyWorkflowNodeExecutionServiceRepository:
         # Mock execute method to handle both select and delete statements
         def mock_execute(stmt):
             mock_result = MagicMock()
-            # For select statements, return execution IDs
+            # For select statements, return execution IDs and their offloaded payloads
             if hasattr(stmt, "limit"):  # This is our select statement
-                mock_result.scalars.return_value.all.return_value = execution_ids
+                mock_result.all.return_value = [
+                    MagicMock(id=execution_id, offloaded_payloads=None) for execution_id in execution_ids
+                ]
             else:  # This is our delete statement
                 mock_result.rowcount = 2
             return mock_result
@@ -202,9 +204,11 @@ class TestSQLAlchemyWorkflowNodeExecutionServiceRepository:
         # Mock execute method to handle both select and delete statements
         def mock_execute(stmt):
             mock_result = MagicMock()
-            # For select statements, return execution IDs
+            # For select statements, return execution IDs and their offloaded payloads
             if hasattr(stmt, "limit"):  # This is our select statement
-                mock_result.scalars.return_value.all.return_value = execution_ids
+                mock_result.all.return_value = [
+                    MagicMock(id=execution_id, offloaded_payloads=None) for execution_id in execution_ids
+                ]
             else:  # This is our delete statement
                 mock_result.rowcount = 2
             return mock_result